@@ -14,6 +14,52 @@ from visits.models import Visit
 from social.models import Friendship
 
 
+# Rastgele ziyaret üretiminde kullanılan değerler
+VISIT_SENTIMENTS = ['excellent', 'good', 'meh']
+VISIT_TAGS = ['butik', 'modern', 'mahalle', 'trendy', 'sakin', 'kalabalık']
+VISIT_SUITABLE_FOR = ['arkadaş', 'sevgili', 'aile', 'tek']
+VISIT_ATMOSPHERE = ['sessiz', 'müzikli', 'estetik', 'manzaralı', 'rahat']
+VISIT_COMMENTS = [
+    'Çok güzel bir yer, tekrar gelmek isterim.',
+    'Fiyatlar uygun, lezzetli yemekler.',
+    'Atmosfer harika, personel çok ilgili.',
+    'Mekan çok şık, fotoğraf çekmek için ideal.',
+    'Kahve çok iyi, pastalar da lezzetli.',
+    'Genel olarak memnun kaldım.',
+]
+
+
+def build_random_visit(user, place, today, rng=random):
+    """
+    Son 365 gün içinde rastgele bir ziyaret (kaydedilmemiş Visit) üretir
+    rng: random modülü veya deterministik çıktı için random.Random örneği
+    """
+    # Son 365 gün içinde rastgele bir tarih
+    visit_date = today - timedelta(days=rng.randint(0, 364))
+
+    # Tarih ve saat oluştur
+    visit_time = time(
+        hour=rng.randint(12, 22),
+        minute=rng.choice([0, 15, 30, 45])
+    )
+    visited_at = timezone.make_aware(
+        datetime.combine(visit_date, visit_time)
+    )
+
+    # Rastgele değerlendirme verileri
+    return Visit(
+        user=user,
+        place=place,
+        visited_at=visited_at,
+        rating=rng.randint(3, 5),
+        sentiment=rng.choice(VISIT_SENTIMENTS),
+        tags=rng.sample(VISIT_TAGS, k=rng.randint(1, 3)),
+        suitable_for=rng.sample(VISIT_SUITABLE_FOR, k=rng.randint(1, 2)),
+        atmosphere=rng.sample(VISIT_ATMOSPHERE, k=rng.randint(1, 3)),
+        comment=rng.choice(VISIT_COMMENTS),
+    )
+
+
 class Command(BaseCommand):
     help = 'Seed visits and friendships for a specific user'
 
@@ -61,10 +107,6 @@ class Command(BaseCommand):
             used_place_ids = set()
 
             for i in range(num_visits):
-                # Son 365 gün içinde rastgele bir tarih
-                day_offset = random.randint(0, 364)
-                visit_date = today - timedelta(days=day_offset)
-
                 # Rastgele bir mekan seç
                 place = random.choice(places)
                 
@@ -72,55 +114,8 @@ class Command(BaseCommand):
                 if Visit.objects.filter(user=user, place=place).exists():
                     continue
 
-                # Tarih ve saat oluştur
-                visit_time = time(
-                    hour=random.randint(12, 22),
-                    minute=random.choice([0, 15, 30, 45])
-                )
-                visited_at = timezone.make_aware(
-                    datetime.combine(visit_date, visit_time)
-                )
-
-                # Rastgele değerlendirme verileri
-                rating = random.randint(3, 5)
-                sentiment_choices = ['excellent', 'good', 'meh']
-                sentiment = random.choice(sentiment_choices)
-                
-                tags = random.sample(
-                    ['butik', 'modern', 'mahalle', 'trendy', 'sakin', 'kalabalık'],
-                    k=random.randint(1, 3)
-                )
-                suitable_for = random.sample(
-                    ['arkadaş', 'sevgili', 'aile', 'tek'],
-                    k=random.randint(1, 2)
-                )
-                atmosphere = random.sample(
-                    ['sessiz', 'müzikli', 'estetik', 'manzaralı', 'rahat'],
-                    k=random.randint(1, 3)
-                )
-
-                comment_options = [
-                    'Çok güzel bir yer, tekrar gelmek isterim.',
-                    'Fiyatlar uygun, lezzetli yemekler.',
-                    'Atmosfer harika, personel çok ilgili.',
-                    'Mekan çok şık, fotoğraf çekmek için ideal.',
-                    'Kahve çok iyi, pastalar da lezzetli.',
-                    'Genel olarak memnun kaldım.',
-                ]
-                comment = random.choice(comment_options)
-
                 # Visit oluştur
-                visit = Visit.objects.create(
-                    user=user,
-                    place=place,
-                    visited_at=visited_at,
-                    rating=rating,
-                    sentiment=sentiment,
-                    tags=tags,
-                    suitable_for=suitable_for,
-                    atmosphere=atmosphere,
-                    comment=comment,
-                )
+                build_random_visit(user, place, today).save()
 
                 created_visits += 1
                 used_place_ids.add(place.id)
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import UserTasteProfile
 from .taste_profile import calculate_taste_profile_for_user
+from places.behavior_storage import count_user_actions
 from places.models import PlacePreference
 from visits.models import Visit
 
@@ -60,6 +61,8 @@ def get_taste_profile(request):
         'category_weights': profile.category_weights,
         'atmosphere_weights': profile.atmosphere_weights,
         'context_weights': profile.context_weights,
+        # Arşivlenmiş olaylar dahil davranış sayıları (kullanıcı rollup'ları + ham tablo)
+        'activity': count_user_actions(user.id),
         'updated_at': profile.updated_at.isoformat()
     }, status=status.HTTP_200_OK)
 
@@ -6,8 +6,10 @@ from django.db.models import Q
 from .models import UserTasteProfile
 from places.models import PlacePreference
 from visits.models import Visit
+from config.tracing import current_span, traced
 
 
+@traced('taste_profile.calculate')
 def calculate_taste_profile_for_user(user, min_interactions=5):
     """
     Kullanıcının zevk profilini hesaplar
@@ -19,6 +21,36 @@ def calculate_taste_profile_for_user(user, min_interactions=5):
     Returns:
         UserTasteProfile objesi veya None (yeterli veri yoksa)
     """
+    interactions = _collect_interactions(user)
+    
+    # Yeterli veri kontrolü
+    if len(interactions) < min_interactions:
+        return None
+    
+    category_scores, atmosphere_scores, context_scores = _score_interactions(interactions)
+    
+    # Negatif değerleri 0'a çek ve normalize et
+    category_weights = normalize_scores(category_scores)
+    atmosphere_weights = normalize_scores(atmosphere_scores)
+    context_weights = normalize_scores(context_scores)
+    
+    # Style label oluştur
+    style_label = build_style_label(category_weights, atmosphere_weights)
+    
+    # Veritabanına kaydet
+    profile, created = UserTasteProfile.objects.get_or_create(user=user)
+    profile.category_weights = category_weights
+    profile.atmosphere_weights = atmosphere_weights
+    profile.context_weights = context_weights
+    profile.style_label = style_label
+    profile.save()
+    
+    return profile
+
+
+@traced('taste_profile.collect')
+def _collect_interactions(user):
+    """Swipe ve değerlendirmeleri tek etkileşim listesinde toplar"""
     # Kullanıcının tüm etkileşimlerini topla
     interactions = []
     
@@ -45,11 +77,18 @@ def calculate_taste_profile_for_user(user, min_interactions=5):
             'atmosphere': visit.atmosphere or [],
             'suitable_for': visit.suitable_for or [],
         })
-    
-    # Yeterli veri kontrolü
-    if len(interactions) < min_interactions:
-        return None
-    
+    current_span().set(interactions=len(interactions))
+    return interactions
+
+
+@traced('taste_profile.score')
+def _score_interactions(interactions):
+    """
+    Etkileşimleri ağırlıklandırıp kategori/atmosfer/bağlam skorlarına ekler
+
+    Returns:
+        tuple: (category_scores, atmosphere_scores, context_scores)
+    """
     # Ağırlık skorları
     category_scores = defaultdict(float)
     atmosphere_scores = defaultdict(float)
@@ -108,24 +147,8 @@ def calculate_taste_profile_for_user(user, min_interactions=5):
                 # 'dost' ve 'arkadaş' aynı şey
                 ctx_key = 'arkadaş' if cat == 'dost' else cat
                 context_scores[ctx_key] += weight * 0.5
-    
-    # Negatif değerleri 0'a çek ve normalize et
-    category_weights = normalize_scores(category_scores)
-    atmosphere_weights = normalize_scores(atmosphere_scores)
-    context_weights = normalize_scores(context_scores)
-    
-    # Style label oluştur
-    style_label = build_style_label(category_weights, atmosphere_weights)
-    
-    # Veritabanına kaydet
-    profile, created = UserTasteProfile.objects.get_or_create(user=user)
-    profile.category_weights = category_weights
-    profile.atmosphere_weights = atmosphere_weights
-    profile.context_weights = context_weights
-    profile.style_label = style_label
-    profile.save()
-    
-    return profile
+    current_span().set(interactions=len(interactions), categories=len(category_scores))
+    return category_scores, atmosphere_scores, context_scores
 
 
 def normalize_scores(scores_dict):
@@ -0,0 +1,26 @@
+"""
+Modül Ayarları - settings.py'deki ayar sözlüğünü modülün varsayılanlarıyla birleştirir
+
+    DEFAULT_SETTINGS = {'ENABLED': True, 'TTL': 900}
+
+    def get_slate_settings():
+        return merged_settings('RECOMMENDATION_SLATES', DEFAULT_SETTINGS)
+
+settings.py'de verilmeyen anahtarlar varsayılanı alır; her çağrıda yeniden
+okunur (override_settings testlerde çalışır).
+"""
+from django.conf import settings
+
+
+def merged_settings(name, defaults, nested=()):
+    """
+    Args:
+        name: settings.py'deki sözlüğün adı
+        defaults: Modülün varsayılan ayarları
+        nested: Değeri sözlük olan anahtarlar; bunlar da anahtar anahtar birleştirilir
+    """
+    config = dict(defaults)
+    config.update(getattr(settings, name, None) or {})
+    for key in nested:
+        config[key] = dict(defaults.get(key) or {}, **(config.get(key) or {}))
+    return config
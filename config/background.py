@@ -0,0 +1,83 @@
+"""
+Arka Plan Thread'leri - Process başına tek daemon thread
+
+Tampon flush, checkpoint ve yenileme işleri istek yolunda değil bir daemon
+thread'inde çalışır. Gunicorn gibi pre-fork sunucularda thread'ler fork ile
+kopyalanmaz: parent'ta başlamış thread child'da yoktur. BackgroundThread
+bunu PID ile fark eder ve ilk ensure() çağrısında child'ın kendi thread'ini
+başlatır.
+
+Test ve benchmark gibi geçici veritabanıyla çalışan süreçler, veritabanını
+kapatmadan önce stop_background_threads() ile thread'leri durdurur; durdurulan
+thread tekrar başlatılmaz ve bileşenler çıkış kancalarında DB'ye yazmaz.
+"""
+import os
+import threading
+import weakref
+
+
+_threads = weakref.WeakSet()
+
+
+class BackgroundThread:
+    """
+    Args:
+        target: Thread'de çalışacak fonksiyon (döngü ya da tek seferlik iş)
+        name: Thread adı
+        on_fork: Fork sonrası child'da yeni thread başlamadan önce çağrılır
+            (parent'tan kopyalanan durumu sıfırlamak için)
+        on_stop: stop() içinde join'den önce çağrılır (Event bekleyen thread'i uyandırmak için)
+    """
+
+    def __init__(self, target, name, on_fork=None, on_stop=None):
+        self.target = target
+        self.name = name
+        self.on_fork = on_fork
+        self.on_stop = on_stop
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        _threads.add(self)
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def wait(self, timeout):
+        """Döngülerde time.sleep yerine kullanılır; stop() çağrılınca hemen True döner"""
+        return self._stop_event.wait(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def ensure(self):
+        """Bu process'te çalışan thread yoksa başlatır; varsa hiçbir şey yapmaz"""
+        if self.stopped or self.is_alive():
+            return
+        with self._lock:
+            if self.stopped or self.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid() and self.on_fork is not None:
+                self.on_fork()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self, timeout=None):
+        """Thread'e durmasını bildirir ve bitmesini bekler; sonraki ensure() çağrıları thread başlatmaz"""
+        self._stop_event.set()
+        if self.on_stop is not None:
+            self.on_stop()
+        if self.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+
+def stop_background_threads(timeout=5):
+    """Bu process'teki tüm BackgroundThread'leri durdurur (geçici veritabanı kapanmadan önce)"""
+    for worker in list(_threads):
+        worker.stop(timeout)
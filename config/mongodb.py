@@ -1,52 +1,295 @@
 """
 MongoDB Connection Helper
+
+MongoClient process başına lazy oluşturulur: gunicorn gibi pre-fork
+sunucularda parent'ta açılmış bir client child'a miras kalırsa soket ve
+monitor thread'leri paylaşılır; bu yüzden client PID'e bağlıdır ve fork
+sonrasında (os.register_at_fork) ilk kullanımda yeniden kurulur.
+
+Havuz ve zaman aşımı ayarları, read preference ve client sınıfı
+settings.MONGODB_SETTINGS'ten okunur. Testlerde 'client_class' ile
+mongomock.MongoClient gibi bir yerine geçen verilebilir.
+
+Komut süreleri ve havuz olayları pymongo monitoring listener'larıyla
+toplanır: get_mongodb_metrics(), /api/debug/mongodb/
 """
-from pymongo import MongoClient
-from django.conf import settings
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from django.utils.module_loading import import_string
+from pymongo import MongoClient, ReadPreference, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from config.app_settings import merged_settings
+from config.sql_profiling import percentile
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'uri': '',
+    'database': 'btkdb',
+    'client_class': None,
+    'app_name': 'btk-django',
+    'max_pool_size': 50,
+    'min_pool_size': 0,
+    'max_idle_time_ms': 60000,
+    'wait_queue_timeout_ms': 2000,
+    'server_selection_timeout_ms': 3000,
+    'connect_timeout_ms': 3000,
+    'socket_timeout_ms': 10000,
+    'read_preference': 'primaryPreferred',
+    'max_staleness_seconds': None,
+    'tls_allow_invalid_certificates': False,
+    'ping_on_connect': False,
+}
+METRIC_SAMPLES = 2000
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_mongodb_settings():
+    return merged_settings('MONGODB_SETTINGS', DEFAULT_SETTINGS)
+
+
+def get_read_preference(name=None, max_staleness_seconds=None):
+    """
+    'primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest'
+    -> pymongo read preference objesi
+    """
+    config = get_mongodb_settings()
+    name = name or config['read_preference']
+    staleness = max_staleness_seconds if max_staleness_seconds is not None else config['max_staleness_seconds']
+    try:
+        mode = read_pref_mode_from_name(name)
+    except (KeyError, ValueError):
+        raise ValueError(f'Geçersiz read preference: {name}')
+    if mode == ReadPreference.PRIMARY.mode or staleness is None:
+        return make_read_preference(mode, None)
+    return make_read_preference(mode, None, max_staleness=staleness)
+
+
+# --- Metrikler ---
+
+class MongoMetrics(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Komut gecikmeleri ve havuz olayları (process içi, thread-safe)"""
+
+    def __init__(self, samples=METRIC_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = samples
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.commands = Counter()
+            self.failures = Counter()
+            self.latencies = deque(maxlen=self._samples)
+            self.checkout_waits = deque(maxlen=self._samples)
+            self.pool = Counter()
+            self.checked_out = 0
+            self.since = time.time()
+
+    # CommandListener
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self.commands[event.command_name] += 1
+            self.latencies.append(event.duration_micros / 1000)
+
+    def failed(self, event):
+        with self._lock:
+            self.commands[event.command_name] += 1
+            self.failures[event.command_name] += 1
+            self.latencies.append(event.duration_micros / 1000)
+
+    # ConnectionPoolListener
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool['cleared'] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.pool['created'] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.pool['closed'] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.pool[f'checkout_failed_{event.reason}'] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.pool['checked_out'] += 1
+            duration = getattr(event, 'duration', None)
+            if duration is not None:
+                self.checkout_waits.append(duration * 1000)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = list(self.latencies)
+            waits = list(self.checkout_waits)
+            return {
+                'pid': os.getpid(),
+                'since': self.since,
+                'commands': dict(self.commands),
+                'failures': dict(self.failures),
+                'latency_ms': {
+                    'samples': len(latencies),
+                    'p50': round(percentile(latencies, 50), 3),
+                    'p95': round(percentile(latencies, 95), 3),
+                    'p99': round(percentile(latencies, 99), 3),
+                },
+                'pool': {
+                    'in_use': self.checked_out,
+                    'events': dict(self.pool),
+                    'checkout_wait_ms': {
+                        'p50': round(percentile(waits, 50), 3),
+                        'p95': round(percentile(waits, 95), 3),
+                    },
+                },
+            }
+
+
+_metrics = MongoMetrics(METRIC_SAMPLES)
+
+
+# --- Client ---
+
+def _reset_after_fork():
+    # Parent'ın client'ı child'da kapatılmaz (soketler parent'a ait); sadece bırakılır
+    global _client, _client_pid, _client_lock
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _metrics.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def build_client_options(config):
+    """MONGODB_SETTINGS -> MongoClient keyword argümanları"""
+    options = {
+        'appname': config['app_name'],
+        'maxPoolSize': config['max_pool_size'],
+        'minPoolSize': config['min_pool_size'],
+        'maxIdleTimeMS': config['max_idle_time_ms'],
+        'waitQueueTimeoutMS': config['wait_queue_timeout_ms'],
+        'serverSelectionTimeoutMS': config['server_selection_timeout_ms'],
+        'connectTimeoutMS': config['connect_timeout_ms'],
+        'socketTimeoutMS': config['socket_timeout_ms'],
+        'read_preference': get_read_preference(config['read_preference'], config['max_staleness_seconds']),
+        'event_listeners': [_metrics],
+    }
+    if config['tls_allow_invalid_certificates']:
+        options['tlsAllowInvalidCertificates'] = True
+    return options
 
-_mongo_client = None
 
 def get_mongodb_client():
     """
-    MongoDB client singleton
+    Process başına MongoClient (fork sonrası yeniden kurulur)
+
+    Client bağlantıyı ilk komutta açar; 'ping_on_connect' True ise kurulumda
+    ping atılır ve hata yükseltilir.
     """
-    global _mongo_client
-    
-    if _mongo_client is None:
-        try:
-            mongodb_settings = getattr(settings, 'MONGODB_SETTINGS', {})
-            uri = mongodb_settings.get('uri', '')
-            
-            if not uri:
-                raise ValueError("MongoDB URI not configured in settings")
-            
-            # PyMongo 4.x için TLS/SSL ayarları
-            # tlsAllowInvalidCertificates=True ekle (development için)
-            # Production'da bu parametreyi kaldırın ve gerçek sertifikaları kullanın
-            _mongo_client = MongoClient(
-                uri,
-                tlsAllowInvalidCertificates=True  # Development için
-            )
-            
-            # Bağlantıyı test et
-            _mongo_client.admin.command('ping')
-            print("✓ MongoDB bağlantısı başarılı!")
-            
-        except Exception as e:
-            print(f"✗ MongoDB bağlantı hatası: {e}")
-            raise
-    
-    return _mongo_client
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+
+        config = get_mongodb_settings()
+        if not config['uri'] and not config['client_class']:
+            raise ValueError("MongoDB URI not configured in settings")
+
+        client_class = import_string(config['client_class']) if config['client_class'] else MongoClient
+        client = client_class(config['uri'] or None, **build_client_options(config))
+        if config['ping_on_connect']:
+            try:
+                client.admin.command('ping')
+            except Exception:
+                logger.exception('MongoDB bağlantısı kurulamadı')
+                client.close()
+                raise
+        logger.info('MongoDB client oluşturuldu (pid=%s, maxPoolSize=%s)', pid, config['max_pool_size'])
+        _client, _client_pid = client, pid
+    return _client
+
 
+def close_mongodb_client():
+    """Bu process'in client'ını kapatır (worker kapanışı, testler)"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
 
-def get_mongodb_database():
+
+def get_mongodb_database(read_preference=None):
     """
     MongoDB database objesi döner
+
+    Args:
+        read_preference: Bu database objesi için okuma tercihi (default: settings)
     """
     client = get_mongodb_client()
-    mongodb_settings = getattr(settings, 'MONGODB_SETTINGS', {})
-    db_name = mongodb_settings.get('database', 'btkdb')
-    return client[db_name]
+    db_name = get_mongodb_settings()['database']
+    if read_preference is None:
+        return client[db_name]
+    return client.get_database(db_name, read_preference=get_read_preference(read_preference))
+
+
+def get_mongodb_metrics():
+    return _metrics.snapshot()
+
+
+def ping_mongodb():
+    """
+    Returns:
+        float: ping süresi (ms)
+    """
+    started = time.perf_counter()
+    get_mongodb_client().admin.command('ping')
+    return (time.perf_counter() - started) * 1000
 
 
 def test_mongodb_connection():
@@ -54,12 +297,45 @@ def test_mongodb_connection():
     MongoDB bağlantısını test eder
     """
     try:
+        latency = ping_mongodb()
         db = get_mongodb_database()
-        # Test collection'ı listele
         collections = db.list_collection_names()
-        print(f"✓ MongoDB bağlantısı başarılı! Database: {db.name}")
-        print(f"  Mevcut collections: {collections}")
+        logger.info('MongoDB bağlantısı başarılı: %s (%.1f ms), collections: %s', db.name, latency, collections)
         return True
-    except Exception as e:
-        print(f"✗ MongoDB bağlantı hatası: {e}")
+    except Exception:
+        logger.exception('MongoDB bağlantı hatası')
         return False
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def mongodb_metrics_api(request):
+    """
+    GET: Bu process'in MongoDB komut gecikmeleri ve havuz metrikleri
+    Query: ?ping=1 ile anlık ping süresi de ölçülür
+    POST: Metrikleri sıfırla
+    """
+    if request.method == 'POST':
+        _metrics.reset()
+        return Response({'success': True, 'pid': os.getpid()})
+
+    config = get_mongodb_settings()
+    data = {
+        'success': True,
+        'metrics': get_mongodb_metrics(),
+        'config': {
+            key: config[key] for key in (
+                'max_pool_size', 'min_pool_size', 'wait_queue_timeout_ms', 'server_selection_timeout_ms',
+                'connect_timeout_ms', 'socket_timeout_ms', 'read_preference',
+            )
+        },
+    }
+    if request.query_params.get('ping'):
+        try:
+            data['ping_ms'] = round(ping_mongodb(), 3)
+        except Exception as e:
+            return Response(
+                {'success': False, 'error': f'MongoDB erişilemiyor: {e}'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+    return Response(data)
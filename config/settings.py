@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.sql_profiling.SQLProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -104,12 +105,49 @@ DATABASES = {
     }
 }
 
+# Production profili: DB_ENGINE=postgresql (psycopg2-binary gerekir, requirements.txt)
+# JSON filtreleri @>/?| ile GIN indekslerini kullanır (places/json_lookups.py, places 0013 migration'ı)
+if os.environ.get('DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'btkdb'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Kalıcı bağlantılar; kopan bağlantı istek başında fark edilir
+            'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer transaction pooling arkasında named cursor'lar kapatılmalı
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_PGBOUNCER', '') == '1',
+            'OPTIONS': {
+                'connect_timeout': 5,
+                'options': f"-c statement_timeout={os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 15000)}",
+                'application_name': 'btk-django',
+            },
+        }
+    }
+
 # MongoDB bağlantı ayarları (pymongo için)
 MONGODB_SETTINGS = {
     'uri': MONGODB_URI,
     'database': 'btkdb',
     'ssl': True,
-    'ssl_cert_reqs': 'CERT_NONE'  # Atlas için
+    'ssl_cert_reqs': 'CERT_NONE',  # Atlas için
+    # Client havuzu (config/mongodb.py) - process başına lazy, fork sonrası yeniden kurulur
+    # Okumalar read_preference ile yönlendirilir; testlerde client_class='mongomock.MongoClient' verilebilir
+    'client_class': os.environ.get('MONGODB_CLIENT_CLASS') or None,
+    'max_pool_size': int(os.environ.get('MONGODB_MAX_POOL_SIZE', 50)),
+    'min_pool_size': 0,
+    'max_idle_time_ms': 60000,
+    'wait_queue_timeout_ms': 2000,
+    'server_selection_timeout_ms': 3000,
+    'connect_timeout_ms': 3000,
+    'socket_timeout_ms': 10000,
+    'read_preference': os.environ.get('MONGODB_READ_PREFERENCE', 'primaryPreferred'),
+    'max_staleness_seconds': None,
+    'tls_allow_invalid_certificates': True,  # Development için; production'da kaldırın
 }
 
 
@@ -161,6 +199,9 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Test veritabanı silinmeden önce arka plan thread'leri durdurulur (config/background.py)
+TEST_RUNNER = 'config.test_runner.BackgroundSafeTestRunner'
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -180,3 +221,136 @@ REST_FRAMEWORK = {
 # Kendi API key'inizi almak için: https://console.cloud.google.com/google/maps-apis
 # Environment variable olarak ayarlayın: export GOOGLE_MAPS_API_KEY="your-api-key"
 GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', 'AIzaSyDummyKey')
+
+# Behavior Tracking - Tamponlu (write-behind) olay kaydı
+# SPOOL_DIR verilirse olaylar çökmelere karşı JSONL segmentlerine de yazılır
+# (kalan segmentler: python manage.py load_behavior_segments)
+BEHAVIOR_LOG = {
+    'BUFFERED': True,
+    'BUFFER_SIZE': 10000,
+    'FLUSH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'SPOOL_DIR': os.environ.get('BEHAVIOR_LOG_SPOOL_DIR') or None,
+}
+
+# Behavior Storage - Rollup ve retention (python manage.py rollup_behaviors)
+BEHAVIOR_RETENTION = {
+    'RAW_DAYS': 30,            # Ham olaylar ana tabloda kaç gün kalır
+    'ARCHIVE_MONTHS': 12,      # Aylık arşiv tabloları kaç ay tutulur
+    'HOURLY_ROLLUP_DAYS': 90,  # Saatlik rollup'lar kaç gün tutulur (günlükler kalıcı)
+    'LATE_EVENT_HOURS': 2,     # Geç gelen olaylar için yeniden hesaplanan saatler
+}
+
+# SQL Profiling - İstek başına sorgu sayısı/süresi, Server-Timing header'ı
+# Açıkken: GET /api/debug/sql-profile/ (staff) ve python manage.py sql_profile_report
+SQL_PROFILING = {
+    'ENABLED': os.environ.get('SQL_PROFILING', '').lower() in ('1', 'true', 'yes'),
+    'SERVER_TIMING': True,
+    'HISTORY_SIZE': 500,
+    'REPEAT_THRESHOLD': 2,
+    'SNAPSHOT_DIR': os.environ.get('SQL_PROFILING_SNAPSHOT_DIR') or None,
+    'SNAPSHOT_INTERVAL': 30,
+}
+
+# Tracing - Öneri/zevk profili motorlarında aşama bazlı span'ler (config/tracing.py)
+# SINK: 'ring' (GET /api/debug/traces/, staff) | 'jsonl' | 'otlp' (python manage.py trace_collector)
+TRACING = {
+    'ENABLED': os.environ.get('TRACING', '').lower() in ('1', 'true', 'yes'),
+    'SINK': os.environ.get('TRACING_SINK', 'ring'),
+    'SAMPLE_RATE': float(os.environ.get('TRACING_SAMPLE_RATE', '1.0')),
+    'RING_SIZE': 2000,
+    'JSONL_PATH': os.environ.get('TRACING_JSONL_PATH') or str(BASE_DIR / 'traces.jsonl'),
+    'OTLP_ENDPOINT': os.environ.get('TRACING_OTLP_ENDPOINT', 'http://127.0.0.1:4318/v1/traces'),
+    'SERVICE_NAME': 'mekan-kesif',
+}
+
+# Öneri aday üreticileri (places/candidates.py) - sırayla çalışır, her biri en fazla QUOTA aday döner
+# TIME_BUDGET_MS aşılınca kalan üreticiler atlanır; INDEX_TTL dolan indeks arka planda yeniden kurulur
+RECOMMENDATION_CANDIDATES = {
+    'GENERATORS': {
+        'query_terms': {'ENABLED': True, 'QUOTA': 400},
+        'graph_neighbours': {'ENABLED': True, 'QUOTA': 200},
+        'friends_likes': {'ENABLED': True, 'QUOTA': 200},
+        'taste_categories': {'ENABLED': True, 'QUOTA': 300},
+        'popular_in_city': {'ENABLED': True, 'QUOTA': 200},
+        'popular': {'ENABLED': True, 'QUOTA': 200},
+    },
+    'TIME_BUDGET_MS': 80,
+    'INDEX_TTL': 300,
+}
+
+# Öneri slate'leri (places/recommendation_slates.py) - kullanıcı başına önceden hesaplanmış öneriler
+# Swipe/değerlendirme sonrası ve TTL dolunca arka planda yenilenir (python manage.py refresh_recommendation_slates)
+RECOMMENDATION_SLATES = {
+    'ENABLED': True,
+    'SIZE': 100,
+    'TTL': 900,
+    'LOW_WATERMARK': 20,
+    'BACKGROUND': True,
+}
+
+# İşbirlikçi filtreleme modeli (places/cf_model.py) - python manage.py train_cf_model ile eğitilir
+# Çarpanlar DIR altında sürümlü .npy dosyaları olarak tutulur, servis eden process mmap ile açar
+CF_MODEL = {
+    'DIR': os.environ.get('CF_MODEL_DIR') or str(BASE_DIR / 'cf_model'),
+    'FACTORS': 32,
+    'ITERATIONS': 10,
+    'REGULARIZATION': 0.05,
+    'ALPHA': 20.0,
+    'WEIGHT': 0.3,
+    'RELOAD_INTERVAL': 30,
+}
+
+# Katalog snapshot'ı (places/catalogue_snapshot.py) - python manage.py build_catalogue_snapshot ile yazılır
+# Worker'lar dosyayı salt okunur mmap ile açar; CURRENT değişince yeni sürüme geçer
+CATALOGUE_SNAPSHOT = {
+    'DIR': os.environ.get('CATALOGUE_SNAPSHOT_DIR') or str(BASE_DIR / 'catalogue_snapshot'),
+    'RELOAD_INTERVAL': 30,
+    'KEEP': 3,
+}
+
+# Trend mekanlar (places/trending.py) - üstel sönümlü 1h/24h/7d sayaçlar
+# Process içi motor REBUILD_INTERVAL'da bir DB'den kurulur; soğukken TrendingPlace (rollup_behaviors yazar) okunur
+TRENDING = {
+    'ENABLED': True,
+    'WINDOWS': {'1h': 3600, '24h': 86400, '7d': 604800},
+    'DEFAULT_WINDOW': '24h',
+    'HISTORY_DAYS': 7,
+    'REBUILD_INTERVAL': 300,
+    'ROLLUP_SIZE': 50,
+}
+
+# Akış istatistikleri (places/stream_stats.py) - Count-Min, Space-Saving, HyperLogLog
+# Worker delta'ları CHECKPOINT_INTERVAL'da bir DB'ye birleştirilir; staff API: /api/debug/stream-stats/
+STREAM_STATS = {
+    'ENABLED': True,
+    'CMS_WIDTH': 2048,
+    'CMS_DEPTH': 4,
+    'TOP_K': 200,
+    'HLL_PRECISION': 9,
+    'HLL_PLACES': 500,
+    'CHECKPOINT_INTERVAL': 60,
+}
+
+# Toplu dışa aktarma (places/bulk_export.py) - python manage.py export_tables
+# FORMAT auto: pyarrow kuruluysa Parquet, değilse sıkıştırılmış NPZ; her export manifest.json ile yazılır
+BULK_EXPORT = {
+    'DIR': os.environ.get('BULK_EXPORT_DIR') or str(BASE_DIR / 'exports'),
+    'FORMAT': 'auto',
+    'CHUNK_ROWS': 50000,
+    'WORKERS': 4,
+}
+
+# MongoDB read model (places/mongo_read_model.py) - python manage.py sync_mongo_read_model ile doldurulur
+# Endpoint'ler tek tek açılır (MONGO_READ_ENDPOINTS=discover,nearby,search); Mongo hatasında SQL'e düşülür
+MONGO_READ_MODEL = {
+    'ENDPOINTS': {
+        endpoint: endpoint in os.environ.get('MONGO_READ_ENDPOINTS', '').split(',')
+        for endpoint in ('discover', 'nearby', 'search')
+    },
+    'COLLECTION': 'place_read_model',
+    'READ_PREFERENCE': 'secondaryPreferred',
+    'SEARCH_MODE': 'contains',
+    'FALLBACK_TO_SQL': True,
+    'BATCH_SIZE': 500,
+}
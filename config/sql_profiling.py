@@ -0,0 +1,308 @@
+"""
+SQL Profiling - İstek başına sorgu sayısı, tekrar eden sorgular ve DB/Python süresi
+
+Opt-in: settings.SQL_PROFILING['ENABLED'] kapalıysa middleware yüklenmez
+(MiddlewareNotUsed), istek yoluna hiç maliyet eklemez.
+
+- Her istek için sorgular connection.execute_wrapper ile zamanlanır (DEBUG gerekmez)
+- Aynı SQL şeklinin (parametreler hariç) bir istekte tekrar tekrar çalışması
+  N+1 işaretidir; parmak izi ve örnek SQL ile raporlanır
+- Sonuçlar Server-Timing header'ı olarak eklenir (tarayıcı DevTools'ta görünür)
+- URL adı başına son N isteğin kayan penceresi bellekte tutulur;
+  SNAPSHOT_DIR verilirse periyodik olarak JSON'a yazılır
+  (python manage.py sql_profile_report bu dosyaları birleştirir)
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from config.app_settings import merged_settings
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'SERVER_TIMING': True,
+    'HISTORY_SIZE': 500,        # URL adı başına tutulan son istek sayısı
+    'REPEAT_THRESHOLD': 2,      # Bir istekte bu kadar tekrar eden SQL şekli raporlanır
+    'SNAPSHOT_DIR': None,
+    'SNAPSHOT_INTERVAL': 30,    # saniye
+}
+
+SAMPLE_SQL_LENGTH = 300
+TOP_REPEATS_PER_ROUTE = 5
+REPORT_ORDERINGS = ('p95_ms', 'queries_max', 'repeated_mean', 'db_ms_mean', 'requests')
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?|\d+|\'[^\']*\')\s*,?)+\)', re.IGNORECASE)
+
+
+def get_profiling_settings():
+    return merged_settings('SQL_PROFILING', DEFAULT_SETTINGS)
+
+
+def normalize_sql(sql):
+    """Literal ve IN listelerini sadeleştirerek SQL şeklini çıkarır"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _LITERAL_RE.sub('?', sql)
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:12]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class QueryRecorder:
+    """Tek isteğin sorgularını sayar ve zamanlar (execute_wrapper)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = fingerprint(sql)
+            self.shapes[key] += 1
+            self.samples.setdefault(key, sql[:SAMPLE_SQL_LENGTH])
+
+    def repeated(self, threshold):
+        """{parmak izi: tekrar sayısı} - eşik ve üstü tekrar eden SQL şekilleri"""
+        return {key: n for key, n in self.shapes.items() if n >= threshold}
+
+
+class ProfileStore:
+    """URL adı başına kayan pencere istatistikleri (thread-safe)"""
+
+    def __init__(self, history_size):
+        self._lock = threading.Lock()
+        self._history_size = history_size
+        self._routes = {}
+        self._repeats = defaultdict(Counter)
+        self._totals = Counter()
+        self._samples = {}
+        self._last_snapshot = time.monotonic()
+
+    def record(self, route, total_ms, db_ms, queries, repeated, samples):
+        with self._lock:
+            window = self._routes.get(route)
+            if window is None:
+                window = self._routes[route] = deque(maxlen=self._history_size)
+            window.append((total_ms, db_ms, queries, sum(repeated.values()) - len(repeated)))
+            # Tekrar sayaçları kümülatif; istek başı ortalama için toplam istek sayısı
+            self._totals[route] += 1
+            for key, n in repeated.items():
+                self._repeats[route][key] += n
+                self._samples.setdefault(key, samples[key])
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._repeats.clear()
+            self._totals.clear()
+            self._samples.clear()
+
+    def snapshot(self):
+        """JSON'a yazılabilir ham pencere verisi"""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'created_at': time.time(),
+                'routes': {route: list(window) for route, window in self._routes.items()},
+                'repeats': {route: dict(counter) for route, counter in self._repeats.items()},
+                'totals': dict(self._totals),
+                'samples': dict(self._samples),
+            }
+
+    def maybe_write_snapshot(self, directory, interval):
+        now = time.monotonic()
+        if now - self._last_snapshot < interval:
+            return
+        self._last_snapshot = now
+        write_snapshot(directory, self.snapshot())
+
+
+def write_snapshot(directory, data):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'sql_profile_{data["pid"]}.json')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def read_snapshots(directory):
+    """Dizindeki tüm process snapshot'larını tek snapshot'ta birleştirir"""
+    merged = {'routes': defaultdict(list), 'repeats': defaultdict(Counter), 'totals': Counter(), 'samples': {}}
+    if not directory or not os.path.isdir(directory):
+        return merged
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith('sql_profile_') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for route, rows in data.get('routes', {}).items():
+            merged['routes'][route].extend(rows)
+        for route, counter in data.get('repeats', {}).items():
+            merged['repeats'][route].update(counter)
+        merged['totals'].update(data.get('totals', {}))
+        merged['samples'].update(data.get('samples', {}))
+    return merged
+
+
+def build_report(data, order_by='p95_ms', limit=20):
+    """
+    Snapshot verisinden en kötü endpoint'ler
+
+    Args:
+        order_by: 'p95_ms' | 'queries_max' | 'repeated_mean' | 'db_ms_mean' | 'requests'
+
+    Returns:
+        list: [{'route', 'requests', 'p50_ms', 'p95_ms', 'db_ms_mean',
+                'queries_mean', 'queries_max', 'repeated_mean', 'top_repeats'}]
+    """
+    rows = []
+    for route, window in data['routes'].items():
+        if not window:
+            continue
+        totals = [r[0] for r in window]
+        repeats = data['repeats'].get(route, {})
+        total_requests = data['totals'].get(route) or len(window)
+        top = sorted(repeats.items(), key=lambda item: -item[1])[:TOP_REPEATS_PER_ROUTE]
+        rows.append({
+            'route': route,
+            'requests': len(window),
+            'p50_ms': round(percentile(totals, 50), 2),
+            'p95_ms': round(percentile(totals, 95), 2),
+            'db_ms_mean': round(sum(r[1] for r in window) / len(window), 2),
+            'queries_mean': round(sum(r[2] for r in window) / len(window), 1),
+            'queries_max': max(r[2] for r in window),
+            'repeated_mean': round(sum(r[3] for r in window) / len(window), 1),
+            'top_repeats': [
+                {
+                    'fingerprint': key,
+                    'per_request': round(n / total_requests, 1),
+                    'sql': data['samples'].get(key, ''),
+                }
+                for key, n in top
+            ],
+        })
+    rows.sort(key=lambda row: -row[order_by])
+    return rows[:limit]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore(get_profiling_settings()['HISTORY_SIZE'])
+    return _store
+
+
+class SQLProfilingMiddleware:
+    """İstek başına SQL profili (settings.SQL_PROFILING['ENABLED'] ile açılır)"""
+
+    def __init__(self, get_response):
+        self.config = get_profiling_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = get_profile_store()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        total_ms = total * 1000
+        db_ms = recorder.duration * 1000
+        repeated = recorder.repeated(self.config['REPEAT_THRESHOLD'])
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unresolved'
+        self.store.record(route, total_ms, db_ms, recorder.count, repeated, recorder.samples)
+
+        if self.config['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.1f};desc="{recorder.count} queries, {len(repeated)} repeated"',
+                f'app;dur={total_ms - db_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+            ])
+
+        if self.config['SNAPSHOT_DIR']:
+            self.store.maybe_write_snapshot(self.config['SNAPSHOT_DIR'], self.config['SNAPSHOT_INTERVAL'])
+        return response
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def sql_profile_report_api(request):
+    """
+    GET: Bu process'in en yavaş / en çok sorgu atan endpoint'leri
+    Query: ?order_by=p95_ms|queries_max|repeated_mean|db_ms_mean|requests&limit=20
+    DELETE: İstatistikleri sıfırla
+    """
+    if not get_profiling_settings()['ENABLED']:
+        return Response(
+            {'success': False, 'error': 'SQL profiling kapalı (SQL_PROFILING.ENABLED)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    store = get_profile_store()
+    if request.method == 'DELETE':
+        store.reset()
+        return Response({'success': True, 'message': 'İstatistikler sıfırlandı'})
+
+    order_by = request.query_params.get('order_by', 'p95_ms')
+    if order_by not in REPORT_ORDERINGS:
+        return Response(
+            {'success': False, 'error': 'Geçersiz order_by'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        limit = 20
+
+    snapshot = store.snapshot()
+    return Response({
+        'success': True,
+        'pid': snapshot['pid'],
+        'routes': build_report(snapshot, order_by=order_by, limit=limit)
+    })
@@ -0,0 +1,16 @@
+"""
+Test Runner - Test veritabanı silinmeden önce arka plan thread'lerini durdurur
+
+Checkpoint/flush thread'leri ve atexit kancaları test veritabanı kapandıktan
+sonra çalışırsa gerçek (default) veritabanına yazar.
+"""
+from django.test.runner import DiscoverRunner
+
+from .background import stop_background_threads
+
+
+class BackgroundSafeTestRunner(DiscoverRunner):
+
+    def teardown_databases(self, old_config, **kwargs):
+        stop_background_threads()
+        super().teardown_databases(old_config, **kwargs)
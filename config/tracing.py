@@ -0,0 +1,452 @@
+"""
+Tracing - Sıcak yollar için hafif span API'si
+
+    from config.tracing import current_span, span, traced
+
+    @traced('recommendations.get')
+    def get_recommendations(...):
+        with span('recommendations.scoring') as s:
+            ...
+            s.set(candidates=len(places))
+
+    @traced('recommendations.fetch')
+    def _fetch_candidate_places(candidates):
+        ...
+        current_span().set(candidates=len(candidates), places=len(places))
+
+Kapalıyken (settings.TRACING['ENABLED'] = False) span() paylaşılan bir no-op
+nesne döner; maliyet bir global okuma ve bir fonksiyon çağrısıdır.
+
+Açıkken her span süreyi, içinde çalışan SQL sorgu sayısını/süresini
+(connection.execute_wrapper) ve set() ile verilen öznitelikleri kaydeder.
+Span'ler contextvars ile iç içe bağlanır (trace_id / parent_id).
+
+Biten span'ler seçilen sink'e gider:
+    'ring'  - Process içi halka tampon (GET /api/debug/traces/, staff)
+    'jsonl' - Dosyaya satır satır JSON
+    'otlp'  - OpenTelemetry OTLP/HTTP JSON (/v1/traces); arka plan thread'i
+              toplu gönderir. Yerel deneme için: python manage.py trace_collector
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from functools import wraps
+
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from config.sql_profiling import percentile
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'SINK': 'ring',             # 'ring' | 'jsonl' | 'otlp'
+    'SAMPLE_RATE': 1.0,         # Kök span'ler için örnekleme oranı (0-1)
+    'RING_SIZE': 2000,
+    'JSONL_PATH': 'traces.jsonl',
+    'OTLP_ENDPOINT': 'http://127.0.0.1:4318/v1/traces',
+    'OTLP_BATCH_SIZE': 256,
+    'OTLP_FLUSH_INTERVAL': 2.0,  # saniye
+    'OTLP_TIMEOUT': 2.0,
+    'SERVICE_NAME': 'mekan-kesif',
+}
+
+_current_span = contextvars.ContextVar('tracing_current_span', default=None)
+
+
+def get_tracing_settings():
+    return merged_settings('TRACING', DEFAULT_SETTINGS)
+
+
+class _NoopSpan:
+    """Kapalıyken / örneklenmemişken dönen span; hiçbir şey kaydetmez"""
+
+    __slots__ = ('_token',)
+    sampled = False
+
+    def __init__(self):
+        self._token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Örneklenmeyen kök; çocukların da no-op olması için context'e yazılır"""
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+class Span:
+    sampled = True
+
+    def __init__(self, tracer, name, attributes, parent):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.queries = 0
+        self.db_time = 0.0
+        self._stack = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def _record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record_query))
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        self._stack.close()
+        _current_span.reset(self._token)
+        self.tracer.sink.emit({
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.start_ns + int(duration * 1e9),
+            'duration_ms': round(duration * 1000, 3),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'attributes': self.attributes,
+            'error': f'{exc_type.__name__}: {exc}' if exc_type else None,
+        })
+        return False
+
+
+class RingBufferSink:
+    """Son N span'i bellekte tutar"""
+
+    def __init__(self, size):
+        self._records = deque(maxlen=size)
+
+    def emit(self, record):
+        self._records.append(record)
+
+    def records(self):
+        return list(self._records)
+
+    def clear(self):
+        self._records.clear()
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """Her span'i dosyaya bir JSON satırı olarak ekler"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def emit(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def close(self):
+        pass
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(records, service_name):
+    """Span kayıtlarını OTLP/HTTP JSON gövdesine çevirir"""
+    spans = []
+    for record in records:
+        attributes = dict(record['attributes'])
+        attributes['db.query_count'] = record['queries']
+        attributes['db.duration_ms'] = record['db_ms']
+        otlp_span = {
+            'traceId': record['trace_id'],
+            'spanId': record['span_id'],
+            'name': record['name'],
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(record['start_ns']),
+            'endTimeUnixNano': str(record['end_ns']),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()],
+            'status': {'code': 2, 'message': record['error']} if record['error'] else {'code': 1},
+        }
+        if record['parent_id']:
+            otlp_span['parentSpanId'] = record['parent_id']
+        spans.append(otlp_span)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'config.tracing'}, 'spans': spans}],
+        }]
+    }
+
+
+class OTLPHttpSink:
+    """
+    Span'leri kuyruğa alır, arka plan thread'i OTLP/HTTP JSON olarak toplu gönderir
+    Collector'a ulaşılamazsa batch düşürülür (istek yolu asla beklemez)
+    """
+
+    def __init__(self, endpoint, service_name, batch_size, flush_interval, timeout):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.sent = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=batch_size * 20)
+        self._worker = BackgroundThread(self._run, 'otlp-exporter', on_fork=self._drop_parent_queue)
+
+    def _drop_parent_queue(self):
+        # Parent'ın kuyruktaki span'leri parent tarafından gönderilir
+        self._queue = queue.Queue(maxsize=self.batch_size * 20)
+
+    def emit(self, record):
+        self._worker.ensure()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is None:
+                return
+            batch = self._drain(first)
+            stop = None in batch
+            self.export([record for record in batch if record is not None])
+            if stop:
+                return
+
+    def export(self, records):
+        if not records:
+            return
+        body = json.dumps(to_otlp(records, self.service_name), default=str).encode('utf-8')
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+            self.sent += len(records)
+        except OSError:
+            self.dropped += len(records)
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join(timeout=self.timeout + self.flush_interval)
+
+
+def build_sink(config):
+    if config['SINK'] == 'jsonl':
+        return JsonlSink(config['JSONL_PATH'])
+    if config['SINK'] == 'otlp':
+        return OTLPHttpSink(
+            config['OTLP_ENDPOINT'],
+            config['SERVICE_NAME'],
+            config['OTLP_BATCH_SIZE'],
+            config['OTLP_FLUSH_INTERVAL'],
+            config['OTLP_TIMEOUT'],
+        )
+    return RingBufferSink(config['RING_SIZE'])
+
+
+class Tracer:
+    def __init__(self, config):
+        self.enabled = config['ENABLED']
+        self.sample_rate = config['SAMPLE_RATE']
+        self.sink = build_sink(config) if self.enabled else None
+
+    def start(self, name, attributes):
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _UnsampledRoot()
+        elif not parent.sampled:
+            return NOOP_SPAN
+        return Span(self, name, attributes, parent)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(get_tracing_settings())
+    return _tracer
+
+
+@receiver(setting_changed)
+def _reset_tracer(setting, **kwargs):
+    # override_settings(TRACING=...) testlerde yeni tracer kurulsun
+    global _tracer
+    if setting == 'TRACING':
+        with _tracer_lock:
+            if _tracer is not None and _tracer.sink is not None:
+                _tracer.sink.close()
+            _tracer = None
+
+
+def span(name, **attributes):
+    """Context manager: with span('stage', key=value) as s: ... s.set(count=n)"""
+    tracer = _tracer or get_tracer()
+    if not tracer.enabled:
+        return NOOP_SPAN
+    return tracer.start(name, attributes)
+
+
+def current_span():
+    """İçinde bulunulan span (@traced fonksiyonlar öznitelik eklemek için); yoksa no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name=None):
+    """Fonksiyonu tek bir span ile sarar (@traced() veya @traced('isim'))"""
+    def decorator(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer or get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.start(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize_spans(records):
+    """
+    Span adı başına özet
+
+    Returns:
+        list: [{'name', 'count', 'p50_ms', 'p95_ms', 'queries_mean', 'db_ms_mean', 'errors'}]
+    """
+    grouped = defaultdict(list)
+    for record in records:
+        grouped[record['name']].append(record)
+    rows = []
+    for name, items in grouped.items():
+        durations = [r['duration_ms'] for r in items]
+        rows.append({
+            'name': name,
+            'count': len(items),
+            'p50_ms': round(percentile(durations, 50), 3),
+            'p95_ms': round(percentile(durations, 95), 3),
+            'queries_mean': round(sum(r['queries'] for r in items) / len(items), 1),
+            'db_ms_mean': round(sum(r['db_ms'] for r in items) / len(items), 3),
+            'errors': sum(1 for r in items if r['error']),
+        })
+    rows.sort(key=lambda row: -row['p95_ms'])
+    return rows
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def traces_api(request):
+    """
+    GET: Halka tampondaki span'lerin özeti ve son trace'ler
+    Query: ?name=recommendations.get&limit=50
+    DELETE: Tamponu temizle
+    """
+    tracer = get_tracer()
+    if not tracer.enabled or not isinstance(tracer.sink, RingBufferSink):
+        return Response(
+            {'success': False, 'error': 'Tracing kapalı veya sink \'ring\' değil (TRACING)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if request.method == 'DELETE':
+        tracer.sink.clear()
+        return Response({'success': True, 'message': 'Span tamponu temizlendi'})
+
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        limit = 50
+
+    records = tracer.sink.records()
+    name = request.query_params.get('name')
+    recent = [r for r in records if r['name'] == name] if name else [r for r in records if not r['parent_id']]
+    return Response({
+        'success': True,
+        'pid': os.getpid(),
+        'summary': summarize_spans(records),
+        'recent': recent[-limit:][::-1],
+    })
@@ -5,6 +5,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from config.mongodb import mongodb_metrics_api
+from config.sql_profiling import sql_profile_report_api
+from config.tracing import traces_api
+from places.stream_stats import stream_stats_api
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,6 +20,10 @@ urlpatterns = [
     path('api/places/', include('places.api_urls')),
     path('api/users/', include('accounts.api_urls')),
     path('api/social/', include('social.api_urls')),
+    path('api/debug/sql-profile/', sql_profile_report_api, name='sql_profile_report'),
+    path('api/debug/traces/', traces_api, name='traces'),
+    path('api/debug/stream-stats/', stream_stats_api, name='stream_stats'),
+    path('api/debug/mongodb/', mongodb_metrics_api, name='mongodb_metrics'),
 ]
 
 if settings.DEBUG:
@@ -11,6 +11,7 @@ from rest_framework.response import Response
 from .models import Place, SocialMatching, PlaceGraph
 from .serializers import PlaceSerializer
 from .advanced_features import calculate_social_matching, build_place_graph, get_contextual_recommendations
+from config.tracing import current_span, traced
 
 
 @api_view(['GET'])
@@ -154,6 +155,7 @@ def build_graph_for_place(request, place_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@traced('contextual.api')
 def get_contextual_recommendations_api(request):
     """
     Bağlamsal öneriler getirir
@@ -183,6 +185,7 @@ def get_contextual_recommendations_api(request):
             'reason': rec['reason'],
             'relationship': rec['relationship']
         })
+    current_span().set(results=len(result))
     
     return Response({
         'success': True,
@@ -4,10 +4,14 @@ Advanced Features - Üst Seviye Özellikler
 - Local Discovery Graph
 - Contextual Recommendations
 """
-from django.db.models import Q, Count, F
+from django.db.models import Count, F
+from django.utils import timezone
 from .models import Place, PlacePreference, SocialMatching, PlaceGraph, UserBehavior
-from social.models import Friendship
+from .behavior_storage import count_user_place_actions
+from .catalogue_snapshot import WEEKDAYS, place_open_mask
+from social.plan_invites import friends_of
 from accounts.models import User
+from config.tracing import current_span, traced
 
 
 def calculate_social_matching(user, place):
@@ -16,16 +20,7 @@ def calculate_social_matching(user, place):
     Arkadaşların bu mekanla etkileşimlerine göre
     """
     # Kullanıcının arkadaşlarını al
-    friendships = Friendship.objects.filter(
-        Q(user1=user, status='accepted') | Q(user2=user, status='accepted')
-    )
-    
-    friend_ids = []
-    for friendship in friendships:
-        if friendship.user1 == user:
-            friend_ids.append(friendship.user2.id)
-        else:
-            friend_ids.append(friendship.user1.id)
+    friend_ids = list(friends_of(user).values_list('id', flat=True))
     
     if not friend_ids:
         return None
@@ -37,17 +32,10 @@ def calculate_social_matching(user, place):
         action='like'
     ).count()
     
-    friend_visits = UserBehavior.objects.filter(
-        user_id__in=friend_ids,
-        place=place,
-        action_type='visit'
-    ).count()
-    
-    friend_reviews = UserBehavior.objects.filter(
-        user_id__in=friend_ids,
-        place=place,
-        action_type='review'
-    ).count()
+    # Watermark öncesi kullanıcı-mekan rollup'larından (arşivlenmiş olaylar dahil), sonrası ham tablodan
+    actions = count_user_place_actions(friend_ids, place.id, ['visit', 'review'])
+    friend_visits = actions['visit']
+    friend_reviews = actions['review']
     
     # Eşleşme skoru hesapla (0-1)
     total_friends = len(friend_ids)
@@ -75,10 +63,19 @@ def calculate_social_matching(user, place):
     return social_match
 
 
+@traced('place_graph.build')
 def build_place_graph(place):
     """
     Local Discovery Graph - Mekan için ilişkileri oluştur/güncelle
     """
+    _link_similar_places(place)
+    _link_same_category(place)
+    _link_same_atmosphere(place)
+    _link_co_liked_places(place)
+
+
+@traced('place_graph.similar')
+def _link_similar_places(place):
     # 1. Benzer mekanlar (similar_places field'ından)
     if place.similar_places:
         for similar_name in place.similar_places:
@@ -92,11 +89,15 @@ def build_place_graph(place):
                 )
             except Place.DoesNotExist:
                 pass
-    
+    current_span().set(candidates=len(place.similar_places or []))
+
+
+@traced('place_graph.same_category')
+def _link_same_category(place):
     # 2. Aynı kategori
     if place.categories:
         same_category_places = Place.objects.filter(
-            categories__overlap=place.categories
+            categories__has_any_element=place.categories
         ).exclude(id=place.id)[:5]
         
         for related_place in same_category_places:
@@ -106,11 +107,15 @@ def build_place_graph(place):
                 relationship_type='same_category',
                 defaults={'strength': 0.6}
             )
-    
+        current_span().set(candidates=len(same_category_places))
+
+
+@traced('place_graph.same_atmosphere')
+def _link_same_atmosphere(place):
     # 3. Aynı atmosfer (tags'den)
     if place.tags:
         same_atmosphere_places = Place.objects.filter(
-            tags__overlap=place.tags
+            tags__has_any_element=place.tags
         ).exclude(id=place.id)[:5]
         
         for related_place in same_atmosphere_places:
@@ -120,7 +125,11 @@ def build_place_graph(place):
                 relationship_type='same_atmosphere',
                 defaults={'strength': 0.7}
             )
-    
+        current_span().set(candidates=len(same_atmosphere_places))
+
+
+@traced('place_graph.co_like')
+def _link_co_liked_places(place):
     # 4. Birlikte beğenilen mekanlar (co-like)
     # Aynı kullanıcıların beğendiği mekanlar
     users_who_liked = PlacePreference.objects.filter(
@@ -147,11 +156,14 @@ def build_place_graph(place):
                     'co_like_count': related_place.co_like_count
                 }
             )
+    current_span().set(likers=len(users_who_liked), candidates=len(co_liked_places) if users_who_liked else 0)
 
 
-def get_contextual_recommendations(user, context=None):
+@traced('contextual.get_recommendations')
+def get_contextual_recommendations(user, context=None, limit=10):
     """
     Bağlamsal öneriler - Kullanıcının mevcut durumuna göre
+    limit: döndürülecek en fazla öneri
     context: {
         'time_of_day': '17:00',
         'day_of_week': 'monday',
@@ -194,25 +206,40 @@ def get_contextual_recommendations(user, context=None):
                     'relationship': connection.relationship_type
                 })
     
+    current_span().set(seeds=min(len(liked_places), 5), candidates=len(recommendations))
+    
+    recommendations = _filter_by_purpose(recommendations, context.get('purpose'))
+    recommendations = _filter_open_places(recommendations, context)
+    
+    # Skora göre sırala ve döndür
+    recommendations.sort(key=lambda x: x['score'], reverse=True)
+    return recommendations[:limit]
+
+
+@traced('contextual.filter_purpose')
+def _filter_by_purpose(recommendations, purpose):
     # 2. Bağlamsal filtreleme
-    purpose = context.get('purpose')
     if purpose:
         recommendations = [
             r for r in recommendations
             if r['place'].use_cases and r['place'].use_cases.get(purpose, False)
         ]
-    
-    # 3. Zaman bazlı filtreleme
+    current_span().set(remaining=len(recommendations))
+    return recommendations
+
+
+@traced('contextual.filter_hours')
+def _filter_open_places(recommendations, context):
+    # 3. Zaman bazlı filtreleme (katalog snapshot'ındaki çalışma saatlerine göre;
+    # snapshot'tan sonra güncellenen mekanlarda ve snapshot yoksa place.hours'a göre;
+    # saatleri bilinmeyen mekan elenmez)
     time_of_day = context.get('time_of_day')
     if time_of_day:
-        # best_time_to_visit'e göre filtrele
-        hour = int(time_of_day.split(':')[0]) if ':' in time_of_day else None
-        if hour:
-            recommendations = [
-                r for r in recommendations
-                if r['place'].best_time_to_visit or True  # Şimdilik hepsini al
-            ]
-    
-    # Skora göre sırala ve döndür
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    return recommendations[:10]  # Top 10
+        hour = time_of_day.split(':')[0]
+        if ':' in time_of_day and hour.isdigit():
+            day = (context.get('day_of_week') or '').strip().lower()
+            weekday = WEEKDAYS.index(day) if day in WEEKDAYS else timezone.localtime().weekday()
+            is_open = place_open_mask([r['place'] for r in recommendations], weekday, int(hour) % 24)
+            recommendations = [r for r in recommendations if is_open[r['place'].id]]
+    current_span().set(remaining=len(recommendations))
+    return recommendations
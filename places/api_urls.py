@@ -12,6 +12,7 @@ urlpatterns = [
     path('discover/swipe/', discover_api_views.swipe_place, name='swipe'),
     path('discover/preferences/', discover_api_views.get_preferences, name='preferences'),
     path('nearby/', discover_api_views.nearby_places, name='nearby_places'),
+    path('trending/', discover_api_views.trending_places, name='trending'),
     path('<int:place_id>/location/', discover_api_views.place_location, name='place_location'),
     # Recommendation endpoint
     path('recommendations/', recommendation_api_views.get_recommendations_api, name='recommendations'),
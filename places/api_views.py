@@ -7,6 +7,9 @@ from .models import Place
 from visits.models import Visit
 from visits.forms import VisitForm
 from .serializers import PlaceSerializer, PlaceDetailSerializer
+from .recommendation_slates import request_slate_refresh
+from .stream_stats import record_stream_event
+from .mongo_read_model import ReadModelResults, search_query, serve_from_read_model
 
 
 class PlaceListAPIView(generics.ListAPIView):
@@ -26,10 +29,10 @@ class PlaceListAPIView(generics.ListAPIView):
             queryset = queryset.filter(city__icontains=city)
         
         if category:
-            queryset = queryset.filter(categories__contains=[category])
+            queryset = queryset.filter(categories__has_element=category)
         
         if mode:
-            queryset = queryset.filter(categories__contains=[mode])
+            queryset = queryset.filter(categories__has_element=mode)
         
         if search:
             queryset = queryset.filter(
@@ -39,6 +42,24 @@ class PlaceListAPIView(generics.ListAPIView):
             )
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Read model açıksa sayfa MongoDB'den serialize edilmiş olarak gelir
+        def from_read_model():
+            params = request.query_params
+            results = ReadModelResults(search_query(
+                city=params.get('city'), category=params.get('category'),
+                mode=params.get('mode'), search=params.get('search')
+            ))
+            page = self.paginate_queryset(results)
+            if page is None:
+                return Response(results[:])
+            return self.get_paginated_response(list(page))
+        
+        response = serve_from_read_model('search', from_read_model)
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
 
 
 class PlaceDetailAPIView(generics.RetrieveAPIView):
@@ -141,6 +162,12 @@ def AddReviewAPIView(request, place_id):
             except Exception as e:
                 print(f"Taste profile update error: {e}")
             
+            # Akış istatistikleri (değerlendirmenin atmosfer etiketleri, yoksa mekanınkiler)
+            record_stream_event(request.user.id, place, 'review', tags=visit.atmosphere or None)
+            
+            # Öneri slate'ini arka planda yenile
+            request_slate_refresh(request.user)
+            
             return Response({
                 'success': True,
                 'message': 'Değerlendirme başarıyla kaydedildi',
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PlacesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'places'
+
+    def ready(self):
+        # categories__has_element / tags__has_any_element (places/json_lookups.py)
+        from .json_lookups import register_json_lookups
+        register_json_lookups()
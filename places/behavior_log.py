@@ -0,0 +1,356 @@
+"""
+Behavior Event Log - Tamponlu (write-behind) UserBehavior kaydı
+
+Swipe gibi sıcak yollarda her olay için senkron INSERT yapmak yerine olaylar
+process içindeki bir halka tampona (ring buffer) yazılır ve arka plandaki bir
+thread tarafından boyut/zaman eşiğine göre `bulk_create` ile DB'ye aktarılır.
+
+Opsiyonel olarak her olay yerel bir segment dosyasına (JSONL) da eklenir.
+Process çökerse DB'ye yazılamamış olaylar bu dosyalarda kalır ve
+`load_behavior_segments` komutu ile içeri alınır. Segment olayları bir
+BehaviorSegmentLoad kaydıyla aynı transaction'da yazılır; DB'ye yazılıp
+silinemeden kalan segment tekrar yüklenmez.
+
+Ayarlar (settings.BEHAVIOR_LOG):
+    BUFFERED: False ise olaylar eskisi gibi senkron yazılır
+    BUFFER_SIZE: Tampon kapasitesi (dolarsa en eski olaylar düşer; spool açıksa
+        flush olayları segment dosyasından okuduğu için düşen olay kaybolmaz)
+    FLUSH_SIZE: Bu kadar olay birikince flush tetiklenir
+    FLUSH_INTERVAL: Saniye cinsinden en uzun bekleme süresi
+    SPOOL_DIR: Segment dosyalarının dizini (None ise spool kapalı)
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from .models import BehaviorSegmentLoad, UserBehavior
+from .stream_stats import record_stream_event
+from .trending import ingest_behavior
+
+
+DEFAULT_SETTINGS = {
+    'BUFFERED': True,
+    'BUFFER_SIZE': 10000,
+    'FLUSH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'SPOOL_DIR': None,
+}
+
+OPEN_SEGMENT_SUFFIX = '.jsonl.open'
+SEALED_SEGMENT_SUFFIX = '.jsonl'
+
+
+def get_behavior_log_settings():
+    """settings.BEHAVIOR_LOG'u varsayılanlarla birleştirir"""
+    return merged_settings('BEHAVIOR_LOG', DEFAULT_SETTINGS)
+
+
+def serialize_event(event):
+    """Olayı segment satırına (JSON) çevirir"""
+    return json.dumps({
+        'user_id': event['user_id'],
+        'place_id': event['place_id'],
+        'action_type': event['action_type'],
+        'context': event['context'],
+        'filters_used': event['filters_used'],
+        'session_id': event['session_id'],
+        'timestamp': event['timestamp'].isoformat(),
+    }, ensure_ascii=False)
+
+
+def deserialize_event(line):
+    """Segment satırını olay dict'ine çevirir"""
+    data = json.loads(line)
+    data['timestamp'] = parse_datetime(data['timestamp']) or timezone.now()
+    return data
+
+
+def read_segment(path):
+    """
+    Segment dosyasındaki olayları okur
+
+    Returns:
+        tuple: (olay listesi, bozuk satır sayısı)
+    """
+    events = []
+    skipped = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(deserialize_event(line))
+            except (ValueError, KeyError, TypeError):
+                # Çökme anında yarım yazılmış son satır olabilir
+                skipped += 1
+    return events, skipped
+
+
+def segment_name(path):
+    """Segment dosyasının uzantısız adı (açık ve mühürlü hali aynı adı taşır)"""
+    name = Path(path).name
+    for suffix in (OPEN_SEGMENT_SUFFIX, SEALED_SEGMENT_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def segment_owner_alive(path):
+    """Açık segmenti yazan process bu makinede hâlâ çalışıyor mu (PID segment adındadır)"""
+    try:
+        pid = int(segment_name(path).split('-')[1])
+    except (IndexError, ValueError):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Başka kullanıcının process'i
+    return True
+
+
+def store_segment(path, behaviors, batch_size=500):
+    """
+    Segment olaylarını ve BehaviorSegmentLoad kaydını tek transaction'da yazar
+
+    Returns:
+        bool: Segment daha önce yazılmışsa False (olaylar tekrar eklenmez)
+    """
+    with transaction.atomic():
+        _, created = BehaviorSegmentLoad.objects.get_or_create(
+            name=segment_name(path), defaults={'events': len(behaviors)}
+        )
+        if created:
+            UserBehavior.objects.bulk_create(behaviors, batch_size=batch_size)
+    return created
+
+
+def forget_segment(path):
+    """Segment dosyası silindikten sonra kaydı da silinir (tablo küçük kalır)"""
+    BehaviorSegmentLoad.objects.filter(name=segment_name(path)).delete()
+
+
+def build_behavior(event):
+    """Olay dict'inden kaydedilmemiş UserBehavior objesi oluşturur"""
+    return UserBehavior(
+        user_id=event['user_id'],
+        place_id=event['place_id'],
+        action_type=event['action_type'],
+        context=event.get('context') or {},
+        filters_used=event.get('filters_used') or [],
+        session_id=event.get('session_id') or '',
+        timestamp=event['timestamp'],
+    )
+
+
+class SegmentSpool:
+    """
+    Append-only segment dosyaları
+    Aktif segment '.jsonl.open' uzantılıdır; flush öncesi '.jsonl' olarak
+    mühürlenir, DB'ye yazıldıktan sonra silinir.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sequence = 0
+        self._file = None
+        self._path = None
+
+    def _open(self):
+        self._sequence += 1
+        name = f'behavior-{os.getpid()}-{int(time.time() * 1000)}-{self._sequence}'
+        self._path = self.directory / f'{name}{OPEN_SEGMENT_SUFFIX}'
+        self._file = open(self._path, 'a', encoding='utf-8')
+
+    def append(self, event):
+        if self._file is None:
+            self._open()
+        self._file.write(serialize_event(event) + '\n')
+        self._file.flush()
+
+    def seal(self):
+        """Aktif segmenti kapatıp mühürler, mühürlü dosya yolunu döner"""
+        if self._file is None:
+            return None
+        self._file.close()
+        sealed_path = self._path.with_name(self._path.name[:-len(OPEN_SEGMENT_SUFFIX)] + SEALED_SEGMENT_SUFFIX)
+        os.replace(self._path, sealed_path)
+        self._file = None
+        self._path = None
+        return sealed_path
+
+
+class BehaviorEventBuffer:
+    """Process içi halka tampon + arka plan flush thread'i"""
+
+    def __init__(self, buffer_size=10000, flush_size=200, flush_interval=2.0, spool_dir=None):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spool = SegmentSpool(spool_dir) if spool_dir else None
+
+        self._events = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = BackgroundThread(self._run, 'behavior-log-flusher', on_stop=self._wakeup.set)
+
+        self.dropped_count = 0
+        self.flushed_count = 0
+
+    def record(self, event):
+        """Olayı tampona ekler; DB'ye yazma arka planda yapılır"""
+        self._worker.ensure()
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped_count += 1
+            self._events.append(event)
+            if self.spool:
+                self.spool.append(event)
+            pending = len(self._events)
+
+        if pending >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Tampondaki olayları tek bulk_create ile yazar, yazılan olay sayısını döner
+        Spool açıksa olaylar mühürlenen segmentten okunur (tampondan düşenler dahil)
+        Durdurulmuş tampon yazmaz; spool'daki olayları loader komutu alır
+        """
+        if self._worker.stopped:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                events = list(self._events)
+                self._events.clear()
+                sealed_path = self.spool.seal() if self.spool else None
+
+            try:
+                if sealed_path is not None:
+                    # Tampon dolunca düşen olaylar da segmentte; yazılacaklar segmentten okunur
+                    events, _ = read_segment(sealed_path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Behavior log flush error: {e}")
+                # Mühürlü segment diskte kalır, loader komutu alır
+                return 0
+
+            if not events:
+                if sealed_path is not None:
+                    sealed_path.unlink(missing_ok=True)
+                return 0
+
+            try:
+                behaviors = [build_behavior(event) for event in events]
+                if sealed_path is not None:
+                    # Silinmeden çökülürse load_behavior_segments segmenti tekrar yüklemez
+                    store_segment(sealed_path, behaviors)
+                else:
+                    UserBehavior.objects.bulk_create(behaviors, batch_size=500)
+            except Exception as e:
+                print(f"Behavior log flush error: {e}")
+                if sealed_path is None:
+                    # Spool yoksa olayları tampona geri koy (sığmayanlar düşer)
+                    with self._lock:
+                        self._events.extendleft(reversed(events))
+                # Spool varsa olaylar mühürlü segmentte kalır, loader komutu alır
+                return 0
+
+            if sealed_path is not None:
+                sealed_path.unlink(missing_ok=True)
+                try:
+                    forget_segment(sealed_path)
+                except Exception as e:
+                    print(f"Behavior log flush error: {e}")
+
+            self.flushed_count += len(events)
+            return len(events)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._events)
+
+    def stop(self, timeout=5):
+        """Kalan olayları yazar ve flusher thread'ini durdurur, yazılan olay sayısını döner"""
+        flushed = self.flush()
+        self._worker.stop(timeout)
+        return flushed
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._worker.stopped:
+                return
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_behavior_buffer():
+    """Process genelinde tek BehaviorEventBuffer objesi"""
+    global _buffer
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = get_behavior_log_settings()
+                _buffer = BehaviorEventBuffer(
+                    buffer_size=config['BUFFER_SIZE'],
+                    flush_size=config['FLUSH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    spool_dir=config['SPOOL_DIR'],
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def record_behavior(user, place, action_type, context=None, filters_used=None, session_id=''):
+    """
+    Kullanıcı davranışını kaydeder
+    BUFFERED açıksa tampona yazar, kapalıysa doğrudan UserBehavior oluşturur
+    """
+    event = {
+        'user_id': user.id,
+        'place_id': place.id,
+        'action_type': action_type,
+        'context': context or {},
+        'filters_used': filters_used or [],
+        'session_id': session_id or '',
+        'timestamp': timezone.now(),
+    }
+
+    # Trend sayaçları ve akış sketch'leri DB yazımını beklemeden güncellenir
+    ingest_behavior(event)
+    record_stream_event(user.id, place, action_type)
+
+    if not get_behavior_log_settings()['BUFFERED']:
+        build_behavior(event).save()
+        return
+
+    get_behavior_buffer().record(event)
+
+
+def flush_behavior_log():
+    """Bekleyen olayları hemen DB'ye yazar"""
+    if _buffer is None:
+        return 0
+    return _buffer.flush()
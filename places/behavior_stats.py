@@ -0,0 +1,280 @@
+"""
+Behavior Stats - UserBehavior olaylarından mekan istatistikleri üreten batch işi
+
+Olaylar (kullanıcı, zaman) sırasıyla parça parça okunur ve NumPy bincount ile
+vektörel sayılır:
+- 168 saatlik (7x24) saat-hafta histogramı -> peak_hours, busiest_day
+- Kalış süresi tahmini (kullanıcının bir sonraki olayına kadar geçen süre)
+  -> behavior_stats['average_stay_minutes']
+- Hafta içi mesai saati payı + kalış süresi -> working_suitability
+
+Birikimli sayaçlar PlaceBehaviorProfile'da tutulur; artımlı çalıştırmalar
+sadece zaman damgası watermark'ından sonraki olayları okur. Watermark
+build_rollups gibi LATE_EVENT_HOURS geriden gelir: tampon/spool ile geç
+commit edilen olaylar ID sırasıyla değil zamanlarıyla yerleşir, ID watermark'ı
+bunları atlardı. Bu süreden de geç yazılan olaylar (ör. günler sonra
+yüklenen spool segmenti) sadece --full ile sayılır.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .behavior_storage import get_retention_settings
+from .models import Place, UserBehavior, PlaceBehaviorProfile, AggregationWatermark
+
+
+STATS_WATERMARK = 'place_behavior_stats'
+
+HOURS_PER_WEEK = 168
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Bu süreden uzun aralar "mekandan ayrıldı" sayılır, kalış tahmini yapılmaz
+MAX_DWELL_MINUTES = 180
+# Saatlik yoğunluk bu oranın üstündeyse peak penceresine dahil edilir
+PEAK_RATIO = 0.6
+# Daha az olayı olan mekanların elle girilmiş değerleri ezilmez
+MIN_EVENTS_FOR_STATS = 20
+# Mesai saatleri (çalışma uygunluğu için)
+WORK_HOURS = range(9, 18)
+
+
+def iter_event_chunks(start, end, chunk_size):
+    """[start, end) aralığındaki olayları (user_id, timestamp) sırasıyla parça parça döner (start None: baştan)"""
+    events = UserBehavior.objects.filter(timestamp__lt=end)
+    if start is not None:
+        events = events.filter(timestamp__gte=start)
+    rows = (
+        events
+        .order_by('user_id', 'timestamp')
+        .values_list('user_id', 'place_id', 'timestamp')
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def local_hour_of_week(epoch):
+    """UTC epoch saniyelerini yerel saat dilimine göre 0-167 saat-hafta indeksine çevirir"""
+    utc_hours = np.floor_divide(epoch, 3600).astype(np.int64)
+    unique_hours, inverse = np.unique(utc_hours, return_inverse=True)
+    offsets = np.array([
+        timezone.localtime(datetime.fromtimestamp(int(h) * 3600, tz=dt_timezone.utc)).utcoffset().total_seconds()
+        for h in unique_hours
+    ])
+    local_hours = np.floor_divide(epoch + offsets[inverse], 3600).astype(np.int64)
+    # 1970-01-01 Perşembe (pazartesi=0 için +3)
+    weekday = (np.floor_divide(local_hours, 24) + 3) % 7
+    return weekday * 24 + local_hours % 24
+
+
+class BehaviorAccumulator:
+    """Parçalar boyunca mekan bazlı histogram ve kalış sayaçlarını biriktirir"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.dwell_totals = {}
+        self.dwell_samples = {}
+        self._tail = None  # Önceki parçanın son olayı (kalış süresi parça sınırında kopmasın)
+
+    def add_chunk(self, rows):
+        users = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        places = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        epoch = np.fromiter((r[2].timestamp() for r in rows), dtype=np.float64, count=len(rows))
+
+        is_new = np.ones(len(rows), dtype=bool)
+        if self._tail is not None:
+            users = np.concatenate(([self._tail[0]], users))
+            places = np.concatenate(([self._tail[1]], places))
+            epoch = np.concatenate(([self._tail[2]], epoch))
+            is_new = np.concatenate(([False], is_new))
+        self._tail = (users[-1], places[-1], epoch[-1])
+
+        place_ids, place_idx = np.unique(places, return_inverse=True)
+        n_places = len(place_ids)
+
+        # Saat-hafta histogramı
+        how = local_hour_of_week(epoch[is_new])
+        histograms = np.bincount(
+            place_idx[is_new] * HOURS_PER_WEEK + how,
+            minlength=n_places * HOURS_PER_WEEK
+        ).reshape(n_places, HOURS_PER_WEEK)
+
+        # Kalış tahmini: aynı kullanıcının ardışık olayları arasındaki süre
+        gaps = np.diff(epoch) / 60.0
+        valid = (users[1:] == users[:-1]) & (gaps > 0) & (gaps <= MAX_DWELL_MINUTES)
+        dwell_idx = place_idx[:-1][valid]
+        dwell_totals = np.bincount(dwell_idx, weights=gaps[valid], minlength=n_places)
+        dwell_samples = np.bincount(dwell_idx, minlength=n_places)
+
+        for i, place_id in enumerate(place_ids.tolist()):
+            if place_id in self.histograms:
+                self.histograms[place_id] += histograms[i]
+                self.dwell_totals[place_id] += dwell_totals[i]
+                self.dwell_samples[place_id] += int(dwell_samples[i])
+            else:
+                self.histograms[place_id] = histograms[i].astype(np.int64)
+                self.dwell_totals[place_id] = float(dwell_totals[i])
+                self.dwell_samples[place_id] = int(dwell_samples[i])
+
+
+def peak_window(hour_counts):
+    """
+    Günlük (24 saat) yoğunluktan en yoğun ardışık saat penceresini bulur
+
+    Returns:
+        dict: {'start': '13:00', 'end': '18:00'} veya {} (veri yoksa)
+    """
+    if hour_counts.sum() == 0:
+        return {}
+
+    peak = int(np.argmax(hour_counts))
+    threshold = hour_counts[peak] * PEAK_RATIO
+    start = end = peak
+    while start > 0 and hour_counts[start - 1] >= threshold:
+        start -= 1
+    while end < 23 and hour_counts[end + 1] >= threshold:
+        end += 1
+
+    return {'start': f'{start:02d}:00', 'end': f'{(end + 1) % 24:02d}:00'}
+
+
+def derive_place_stats(profile):
+    """
+    Profil sayaçlarından Place alanlarını hesaplar
+
+    Returns:
+        tuple: (behavior_stats güncellemesi, peak_hours, working_suitability)
+    """
+    histogram = np.array(profile.hour_of_week_counts, dtype=np.int64).reshape(7, 24)
+    hour_counts = histogram.sum(axis=0)
+    day_counts = histogram.sum(axis=1)
+    total = int(histogram.sum())
+
+    average_stay = (
+        round(profile.dwell_minutes_total / profile.dwell_samples)
+        if profile.dwell_samples else None
+    )
+
+    stats = {
+        'event_count': total,
+        'busiest_day': DAY_NAMES[int(np.argmax(day_counts))],
+        'hourly_distribution': [round(c / total, 3) for c in hour_counts.tolist()],
+        'computed_at': timezone.now().isoformat(),
+    }
+    if average_stay is not None:
+        stats['average_stay_minutes'] = average_stay
+
+    # Hafta içi mesai saatlerindeki olay payı + uzun kalış = çalışmaya uygun
+    work_share = histogram[:5, WORK_HOURS.start:WORK_HOURS.stop].sum() / total
+    stay_score = min(1.0, (average_stay or 0) / 120.0)
+    working_suitability = int(round(100 * (0.6 * work_share + 0.4 * stay_score)))
+
+    return stats, peak_window(hour_counts), working_suitability
+
+
+def _save_profiles(accumulator):
+    """Biriken sayaçları mevcut profillerle birleştirip toplu yazar"""
+    place_ids = list(accumulator.histograms)
+    existing = PlaceBehaviorProfile.objects.in_bulk(place_ids, field_name='place_id')
+
+    to_create, to_update = [], []
+    for place_id in place_ids:
+        profile = existing.get(place_id)
+        if profile is None:
+            profile = PlaceBehaviorProfile(place_id=place_id, hour_of_week_counts=[0] * HOURS_PER_WEEK)
+            to_create.append(profile)
+        else:
+            to_update.append(profile)
+
+        histogram = np.array(profile.hour_of_week_counts or [0] * HOURS_PER_WEEK, dtype=np.int64)
+        histogram += accumulator.histograms[place_id]
+        profile.hour_of_week_counts = histogram.tolist()
+        profile.event_count = int(histogram.sum())
+        profile.dwell_minutes_total += accumulator.dwell_totals[place_id]
+        profile.dwell_samples += accumulator.dwell_samples[place_id]
+        profile.updated_at = timezone.now()
+
+    PlaceBehaviorProfile.objects.bulk_create(to_create, batch_size=500)
+    PlaceBehaviorProfile.objects.bulk_update(
+        to_update,
+        ['hour_of_week_counts', 'event_count', 'dwell_minutes_total', 'dwell_samples', 'updated_at'],
+        batch_size=500
+    )
+    return to_create + to_update
+
+
+def _update_places(profiles):
+    """Yeterli veri olan mekanların behavior_stats/peak_hours/working_suitability alanlarını yazar"""
+    profiles = {p.place_id: p for p in profiles if p.event_count >= MIN_EVENTS_FOR_STATS}
+    place_ids = list(profiles)
+    updated = 0
+
+    for start in range(0, len(place_ids), 500):
+        places = list(
+            Place.objects.filter(id__in=place_ids[start:start + 500])
+            .only('id', 'behavior_stats', 'peak_hours', 'working_suitability')
+        )
+        for place in places:
+            stats, peak_hours, working_suitability = derive_place_stats(profiles[place.id])
+            place.behavior_stats = {**(place.behavior_stats or {}), **stats}
+            if peak_hours:
+                place.peak_hours = peak_hours
+            place.working_suitability = working_suitability
+
+        Place.objects.bulk_update(places, ['behavior_stats', 'peak_hours', 'working_suitability'])
+        updated += len(places)
+
+    return updated
+
+
+def _stats_watermark():
+    """Son işlenen zaman; eski ID watermark'ı varsa o ID'ye kadarki en yeni olayın zamanına çevrilir"""
+    watermark = AggregationWatermark.get_value(STATS_WATERMARK)
+    if watermark is None:
+        position = AggregationWatermark.get_position(STATS_WATERMARK)
+        if position:
+            latest = UserBehavior.objects.filter(id__lte=position).aggregate(latest=Max('timestamp'))['latest']
+            if latest is not None:
+                watermark = latest + timedelta(microseconds=1)
+    return watermark
+
+
+def compute_behavior_stats(full=False, chunk_size=5000):
+    """
+    Mekan davranış istatistiklerini günceller
+
+    Args:
+        full: True ise profiller sıfırlanıp tüm olaylar baştan işlenir
+        chunk_size: Tek seferde belleğe alınan olay sayısı
+
+    Returns:
+        dict: işlenen olay sayısı, güncellenen mekan sayısı, yeni watermark
+    """
+    # Son LATE_EVENT_HOURS saat geç commit edilebilir; bir sonraki çalıştırmaya kalır
+    until = timezone.now() - timedelta(hours=get_retention_settings()['LATE_EVENT_HOURS'])
+    start = None if full else _stats_watermark()
+
+    if start is not None and start >= until:
+        return {'events': 0, 'places': 0, 'watermark': start}
+
+    accumulator = BehaviorAccumulator()
+    events = 0
+    for chunk in iter_event_chunks(start, until, chunk_size):
+        accumulator.add_chunk(chunk)
+        events += len(chunk)
+
+    with transaction.atomic():
+        if full:
+            PlaceBehaviorProfile.objects.all().delete()
+        profiles = _save_profiles(accumulator)
+        places = _update_places(profiles)
+        AggregationWatermark.set_value(STATS_WATERMARK, until)
+
+    return {'events': events, 'places': places, 'watermark': until}
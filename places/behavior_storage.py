@@ -0,0 +1,419 @@
+"""
+Behavior Storage - UserBehavior için rollup, aylık arşiv (partition) ve retention
+
+- Saatlik rollup'lar ham olaylardan, günlük rollup'lar saatliklerden üretilir
+- Watermark'tan eski ham olaylar aylık gölge tablolara taşınır
+  (places_userbehavior_YYYYMM), çok eski gölge tablolar tamamen düşürülür
+- (user, place, action_type) günlük rollup'ları arkadaş etkileşimi gibi
+  kullanıcı-mekan sorgularını, (user, action_type) rollup'ları kullanıcının
+  toplam aktivitesini arşiv tablolarına inmeden yanıtlar
+- Sorgu yardımcıları watermark öncesini rollup'lardan, sonrasını ham
+  tablodan okur
+
+Ayarlar (settings.BEHAVIOR_RETENTION):
+    RAW_DAYS: Ham olayların ana tabloda kalacağı gün sayısı
+    ARCHIVE_MONTHS: Aylık gölge tabloların tutulacağı ay sayısı (None: sınırsız)
+    HOURLY_ROLLUP_DAYS: Saatlik rollup'ların tutulacağı gün sayısı (günlükler kalır)
+    LATE_EVENT_HOURS: Geç gelen olaylar için yeniden hesaplanan saat sayısı
+"""
+from datetime import datetime, timedelta
+
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from config.app_settings import merged_settings
+from .models import (
+    UserBehavior, PlaceBehaviorRollup, UserBehaviorRollup, UserPlaceBehaviorRollup, AggregationWatermark
+)
+
+
+ROLLUP_WATERMARK = 'behavior_rollup'
+
+DEFAULT_RETENTION = {
+    'RAW_DAYS': 30,
+    'ARCHIVE_MONTHS': 12,
+    'HOURLY_ROLLUP_DAYS': 90,
+    'LATE_EVENT_HOURS': 2,
+}
+
+PARTITION_TABLE_PREFIX = 'places_userbehavior_'
+
+# Gölge tablo modelleri ana app registry'sine karışmasın (migration'lar görmez)
+_partition_apps = Apps()
+_partition_models = {}
+
+
+def get_retention_settings():
+    return merged_settings('BEHAVIOR_RETENTION', DEFAULT_RETENTION)
+
+
+def floor_hour(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def month_start(dt):
+    dt = timezone.localtime(dt)
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(dt):
+    if dt.month == 12:
+        return dt.replace(year=dt.year + 1, month=1)
+    return dt.replace(month=dt.month + 1)
+
+
+# ---------------------------------------------------------------------------
+# Rollup
+# ---------------------------------------------------------------------------
+
+def _hourly_counts(group_field, start, end):
+    """[start, end) aralığındaki ham olayları (group_field, action_type, saat) bazında sayar"""
+    return (
+        UserBehavior.objects
+        .filter(timestamp__gte=start, timestamp__lt=end)
+        .annotate(bucket=TruncHour('timestamp'))
+        .values(group_field, 'action_type', 'bucket')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _replace_rollups(model, group_field, granularity, start, end, rows):
+    """Aralıktaki rollup'ları siler ve yenilerini toplu yazar (idempotent)"""
+    model.objects.filter(
+        granularity=granularity,
+        bucket_start__gte=start,
+        bucket_start__lt=end
+    ).delete()
+    model.objects.bulk_create([
+        model(**{
+            f'{group_field}_id': row[group_field],
+            'action_type': row['action_type'],
+            'granularity': granularity,
+            'bucket_start': row['bucket'],
+            'count': row['total'],
+        })
+        for row in rows
+    ], batch_size=1000)
+
+
+def _daily_user_place_counts(model, start, end):
+    """[start, end) aralığındaki olayları (user, place, action_type, gün) bazında sayar (start None: baştan)"""
+    events = model.objects.filter(timestamp__lt=end)
+    if start is not None:
+        events = events.filter(timestamp__gte=start)
+    return (
+        events
+        .annotate(bucket=TruncDay('timestamp'))
+        .values('user_id', 'place_id', 'action_type', 'bucket')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _replace_user_place_rollups(start, end, rows):
+    existing = UserPlaceBehaviorRollup.objects.filter(bucket_start__lt=end)
+    if start is not None:
+        existing = existing.filter(bucket_start__gte=start)
+    existing.delete()
+    UserPlaceBehaviorRollup.objects.bulk_create([
+        UserPlaceBehaviorRollup(
+            user_id=row['user_id'],
+            place_id=row['place_id'],
+            action_type=row['action_type'],
+            bucket_start=row['bucket'],
+            count=row['total'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+def backfill_user_place_rollups():
+    """
+    Kullanıcı-mekan rollup'larını watermark'a kadar ham tablo + arşiv
+    tablolarından baştan üretir (tablo eklenmeden önceki geçmiş için bir kez)
+
+    Returns:
+        int: yazılan rollup satırı
+    """
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    if watermark is None:
+        return 0
+
+    # Aynı gün hem arşivde hem ham tabloda olabilir
+    totals = {}
+    sources = [UserBehavior] + [
+        get_partition_model(datetime.strptime(table[len(PARTITION_TABLE_PREFIX):], '%Y%m'))
+        for table in list_partition_tables()
+    ]
+    for model in sources:
+        for row in _daily_user_place_counts(model, None, watermark):
+            key = (row['user_id'], row['place_id'], row['action_type'], row['bucket'])
+            totals[key] = totals.get(key, 0) + row['total']
+
+    rows = [
+        {'user_id': user_id, 'place_id': place_id, 'action_type': action_type, 'bucket': bucket, 'total': total}
+        for (user_id, place_id, action_type, bucket), total in totals.items()
+    ]
+    with transaction.atomic():
+        _replace_user_place_rollups(None, watermark, rows)
+    return len(rows)
+
+
+def build_rollups(until=None):
+    """
+    Watermark'tan `until` saatine kadar saatlik ve günlük rollup'ları üretir
+    Geç gelen (tampon/spool) olaylar için son LATE_EVENT_HOURS saat yeniden hesaplanır
+
+    Returns:
+        datetime: yeni watermark (bu saatten önceki olaylar rollup'larda)
+    """
+    config = get_retention_settings()
+    until = floor_hour(until or timezone.now())
+
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    if watermark is None:
+        first = UserBehavior.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if first is None:
+            return None
+        start = floor_hour(first)
+    else:
+        start = watermark - timedelta(hours=config['LATE_EVENT_HOURS'])
+
+    if start >= until:
+        return watermark
+
+    day_start = timezone.localtime(start).replace(hour=0)
+    with transaction.atomic():
+        for model, group_field in ((PlaceBehaviorRollup, 'place'), (UserBehaviorRollup, 'user')):
+            _replace_rollups(model, group_field, 'hour', start, until,
+                             _hourly_counts(group_field, start, until))
+
+            # Etkilenen günleri saatlik rollup'lardan yeniden topla
+            daily = (
+                model.objects
+                .filter(granularity='hour', bucket_start__gte=day_start, bucket_start__lt=until)
+                .annotate(bucket=TruncDay('bucket_start'))
+                .values(group_field, 'action_type', 'bucket')
+                .annotate(total=Sum('count'))
+                .order_by()
+            )
+            _replace_rollups(model, group_field, 'day', day_start, until, daily)
+
+        # Kullanıcı-mekan günlükleri doğrudan ham olaylardan (saatlik ara katman yok)
+        _replace_user_place_rollups(day_start, until, _daily_user_place_counts(UserBehavior, day_start, until))
+
+        AggregationWatermark.set_value(ROLLUP_WATERMARK, until)
+
+    return until
+
+
+# ---------------------------------------------------------------------------
+# Aylık gölge tablolar
+# ---------------------------------------------------------------------------
+
+def partition_table_name(month):
+    return f'{PARTITION_TABLE_PREFIX}{month:%Y%m}'
+
+
+def get_partition_model(month):
+    """Verilen ayın gölge tablosu için (kayıt dışı) model sınıfı"""
+    table = partition_table_name(month)
+    if table not in _partition_models:
+        class Meta:
+            app_label = 'places'
+            db_table = table
+            managed = False
+            apps = _partition_apps
+            indexes = [
+                models.Index(fields=['place_id', 'action_type'], name=f'{table}_pa'),
+                models.Index(fields=['user_id', 'action_type'], name=f'{table}_ua'),
+            ]
+
+        _partition_models[table] = type(f'UserBehavior{month:%Y%m}', (models.Model,), {
+            '__module__': __name__,
+            'Meta': Meta,
+            'id': models.BigAutoField(primary_key=True),
+            'user_id': models.BigIntegerField(),
+            'place_id': models.BigIntegerField(),
+            'action_type': models.CharField(max_length=20),
+            'context': models.JSONField(default=dict),
+            'filters_used': models.JSONField(default=list),
+            'session_id': models.CharField(max_length=100, blank=True),
+            'timestamp': models.DateTimeField(db_index=True),
+        })
+    return _partition_models[table]
+
+
+def list_partition_tables():
+    """Mevcut gölge tabloları (eskiden yeniye) döner"""
+    return sorted(
+        name for name in connection.introspection.table_names()
+        if name.startswith(PARTITION_TABLE_PREFIX) and name[len(PARTITION_TABLE_PREFIX):].isdigit()
+    )
+
+
+def ensure_partition(month):
+    model = get_partition_model(month)
+    if model._meta.db_table not in connection.introspection.table_names():
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(model)
+    return model
+
+
+def archive_raw_events(before):
+    """
+    `before`'dan eski ham olayları aylık gölge tablolara taşır
+
+    Returns:
+        int: taşınan olay sayısı
+    """
+    first = UserBehavior.objects.filter(
+        timestamp__lt=before
+    ).order_by('timestamp').values_list('timestamp', flat=True).first()
+    if first is None:
+        return 0
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(c) for c in (
+        'user_id', 'place_id', 'action_type', 'context', 'filters_used', 'session_id', 'timestamp'
+    ))
+    source = quote(UserBehavior._meta.db_table)
+
+    moved = 0
+    month = month_start(first)
+    while month < before:
+        end = min(next_month(month), before)
+        target = quote(ensure_partition(month)._meta.db_table)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {target} ({columns}) SELECT {columns} FROM {source} '
+                f'WHERE {quote("timestamp")} >= %s AND {quote("timestamp")} < %s',
+                [connection.ops.adapt_datetimefield_value(month),
+                 connection.ops.adapt_datetimefield_value(end)]
+            )
+            moved += UserBehavior.objects.filter(timestamp__gte=month, timestamp__lt=end).delete()[0]
+
+        month = next_month(month)
+
+    return moved
+
+
+def drop_expired_partitions(keep_months, now=None):
+    """Son `keep_months` aydan eski gölge tabloları düşürür"""
+    oldest_kept = month_start(now or timezone.now())
+    for _ in range(keep_months):
+        oldest_kept = (oldest_kept - timedelta(days=1)).replace(day=1)
+
+    dropped = []
+    for table in list_partition_tables():
+        if table < partition_table_name(oldest_kept):
+            with connection.schema_editor() as schema_editor:
+                schema_editor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+            _partition_models.pop(table, None)
+            dropped.append(table)
+    return dropped
+
+
+def apply_retention(now=None):
+    """
+    Retention politikasını uygular
+    Ham olaylar sadece rollup'lara işlendikten sonra arşive taşınır
+    """
+    config = get_retention_settings()
+    now = now or timezone.now()
+    result = {'archived': 0, 'dropped_partitions': [], 'deleted_hourly_rollups': 0}
+
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    if watermark is not None:
+        # Yeniden hesaplanabilecek son saatler ham tabloda kalmalı
+        cutoff = min(
+            now - timedelta(days=config['RAW_DAYS']),
+            watermark - timedelta(hours=config['LATE_EVENT_HOURS'])
+        )
+        result['archived'] = archive_raw_events(cutoff)
+
+    if config['ARCHIVE_MONTHS'] is not None:
+        result['dropped_partitions'] = drop_expired_partitions(config['ARCHIVE_MONTHS'], now)
+
+    hourly_cutoff = now - timedelta(days=config['HOURLY_ROLLUP_DAYS'])
+    for model in (PlaceBehaviorRollup, UserBehaviorRollup):
+        result['deleted_hourly_rollups'] += model.objects.filter(
+            granularity='hour', bucket_start__lt=hourly_cutoff
+        ).delete()[0]
+
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Sorgu yardımcıları
+# ---------------------------------------------------------------------------
+
+def count_user_place_actions(user_ids, place_id, action_types):
+    """
+    Belirli kullanıcıların bir mekandaki olay sayıları (ör. arkadaş ziyaretleri)
+    Watermark öncesi günlük kullanıcı-mekan rollup'larından, sonrası ham
+    tablodan okunur; arşiv tablolarına inilmez (sabit 3 sorgu)
+
+    Returns:
+        dict: {'visit': 4, 'review': 1} - istenen her action_type için
+    """
+    totals = dict.fromkeys(action_types, 0)
+    if not user_ids:
+        return totals
+
+    filters = {'user_id__in': user_ids, 'place_id': place_id, 'action_type__in': list(action_types)}
+    raw = UserBehavior.objects.filter(**filters)
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    if watermark is not None:
+        rollups = (
+            UserPlaceBehaviorRollup.objects
+            .filter(bucket_start__lt=watermark, **filters)
+            .values('action_type')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        for row in rollups:
+            totals[row['action_type']] += row['total']
+        raw = raw.filter(timestamp__gte=watermark)
+
+    for row in raw.values('action_type').annotate(total=Count('id')).order_by():
+        totals[row['action_type']] += row['total']
+    return totals
+
+
+def count_user_actions(user_id, action_types=None):
+    """
+    Bir kullanıcının action_type bazında toplam olay sayıları (ör. profil aktivitesi)
+    Watermark öncesi günlük kullanıcı rollup'larından, sonrası ham tablodan
+    okunur; arşiv tablolarına inilmez (sabit 3 sorgu)
+
+    Returns:
+        dict: {'view': 12, 'swipe_like': 3} - action_types verilirse her biri için
+    """
+    totals = dict.fromkeys(action_types or [], 0)
+    filters = {'user_id': user_id}
+    if action_types is not None:
+        filters['action_type__in'] = list(action_types)
+
+    raw = UserBehavior.objects.filter(**filters)
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    if watermark is not None:
+        rollups = (
+            UserBehaviorRollup.objects
+            .filter(granularity='day', bucket_start__lt=watermark, **filters)
+            .values('action_type')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        for row in rollups:
+            totals[row['action_type']] = totals.get(row['action_type'], 0) + row['total']
+        raw = raw.filter(timestamp__gte=watermark)
+
+    for row in raw.values('action_type').annotate(total=Count('id')).order_by():
+        totals[row['action_type']] = totals.get(row['action_type'], 0) + row['total']
+    return totals
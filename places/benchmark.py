@@ -0,0 +1,317 @@
+"""
+API Benchmark - Sentetik veri üretip tüm API endpoint'lerini ölçer
+
+- seed_benchmark_data: mekan, kullanıcı, ziyaret, swipe, davranış ve
+  arkadaşlıkları seed_synthetic_data komutuyla (places/synthetic_data.py)
+  üretir; üstüne bench kullanıcısının arkadaşlık, grup ve plan verisini ekler.
+- run_benchmark: places, social ve accounts api_urls içindeki her route'u
+  test client ile çağırır; sorgu sayısı, p50/p95 gecikme ve yanıt boyutu
+  ölçülür. Her istek geri alınan bir transaction içinde çalışır, böylece
+  yazma yapan endpoint'ler tekrarlar arasında veriyi değiştirmez.
+
+Çıktı commit'ler arasında diff'lenebilecek JSON baseline'dır
+(python manage.py benchmark_api).
+"""
+import io
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection, reset_queries, transaction
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from accounts.models import User
+from places.models import Place
+from places.synthetic_data import SCALES as SYNTHETIC_SCALES
+from social.models import Friendship, FriendGroup, GroupPlan, PlanParticipant, PlanPlaceOption, PlanVote
+
+
+# Ölçekler seed_synthetic_data ile aynı; grup planı sayısı benchmark'a özel
+SCALES = {
+    name: {**counts, 'plans': max(2, counts['users'] // 25)}
+    for name, counts in SYNTHETIC_SCALES.items()
+}
+
+BENCH_PREFIX = 'bench'
+BATCH_SIZE = 2000
+
+# Ölçülen API modülleri (URL namespace, modül)
+API_MODULES = [
+    ('places_api', 'places.api_urls'),
+    ('social_api', 'social.api_urls'),
+    ('accounts_api', 'accounts.api_urls'),
+]
+
+# Uzun süreli akış olduğu için ölçülemeyen route'lar
+SKIPPED_ROUTES = {
+    'social_api:plan_events': 'Server-sent events akışı STREAM_MAX_AGE boyunca açık kalır',
+}
+
+
+def seed_benchmark_data(scale, seed=42):
+    """
+    Ölçekli sentetik veri üretir
+
+    Args:
+        scale: SCALES girdisi (seed_synthetic_data sayıları + 'plans')
+        seed: deterministik üretim için random seed
+
+    Returns:
+        dict: benchmark istekleri için kimlikler (bench kullanıcısı, planlar, vb.)
+    """
+    counts = {key: scale[key] for key in SYNTHETIC_SCALES['small']}
+    counts['users'] = max(counts['users'], 4)
+    call_command('seed_synthetic_data', **counts, seed=seed, prefix=BENCH_PREFIX, stdout=io.StringIO())
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    place_ids = list(Place.objects.order_by('id').values_list('id', flat=True))
+    user_ids = list(
+        User.objects.filter(username__startswith=f'{BENCH_PREFIX}_').order_by('id').values_list('id', flat=True)
+    )
+    bench_id = user_ids[0]
+    others = user_ids[1:]
+
+    # Arkadaşlıklar: bench kullanıcısının rastgele ilişkileri yerine bilinen bir
+    # düzen kurulur: yarısı kabul edilmiş arkadaş, bir kullanıcıdan bekleyen
+    # istek ve hiçbir ilişkisi olmayan bir yabancı
+    Friendship.objects.filter(Q(requester_id=bench_id) | Q(receiver_id=bench_id)).delete()
+    bench_friends = others[:max(1, len(others) // 2)]
+    pending_from = others[-1]
+    stranger = others[-2]
+    Friendship.objects.filter(
+        Q(requester_id=stranger) | Q(receiver_id=stranger) | Q(requester_id=pending_from) | Q(receiver_id=pending_from)
+    ).delete()
+    friendships = [Friendship(requester_id=bench_id, receiver_id=u, status='accepted') for u in bench_friends]
+    friendships.append(Friendship(requester_id=pending_from, receiver_id=bench_id, status='pending'))
+    Friendship.objects.bulk_create(friendships, batch_size=BATCH_SIZE)
+
+    group = FriendGroup.objects.create(owner_id=bench_id, name='Ofis Ekibi')
+    group.members.set(bench_friends[:5])
+
+    # Grup planları: bench kullanıcısının oluşturduğu oylamadaki planlar
+    # ve davet edildiği (yanıtlamadığı) bir plan
+    plans = [
+        GroupPlan(
+            creator_id=bench_id if i % 2 == 0 else rng.choice(bench_friends),
+            title=f'Plan {i}',
+            status='voting',
+            planned_date=now + timedelta(days=rng.randint(1, 30)),
+            poll_questions=['Bugün akşam geliyor musun?'],
+        )
+        for i in range(max(scale['plans'], 2))
+    ]
+    GroupPlan.objects.bulk_create(plans, batch_size=BATCH_SIZE)
+    plans = list(GroupPlan.objects.filter(title__startswith='Plan ').order_by('id'))
+
+    participants, options, votes = [], [], []
+    for plan in plans:
+        members = {plan.creator_id, *rng.sample(bench_friends, k=min(5, len(bench_friends)))}
+        invited_plan = plan.creator_id != bench_id
+        members.add(bench_id)
+        for user_id in members:
+            accepted = not (invited_plan and user_id == bench_id)
+            participants.append(PlanParticipant(plan_id=plan.id, user_id=user_id, has_accepted=accepted))
+
+        plan_places = rng.sample(place_ids, k=min(5, len(place_ids)))
+        for place_id in plan_places:
+            options.append(PlanPlaceOption(plan_id=plan.id, place_id=place_id, suggested_by_id=plan.creator_id))
+            for user_id in members:
+                votes.append(PlanVote(plan_id=plan.id, user_id=user_id, place_id=place_id, vote_type=rng.choice(['yes', 'maybe', 'no'])))
+
+    PlanParticipant.objects.bulk_create(participants, batch_size=BATCH_SIZE)
+    PlanPlaceOption.objects.bulk_create(options, batch_size=BATCH_SIZE)
+    PlanVote.objects.bulk_create(votes, batch_size=BATCH_SIZE)
+
+    own_plan = next(plan for plan in plans if plan.creator_id == bench_id)
+    invited_plan = next(plan for plan in plans if plan.creator_id != bench_id)
+    suggested = set(PlanPlaceOption.objects.filter(plan=own_plan).values_list('place_id', flat=True))
+
+    return {
+        'bench_user_id': bench_id,
+        'bench_username': User.objects.get(id=bench_id).username,
+        'place_id': place_ids[0],
+        'unsuggested_place_id': next(p for p in place_ids if p not in suggested),
+        'voted_place_id': next(iter(suggested)),
+        'stranger_username': User.objects.get(id=stranger).username,
+        'friend_request_id': Friendship.objects.get(requester_id=pending_from, receiver_id=bench_id).id,
+        'plan_id': own_plan.id,
+        'invited_plan_id': invited_plan.id,
+        'friend_group_id': group.id,
+    }
+
+
+def request_specs(ctx):
+    """
+    Route adı -> istek tanımı (method, kwargs, query/body)
+    Tanımı olmayan route'lar çıktıda 'uncovered' olarak raporlanır
+    """
+    from social.plan_calendar import make_feed_token
+
+    place = {'place_id': ctx['place_id']}
+    plan = {'plan_id': ctx['plan_id']}
+    return {
+        'places_api:place_list': ('GET', {}, {}),
+        'places_api:place_detail': ('GET', {'pk': ctx['place_id']}, {}),
+        'places_api:add_review': ('POST', place, {'rating': 4, 'comment': 'Benchmark yorumu', 'tags': ['sakin']}),
+        'places_api:discover': ('GET', {}, {}),
+        'places_api:swipe': ('POST', {}, {'place_id': ctx['place_id'], 'action': 'like'}),
+        'places_api:preferences': ('GET', {}, {}),
+        'places_api:nearby_places': ('GET', {}, {'lat': '41.0', 'lon': '29.0', 'radius': '5'}),
+        'places_api:trending': ('GET', {}, {'window': '7d', 'limit': '20'}),
+        'places_api:place_location': ('GET', place, {}),
+        'places_api:recommendations': ('GET', {}, {}),
+        'places_api:social_matches': ('GET', {}, {}),
+        'places_api:calculate_social_match': ('POST', {}, {'place_id': ctx['place_id']}),
+        'places_api:place_graph': ('GET', place, {}),
+        'places_api:build_graph': ('POST', place, {}),
+        'places_api:contextual_recommendations': ('GET', {}, {'purpose': 'work', 'time_of_day': 'evening'}),
+        'accounts_api:user_profile': ('GET', {'username': ctx['bench_username']}, {}),
+        'accounts_api:search_users': ('GET', {}, {'q': 'bench'}),
+        'accounts_api:taste_profile': ('GET', {}, {}),
+        'accounts_api:recalculate_taste_profile': ('POST', {}, {}),
+        'social_api:friends_feed': ('GET', {}, {}),
+        'social_api:friend_request': ('POST', {}, {'username': ctx['stranger_username']}),
+        'social_api:friend_respond': ('POST', {}, {'request_id': ctx['friend_request_id'], 'action': 'accept'}),
+        'social_api:leaderboard': ('GET', {}, {}),
+        'social_api:group_plans': ('GET', {}, {}),
+        'social_api:group_plan_detail': ('GET', plan, {}),
+        'social_api:invite_participants': ('POST', plan, {'all_friends': True}),
+        'social_api:respond_invitation': ('POST', {'plan_id': ctx['invited_plan_id']}, {'action': 'accept'}),
+        'social_api:suggest_place': ('POST', plan, {'place_id': ctx['unsuggested_place_id']}),
+        'social_api:vote_place': ('POST', plan, {'place_id': ctx['voted_place_id'], 'vote_type': 'yes'}),
+        'social_api:finalize_plan': ('POST', plan, {}),
+        'social_api:save_poll_answers': ('POST', plan, {'answers': {'0': 'Evet'}}),
+        'social_api:export_plan_ical': ('GET', plan, {}),
+        'social_api:group_recommendations': ('GET', plan, {}),
+        'social_api:plan_calendar_feed_url': ('GET', {}, {}),
+        'social_api:reset_plan_calendar_feed_url': ('POST', {}, {}),
+        'social_api:plan_calendar_feed': ('GET', {'token': make_feed_token(User.objects.get(id=ctx['bench_user_id']))}, {}),
+        'social_api:friends_for_invite': ('GET', {}, {}),
+        'social_api:friend_groups': ('GET', {}, {}),
+        'social_api:friend_group_detail': ('PUT', {'group_id': ctx['friend_group_id']}, {'name': 'Ofis'}),
+    }
+
+
+def api_route_names():
+    """Ölçülecek modüllerdeki tüm isimli route'lar"""
+    from importlib import import_module
+
+    names = []
+    for namespace, module in API_MODULES:
+        for pattern in import_module(module).urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                names.append(f'{namespace}:{pattern.name}')
+    return names
+
+
+def percentile(values, pct):
+    """Nearest-rank yüzdelik"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _call(client, method, path, data):
+    if method == 'GET':
+        return client.get(path, data)
+    return getattr(client, method.lower())(path, data, content_type='application/json')
+
+
+def measure(client, method, path, data, repeat, warmup):
+    """
+    İsteği geri alınan transaction içinde tekrar tekrar çalıştırır
+
+    Returns:
+        dict: status, queries, p50_ms, p95_ms, mean_ms, bytes
+    """
+    timings, queries, size, status_code = [], 0, 0, None
+    for i in range(warmup + repeat):
+        # Sorgu logu sınırlı (9000); dolarsa CaptureQueriesContext yanlış sayar
+        reset_queries()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = _call(client, method, path, data)
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+
+        if i >= warmup:
+            timings.append(elapsed)
+            queries = len(captured)
+            status_code = response.status_code
+
+    return {
+        'status': status_code,
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'bytes': size,
+    }
+
+
+def run_benchmark(ctx, repeat=10, warmup=1, only=None):
+    """
+    Tüm API route'larını ölçer
+
+    Args:
+        ctx: seed_benchmark_data çıktısı
+        only: sadece bu route adlarını ölç (örn: ['places_api:discover'])
+
+    Returns:
+        dict: {'endpoints': {...}, 'skipped': {...}, 'uncovered': [...]}
+    """
+    # Hatalı endpoint'ler ölçümü durdurmaz, 500 olarak raporlanır
+    client = Client(raise_request_exception=False)
+    client.force_login(User.objects.get(id=ctx['bench_user_id']))
+
+    specs = request_specs(ctx)
+    endpoints, skipped, uncovered = {}, {}, []
+    for name in api_route_names():
+        if only and name not in only:
+            continue
+        if name in SKIPPED_ROUTES:
+            skipped[name] = SKIPPED_ROUTES[name]
+            continue
+        if name not in specs:
+            uncovered.append(name)
+            continue
+
+        method, kwargs, data = specs[name]
+        path = reverse(name, kwargs=kwargs)
+        endpoints[name] = {'method': method, 'path': path, **measure(client, method, path, data, repeat, warmup)}
+
+    return {'endpoints': endpoints, 'skipped': skipped, 'uncovered': uncovered}
+
+
+def compare_results(baseline, current):
+    """
+    İki benchmark çıktısı arasındaki farklar
+
+    Returns:
+        list: [(route, metrik, önceki, şimdiki)] - sorgu sayısı/boyut değişimleri
+        ve p95'i %20'den fazla değişen endpoint'ler
+    """
+    changes = []
+    old_endpoints = baseline.get('endpoints', {})
+    for name, row in current['endpoints'].items():
+        old = old_endpoints.get(name)
+        if old is None:
+            changes.append((name, 'new', None, None))
+            continue
+        for metric in ('status', 'queries', 'bytes'):
+            if old.get(metric) != row[metric]:
+                changes.append((name, metric, old.get(metric), row[metric]))
+        if old.get('p95_ms') and abs(row['p95_ms'] - old['p95_ms']) / old['p95_ms'] > 0.2:
+            changes.append((name, 'p95_ms', old['p95_ms'], row['p95_ms']))
+    return changes
@@ -0,0 +1,351 @@
+"""
+Toplu Dışa Aktarma - Analitik için tam tablo snapshot'ları (kolon bazlı dosyalar)
+
+MongoDB senkronu satır satır çalışır; analitik tarafı ise tabloların tamamını
+ister. Bu modül her tabloyu PK sırasıyla QuerySet.iterator() ile akıtır
+(PostgreSQL'de server-side cursor, SQLite'ta fetchmany) ve CHUNK_ROWS'luk
+parçaları ayrı kolon bazlı dosyalara yazar; bellek kullanımı tablo boyutundan
+bağımsızdır. Tablolar process havuzunda paralel dışa aktarılır.
+
+Biçimler:
+    parquet  pyarrow kuruluysa (zstd); tipler manifest'tekiyle aynıdır
+    npz      numpy.savez_compressed; sayısal kolonlar tipli dizi, metin/JSON
+             kolonları <kolon>__data (UTF-8 uint8) + <kolon>__offsets (int64),
+             NULL olabilen kolonlar için <kolon>__null (bool)
+    csv      gzip'li CSV; NULL boş hücre olarak yazılır
+    auto     pyarrow varsa parquet, yoksa npz
+
+Çıktı düzeni:
+    <DIR>/<YYYYmmdd-HHMMSS>/<tablo>/part-00000.<uzantı>
+    <DIR>/<YYYYmmdd-HHMMSS>/manifest.json - kolon tipleri, satır sayıları, dosya
+    boyutları ve SHA-256 özetleri; en son yazılır, yoksa export yarım kalmıştır
+
+Her tablo kendi transaction'ında okunur; tablolar arası tek bir anlık görüntü
+garanti edilmez (created_at/updated_at üzerinden hizalanabilir).
+
+user_behaviors ana tablodan sonra retention'ın taşıdığı aylık arşiv tablolarını
+(places_userbehavior_YYYYMM) da aynı dizine yazar. Manifest'te her kaynak
+tablonun satır sayısı ve ayı, her dosyanın kaynağı tutulur; arşiv satırlarının
+id'leri kendi tablolarına aittir (ana tablonun id'leriyle çakışabilir).
+Export sırasında arşive taşınan bir olay iki kez yazılabilir, kaybolmaz.
+
+Ayarlar (settings.BULK_EXPORT):
+    DIR: Export dizini
+    FORMAT: auto | parquet | npz | csv
+    CHUNK_ROWS: Dosya başına satır
+    WORKERS: Paralel tablo sayısı
+"""
+import csv
+import datetime
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from config.app_settings import merged_settings
+from social.models import Friendship, GroupPlan
+from visits.models import Visit
+from .behavior_storage import PARTITION_TABLE_PREFIX, get_partition_model, list_partition_tables
+from .models import Place, PlacePreference, UserBehavior
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - opsiyonel bağımlılık
+    pa = None
+    pq = None
+
+
+DEFAULT_SETTINGS = {
+    'DIR': 'exports',
+    'FORMAT': 'auto',
+    'CHUNK_ROWS': 50000,
+    'WORKERS': 4,
+}
+
+EXPORT_TABLES = {
+    'places': Place,
+    'visits': Visit,
+    'place_preferences': PlacePreference,
+    'user_behaviors': UserBehavior,
+    'friendships': Friendship,
+    'group_plans': GroupPlan,
+}
+FORMATS = ('auto', 'parquet', 'npz', 'csv')
+EXTENSIONS = {'parquet': 'parquet', 'npz': 'npz', 'csv': 'csv.gz'}
+MANIFEST_FILE = 'manifest.json'
+
+INTEGER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+    'SmallIntegerField', 'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+}
+EPOCH_DATE = datetime.date(1970, 1, 1)
+
+
+def get_export_settings():
+    return merged_settings('BULK_EXPORT', DEFAULT_SETTINGS)
+
+
+def resolve_format(name):
+    if name == 'auto':
+        return 'parquet' if pa is not None else 'npz'
+    if name == 'parquet' and pa is None:
+        raise ImportError('parquet biçimi için pyarrow gerekli')
+    return name
+
+
+# --- Kolon şeması ---
+
+def column_type(field):
+    """Django alanı -> export tipi (int64, bool, float64, timestamp, date, json, string)"""
+    if field.is_relation:
+        field = field.target_field
+    internal = field.get_internal_type()
+    if internal in INTEGER_TYPES:
+        return 'int64'
+    if internal == 'BooleanField':
+        return 'bool'
+    if internal in ('FloatField', 'DecimalField'):
+        return 'float64'
+    if internal == 'DateTimeField':
+        return 'timestamp'
+    if internal == 'DateField':
+        return 'date'
+    if internal == 'JSONField':
+        return 'json'
+    return 'string'
+
+
+def table_columns(model):
+    """[(kolon adı, tip, null olabilir mi)] - M2M hariç somut alanlar, FK'ler <ad>_id olarak"""
+    return [(field.attname, column_type(field), field.null) for field in model._meta.concrete_fields]
+
+
+def _convert(value, kind):
+    """Python değerini dosyaya yazılacak ilkel değere çevirir (None korunur)"""
+    if value is None:
+        return None
+    if kind == 'float64':
+        return float(value)
+    if kind == 'timestamp':
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, datetime.timezone.utc)
+        return int(value.timestamp() * 1_000_000)
+    if kind == 'date':
+        return (value - EPOCH_DATE).days
+    if kind == 'json':
+        return json.dumps(value, ensure_ascii=False)
+    if kind == 'string':
+        return str(value)
+    return value
+
+
+# --- Parça yazıcıları ---
+
+def _write_parquet(path, columns, data):
+    types = {
+        'int64': pa.int64(), 'bool': pa.bool_(), 'float64': pa.float64(),
+        'timestamp': pa.timestamp('us', tz='UTC'), 'date': pa.date32(),
+        'json': pa.string(), 'string': pa.string(),
+    }
+    arrays = [pa.array(values, type=types[kind]) for (_, kind, _), values in zip(columns, data)]
+    table = pa.Table.from_arrays(arrays, names=[name for name, _, _ in columns])
+    pq.write_table(table, path, compression='zstd')
+
+
+def _write_npz(path, columns, data):
+    dtypes = {'int64': np.int64, 'bool': np.bool_, 'float64': np.float64, 'timestamp': np.int64, 'date': np.int32}
+    arrays = {}
+    for (name, kind, nullable), values in zip(columns, data):
+        if nullable:
+            arrays[f'{name}__null'] = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+        if kind in dtypes:
+            fill = np.nan if kind == 'float64' else 0
+            arrays[name] = np.array([fill if value is None else value for value in values], dtype=dtypes[kind])
+            continue
+        encoded = [b'' if value is None else value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        arrays[f'{name}__data'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        arrays[f'{name}__offsets'] = offsets
+    np.savez_compressed(path, **arrays)
+
+
+def _write_csv(path, columns, data):
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _, _ in columns])
+        writer.writerows(zip(*data))
+
+
+WRITERS = {'parquet': _write_parquet, 'npz': _write_npz, 'csv': _write_csv}
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- Tablo dışa aktarma ---
+
+def export_table(name, directory, file_format, chunk_rows):
+    """
+    Tek tabloyu parçalar halinde yazar
+
+    Returns:
+        dict: manifest'teki tablo girdisi
+    """
+    model = EXPORT_TABLES[name]
+    columns = table_columns(model)
+    kinds = [kind for _, kind, _ in columns]
+    writer = WRITERS[file_format]
+    table_dir = os.path.join(directory, name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    files = []
+    sources = []
+    started = time.perf_counter()
+
+    def flush(buffer, source):
+        part = os.path.join(table_dir, f'part-{len(files):05d}.{EXTENSIONS[file_format]}')
+        data = [[_convert(value, kind) for value in values] for values, kind in zip(zip(*buffer), kinds)]
+        writer(part, columns, data)
+        files.append({
+            'path': os.path.relpath(part, directory),
+            'source': source,
+            'rows': len(buffer),
+            'bytes': os.path.getsize(part),
+            'sha256': file_checksum(part),
+        })
+
+    with transaction.atomic():
+        for source, month, source_model in _table_sources(model):
+            queryset = source_model.objects.order_by('pk').values_list(*[column for column, _, _ in columns])
+            source_rows = 0
+            buffer = []
+            for row in queryset.iterator(chunk_size=min(chunk_rows, 10000)):
+                buffer.append(row)
+                if len(buffer) >= chunk_rows:
+                    flush(buffer, source)
+                    source_rows += len(buffer)
+                    buffer = []
+            if buffer:
+                flush(buffer, source)
+                source_rows += len(buffer)
+            sources.append({'table': source, 'month': month, 'rows': source_rows})
+
+    return {
+        'table': model._meta.db_table,
+        'rows': sum(source['rows'] for source in sources),
+        'sources': sources,
+        'columns': [{'name': column, 'type': kind, 'nullable': nullable} for column, kind, nullable in columns],
+        'files': files,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _table_sources(model):
+    """[(tablo adı, ay 'YYYY-MM' ya da None, model)] - UserBehavior için arşiv tabloları dahil"""
+    sources = [(model._meta.db_table, None, model)]
+    if model is UserBehavior:
+        for table in list_partition_tables():
+            month = datetime.datetime.strptime(table[len(PARTITION_TABLE_PREFIX):], '%Y%m')
+            sources.append((table, f'{month:%Y-%m}', get_partition_model(month)))
+    return sources
+
+
+def _init_worker():
+    # Ana process'ten miras kalan bağlantı paylaşılmasın
+    connections.close_all()
+
+
+def _export_task(args):
+    return args[0], export_table(*args)
+
+
+def run_export(tables=None, directory=None, file_format=None, chunk_rows=None, workers=None, progress=None):
+    """
+    Seçilen tabloları yeni bir sürüm dizinine dışa aktarır ve manifest yazar
+
+    Returns:
+        dict: manifest içeriği (+ 'directory')
+    """
+    config = get_export_settings()
+    tables = list(tables or EXPORT_TABLES)
+    unknown = [name for name in tables if name not in EXPORT_TABLES]
+    if unknown:
+        raise ValueError(f'Bilinmeyen tablo: {", ".join(unknown)}')
+    file_format = resolve_format(file_format or config['FORMAT'])
+    chunk_rows = chunk_rows or config['CHUNK_ROWS']
+    workers = max(1, min(workers or config['WORKERS'], len(tables)))
+    report = progress or (lambda name, entry: None)
+
+    started_at = timezone.now()
+    base_dir = directory or config['DIR']
+    directory = os.path.join(base_dir, started_at.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(directory, exist_ok=False)
+
+    started = time.perf_counter()
+    results = {}
+    if workers > 1:
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+        )
+        with executor:
+            tasks = [(name, directory, file_format, chunk_rows) for name in tables]
+            for name, entry in executor.map(_export_task, tasks):
+                results[name] = entry
+                report(name, entry)
+    else:
+        for name in tables:
+            results[name] = export_table(name, directory, file_format, chunk_rows)
+            report(name, results[name])
+
+    manifest = {
+        'created_at': started_at.isoformat(),
+        'seconds': round(time.perf_counter() - started, 3),
+        'format': file_format,
+        'chunk_rows': chunk_rows,
+        'database': connection.vendor,
+        'tables': results,
+    }
+    tmp_path = os.path.join(directory, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+    return dict(manifest, directory=directory)
+
+
+def verify_export(directory):
+    """
+    Manifest'teki dosya boyutlarını ve özetlerini kontrol eder
+
+    Returns:
+        list: sorunlu dosya açıklamaları (boşsa export sağlam)
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    problems = []
+    for name, entry in manifest['tables'].items():
+        for item in entry['files']:
+            path = os.path.join(directory, item['path'])
+            if not os.path.exists(path):
+                problems.append(f'{item["path"]}: dosya yok')
+            elif os.path.getsize(path) != item['bytes'] or file_checksum(path) != item['sha256']:
+                problems.append(f'{item["path"]}: özet uyuşmuyor')
+        if sum(item['rows'] for item in entry['files']) != entry['rows']:
+            problems.append(f'{name}: satır sayısı uyuşmuyor')
+    return problems
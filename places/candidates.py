@@ -0,0 +1,342 @@
+"""
+Aday Üretimi (Candidate Generation) - Öneri motorunun birinci aşaması
+
+Öneri iki aşamada üretilir:
+1. Ucuz aday üreticileri her biri en fazla kotası kadar mekan ID'si döner
+   (indeksli sorgular veya process içi posting list'ler üzerinden)
+2. Ranker (recommendations.rank_candidates) sadece adayların birleşimini
+   tüm özelliklerle skorlar
+
+Böylece istek maliyeti katalog büyüklüğünden bağımsız kalır.
+
+Üreticiler (settings.RECOMMENDATION_CANDIDATES['GENERATORS'] sırasıyla çalışır):
+    query_terms       - İstenen kategori/atmosfer posting list'leri (popülerlik sırasıyla)
+    graph_neighbours  - Beğenilen mekanların PlaceGraph komşuları
+    friends_likes     - Arkadaşların beğendiği/kaydettiği mekanlar
+    taste_categories  - Zevk profilindeki kategori/atmosfer ağırlıklarına göre posting list'ler
+    popular_in_city   - Kullanıcının şehrinde popüler mekanlar
+    popular           - Genel popüler mekanlar (soğuk başlangıç için)
+
+TIME_BUDGET_MS aşılırsa sıradaki üreticiler atlanır.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.db import close_old_connections
+from django.db.models import Avg, Count, Max
+
+from accounts.models import Profile
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from config.tracing import span
+from social.plan_invites import friends_of
+from visits.models import Visit
+from .models import Place, PlaceGraph, PlacePreference
+
+
+DEFAULT_SETTINGS = {
+    'GENERATORS': {
+        'query_terms': {'ENABLED': True, 'QUOTA': 400},
+        'graph_neighbours': {'ENABLED': True, 'QUOTA': 200},
+        'friends_likes': {'ENABLED': True, 'QUOTA': 200},
+        'taste_categories': {'ENABLED': True, 'QUOTA': 300},
+        'popular_in_city': {'ENABLED': True, 'QUOTA': 200},
+        'popular': {'ENABLED': True, 'QUOTA': 200},
+    },
+    'TIME_BUDGET_MS': 80,
+    'INDEX_TTL': 300,  # saniye - daha eski indeks arka planda yeniden kurulur
+}
+
+# Posting list üreticilerinin baktığı en fazla zevk profili terimi
+TASTE_TERMS = 3
+# Graph komşuları için kullanılan son beğeni sayısı
+GRAPH_SEED_LIKES = 20
+GRAPH_MIN_STRENGTH = 0.5
+POSITIVE_ACTIONS = ('like', 'save')
+
+
+def get_candidate_settings():
+    config = merged_settings('RECOMMENDATION_CANDIDATES', DEFAULT_SETTINGS)
+    generators = {name: dict(options) for name, options in DEFAULT_SETTINGS['GENERATORS'].items()}
+    for name, options in config['GENERATORS'].items():
+        generators.setdefault(name, {}).update(options)
+    config['GENERATORS'] = generators
+    return config
+
+
+class CandidateIndex:
+    """
+    Katalog posting list'leri ve popülerlik istatistikleri
+
+    - stats: {place_id: (avg_rating, visit_count)}
+    - rank: {place_id: popülerlik sırası} (önce rating, sonra ziyaret sayısı)
+    - popular: ziyaret almış mekanlar, popülerlik sırasıyla
+    - by_city / by_category / by_tag: terim -> popülerlik sıralı mekan ID'leri
+    """
+
+    def __init__(self, place_rows, visit_rows):
+        self.stats = {place_id: (avg or 0.0, count) for place_id, avg, count in visit_rows}
+        ordered = sorted(
+            (row[0] for row in place_rows),
+            key=lambda place_id: (
+                -self.stats.get(place_id, (0.0, 0))[0],
+                -self.stats.get(place_id, (0.0, 0))[1],
+                place_id,
+            )
+        )
+        self.rank = {place_id: i for i, place_id in enumerate(ordered)}
+        self.popular = [place_id for place_id in ordered if place_id in self.stats]
+
+        by_city = defaultdict(list)
+        by_category = defaultdict(list)
+        by_tag = defaultdict(list)
+        for place_id, city, categories, tags in sorted(place_rows, key=lambda row: self.rank[row[0]]):
+            if city:
+                by_city[city.strip().lower()].append(place_id)
+            for category in set(categories or []):
+                by_category[category].append(place_id)
+            for tag in set(tags or []):
+                by_tag[tag].append(place_id)
+        self.by_city = dict(by_city)
+        self.by_category = dict(by_category)
+        self.by_tag = dict(by_tag)
+
+    def merged(self, postings):
+        """Birden fazla posting list'i popülerlik sırasını koruyarak tekilleştirip birleştirir"""
+        previous = None
+        for place_id in heapq.merge(*postings, key=self.rank.__getitem__):
+            if place_id != previous:
+                yield place_id
+                previous = place_id
+
+
+_index = None
+_index_built_at = 0.0
+_build_lock = threading.Lock()
+
+
+def build_candidate_index():
+    with span('candidates.build_index') as stage:
+        place_rows = list(Place.objects.values_list('id', 'city', 'categories', 'tags'))
+        visit_rows = list(
+            Visit.objects.values('place_id').annotate(
+                avg_rating=Avg('rating'), visit_count=Count('id')
+            ).values_list('place_id', 'avg_rating', 'visit_count')
+        )
+        index = CandidateIndex(place_rows, visit_rows)
+        stage.set(places=len(place_rows))
+    return index
+
+
+def _swap_index():
+    global _index, _index_built_at
+
+    index = build_candidate_index()
+    _index, _index_built_at = index, time.monotonic()
+    return index
+
+
+def refresh_candidate_index():
+    """İndeksi hemen yeniden kurar ve process önbelleğine yazar"""
+    with _build_lock:
+        return _swap_index()
+
+
+def _rebuild_in_background():
+    close_old_connections()
+    try:
+        refresh_candidate_index()
+    except Exception as e:
+        print(f"Candidate index rebuild error: {e}")
+    finally:
+        close_old_connections()
+
+
+_rebuild_worker = BackgroundThread(_rebuild_in_background, 'candidate-index-rebuild')
+
+
+def get_candidate_index():
+    """
+    Process içinde önbelleklenen aday indeksi
+    İlk çağrıda kurulur; INDEX_TTL saniyeden eskiyse arka planda yeniden
+    kurulurken eski indeks sunulmaya devam eder (yeni ziyaretler en fazla
+    INDEX_TTL gecikmeyle popülerliğe yansır)
+    """
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                return _swap_index()
+        return _index
+
+    if time.monotonic() - _index_built_at < get_candidate_settings()['INDEX_TTL']:
+        return _index
+
+    _rebuild_worker.ensure()
+    return _index
+
+
+class CandidateRequest:
+    """Üreticilerin paylaştığı istek bağlamı"""
+
+    def __init__(self, user, swiped_ids, taste_profile=None, category=None, atmosphere=None):
+        self.user = user
+        self.swiped_ids = set(swiped_ids)
+        self.taste_profile = taste_profile
+        self.category = category or []
+        self.atmosphere = atmosphere or []
+
+    def swiped_subquery(self):
+        return PlacePreference.objects.filter(user=self.user).values('place_id')
+
+
+def _take(place_ids, request, quota):
+    """Swipe yapılmamış ilk `quota` mekan"""
+    result = []
+    for place_id in place_ids:
+        if place_id not in request.swiped_ids:
+            result.append(place_id)
+            if len(result) >= quota:
+                break
+    return result
+
+
+def generate_query_terms(request, index, quota):
+    if not request.category and not request.atmosphere:
+        return {}
+    if request.category:
+        stream = index.merged([index.by_category.get(c, []) for c in request.category])
+        allowed = None
+        if request.atmosphere:
+            allowed = set()
+            for tag in request.atmosphere:
+                allowed.update(index.by_tag.get(tag, []))
+            stream = (place_id for place_id in stream if place_id in allowed)
+    else:
+        stream = index.merged([index.by_tag.get(t, []) for t in request.atmosphere])
+    return {place_id: {} for place_id in _take(stream, request, quota)}
+
+
+def generate_graph_neighbours(request, index, quota):
+    seeds = PlacePreference.objects.filter(
+        user=request.user, action__in=POSITIVE_ACTIONS
+    ).order_by('-timestamp').values('place_id')[:GRAPH_SEED_LIKES]
+    rows = PlaceGraph.objects.filter(
+        from_place_id__in=seeds,
+        strength__gte=GRAPH_MIN_STRENGTH,
+    ).exclude(
+        to_place_id__in=request.swiped_subquery()
+    ).values('to_place_id').annotate(
+        strength=Max('strength')
+    ).order_by('-strength')[:quota]
+    return {row['to_place_id']: {'graph_strength': row['strength']} for row in rows}
+
+
+def generate_friends_likes(request, index, quota):
+    rows = PlacePreference.objects.filter(
+        user__in=friends_of(request.user).values('id'),
+        action__in=POSITIVE_ACTIONS,
+    ).exclude(
+        place_id__in=request.swiped_subquery()
+    ).values('place_id').annotate(
+        friend_likes=Count('id')
+    ).order_by('-friend_likes')[:quota]
+    return {row['place_id']: {'friend_likes': row['friend_likes']} for row in rows}
+
+
+def _weighted_terms(weights):
+    return sorted((weights or {}).items(), key=lambda item: -item[1])[:TASTE_TERMS]
+
+
+def generate_taste_categories(request, index, quota):
+    profile = request.taste_profile
+    if profile is None:
+        return {}
+    terms = [(index.by_category, term, weight) for term, weight in _weighted_terms(profile.category_weights)]
+    terms += [(index.by_tag, term, weight) for term, weight in _weighted_terms(profile.atmosphere_weights)]
+    total = sum(weight for _, _, weight in terms)
+    if not total:
+        return {}
+
+    # Kota, terim ağırlıklarıyla orantılı paylaştırılır
+    candidates = {}
+    for postings, term, weight in terms:
+        share = max(1, round(quota * weight / total))
+        for place_id in _take(postings.get(term, []), request, share):
+            candidates.setdefault(place_id, {})
+    return candidates
+
+
+def generate_popular_in_city(request, index, quota):
+    city = Profile.objects.filter(user=request.user).values_list('city', flat=True).first()
+    if not city:
+        return {}
+    postings = index.by_city.get(city.strip().lower(), [])
+    return {place_id: {} for place_id in _take(postings, request, quota)}
+
+
+def generate_popular(request, index, quota):
+    return {place_id: {} for place_id in _take(index.popular, request, quota)}
+
+
+def candidate_reason(evidence):
+    """Adayın neden önerildiğini anlatan kısa metin (en güçlü kanıt)"""
+    sources = evidence.get('sources', [])
+    if evidence.get('friend_likes'):
+        return f"{evidence['friend_likes']} arkadaşın beğendi"
+    if 'graph_neighbours' in sources:
+        return 'Beğendiğin mekanlara benziyor'
+    if 'query_terms' in sources:
+        return 'Aramana uygun'
+    if 'taste_categories' in sources:
+        return 'Zevk profiline uygun'
+    if 'popular_in_city' in sources:
+        return 'Şehrinde popüler'
+    return 'Popüler'
+
+
+GENERATORS = {
+    'query_terms': generate_query_terms,
+    'graph_neighbours': generate_graph_neighbours,
+    'friends_likes': generate_friends_likes,
+    'taste_categories': generate_taste_categories,
+    'popular_in_city': generate_popular_in_city,
+    'popular': generate_popular,
+}
+
+
+def generate_candidates(request, index=None):
+    """
+    Etkin üreticileri sırayla çalıştırır ve adayları birleştirir
+
+    Returns:
+        tuple: (candidates, timings)
+            candidates: {place_id: {'sources': [...], 'graph_strength': .., 'friend_likes': ..}}
+            timings: {generator: {'ms', 'count'} veya {'skipped': True}}
+    """
+    config = get_candidate_settings()
+    index = index or get_candidate_index()
+    budget = config['TIME_BUDGET_MS'] / 1000
+    started = time.perf_counter()
+
+    candidates = {}
+    timings = {}
+    for name, options in config['GENERATORS'].items():
+        if not options.get('ENABLED', True) or name not in GENERATORS:
+            continue
+        if timings and time.perf_counter() - started > budget:
+            timings[name] = {'skipped': True}
+            continue
+
+        generator_started = time.perf_counter()
+        with span(f'candidates.{name}', quota=options['QUOTA']) as stage:
+            found = GENERATORS[name](request, index, options['QUOTA'])
+            stage.set(candidates=len(found))
+        timings[name] = {'ms': round((time.perf_counter() - generator_started) * 1000, 2), 'count': len(found)}
+
+        for place_id, evidence in found.items():
+            entry = candidates.setdefault(place_id, {'sources': []})
+            entry['sources'].append(name)
+            entry.update(evidence)
+    return candidates, timings
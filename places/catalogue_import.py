@@ -0,0 +1,529 @@
+"""
+Katalog İçe Aktarma - Büyük CSV/JSONL mekan dökümlerinin akışlı yüklenmesi
+
+Akış:
+1. Ana process dosyayı satır satır okur (csv.reader / JSONL), CHUNK_SIZE'lık
+   parçalar halinde process havuzuna gönderir; aynı anda en fazla
+   workers * 2 parça bellekte bulunur
+2. Worker'lar satırları doğrular ve normalleştirir (fiyat seviyesi,
+   kategori/etiket listeleri, koordinatlar, metin alanları); DB'ye dokunmaz
+3. Ana process parçaları sırayla işler: mevcut mekanlarla ve dosyanın önceki
+   satırlarıyla tekilleştirir (ad + adres, ya da ad + DEDUPE_RADIUS_M içinde
+   koordinat), yenileri bulk_create, eşleşenleri
+   bulk_create(update_conflicts=True) ile tek transaction'da yazar
+4. Her parçadan sonra checkpoint (dosya konumu + sayaçlar) yazılır;
+   --resume ile yarıda kalan iş kaldığı yerden sürer
+5. Hatalı satırlar satır numarası ve sebebiyle hata raporuna (CSV) eklenir
+
+Güncellemede sadece dosyada dolu gelen alanlar değişir; diğer alanlar korunur.
+"""
+import csv
+import gzip
+import json
+import math
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, transaction
+
+from .models import Place
+
+
+CHUNK_SIZE = 2000
+DEDUPE_RADIUS_M = 75
+# ~110 m'lik ızgara; yakınlık araması komşu 3x3 hücreye bakar
+GRID_DEGREES = 0.001
+RAW_EXCERPT = 300
+
+PRICE_ALIASES = {
+    '₺': '₺', '₺₺': '₺₺', '₺₺₺': '₺₺₺', '₺₺₺₺': '₺₺₺',
+    '$': '₺', '$$': '₺₺', '$$$': '₺₺₺', '$$$$': '₺₺₺',
+    '1': '₺', '2': '₺₺', '3': '₺₺₺', '4': '₺₺₺',
+    'ucuz': '₺', 'orta': '₺₺', 'pahalı': '₺₺₺',
+    'cheap': '₺', 'inexpensive': '₺', 'moderate': '₺₺', 'expensive': '₺₺₺',
+}
+CATEGORY_ALIASES = {
+    'cafe': 'kafe', 'café': 'kafe', 'coffee shop': 'kafe', 'kahveci': 'kafe',
+    'coffee': 'kahve', 'restaurant': 'restoran', 'lokanta': 'restoran',
+    'pub': 'bar', 'bakery': 'pastane', 'patisserie': 'pastane', 'breakfast': 'brunch',
+}
+ADDRESS_ABBREVIATIONS = {
+    'cad': 'caddesi', 'cd': 'caddesi', 'sok': 'sokak', 'sk': 'sokak',
+    'mah': 'mahallesi', 'mh': 'mahallesi', 'blv': 'bulvarı', 'bulv': 'bulvarı', 'no': 'no',
+}
+# Dosyadaki başlık -> Place alanı
+FIELD_ALIASES = {
+    'name': 'name', 'title': 'name', 'ad': 'name', 'isim': 'name',
+    'address': 'address', 'adres': 'address',
+    'city': 'city', 'şehir': 'city', 'sehir': 'city',
+    'categories': 'categories', 'category': 'categories', 'kategori': 'categories',
+    'tags': 'tags', 'etiketler': 'tags', 'atmosphere': 'tags',
+    'price_level': 'price_level', 'price': 'price_level', 'fiyat': 'price_level',
+    'latitude': 'latitude', 'lat': 'latitude', 'enlem': 'latitude',
+    'longitude': 'longitude', 'lon': 'longitude', 'lng': 'longitude', 'boylam': 'longitude',
+    'description': 'description', 'short_description': 'short_description',
+    'photos': 'photos', 'hours': 'hours', 'menu_link': 'menu_link', 'website': 'menu_link',
+}
+LIST_FIELDS = ('categories', 'tags', 'photos')
+TEXT_LIMITS = {'name': 200, 'address': 300, 'city': 100, 'short_description': 300}
+IMPORT_FIELDS = [
+    'name', 'address', 'city', 'categories', 'tags', 'price_level', 'latitude', 'longitude',
+    'description', 'short_description', 'photos', 'hours', 'menu_link',
+]
+
+_LIST_SPLIT = re.compile(r'[,;|]')
+_NON_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+class RowError(ValueError):
+    pass
+
+
+def tr_lower(value):
+    """Türkçe büyük I/İ'yi doğru küçülten lower()"""
+    return value.replace('I', 'ı').replace('İ', 'i').lower()
+
+
+def normalize_text(value):
+    """Tekilleştirme anahtarı: küçük harf, noktalama yok, tek boşluk"""
+    return ' '.join(_NON_WORD.sub(' ', tr_lower(value or '')).split())
+
+
+def normalize_address(value):
+    words = normalize_text(value).split()
+    return ' '.join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+
+
+# --- Satır normalleştirme (worker'larda çalışır) ---
+
+def _clean_text(value, field):
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        value = str(value)
+    value = ' '.join(value.split())
+    limit = TEXT_LIMITS.get(field)
+    return value[:limit] if limit else value
+
+
+def _split_list(value, aliases=None):
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.startswith('['):
+            try:
+                value = json.loads(stripped)
+            except ValueError:
+                value = _LIST_SPLIT.split(stripped)
+        else:
+            value = _LIST_SPLIT.split(stripped)
+    if not isinstance(value, (list, tuple)):
+        raise RowError('liste bekleniyordu')
+    result = []
+    for item in value:
+        if not isinstance(item, str):
+            continue
+        item = ' '.join(tr_lower(item).split())
+        item = (aliases or {}).get(item, item)
+        if item and item not in result:
+            result.append(item)
+    return result
+
+
+def _coordinate(value, field, low, high):
+    if value is None or value == '':
+        return None
+    try:
+        number = Decimal(str(value).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise RowError(f'{field} sayısal değil: {value!r}')
+    if not number.is_finite() or not low <= number <= high:
+        raise RowError(f'{field} aralık dışında: {value}')
+    return number.quantize(Decimal('0.000001'))
+
+
+def normalize_row(raw):
+    """
+    Ham satırı (dict) Place alanlarına çevirir
+
+    Returns:
+        dict: sadece dosyada dolu gelen alanlar
+    Raises:
+        RowError: satır kullanılamıyorsa
+    """
+    if not isinstance(raw, dict):
+        raise RowError('satır bir nesne değil')
+    row = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(tr_lower(str(key)).strip())
+        if field and field not in row and value not in (None, ''):
+            row[field] = value
+
+    fields = {}
+    for field in ('name', 'address', 'city', 'description', 'short_description'):
+        if field in row:
+            fields[field] = _clean_text(row[field], field)
+    if not fields.get('name'):
+        raise RowError('name zorunlu')
+    if not fields.get('city'):
+        raise RowError('city zorunlu')
+
+    if 'price_level' in row:
+        price = PRICE_ALIASES.get(tr_lower(str(row['price_level'])).strip())
+        if price is None:
+            raise RowError(f'geçersiz fiyat seviyesi: {row["price_level"]!r}')
+        fields['price_level'] = price
+
+    if 'categories' in row:
+        fields['categories'] = _split_list(row['categories'], CATEGORY_ALIASES)
+    if 'tags' in row:
+        fields['tags'] = _split_list(row['tags'])
+    if 'photos' in row:
+        fields['photos'] = [url for url in _split_list(row['photos']) if url.startswith(('http://', 'https://'))]
+
+    latitude = _coordinate(row.get('latitude'), 'latitude', -90, 90)
+    longitude = _coordinate(row.get('longitude'), 'longitude', -180, 180)
+    if (latitude is None) != (longitude is None):
+        raise RowError('latitude ve longitude birlikte verilmeli')
+    if latitude is not None:
+        if latitude == 0 and longitude == 0:
+            raise RowError('koordinat 0,0')
+        fields['latitude'] = latitude
+        fields['longitude'] = longitude
+
+    if 'hours' in row:
+        hours = row['hours']
+        if isinstance(hours, str):
+            try:
+                hours = json.loads(hours)
+            except ValueError:
+                raise RowError('hours JSON nesnesi olmalı')
+        if not isinstance(hours, dict):
+            raise RowError('hours JSON nesnesi olmalı')
+        fields['hours'] = hours
+
+    if 'menu_link' in row:
+        link = str(row['menu_link']).strip()
+        if link.startswith(('http://', 'https://')) and len(link) <= 200:
+            fields['menu_link'] = link
+    return fields
+
+
+def normalize_chunk(records):
+    """
+    Worker girişi: [(satır no, ham)] -> [(satır no, alanlar veya None, hata veya None, ham özet)]
+    JSONL satırları burada çözülür
+    """
+    results = []
+    for row_number, raw in records:
+        try:
+            if isinstance(raw, str):
+                try:
+                    raw = json.loads(raw)
+                except ValueError as e:
+                    raise RowError(f'geçersiz JSON: {e}')
+            results.append((row_number, normalize_row(raw), None, None))
+        except RowError as e:
+            excerpt = raw if isinstance(raw, str) else json.dumps(raw, ensure_ascii=False, default=str)
+            results.append((row_number, None, str(e), excerpt[:RAW_EXCERPT]))
+    return results
+
+
+# --- Dosya okuma ---
+
+def open_source(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+    return open(path, 'r', encoding='utf-8-sig', newline='')
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_records(handle, file_format, fieldnames=None):
+    """
+    (satır no, ham kayıt, kayıttan sonraki dosya konumu) üretir
+    readline() kullanılır ki tell() her kayıttan sonra geçerli olsun
+    """
+    def lines():
+        while True:
+            line = handle.readline()
+            if not line:
+                return
+            yield line
+
+    if file_format == 'jsonl':
+        for line in lines():
+            if line.strip():
+                yield line, handle.tell()
+        return
+
+    reader = csv.reader(lines())
+    if fieldnames is None:
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return
+        yield fieldnames, handle.tell()
+    for values in reader:
+        if not any(values):
+            continue
+        yield dict(zip(fieldnames, values)), handle.tell()
+
+
+# --- Tekilleştirme ---
+
+def _cell(latitude, longitude):
+    return (math.floor(float(latitude) / GRID_DEGREES), math.floor(float(longitude) / GRID_DEGREES))
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(min(1.0, a)))
+
+
+class PlaceMatcher:
+    """Ad + adres ve ad + yakınlık indeksleri (mevcut katalog + bu içe aktarmada yazılanlar)"""
+
+    def __init__(self, radius_m=DEDUPE_RADIUS_M):
+        self.radius_m = radius_m
+        self.by_name_address = {}
+        self.by_cell = {}
+
+    @classmethod
+    def from_database(cls, radius_m=DEDUPE_RADIUS_M):
+        matcher = cls(radius_m)
+        rows = Place.objects.order_by().values_list('id', 'name', 'address', 'latitude', 'longitude')
+        for place_id, name, address, latitude, longitude in rows.iterator(chunk_size=5000):
+            matcher.add(place_id, name, address, latitude, longitude)
+        return matcher
+
+    def add(self, place_id, name, address, latitude, longitude):
+        name_key = normalize_text(name)
+        address_key = normalize_address(address)
+        if address_key:
+            self.by_name_address[(name_key, address_key)] = place_id
+        if latitude is not None and longitude is not None:
+            self.by_cell.setdefault(_cell(latitude, longitude), []).append(
+                (place_id, name_key, float(latitude), float(longitude))
+            )
+
+    def match(self, name, address, latitude=None, longitude=None):
+        name_key = normalize_text(name)
+        address_key = normalize_address(address)
+        if address_key:
+            place_id = self.by_name_address.get((name_key, address_key))
+            if place_id is not None:
+                return place_id
+        if latitude is None or longitude is None:
+            return None
+        row, col = _cell(latitude, longitude)
+        best = None
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for place_id, other_name, other_lat, other_lon in self.by_cell.get((row + d_row, col + d_col), ()):
+                    if other_name != name_key:
+                        continue
+                    distance = distance_m(latitude, longitude, other_lat, other_lon)
+                    if distance <= self.radius_m and (best is None or distance < best[0]):
+                        best = (distance, place_id)
+        return best[1] if best else None
+
+
+# --- Yazma ---
+
+def upsert_chunk(rows, matcher):
+    """
+    Normalleştirilmiş satırları tek transaction'da yazar
+
+    Returns:
+        dict: {'created', 'updated', 'merged'} - merged: aynı parçada birleşen satırlar
+    """
+    existing_targets = {}  # place_id -> alanlar
+    new_targets = []       # [alanlar]
+    new_index = PlaceMatcher(matcher.radius_m)
+    merged = 0
+
+    for fields in rows:
+        location = (fields.get('latitude'), fields.get('longitude'))
+        place_id = matcher.match(fields['name'], fields.get('address', ''), *location)
+        if place_id is not None:
+            if place_id in existing_targets:
+                merged += 1
+            existing_targets.setdefault(place_id, {}).update(fields)
+            continue
+        position = new_index.match(fields['name'], fields.get('address', ''), *location)
+        if position is not None:
+            new_targets[position].update(fields)
+            merged += 1
+            continue
+        new_index.add(len(new_targets), fields['name'], fields.get('address', ''), *location)
+        new_targets.append(dict(fields))
+
+    with transaction.atomic():
+        updated = []
+        if existing_targets:
+            places = Place.objects.in_bulk(list(existing_targets))
+            for place_id, fields in existing_targets.items():
+                place = places.get(place_id)
+                if place is None:
+                    # Bu arada silinmiş; yeni mekan olarak eklenir
+                    new_targets.append(fields)
+                    continue
+                for field, value in fields.items():
+                    setattr(place, field, value)
+                updated.append(place)
+            Place.objects.bulk_create(
+                updated,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=IMPORT_FIELDS + ['updated_at'],
+                batch_size=500,
+            )
+
+        created = [Place(**fields) for fields in new_targets]
+        Place.objects.bulk_create(created, batch_size=500)
+
+    for place in created:
+        matcher.add(place.id, place.name, place.address, place.latitude, place.longitude)
+    for place in updated:
+        matcher.add(place.id, place.name, place.address, place.latitude, place.longitude)
+    return {'created': len(created), 'updated': len(updated), 'merged': merged}
+
+
+# --- Checkpoint ---
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def load_checkpoint(path, signature):
+    try:
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get('source') != signature:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+# --- Ana akış ---
+
+def _chunked(records, start_row, chunk_size):
+    """(ilk satır no, [(satır no, ham)], parça sonrası konum) parçaları"""
+    chunk = []
+    row_number = start_row
+    offset = None
+    for raw, offset in records:
+        row_number += 1
+        chunk.append((row_number, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk, row_number, offset
+            chunk = []
+    if chunk:
+        yield chunk, row_number, offset
+
+
+def import_places(path, file_format=None, workers=1, chunk_size=CHUNK_SIZE, checkpoint_path=None,
+                  resume=False, error_path=None, dry_run=False, radius_m=DEDUPE_RADIUS_M, progress=None):
+    """
+    CSV/JSONL mekan dökümünü içe aktarır
+
+    Returns:
+        dict: {'rows', 'created', 'updated', 'merged', 'errors', 'resumed_from'}
+    """
+    file_format = file_format or detect_format(path)
+    signature = source_signature(path)
+    checkpoint_path = checkpoint_path or f'{path}.checkpoint.json'
+    error_path = error_path or f'{path}.errors.csv'
+    report = progress or (lambda totals: None)
+
+    checkpoint = load_checkpoint(checkpoint_path, signature) if resume else None
+    totals = dict(checkpoint['totals']) if checkpoint else {'rows': 0, 'created': 0, 'updated': 0, 'merged': 0, 'errors': 0}
+    resumed_from = checkpoint['rows'] if checkpoint else 0
+    fieldnames = checkpoint.get('fieldnames') if checkpoint else None
+
+    matcher = PlaceMatcher.from_database(radius_m)
+    handle = open_source(path)
+    error_file = open(error_path, 'a' if checkpoint else 'w', encoding='utf-8', newline='')
+    error_writer = csv.writer(error_file)
+    if not checkpoint:
+        error_writer.writerow(['row', 'error', 'raw'])
+
+    executor = None
+    try:
+        if checkpoint:
+            handle.seek(checkpoint['offset'])
+        records = iter_records(handle, file_format, fieldnames)
+        if file_format == 'csv' and fieldnames is None:
+            header = next(records, None)
+            if header is None:
+                return dict(totals, resumed_from=resumed_from)
+            fieldnames = header[0]
+
+        def process(results, last_row, offset):
+            valid = [fields for _, fields, error, _ in results if error is None]
+            for row_number, _, error, excerpt in results:
+                if error is not None:
+                    error_writer.writerow([row_number, error, excerpt])
+            error_file.flush()
+            if valid and not dry_run:
+                written = upsert_chunk(valid, matcher)
+                for key in ('created', 'updated', 'merged'):
+                    totals[key] += written[key]
+            totals['rows'] = last_row
+            totals['errors'] += len(results) - len(valid)
+            if not dry_run:
+                save_checkpoint(checkpoint_path, {
+                    'source': signature,
+                    'format': file_format,
+                    'fieldnames': fieldnames,
+                    'rows': last_row,
+                    'offset': offset,
+                    'totals': totals,
+                })
+            report(dict(totals))
+
+        chunks = _chunked(records, resumed_from, chunk_size)
+        if workers > 1:
+            # Worker'lar DB'ye dokunmaz ama miras bağlantı paylaşılmasın
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+            pending = deque()
+            for chunk, last_row, offset in chunks:
+                pending.append((executor.submit(normalize_chunk, chunk), last_row, offset))
+                # Bellek sınırı: en fazla workers * 2 parça beklemede
+                while len(pending) >= workers * 2:
+                    future, done_row, done_offset = pending.popleft()
+                    process(future.result(), done_row, done_offset)
+            while pending:
+                future, done_row, done_offset = pending.popleft()
+                process(future.result(), done_row, done_offset)
+        else:
+            for chunk, last_row, offset in chunks:
+                process(normalize_chunk(chunk), last_row, offset)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        handle.close()
+        error_file.close()
+
+    return dict(totals, resumed_from=resumed_from)
@@ -0,0 +1,416 @@
+"""
+Katalog Snapshot'ı - Worker'lar arasında paylaşılan, mmap ile açılan ikili dosya
+
+Vektörel skorlama, mekansal indeks veya ANN yapıları kuran her gunicorn
+worker'ının kataloğu DB'den ayrı ayrı okuması yerine tek bir sürümlü dosya
+yazılır (python manage.py build_catalogue_snapshot). Worker'lar dosyayı salt
+okunur mmap ile açar: N worker aynı page cache kopyasını paylaşır, açılış
+milisaniyeler sürer, sayfalar ancak dokunulunca okunur.
+
+Dosya düzeni:
+    MAGIC (8 bayt) | header uzunluğu (uint32, little-endian) | JSON header | bölümler
+    Her bölüm ALIGNMENT baytına hizalıdır; header'da {ad: dtype, shape, offset} tutulur.
+
+Bölümler (satır i = place_ids[i], ID'ye göre sıralı):
+    place_ids      int64 (n,)
+    coordinates    float32 (n, 2) - enlem/boylam, bilinmiyorsa NaN
+    category_bits  uint64 (n, w) - header'daki categories sözlüğüne göre multi-hot
+    tag_bits       uint64 (n, w) - header'daki tags sözlüğüne göre multi-hot
+    price_level    int8 (n,) - PRICE_LEVELS indeksi, bilinmiyorsa -1
+    avg_rating     float32 (n,)
+    visit_count    int32 (n,)
+    open_hours     uint32 (n, 7) - gün başına 24 bitlik açık saat maskesi (0 = Pazartesi)
+    hours_known    bool (n,) - hours alanı dolu ve çözülebilir mi
+
+Sürüm değişimi cf_model ile aynıdır (versioned_files): yeni dosya tamamen
+yazıldıktan sonra CURRENT atomik olarak değiştirilir; açık snapshot'lar eski
+dosyayı (silinse bile) kullanmaya devam eder, yeni çağrılar yeni sürümü alır.
+
+Kullananlar: nearby_places (within_radius ön filtresi) ve bağlamsal öneriler
+(is_open saat filtresi). Snapshot yoksa ikisi de DB'den çalışır.
+
+Ayarlar (settings.CATALOGUE_SNAPSHOT):
+    DIR: Snapshot dizini
+    RELOAD_INTERVAL: CURRENT en fazla bu sıklıkla (saniye) kontrol edilir
+    KEEP: Yazarken tutulacak eski sürüm sayısı
+"""
+import json
+import mmap
+import os
+import re
+import struct
+
+import numpy as np
+from django.db.models import Avg, Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.app_settings import merged_settings
+from visits.models import Visit
+from .models import Place
+from .versioned_files import VersionedFileLoader, new_version, publish_version
+
+
+DEFAULT_SETTINGS = {
+    'DIR': 'catalogue_snapshot',
+    'RELOAD_INTERVAL': 30,
+    'KEEP': 3,
+}
+
+MAGIC = b'MKCATv01'
+ALIGNMENT = 64
+SNAPSHOT_SUFFIX = '.snap'
+PRICE_LEVELS = ['₺', '₺₺', '₺₺₺']
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ALL_DAY = (1 << 24) - 1
+HOUR_RANGE = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*-\s*(\d{1,2})(?::(\d{2}))?')
+CLOSED_WORDS = ('kapalı', 'closed')
+ALWAYS_OPEN_WORDS = ('24 saat', '7/24', '24/7', '24 hours')
+# float32 koordinat yuvarlaması sınırdaki mekanları ön filtrede düşürmesin
+RADIUS_MARGIN_KM = 0.05
+
+
+def get_snapshot_settings():
+    return merged_settings('CATALOGUE_SNAPSHOT', DEFAULT_SETTINGS)
+
+
+# --- Satırları kodlama ---
+
+def parse_opening_hours(hours):
+    """
+    {'monday': '09:00-22:00', ...} -> (7 günlük saat maskesi, çözülebildi mi)
+
+    Gece yarısını geçen aralıklar ('18:00-02:00') ertesi güne taşar;
+    başlangıç saati dakikası olsa da o saat açık sayılır.
+    """
+    masks = [0] * 7
+    if not isinstance(hours, dict) or not hours:
+        return masks, False
+
+    known = False
+    for day, value in hours.items():
+        if not isinstance(day, str) or day.strip().lower() not in WEEKDAYS or not isinstance(value, str):
+            continue
+        weekday = WEEKDAYS.index(day.strip().lower())
+        text = value.strip().lower()
+        if any(word in text for word in CLOSED_WORDS):
+            known = True
+            continue
+        if any(word in text for word in ALWAYS_OPEN_WORDS):
+            masks[weekday] = ALL_DAY
+            known = True
+            continue
+        for match in HOUR_RANGE.finditer(text):
+            start, end = int(match.group(1)), int(match.group(3))
+            end_minutes = int(match.group(4) or 0)
+            if start > 24 or end > 24:
+                continue
+            # Bitiş saati dahil değil; '22:30' bitişi 22 saatini de açık sayar
+            end = end + 1 if end_minutes else end
+            known = True
+            if end <= start:
+                end += 24
+            for hour in range(start, min(end, start + 24)):
+                day_offset, bit = divmod(hour, 24)
+                masks[(weekday + day_offset) % 7] |= 1 << bit
+    return masks, known
+
+
+def _bitset(values, vocabulary, words):
+    row = [0] * words
+    for value in values or []:
+        position = vocabulary.get(value)
+        if position is not None:
+            word, bit = divmod(position, 64)
+            row[word] |= 1 << bit
+    return row
+
+
+def build_sections(place_rows, visit_rows):
+    """
+    Args:
+        place_rows: (id, latitude, longitude, categories, tags, price_level, hours)
+        visit_rows: (place_id, avg_rating, visit_count)
+
+    Returns:
+        tuple: (sections {ad: ndarray}, vocabularies {'categories', 'tags'})
+    """
+    place_rows = sorted(place_rows, key=lambda row: row[0])
+    count = len(place_rows)
+    categories = sorted({c for row in place_rows for c in (row[3] or []) if isinstance(c, str)})
+    tags = sorted({t for row in place_rows for t in (row[4] or []) if isinstance(t, str)})
+    category_index = {value: i for i, value in enumerate(categories)}
+    tag_index = {value: i for i, value in enumerate(tags)}
+    category_words = max(1, -(-len(categories) // 64))
+    tag_words = max(1, -(-len(tags) // 64))
+
+    place_ids = np.fromiter((row[0] for row in place_rows), dtype=np.int64, count=count)
+    coordinates = np.full((count, 2), np.nan, dtype=np.float32)
+    category_bits = np.zeros((count, category_words), dtype=np.uint64)
+    tag_bits = np.zeros((count, tag_words), dtype=np.uint64)
+    price_level = np.full(count, -1, dtype=np.int8)
+    open_hours = np.zeros((count, 7), dtype=np.uint32)
+    hours_known = np.zeros(count, dtype=bool)
+
+    for i, (_, latitude, longitude, place_categories, place_tags, price, hours) in enumerate(place_rows):
+        if latitude is not None and longitude is not None:
+            coordinates[i] = (float(latitude), float(longitude))
+        category_bits[i] = _bitset(place_categories, category_index, category_words)
+        tag_bits[i] = _bitset(place_tags, tag_index, tag_words)
+        if price in PRICE_LEVELS:
+            price_level[i] = PRICE_LEVELS.index(price)
+        masks, known = parse_opening_hours(hours)
+        open_hours[i] = masks
+        hours_known[i] = known
+
+    avg_rating = np.zeros(count, dtype=np.float32)
+    visit_count = np.zeros(count, dtype=np.int32)
+    if count:
+        for place_id, avg, visits in visit_rows:
+            position = np.searchsorted(place_ids, place_id)
+            if position < count and place_ids[position] == place_id:
+                avg_rating[position] = avg or 0.0
+                visit_count[position] = visits
+
+    sections = {
+        'place_ids': place_ids,
+        'coordinates': coordinates,
+        'category_bits': category_bits,
+        'tag_bits': tag_bits,
+        'price_level': price_level,
+        'avg_rating': avg_rating,
+        'visit_count': visit_count,
+        'open_hours': open_hours,
+        'hours_known': hours_known,
+    }
+    return sections, {'categories': categories, 'tags': tags}
+
+
+# --- Dosya yazma ---
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(path, sections, vocabularies, meta=None):
+    """Bölümleri tek bir hizalı ikili dosyaya yazar (önce .tmp, sonra rename)"""
+    sections = {name: np.ascontiguousarray(array) for name, array in sections.items()}
+    base = ALIGNMENT
+    while True:
+        # Offset'ler header boyutuna bağlı; header sığana kadar taban büyütülür
+        layout = {}
+        offset = base
+        for name, array in sections.items():
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+        header = {'sections': layout, 'vocabularies': vocabularies, 'meta': meta or {}}
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        if len(MAGIC) + 4 + len(encoded) <= base:
+            break
+        base = _aligned(len(MAGIC) + 4 + len(encoded))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(encoded)))
+        f.write(encoded)
+        for name, array in sections.items():
+            f.seek(layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return offset
+
+
+def build_catalogue_snapshot(directory=None, keep=None):
+    """
+    Katalogu DB'den okuyup yeni sürüm yazar ve CURRENT'ı atomik olarak günceller
+
+    Returns:
+        dict: {'version', 'path', 'places', 'bytes', 'removed'}
+    """
+    config = get_snapshot_settings()
+    directory = str(directory or config['DIR'])
+    keep = config['KEEP'] if keep is None else keep
+    os.makedirs(directory, exist_ok=True)
+
+    # Okumadan önceki an: bundan sonra güncellenen mekanlar snapshot'ta eski olabilir
+    read_at = timezone.now()
+    place_rows = Place.objects.order_by('id').values_list(
+        'id', 'latitude', 'longitude', 'categories', 'tags', 'price_level', 'hours'
+    ).iterator(chunk_size=2000)
+    visit_rows = Visit.objects.values('place_id').annotate(
+        avg_rating=Avg('rating'), visit_count=Count('id')
+    ).values_list('place_id', 'avg_rating', 'visit_count')
+    sections, vocabularies = build_sections(list(place_rows), list(visit_rows))
+
+    version = new_version()
+    path = os.path.join(directory, version + SNAPSHOT_SUFFIX)
+    size = write_snapshot(path, sections, vocabularies, {
+        'version': version,
+        'built_at': timezone.now().isoformat(),
+        'read_at': read_at.isoformat(),
+        'places': len(sections['place_ids']),
+    })
+    publish_version(directory, version)
+
+    return {
+        'version': version,
+        'path': path,
+        'places': len(sections['place_ids']),
+        'bytes': size,
+        'removed': _prune(directory, version, keep),
+    }
+
+
+def _prune(directory, current, keep):
+    # Açık mmap'ler silinen dosyayı kullanmaya devam eder (inode kapanana kadar yaşar)
+    versions = sorted(
+        name[:-len(SNAPSHOT_SUFFIX)] for name in os.listdir(directory)
+        if name.startswith('v') and name.endswith(SNAPSHOT_SUFFIX) and name[:-len(SNAPSHOT_SUFFIX)] != current
+    )
+    stale = versions[:max(0, len(versions) - keep)]
+    for version in stale:
+        try:
+            os.remove(os.path.join(directory, version + SNAPSHOT_SUFFIX))
+        except OSError:
+            pass
+    return len(stale)
+
+
+# --- Okuma ---
+
+class CatalogueSnapshot:
+    """
+    Salt okunur mmap üzerinde bölüm görünümleri (kopya yok)
+
+    Bölümler attribute olarak erişilir: snapshot.place_ids, snapshot.coordinates, ...
+    """
+
+    def __init__(self, path, version):
+        self.version = version
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'Geçersiz snapshot dosyası: {path}')
+        (header_length,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start:start + header_length].decode('utf-8'))
+
+        self.meta = header['meta']
+        self.categories = header['vocabularies']['categories']
+        self.tags = header['vocabularies']['tags']
+        self._category_index = {value: i for i, value in enumerate(self.categories)}
+        self._tag_index = {value: i for i, value in enumerate(self.tags)}
+        self.sections = {}
+        for name, spec in header['sections'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=spec['offset'])
+            self.sections[name] = array.reshape(spec['shape'])
+
+    def __getattr__(self, name):
+        sections = self.__dict__.get('sections', {})
+        if name in sections:
+            return sections[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.sections['place_ids'])
+
+    def positions(self, place_ids):
+        """
+        Returns:
+            tuple: (satır indeksleri, snapshot'ta bulunan mi maskesi)
+        """
+        wanted = np.asarray(list(place_ids), dtype=np.int64)
+        ids = self.sections['place_ids']
+        if not len(ids):
+            return np.zeros(len(wanted), dtype=np.int64), np.zeros(len(wanted), dtype=bool)
+        positions = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        return positions, ids[positions] == wanted
+
+    def is_open(self, weekday, hour, unknown=True):
+        """Gün (0 = Pazartesi) ve saatte açık olanların maskesi; saati bilinmeyenler `unknown`"""
+        mask = (self.sections['open_hours'][:, weekday] >> np.uint32(hour)) & np.uint32(1)
+        return np.where(self.sections['hours_known'], mask.astype(bool), unknown)
+
+    def within_radius(self, latitude, longitude, km):
+        """Haversine mesafesi `km` içinde kalanların maskesi (koordinatsızlar hariç)"""
+        coords = np.radians(self.sections['coordinates'].astype(np.float64))
+        lat, lon = np.radians(latitude), np.radians(longitude)
+        a = (
+            np.sin((coords[:, 0] - lat) / 2) ** 2 +
+            np.cos(lat) * np.cos(coords[:, 0]) * np.sin((coords[:, 1] - lon) / 2) ** 2
+        )
+        distance = 2 * 6371.0 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+        return np.nan_to_num(distance, nan=np.inf) <= km
+
+
+_loader = VersionedFileLoader(CatalogueSnapshot, get_snapshot_settings, suffix=SNAPSHOT_SUFFIX)
+
+
+def get_catalogue_snapshot():
+    """
+    Process içinde açık snapshot'ı döner (yoksa None)
+    İlk çağrıda tembel açılır; CURRENT değişince yeni sürüme geçilir
+    """
+    return _loader.get()
+
+
+def place_ids_within_radius(latitude, longitude, km):
+    """
+    Yarıçap içindeki mekan ID'leri için ön filtre (snapshot yoksa None)
+
+    Snapshot okunduktan sonra eklenen/güncellenen mekanlar da döner; kesin
+    mesafe ve silinmiş mekanların elenmesi çağıran tarafta yapılır.
+    """
+    snapshot = get_catalogue_snapshot()
+    read_at = parse_datetime(snapshot.meta.get('read_at') or '') if snapshot is not None else None
+    if read_at is None:
+        return None
+    place_ids = set(snapshot.place_ids[snapshot.within_radius(latitude, longitude, km + RADIUS_MARGIN_KM)].tolist())
+    place_ids.update(Place.objects.filter(updated_at__gte=read_at).values_list('id', flat=True))
+    return place_ids
+
+
+def open_mask(place_ids, weekday, hour):
+    """
+    Returns:
+        dict: {place_id: o gün/saatte açık mı} - snapshot yoksa veya mekan
+        snapshot'ta yoksa/saatleri bilinmiyorsa True
+    """
+    snapshot = get_catalogue_snapshot()
+    place_ids = list(place_ids)
+    if snapshot is None or not place_ids:
+        return {place_id: True for place_id in place_ids}
+    positions, found = snapshot.positions(place_ids)
+    is_open = snapshot.is_open(weekday, hour)[positions] | ~found
+    return dict(zip(place_ids, is_open.tolist()))
+
+
+def place_open_mask(places, weekday, hour):
+    """
+    Yüklenmiş Place objeleri için open_mask
+
+    Snapshot okunduktan sonra güncellenen mekanların (snapshot yoksa hepsinin)
+    saatleri place.hours'tan çözülür; diğerleri snapshot'tan okunur.
+
+    Returns:
+        dict: {place_id: o gün/saatte açık mı} - saatleri bilinmeyenler True
+    """
+    snapshot = get_catalogue_snapshot()
+    read_at = parse_datetime(snapshot.meta.get('read_at') or '') if snapshot is not None else None
+    mask = {}
+    snapshot_ids = []
+    for place in places:
+        if read_at is not None and place.updated_at is not None and place.updated_at < read_at:
+            snapshot_ids.append(place.id)
+            continue
+        masks, known = parse_opening_hours(place.hours)
+        mask[place.id] = not known or bool((masks[weekday] >> hour) & 1)
+    mask.update(open_mask(snapshot_ids, weekday, hour))
+    return mask
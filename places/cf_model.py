@@ -0,0 +1,335 @@
+"""
+İşbirlikçi Filtreleme (Collaborative Filtering) - Örtük geri bildirimle ALS
+
+Kullanıcı x mekan etkileşim matrisi PlacePreference (like/save/dislike) ve
+Visit (rating) kayıtlarından kurulur ve Hu-Koren-Volinsky implicit ALS ile
+çarpanlarına ayrılır:
+
+    p_ui = 1 (ağırlık > 0) / 0 (ağırlık <= 0)
+    c_ui = 1 + ALPHA * |ağırlık|
+
+Gözlenmemiş hücreler p=0, c=1 kabul edilir. Her yarım adımda kullanıcı başına
+normal denklemler parça parça (einsum + reduceat) kurulur ve np.linalg.solve
+ile toplu çözülür ('exact') ya da önceki çözümden başlayan birkaç eşlenik
+gradyan adımıyla yaklaşık çözülür ('cg', varsayılan - O(nnz * k)).
+Satır başına Python döngüsü yoktur.
+
+Çarpanlar sürümlü bir dizine .npy olarak yazılır, CURRENT dosyası atomik olarak
+yeni sürümü gösterir. Servis eden process dosyaları mmap ile tembel açar;
+adayların skoru tek bir matris-vektör çarpımıdır.
+
+Ayarlar (settings.CF_MODEL):
+    DIR: Model dizini
+    FACTORS / ITERATIONS / REGULARIZATION / ALPHA: Eğitim parametreleri
+    WEIGHT: Ranker'da CF skorunun ağırlığı (0 ise kullanılmaz)
+    RELOAD_INTERVAL: CURRENT en fazla bu sıklıkla (saniye) kontrol edilir
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from config.app_settings import merged_settings
+from config.tracing import current_span, traced
+from visits.models import Visit
+from .models import PlacePreference
+from .versioned_files import VersionedFileLoader, new_version, publish_version
+
+
+DEFAULT_SETTINGS = {
+    'DIR': 'cf_model',
+    'FACTORS': 32,
+    'ITERATIONS': 10,
+    'REGULARIZATION': 0.05,
+    'ALPHA': 20.0,
+    'WEIGHT': 0.3,
+    'RELOAD_INTERVAL': 30,
+}
+
+# Etkileşim ağırlıkları
+SWIPE_WEIGHTS = {'like': 1.0, 'save': 0.8, 'dislike': -1.0}
+# Ziyaret: puansız ziyaret zayıf pozitif, her puan basamağı ±RATING_STEP
+VISIT_BASE_WEIGHT = 0.3
+RATING_STEP = 0.35
+
+# Normal denklem parçası başına en fazla etkileşim (nnz x k x k float32 bellek)
+SOLVE_CHUNK_NNZ = 20000
+# Eşlenik gradyan: parça başına etkileşim ve yarım adım başına CG adımı
+CG_CHUNK_NNZ = 200000
+CG_STEPS = 3
+
+
+def get_cf_settings():
+    return merged_settings('CF_MODEL', DEFAULT_SETTINGS)
+
+
+class InteractionMatrix:
+    """
+    CSR düzeninde kullanıcı x mekan matrisi (scipy gerektirmez)
+
+    - user_ids / place_ids: satır/sütun -> gerçek ID (sıralı)
+    - indptr, indices: CSR yapısı
+    - weights: birleşik etkileşim ağırlığı (negatif = olumsuz)
+    """
+
+    def __init__(self, user_idx, place_idx, weights, user_ids, place_ids):
+        self.user_ids = user_ids
+        self.place_ids = place_ids
+
+        order = np.lexsort((place_idx, user_idx))
+        user_idx, place_idx, weights = user_idx[order], place_idx[order], weights[order]
+
+        # Aynı (kullanıcı, mekan) çiftinin ağırlıklarını topla
+        if len(user_idx):
+            new_pair = np.ones(len(user_idx), dtype=bool)
+            new_pair[1:] = (user_idx[1:] != user_idx[:-1]) | (place_idx[1:] != place_idx[:-1])
+            starts = np.flatnonzero(new_pair)
+            weights = np.add.reduceat(weights, starts)
+            user_idx, place_idx = user_idx[starts], place_idx[starts]
+
+        self.indices = place_idx.astype(np.int32)
+        self.weights = weights.astype(np.float32)
+        self.indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user_idx, minlength=len(user_ids)), out=self.indptr[1:])
+        self._row_idx = user_idx.astype(np.int32)
+
+    @property
+    def shape(self):
+        return len(self.user_ids), len(self.place_ids)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def transpose(self):
+        return InteractionMatrix(self.indices, self._row_idx, self.weights, self.place_ids, self.user_ids)
+
+
+def build_interaction_matrix(swipe_rows, visit_rows):
+    """
+    Args:
+        swipe_rows: [(user_id, place_id, action)]
+        visit_rows: [(user_id, place_id, rating)]
+    """
+    users, places, weights = [], [], []
+    for user_id, place_id, action in swipe_rows:
+        weight = SWIPE_WEIGHTS.get(action)
+        if weight is not None:
+            users.append(user_id)
+            places.append(place_id)
+            weights.append(weight)
+    for user_id, place_id, rating in visit_rows:
+        users.append(user_id)
+        places.append(place_id)
+        weights.append(VISIT_BASE_WEIGHT + ((rating - 3) * RATING_STEP if rating else 0.0))
+
+    users = np.asarray(users, dtype=np.int64)
+    places = np.asarray(places, dtype=np.int64)
+    user_ids, user_idx = np.unique(users, return_inverse=True)
+    place_ids, place_idx = np.unique(places, return_inverse=True)
+    return InteractionMatrix(user_idx, place_idx, np.asarray(weights, dtype=np.float32), user_ids, place_ids)
+
+
+def load_interaction_matrix():
+    """PlacePreference ve Visit tablolarından matrisi kurar (2 sorgu)"""
+    swipe_rows = PlacePreference.objects.values_list('user_id', 'place_id', 'action').iterator(chunk_size=10000)
+    visit_rows = Visit.objects.values_list('user_id', 'place_id', 'rating').iterator(chunk_size=10000)
+    return build_interaction_matrix(swipe_rows, visit_rows)
+
+
+def _als_half_step(matrix, fixed, regularization, alpha):
+    """
+    Diğer taraf sabitken satır çarpanlarını çözer:
+        (YtY + Yu^T (Cu - I) Yu + λI) x_u = Yu^T Cu p_u
+    """
+    n_rows = matrix.shape[0]
+    k = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(k, dtype=np.float32)
+    result = np.zeros((n_rows, k), dtype=np.float32)
+
+    counts = np.diff(matrix.indptr)
+    confidence = 1.0 + alpha * np.abs(matrix.weights)
+    preference = (matrix.weights > 0).astype(np.float32)
+
+    row = 0
+    while row < n_rows:
+        # nnz bütçesine sığan satır aralığı
+        end = int(np.searchsorted(matrix.indptr, matrix.indptr[row] + SOLVE_CHUNK_NNZ, side='right')) - 1
+        end = min(max(end, row + 1), n_rows)
+        if counts[row] > SOLVE_CHUNK_NNZ:
+            # Çok popüler satır (Zipf başı): nnz x k x k yerine doğrudan matris çarpımı
+            start, stop = matrix.indptr[row], matrix.indptr[row + 1]
+            factors = fixed[matrix.indices[start:stop]]
+            conf = confidence[start:stop]
+            lhs = gram + (factors * (conf - 1.0)[:, None]).T @ factors
+            rhs = factors.T @ (conf * preference[start:stop])
+            result[row] = np.linalg.solve(lhs, rhs)
+            row += 1
+            continue
+        rows = np.arange(row, end)[counts[row:end] > 0]
+        row = end
+        if not len(rows):
+            continue
+
+        start, stop = matrix.indptr[rows[0]], matrix.indptr[rows[-1] + 1]
+        factors = fixed[matrix.indices[start:stop]]
+        conf = confidence[start:stop]
+        offsets = (matrix.indptr[rows] - start).astype(np.int64)
+
+        weighted = factors * (conf - 1.0)[:, None]
+        lhs = np.add.reduceat(np.einsum('ni,nj->nij', weighted, factors), offsets, axis=0) + gram
+        rhs = np.add.reduceat(factors * (conf * preference[start:stop])[:, None], offsets, axis=0)
+        result[rows] = np.linalg.solve(lhs, rhs[..., None])[..., 0]
+    return result
+
+
+def _als_half_step_cg(matrix, fixed, current, regularization, alpha, steps=CG_STEPS):
+    """
+    Aynı sistemi önceki çözümden başlayan birkaç eşlenik gradyan adımıyla yaklaşık çözer
+    Maliyet O(nnz * k); k x k matris kurulmaz (büyük veri için varsayılan)
+    """
+    n_rows = matrix.shape[0]
+    k = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(k, dtype=np.float32)
+    result = current.copy()
+
+    counts = np.diff(matrix.indptr)
+    result[counts == 0] = 0.0
+    confidence = 1.0 + alpha * np.abs(matrix.weights)
+    preference = (matrix.weights > 0).astype(np.float32)
+
+    row = 0
+    while row < n_rows:
+        end = int(np.searchsorted(matrix.indptr, matrix.indptr[row] + CG_CHUNK_NNZ, side='right')) - 1
+        end = min(max(end, row + 1), n_rows)
+        rows = np.arange(row, end)[counts[row:end] > 0]
+        row = end
+        if not len(rows):
+            continue
+
+        start, stop = matrix.indptr[rows[0]], matrix.indptr[rows[-1] + 1]
+        factors = fixed[matrix.indices[start:stop]]
+        extra = confidence[start:stop] - 1.0
+        offsets = (matrix.indptr[rows] - start).astype(np.int64)
+        owner = np.repeat(np.arange(len(rows)), counts[rows])
+
+        def apply(vectors):
+            # (YtY + λI) v + Σ (c-1) (y·v) y
+            dots = np.einsum('nk,nk->n', factors, vectors[owner]) * extra
+            return vectors @ gram + np.add.reduceat(factors * dots[:, None], offsets, axis=0)
+
+        x = result[rows]
+        b = np.add.reduceat(factors * (confidence[start:stop] * preference[start:stop])[:, None], offsets, axis=0)
+        r = b - apply(x)
+        p = r.copy()
+        rs_old = np.einsum('nk,nk->n', r, r)
+        for _ in range(steps):
+            active = rs_old > 1e-12
+            if not active.any():
+                break
+            ap = apply(p)
+            step = np.where(active, rs_old / np.maximum(np.einsum('nk,nk->n', p, ap), 1e-12), 0.0)
+            x += step[:, None] * p
+            r -= step[:, None] * ap
+            rs_new = np.einsum('nk,nk->n', r, r)
+            p = r + np.where(active, rs_new / np.maximum(rs_old, 1e-12), 0.0)[:, None] * p
+            rs_old = rs_new
+        result[rows] = x
+    return result
+
+
+def train_als(matrix, factors=32, iterations=10, regularization=0.05, alpha=20.0, seed=42,
+              solver='cg', progress=None):
+    """
+    Args:
+        solver: 'cg' (eşlenik gradyan, varsayılan) veya 'exact' (toplu np.linalg.solve)
+
+    Returns:
+        tuple: (user_factors, place_factors) - float32 matrisler
+    """
+    rng = np.random.default_rng(seed)
+    n_users, n_places = matrix.shape
+    user_factors = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+    place_factors = (rng.standard_normal((n_places, factors)) * 0.01).astype(np.float32)
+    transposed = matrix.transpose()
+
+    for iteration in range(iterations):
+        started = time.perf_counter()
+        if solver == 'exact':
+            user_factors = _als_half_step(matrix, place_factors, regularization, alpha)
+            place_factors = _als_half_step(transposed, user_factors, regularization, alpha)
+        else:
+            user_factors = _als_half_step_cg(matrix, place_factors, user_factors, regularization, alpha)
+            place_factors = _als_half_step_cg(transposed, user_factors, place_factors, regularization, alpha)
+        if progress:
+            progress(iteration + 1, time.perf_counter() - started)
+    return user_factors, place_factors
+
+
+def save_model(directory, matrix, user_factors, place_factors, params):
+    """Yeni sürüm dizinine yazar ve CURRENT'ı atomik olarak günceller"""
+    version = new_version()
+    path = os.path.join(directory, version)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'user_ids.npy'), matrix.user_ids)
+    np.save(os.path.join(path, 'place_ids.npy'), matrix.place_ids)
+    np.save(os.path.join(path, 'user_factors.npy'), user_factors)
+    np.save(os.path.join(path, 'place_factors.npy'), place_factors)
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(params, users=matrix.shape[0], places=matrix.shape[1], nnz=matrix.nnz), f)
+    publish_version(directory, version)
+    return version
+
+
+class CFModel:
+    """mmap ile açılmış çarpanlar; skor = kullanıcı vektörü · mekan vektörleri"""
+
+    def __init__(self, path, version):
+        self.version = version
+        self.user_ids = np.load(os.path.join(path, 'user_ids.npy'))
+        self.place_ids = np.load(os.path.join(path, 'place_ids.npy'))
+        self.user_factors = np.load(os.path.join(path, 'user_factors.npy'), mmap_mode='r')
+        self.place_factors = np.load(os.path.join(path, 'place_factors.npy'), mmap_mode='r')
+
+    @staticmethod
+    def _lookup(ids, wanted):
+        positions = np.searchsorted(ids, wanted)
+        positions = np.minimum(positions, len(ids) - 1)
+        return positions, ids[positions] == wanted
+
+    def score(self, user_id, place_ids):
+        """
+        Returns:
+            dict: {place_id: tahmini tercih} - modelde olmayan kullanıcı/mekan için boş/eksik
+        """
+        if not len(self.user_ids) or not len(self.place_ids) or not len(place_ids):
+            return {}
+        row, found = self._lookup(self.user_ids, np.asarray([user_id]))
+        if not found[0]:
+            return {}
+        wanted = np.asarray(list(place_ids), dtype=np.int64)
+        positions, known = self._lookup(self.place_ids, wanted)
+        scores = self.place_factors[positions[known]] @ self.user_factors[row[0]]
+        return dict(zip(wanted[known].tolist(), scores.tolist()))
+
+
+_loader = VersionedFileLoader(CFModel, get_cf_settings)
+
+
+def get_cf_model():
+    """Mevcut modeli döner (yoksa None); CURRENT değişince yeni sürüm açılır"""
+    return _loader.get()
+
+
+@traced('recommendations.cf_score')
+def cf_scores(user_id, place_ids):
+    """Ranker için adayların CF skorları; model yoksa veya WEIGHT 0 ise boş dict"""
+    if not get_cf_settings()['WEIGHT']:
+        return {}
+    model = get_cf_model()
+    if model is None:
+        return {}
+    scores = model.score(user_id, place_ids)
+    current_span().set(candidates=len(place_ids), scored=len(scores))
+    return scores
@@ -1,13 +1,18 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from django.db.models import Q, Exists, OuterRef
 from django.utils import timezone
 from datetime import datetime
 import math
 from .models import Place, PlacePreference, UserBehavior
-from .serializers import PlaceSerializer
+from .serializers import PlaceSerializer, build_place_stats
+from .behavior_log import record_behavior
+from .catalogue_snapshot import place_ids_within_radius
+from .recommendation_slates import request_slate_refresh
+from .trending import get_trending, get_trending_settings
+from .mongo_read_model import discover_query, find_discover, find_nearby, serve_from_read_model
 
 
 @api_view(['GET'])
@@ -29,6 +34,26 @@ def discover_places(request):
     search = request.query_params.get('search', None)  # Normal keşfet sayfası için
     show_all = request.query_params.get('show_all', 'false').lower() == 'true'  # Tüm mekanları göster
     
+    # Read model açıksa filtreleme ve serialize MongoDB'de (sadece swipe listesi SQL'den)
+    def from_read_model():
+        exclude_ids = [] if show_all else list(
+            PlacePreference.objects.filter(user=user).values_list('place_id', flat=True)
+        )
+        places_data, total = find_discover(discover_query(
+            exclude_ids, category=category, price_level=price_level, atmosphere=atmosphere,
+            suitable_for=suitable_for, city=city, mode=mode, search=search
+        ))
+        return Response({
+            'success': True,
+            'places': places_data,
+            'count': len(places_data),
+            'total_available': total
+        })
+    
+    response = serve_from_read_model('discover', from_read_model)
+    if response is not None:
+        return response
+    
     # Eğer show_all=True ise, swipe yapılmış mekanları da göster
     if show_all:
         places = Place.objects.all()
@@ -41,7 +66,6 @@ def discover_places(request):
         # Swipe yapılmamış mekanları getir
         places = Place.objects.exclude(id__in=swiped_place_ids)
     
-    # SQLite uyumlu filtreler
     if price_level:
         places = places.filter(price_level=price_level)
     
@@ -55,33 +79,25 @@ def discover_places(request):
             Q(address__icontains=search)
         )
     
-    # Fotoğrafı olan mekanları önceliklendir
-    places = places.order_by('-created_at')
-    
-    # Queryset'i listeye çevir
-    places_list = list(places)
-    
-    # JSONField filtrelerini Python'da yap (SQLite uyumluluğu için)
-    if category:
-        places_list = [p for p in places_list if category in (p.categories or [])]
+    # JSONField filtreleri SQL'de (PostgreSQL: @> + GIN indeksi, SQLite: json_each)
+    for value in (category, suitable_for, mode):
+        if value:
+            places = places.filter(categories__has_element=value)
     
     if atmosphere:
-        places_list = [p for p in places_list if atmosphere in (p.tags or [])]
-    
-    if suitable_for:
-        places_list = [p for p in places_list if suitable_for in (p.categories or [])]
+        places = places.filter(tags__has_element=atmosphere)
     
-    if mode:
-        places_list = [p for p in places_list if mode in (p.categories or [])]
+    # Fotoğrafı olan mekanları önceliklendir
+    places = places.order_by('-created_at')
     
     # Serialize et
-    serializer = PlaceSerializer(places_list[:20], many=True)  # İlk 20 mekan
+    serializer = PlaceSerializer(places[:20], many=True)  # İlk 20 mekan
     
     return Response({
         'success': True,
         'places': serializer.data,
         'count': len(serializer.data),
-        'total_available': len(places_list)
+        'total_available': places.count()
     })
 
 
@@ -142,11 +158,11 @@ def swipe_place(request):
         'device': request.META.get('HTTP_USER_AGENT', 'unknown')[:50]
     }
     
-    # Behavior kaydı oluştur
-    UserBehavior.objects.create(
-        user=user,
-        place=place,
-        action_type=action_type_map.get(action, 'swipe_like'),
+    # Behavior kaydı oluştur (tamponlu, DB'ye arka planda toplu yazılır)
+    record_behavior(
+        user,
+        place,
+        action_type_map.get(action, 'swipe_like'),
         context=context,
         session_id=request.session.session_key or ''
     )
@@ -176,6 +192,9 @@ def swipe_place(request):
     except Exception as e:
         print(f"Taste profile update error: {e}")
     
+    # Öneri slate'ini arka planda yenile
+    request_slate_refresh(user)
+    
     return Response({
         'success': True,
         'message': f'Mekan {preference.get_action_display()} olarak kaydedildi',
@@ -271,11 +290,29 @@ def nearby_places(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Koordinatı olan mekanları al
+    def from_read_model():
+        nearby = find_nearby(lat, lon, radius, limit, calculate_distance)
+        result_data = [dict(place_data, distance_km=distance) for place_data, distance in nearby]
+        return Response({
+            'success': True,
+            'places': result_data,
+            'count': len(result_data),
+            'center': {'lat': lat, 'lon': lon},
+            'radius': radius
+        })
+    
+    response = serve_from_read_model('nearby', from_read_model)
+    if response is not None:
+        return response
+    
+    # Koordinatı olan mekanları al (katalog snapshot'ı varsa sadece yarıçap içindekiler)
     places = Place.objects.filter(
         latitude__isnull=False,
         longitude__isnull=False
     )
+    nearby_ids = place_ids_within_radius(lat, lon, radius)
+    if nearby_ids is not None:
+        places = places.filter(id__in=nearby_ids)
     
     # Mesafe hesapla ve filtrele
     places_with_distance = []
@@ -313,6 +350,54 @@ def nearby_places(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def trending_places(request):
+    """
+    Şehirde (veya genel) şu an trend olan mekanlar
+    Query params:
+        - city: Şehir (opsiyonel, yoksa tüm şehirler)
+        - window: '1h', '24h' veya '7d' (varsayılan: 24h)
+        - limit: Maksimum sonuç sayısı (varsayılan: 10, 1-50 arası)
+    """
+    config = get_trending_settings()
+    city = request.query_params.get('city', '')
+    window = request.query_params.get('window', config['DEFAULT_WINDOW'])
+    if window not in config['WINDOWS']:
+        return Response(
+            {'success': False, 'error': f"window şunlardan biri olmalı: {', '.join(config['WINDOWS'])}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+    except (ValueError, TypeError):
+        limit = 10
+    
+    ranked, source = get_trending(city or None, window, limit)
+    place_dict = Place.objects.in_bulk([place_id for place_id, _ in ranked])
+    places = [place_dict[place_id] for place_id, _ in ranked if place_id in place_dict]
+    serializer = PlaceSerializer(
+        places,
+        many=True,
+        context={'place_stats': build_place_stats(list(place_dict))}
+    )
+    
+    scores = dict(ranked)
+    result_data = []
+    for place, place_data in zip(places, serializer.data):
+        place_data['trending_score'] = round(scores[place.id], 3)
+        result_data.append(place_data)
+    
+    return Response({
+        'success': True,
+        'places': result_data,
+        'count': len(result_data),
+        'city': city,
+        'window': window,
+        'source': source
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def place_location(request, place_id):
@@ -0,0 +1,347 @@
+"""
+Offline Değerlendirme - Öneri motorlarının kalite / maliyet ölçümü
+
+Geçmiş PlacePreference ve Visit verisi zamana göre bölünür:
+- Eğitim: cutoff'tan önceki etkileşimler (motorlar sadece bunları görür)
+- Test: cutoff'tan sonraki pozitif etkileşimler (like/save swipe'ları ve
+  rating >= POSITIVE_RATING ziyaretler)
+
+Her test kullanıcısı için cutoff sonrası satırlar bir transaction içinde
+gizlenir, zevk profili eğitim verisiyle yeniden hesaplanır, motorlar
+çalıştırılır ve transaction geri alınır (veritabanı değişmez).
+
+Motor arayüzü: callable(user, k) -> sıralı mekan ID listesi
+    rule_based  - recommendations.get_recommendations
+    contextual  - advanced_features.get_contextual_recommendations
+    popular     - Popülerlik baseline'ı (aday indeksi sırası)
+Yeni motorlar dotted path ile eklenir (örn: myapp.engines.my_engine).
+
+Metrikler: precision@k, recall@k, NDCG@k, coverage; sorgu başına
+gecikme (p50/p95/ortalama, ms) ve tepe bellek (tracemalloc, KB).
+
+Bilinen sızıntılar: diğer kullanıcıların cutoff sonrası etkileşimleri,
+aday indeksindeki popülerlik istatistikleri ve eğitilmiş CF modeli
+gizlenmez; motorlar arası karşılaştırma için yeterli, mutlak değerler
+için iyimser kabul edilmeli.
+"""
+import math
+import multiprocessing
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from accounts.models import User, UserTasteProfile
+from accounts.taste_profile import calculate_taste_profile_for_user
+from config.sql_profiling import percentile
+from visits.models import Visit
+from .advanced_features import get_contextual_recommendations
+from .candidates import get_candidate_index
+from .models import Place, PlacePreference
+from .recommendations import get_recommendations
+
+
+POSITIVE_ACTIONS = ('like', 'save')
+POSITIVE_RATING = 4
+DEFAULT_CUTOFF_QUANTILE = 0.8
+
+
+# --- Motorlar ---
+
+def rule_based_engine(user, k):
+    _, results = get_recommendations(user, None, k)
+    return [result['id'] for result in results]
+
+
+def contextual_engine(user, k):
+    return [result['place'].id for result in get_contextual_recommendations(user, limit=k)]
+
+
+def popular_engine(user, k):
+    swiped = set(PlacePreference.objects.filter(user=user).values_list('place_id', flat=True))
+    result = []
+    for place_id in get_candidate_index().popular:
+        if place_id not in swiped:
+            result.append(place_id)
+            if len(result) >= k:
+                break
+    return result
+
+
+ENGINES = {
+    'rule_based': rule_based_engine,
+    'contextual': contextual_engine,
+    'popular': popular_engine,
+}
+
+
+def resolve_engine(name):
+    """Kayıtlı motor adı veya dotted path -> callable(user, k)"""
+    if name in ENGINES:
+        return ENGINES[name]
+    return import_string(name)
+
+
+# --- Zaman bazlı bölme ---
+
+def default_cutoff(quantile=DEFAULT_CUTOFF_QUANTILE):
+    """Tüm swipe/ziyaret zaman damgalarının `quantile` yüzdeliği"""
+    timestamps = PlacePreference.objects.order_by().values_list('timestamp').union(
+        Visit.objects.order_by().values_list('visited_at'), all=True
+    )
+    total = timestamps.count()
+    if not total:
+        return None
+    offset = min(total - 1, int(total * quantile))
+    return timestamps.order_by('timestamp')[offset][0]
+
+
+def held_out_positives(cutoff, user_ids=None):
+    """
+    Cutoff sonrası pozitif etkileşimler
+
+    Returns:
+        dict: {user_id: set(place_id)}
+    """
+    preferences = PlacePreference.objects.filter(timestamp__gt=cutoff, action__in=POSITIVE_ACTIONS)
+    visits = Visit.objects.filter(visited_at__gt=cutoff, rating__gte=POSITIVE_RATING)
+    if user_ids is not None:
+        preferences = preferences.filter(user_id__in=user_ids)
+        visits = visits.filter(user_id__in=user_ids)
+
+    positives = {}
+    for queryset in (preferences, visits):
+        for user_id, place_id in queryset.values_list('user_id', 'place_id'):
+            positives.setdefault(user_id, set()).add(place_id)
+    return positives
+
+
+def select_test_users(cutoff, min_train=1, max_users=None):
+    """
+    Hem eğitim döneminde en az `min_train` etkileşimi hem de test döneminde
+    pozitif etkileşimi olan kullanıcılar
+
+    Returns:
+        dict: {user_id: set(place_id)} (user_id sırasıyla, en fazla max_users)
+    """
+    positives = held_out_positives(cutoff)
+    if min_train > 0 and positives:
+        train_counts = {}
+        for queryset in (
+            PlacePreference.objects.filter(timestamp__lte=cutoff, user_id__in=list(positives)),
+            Visit.objects.filter(visited_at__lte=cutoff, user_id__in=list(positives)),
+        ):
+            for user_id in queryset.values_list('user_id', flat=True):
+                train_counts[user_id] = train_counts.get(user_id, 0) + 1
+        positives = {
+            user_id: places for user_id, places in positives.items()
+            if train_counts.get(user_id, 0) >= min_train
+        }
+    selected = sorted(positives)[:max_users] if max_users else sorted(positives)
+    return {user_id: positives[user_id] for user_id in selected}
+
+
+# --- Metrikler ---
+
+def precision_at_k(recommended, relevant, k):
+    if k <= 0:
+        return 0.0
+    return len(set(recommended[:k]) & relevant) / k
+
+
+def recall_at_k(recommended, relevant, k):
+    if not relevant:
+        return 0.0
+    return len(set(recommended[:k]) & relevant) / len(relevant)
+
+
+def ndcg_at_k(recommended, relevant, k):
+    """İkili alaka düzeyiyle NDCG@k"""
+    dcg = sum(
+        1 / math.log2(position + 2)
+        for position, place_id in enumerate(recommended[:k])
+        if place_id in relevant
+    )
+    ideal = sum(1 / math.log2(position + 2) for position in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+# --- Kullanıcı başına değerlendirme ---
+
+def _hide_future(user_ids, cutoff):
+    """Cutoff sonrası satırları siler ve zevk profillerini eğitim verisiyle yeniden hesaplar"""
+    PlacePreference.objects.filter(user_id__in=user_ids, timestamp__gt=cutoff).delete()
+    Visit.objects.filter(user_id__in=user_ids, visited_at__gt=cutoff).delete()
+    for user in User.objects.filter(id__in=user_ids):
+        if calculate_taste_profile_for_user(user) is None:
+            UserTasteProfile.objects.filter(user=user).delete()
+
+
+def _measure(engine, user, k, memory):
+    started = time.perf_counter()
+    recommended = list(engine(user, k))[:k]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    peak_kb = None
+    if memory:
+        # Ayrı çalıştırma: tracemalloc gecikmeyi şişirmesin
+        tracemalloc.start()
+        try:
+            engine(user, k)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return recommended, elapsed_ms, peak_kb
+
+
+def evaluate_users(user_ids, engine_names, cutoff, k, memory=True):
+    """
+    Verilen kullanıcılar için tüm motorları çalıştırır (veritabanı geri alınır)
+
+    Returns:
+        dict: {user_id: {engine: {'recommended', 'ms', 'peak_kb'} veya {'error'}}}
+    """
+    engines = {name: resolve_engine(name) for name in engine_names}
+    results = {}
+    # İndeks gizleme öncesi kurulsun; aksi halde process içi önbellek bu parçanın görünümünde kalır
+    get_candidate_index()
+    with transaction.atomic():
+        _hide_future(user_ids, cutoff)
+        for user in User.objects.filter(id__in=user_ids).order_by('id'):
+            per_engine = {}
+            for name, engine in engines.items():
+                try:
+                    # Savepoint: hatalı motor dış transaction'ı bozmasın
+                    with transaction.atomic():
+                        recommended, elapsed_ms, peak_kb = _measure(engine, user, k, memory)
+                except Exception as e:
+                    per_engine[name] = {'error': str(e)}
+                    continue
+                per_engine[name] = {'recommended': recommended, 'ms': elapsed_ms, 'peak_kb': peak_kb}
+            results[user.id] = per_engine
+        transaction.set_rollback(True)
+    return results
+
+
+def summarize(results, positives, engine_names, k, catalogue_size):
+    """Kullanıcı sonuçlarını motor başına kalite ve maliyet özetine çevirir"""
+    summary = {}
+    for name in engine_names:
+        precision, recall, ndcg, latencies, peaks = [], [], [], [], []
+        recommended_places = set()
+        errors = 0
+        for user_id, per_engine in results.items():
+            outcome = per_engine.get(name)
+            if outcome is None:
+                continue
+            if 'error' in outcome:
+                errors += 1
+                continue
+            relevant = positives[user_id]
+            recommended = outcome['recommended']
+            precision.append(precision_at_k(recommended, relevant, k))
+            recall.append(recall_at_k(recommended, relevant, k))
+            ndcg.append(ndcg_at_k(recommended, relevant, k))
+            recommended_places.update(recommended)
+            latencies.append(outcome['ms'])
+            if outcome['peak_kb'] is not None:
+                peaks.append(outcome['peak_kb'])
+
+        users = len(precision)
+        summary[name] = {
+            'users': users,
+            'errors': errors,
+            f'precision@{k}': round(sum(precision) / users, 4) if users else 0.0,
+            f'recall@{k}': round(sum(recall) / users, 4) if users else 0.0,
+            f'ndcg@{k}': round(sum(ndcg) / users, 4) if users else 0.0,
+            'coverage': round(len(recommended_places) / catalogue_size, 4) if catalogue_size else 0.0,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            },
+            'peak_kb': {
+                'p50': round(percentile(peaks, 50), 1),
+                'p95': round(percentile(peaks, 95), 1),
+                'max': round(max(peaks), 1) if peaks else 0.0,
+            } if peaks else None,
+        }
+    return summary
+
+
+# --- Worker process'leri ---
+
+_worker_ctx = None
+
+
+def _init_worker(ctx):
+    global _worker_ctx
+    _worker_ctx = ctx
+    # Ana process'ten miras kalan bağlantı paylaşılmasın
+    connections.close_all()
+
+
+def _run_chunk(user_ids):
+    return evaluate_users(user_ids, **_worker_ctx)
+
+
+def _chunks(items, chunk_size):
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def run_evaluation(engine_names, cutoff=None, k=10, min_train=1, max_users=None,
+                   workers=1, chunk_size=20, memory=True, progress=None):
+    """
+    Offline değerlendirmeyi çalıştırır
+
+    Args:
+        engine_names: motor adları veya dotted path'ler
+        cutoff: datetime; None ise etkileşimlerin %80'lik zaman noktası
+        workers: paralel process sayısı (SQLite'ta 1'e düşer)
+        progress: callable(değerlendirilen kullanıcı, toplam) - ilerleme bildirimi
+
+    Returns:
+        dict: {'cutoff', 'k', 'users', 'catalogue_size', 'engines': {ad: özet}}
+    """
+    for name in engine_names:
+        resolve_engine(name)
+    if connection.vendor == 'sqlite':
+        workers = 1
+
+    cutoff = cutoff or default_cutoff()
+    if cutoff is None:
+        raise ValueError('Değerlendirilecek etkileşim yok')
+    positives = select_test_users(cutoff, min_train=min_train, max_users=max_users)
+    catalogue_size = Place.objects.count()
+    report = progress or (lambda done, total: None)
+
+    ctx = {'engine_names': list(engine_names), 'cutoff': cutoff, 'k': k, 'memory': memory}
+    chunks = _chunks(list(positives), chunk_size)
+    results = {}
+    if workers > 1 and len(chunks) > 1:
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(ctx,),
+        )
+        with executor:
+            futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+            for future in futures:
+                results.update(future.result())
+                report(len(results), len(positives))
+    else:
+        for chunk in chunks:
+            results.update(evaluate_users(chunk, **ctx))
+            report(len(results), len(positives))
+
+    return {
+        'cutoff': cutoff.isoformat(),
+        'k': k,
+        'users': len(positives),
+        'catalogue_size': catalogue_size,
+        'engines': summarize(results, positives, engine_names, k, catalogue_size),
+    }
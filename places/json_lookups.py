@@ -0,0 +1,71 @@
+"""
+JSON Liste Lookup'ları - categories/tags gibi JSON dizilerinde eleman filtresi
+
+Django'nun JSONField 'contains' lookup'ı SQLite'ta desteklenmez, 'overlap'
+ise sadece PostgreSQL ArrayField'da vardır; bu yüzden JSON filtreleri
+Python'da yapılıyordu. Bu lookup'lar her veritabanında SQL'e çevrilir:
+
+    Place.objects.filter(categories__has_element='kafe')
+    Place.objects.filter(tags__has_any_element=['sessiz', 'samimi'])
+
+PostgreSQL:  has_element -> categories @> '["kafe"]'::jsonb
+             has_any_element -> tags ?| ARRAY['sessiz', 'samimi']
+             (ikisi de 0013 migration'ındaki GIN indekslerini kullanır)
+SQLite:      EXISTS (SELECT 1 FROM json_each(...) WHERE value = ...)
+
+Elemanlar string kabul edilir (?| sadece string elemanlara bakar).
+PlacesConfig.ready() içinde JSONField'a kaydedilir.
+"""
+import json
+
+from django.db.models import JSONField, Lookup
+
+
+class HasElement(Lookup):
+    """JSON dizisi verilen elemanı içerir (Python: value in liste)"""
+    lookup_name = 'has_element'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        return self.rhs if self.rhs is None else str(self.rhs)
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return (
+            f'EXISTS (SELECT 1 FROM json_each({lhs}) WHERE json_each.value = %s)',
+            (*lhs_params, self.rhs),
+        )
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f'{lhs} @> %s::jsonb', (*lhs_params, json.dumps([self.rhs]))
+
+
+class HasAnyElement(Lookup):
+    """JSON dizisi verilen elemanlardan en az birini içerir (boş liste: hiçbiri)"""
+    lookup_name = 'has_any_element'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        return [str(item) for item in dict.fromkeys(self.rhs or [])]
+
+    def as_sql(self, compiler, connection):
+        if not self.rhs:
+            return '1 = 0', ()
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        placeholders = ', '.join(['%s'] * len(self.rhs))
+        return (
+            f'EXISTS (SELECT 1 FROM json_each({lhs}) WHERE json_each.value IN ({placeholders}))',
+            (*lhs_params, *self.rhs),
+        )
+
+    def as_postgresql(self, compiler, connection):
+        if not self.rhs:
+            return '1 = 0', ()
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f'{lhs} ?| %s::text[]', (*lhs_params, list(self.rhs))
+
+
+def register_json_lookups():
+    JSONField.register_lookup(HasElement)
+    JSONField.register_lookup(HasAnyElement)
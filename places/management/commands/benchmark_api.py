@@ -0,0 +1,134 @@
+"""
+API endpoint'leri için sorgu sayısı / gecikme / boyut benchmark'ı
+Ayrı bir test veritabanı oluşturur, sentetik veri üretir ve JSON baseline yazar
+Usage: python manage.py benchmark_api --scale small --output benchmarks/api.json [--compare eski.json]
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from config.background import stop_background_threads
+from places.benchmark import SCALES, seed_benchmark_data, run_benchmark, compare_results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API route (query count, p50/p95 latency, payload bytes) on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Veri ölçeği (default: small)')
+        for key in SCALES['small']:
+            parser.add_argument(f'--{key}', type=int, default=None, help=f'{key} sayısını ölçekten bağımsız belirle')
+        parser.add_argument('--repeat', type=int, default=10, help='Endpoint başına ölçüm sayısı (default: 10)')
+        parser.add_argument('--warmup', type=int, default=1, help='Ölçülmeyen ısınma isteği sayısı (default: 1)')
+        parser.add_argument('--seed', type=int, default=42, help='Veri üretimi için random seed (default: 42)')
+        parser.add_argument('--only', nargs='*', default=None, help='Sadece bu route adlarını ölç (örn: places_api:discover)')
+        parser.add_argument('--output', default='api_benchmark.json', help='JSON çıktı dosyası (default: api_benchmark.json)')
+        parser.add_argument('--compare', default=None, help='Karşılaştırılacak önceki JSON baseline')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat en az 1 olmalı')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Baseline okunamadı: {e}')
+
+        scale = dict(SCALES[options['scale']])
+        for key in scale:
+            if options[key] is not None:
+                scale[key] = options[key]
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Ölçülen istekten bağımsız sorgu atan arka plan işleri kapalı ya da senkron:
+        # tampon flush'ı, slate yenileme, trend motoru ve akış istatistikleri
+        background_off = override_settings(
+            BEHAVIOR_LOG={**settings.BEHAVIOR_LOG, 'BUFFERED': False},
+            RECOMMENDATION_SLATES={**settings.RECOMMENDATION_SLATES, 'BACKGROUND': False},
+            TRENDING={**settings.TRENDING, 'ENABLED': False},
+            STREAM_STATS={**settings.STREAM_STATS, 'ENABLED': False},
+        )
+        try:
+            with background_off:
+                started = time.perf_counter()
+                ctx = seed_benchmark_data(scale, seed=options['seed'])
+                self.stdout.write(f'Veri üretildi ({time.perf_counter() - started:.1f} sn): {scale}')
+
+                result = run_benchmark(ctx, repeat=options['repeat'], warmup=options['warmup'], only=options['only'])
+        finally:
+            # Kalan thread'ler (aday indeksi yenileme vb.) test DB'si silinmeden durur;
+            # aksi halde gerçek veritabanına yazarlar
+            stop_background_threads()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'scale': options['scale'],
+                'counts': scale,
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'git_commit': self._git_commit(),
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            **result,
+        }
+
+        output_dir = os.path.dirname(options['output'])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+        self._print_table(result)
+        if baseline is not None:
+            self._print_changes(compare_results(baseline, result))
+        self.stdout.write(self.style.SUCCESS(f'✓ Sonuçlar yazıldı: {options["output"]}'))
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _print_table(self, result):
+        self.stdout.write(f'\n{"route":<45} {"method":<6} {"status":>6} {"queries":>7} {"p50 ms":>8} {"p95 ms":>8} {"bytes":>9}')
+        for name, row in sorted(result['endpoints'].items()):
+            line = (
+                f'{name:<45} {row["method"]:<6} {row["status"]:>6} {row["queries"]:>7} '
+                f'{row["p50_ms"]:>8} {row["p95_ms"]:>8} {row["bytes"]:>9}'
+            )
+            self.stdout.write(self.style.ERROR(line) if row['status'] >= 500 else line)
+
+        for name, reason in result['skipped'].items():
+            self.stdout.write(self.style.WARNING(f'Atlandı: {name} ({reason})'))
+        for name in result['uncovered']:
+            self.stdout.write(self.style.WARNING(f'İstek tanımı yok: {name}'))
+
+    def _print_changes(self, changes):
+        if not changes:
+            self.stdout.write(self.style.SUCCESS('\nBaseline ile fark yok'))
+            return
+        self.stdout.write('\nBaseline ile farklar:')
+        for name, metric, old, new in changes:
+            self.stdout.write(self.style.WARNING(f'  {name}: {metric} {old} -> {new}'))
@@ -0,0 +1,38 @@
+"""
+UserBehavior olaylarından mekan behavior_stats / peak_hours / working_suitability hesaplar
+Usage: python manage.py compute_behavior_stats [--full] [--chunk-size 5000]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from places.behavior_stats import compute_behavior_stats
+
+
+class Command(BaseCommand):
+    help = 'Compute per-place behaviour statistics from UserBehavior events (incremental by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Watermark\'ı yok say, ana tablodaki tüm olayları baştan işle'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Tek seferde işlenen olay sayısı (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = compute_behavior_stats(full=options['full'], chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {result["events"]} olay işlendi, {result["places"]} mekan güncellendi '
+                f'(watermark: {result["watermark"]}, {elapsed:.2f}s)'
+            )
+        )
@@ -0,0 +1,97 @@
+"""
+Öneri motorlarını geçmiş veriyle offline değerlendirir (kalite + gecikme/bellek)
+Usage: python manage.py evaluate_recommendations [--engines rule_based contextual popular] [--k 10]
+       python manage.py evaluate_recommendations --cutoff 2024-06-01 --workers 4 --output eval.json
+       python manage.py evaluate_recommendations --engines rule_based myapp.engines.new_engine
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from places.evaluation import ENGINES, default_cutoff, run_evaluation
+
+
+class Command(BaseCommand):
+    help = 'Replay PlacePreference/Visit history with a time split and score recommendation engines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', nargs='+', default=list(ENGINES),
+                            help=f'Motor adları ({", ".join(ENGINES)}) veya dotted path')
+        parser.add_argument('--k', type=int, default=10, help='Değerlendirilen öneri sayısı (default: 10)')
+        parser.add_argument('--cutoff', default=None, help='Eğitim/test sınırı (ISO tarih; default: %%80 zaman noktası)')
+        parser.add_argument('--quantile', type=float, default=0.8, help='--cutoff verilmezse kullanılan yüzdelik')
+        parser.add_argument('--min-train', type=int, default=1, help='Eğitim döneminde gereken en az etkileşim')
+        parser.add_argument('--max-users', type=int, default=None, help='En fazla değerlendirilecek kullanıcı')
+        parser.add_argument('--workers', type=int, default=1, help='Paralel process sayısı (SQLite\'ta 1)')
+        parser.add_argument('--chunk-size', type=int, default=20, help='Worker başına kullanıcı parçası')
+        parser.add_argument('--no-memory', action='store_true', help='tracemalloc ile bellek ölçümünü atla')
+        parser.add_argument('--output', default=None, help='Sonuçların yazılacağı JSON dosyası')
+
+    def handle(self, *args, **options):
+        if options['k'] < 1:
+            raise CommandError('--k en az 1 olmalı')
+        if not 0 < options['quantile'] < 1:
+            raise CommandError('--quantile 0 ile 1 arasında olmalı')
+
+        cutoff = self._parse_cutoff(options['cutoff']) if options['cutoff'] else default_cutoff(options['quantile'])
+        if cutoff is None:
+            raise CommandError('Değerlendirilecek etkileşim yok')
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} kullanıcı değerlendirildi')
+
+        started = time.perf_counter()
+        try:
+            report = run_evaluation(
+                options['engines'],
+                cutoff=cutoff,
+                k=options['k'],
+                min_train=options['min_train'],
+                max_users=options['max_users'],
+                workers=options['workers'],
+                chunk_size=max(1, options['chunk_size']),
+                memory=not options['no_memory'],
+                progress=progress,
+            )
+        except ImportError as e:
+            raise CommandError(f'Motor yüklenemedi: {e}')
+        elapsed = time.perf_counter() - started
+
+        k = options['k']
+        self.stdout.write(
+            f'\nCutoff: {report["cutoff"]}  test kullanıcısı: {report["users"]}  katalog: {report["catalogue_size"]}'
+        )
+        header = (
+            f'{"motor":<28} {"P@" + str(k):>8} {"R@" + str(k):>8} {"NDCG@" + str(k):>9} {"kapsam":>8} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"p95 KB":>9} {"hata":>5}'
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in report['engines'].items():
+            peak = f'{row["peak_kb"]["p95"]:.0f}' if row['peak_kb'] else '-'
+            self.stdout.write(
+                f'{name[-28:]:<28} {row[f"precision@{k}"]:>8.4f} {row[f"recall@{k}"]:>8.4f} '
+                f'{row[f"ndcg@{k}"]:>9.4f} {row["coverage"]:>8.4f} '
+                f'{row["latency_ms"]["p50"]:>8.2f} {row["latency_ms"]["p95"]:>8.2f} {peak:>9} {row["errors"]:>5}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Sonuçlar yazıldı: {options["output"]}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Değerlendirme {elapsed:.1f} sn sürdü'))
+
+    def _parse_cutoff(self, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Geçersiz --cutoff: {value}')
+            parsed = timezone.datetime(day.year, day.month, day.day)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -0,0 +1,70 @@
+"""
+Mekan, ziyaret ve sosyal tabloları analitik için kolon bazlı dosyalara döker
+Usage: python manage.py export_tables [--tables places visits] [--format auto|parquet|npz|csv]
+       python manage.py export_tables --dir /data/exports --workers 6 --chunk-rows 100000
+       python manage.py export_tables --verify exports/20240601-030000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from places.bulk_export import EXPORT_TABLES, FORMATS, run_export, verify_export
+
+
+class Command(BaseCommand):
+    help = 'Export Place, Visit, PlacePreference, UserBehavior (with monthly archives), Friendship and GroupPlan to chunked columnar files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), default=None,
+                            help='Dışa aktarılacak tablolar (default: hepsi)')
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='Dosya biçimi (default: settings.BULK_EXPORT["FORMAT"])')
+        parser.add_argument('--dir', default=None, help='Export dizini (default: settings.BULK_EXPORT["DIR"])')
+        parser.add_argument('--chunk-rows', type=int, default=None, help='Dosya başına satır')
+        parser.add_argument('--workers', type=int, default=None, help='Paralel tablo sayısı')
+        parser.add_argument('--verify', metavar='EXPORT_DIR', default=None,
+                            help='Dışa aktarma yerine mevcut bir export\'u manifest\'e göre doğrula')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            try:
+                problems = verify_export(options['verify'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Manifest okunamadı: {e}')
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(f'  {problem}'))
+            if problems:
+                raise CommandError(f'{len(problems)} sorun bulundu')
+            self.stdout.write(self.style.SUCCESS('✓ Export manifest ile uyumlu'))
+            return
+
+        if options['chunk_rows'] is not None and options['chunk_rows'] < 1:
+            raise CommandError('--chunk-rows en az 1 olmalı')
+
+        def progress(name, entry):
+            self.stdout.write(
+                f'  {name}: {entry["rows"]} satır, {len(entry["files"])} dosya, {entry["seconds"]:.1f} sn'
+            )
+
+        started = time.perf_counter()
+        try:
+            manifest = run_export(
+                tables=options['tables'],
+                directory=options['dir'],
+                file_format=options['format'],
+                chunk_rows=options['chunk_rows'],
+                workers=options['workers'],
+                progress=progress,
+            )
+        except ImportError as e:
+            raise CommandError(str(e))
+        except FileExistsError as e:
+            raise CommandError(f'Export dizini zaten var: {e.filename}')
+        elapsed = time.perf_counter() - started
+
+        total_rows = sum(entry['rows'] for entry in manifest['tables'].values())
+        total_bytes = sum(item['bytes'] for entry in manifest['tables'].values() for item in entry['files'])
+        self.stdout.write(
+            f'\nBiçim: {manifest["format"]}  satır: {total_rows}  boyut: {total_bytes / 1024 / 1024:.1f} MB'
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Export yazıldı: {manifest["directory"]} ({elapsed:.1f} sn)'))
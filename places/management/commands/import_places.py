@@ -0,0 +1,72 @@
+"""
+Büyük CSV/JSONL mekan dökümlerini akışlı olarak içe aktarır (tekilleştirme + toplu upsert)
+Usage: python manage.py import_places places.csv [--workers 4] [--chunk-size 2000]
+       python manage.py import_places dump.jsonl.gz --resume
+       python manage.py import_places places.csv --dry-run --errors hatalar.csv
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from places.catalogue_import import CHUNK_SIZE, DEDUPE_RADIUS_M, import_places
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/JSONL place dump into the catalogue with validation, de-duplication and bulk upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, JSONL veya .gz dosyası')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                            help='Dosya biçimi (default: uzantıdan)')
+        parser.add_argument('--workers', type=int, default=1, help='Doğrulama için paralel process sayısı')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Parça başına satır (default: {CHUNK_SIZE})')
+        parser.add_argument('--radius', type=float, default=DEDUPE_RADIUS_M,
+                            help=f'Aynı adlı mekanları birleştirme yarıçapı, metre (default: {DEDUPE_RADIUS_M})')
+        parser.add_argument('--checkpoint', default=None, help='Checkpoint dosyası (default: <path>.checkpoint.json)')
+        parser.add_argument('--errors', default=None, help='Hata raporu (default: <path>.errors.csv)')
+        parser.add_argument('--resume', action='store_true', help='Checkpoint\'ten devam et')
+        parser.add_argument('--dry-run', action='store_true', help='Sadece doğrula, veritabanına yazma')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Dosya bulunamadı: {path}')
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers ve --chunk-size en az 1 olmalı')
+
+        def progress(totals):
+            self.stdout.write(
+                f'  {totals["rows"]} satır: +{totals["created"]} yeni, {totals["updated"]} güncellendi, '
+                f'{totals["errors"]} hata'
+            )
+
+        started = time.perf_counter()
+        try:
+            totals = import_places(
+                path,
+                file_format=options['format'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                checkpoint_path=options['checkpoint'],
+                resume=options['resume'],
+                error_path=options['errors'],
+                dry_run=options['dry_run'],
+                radius_m=options['radius'],
+                progress=progress,
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'Dosya okunamadı: {e}')
+        elapsed = time.perf_counter() - started
+
+        if totals['resumed_from']:
+            self.stdout.write(f'{totals["resumed_from"]}. satırdan devam edildi')
+        self.stdout.write(
+            f'\nSatır: {totals["rows"]}  yeni: {totals["created"]}  güncellenen: {totals["updated"]}  '
+            f'birleşen kopya: {totals["merged"]}  hata: {totals["errors"]}'
+        )
+        if totals['errors']:
+            self.stdout.write(self.style.WARNING(f'Hatalı satırlar: {options["errors"] or path + ".errors.csv"}'))
+        label = 'Doğrulama' if options['dry_run'] else 'İçe aktarma'
+        self.stdout.write(self.style.SUCCESS(f'✓ {label} {elapsed:.1f} sn sürdü'))
@@ -0,0 +1,97 @@
+"""
+Spool dizininde kalan behavior segmentlerini DB'ye yükler
+Usage: python manage.py load_behavior_segments [--dir DIR] [--include-open] [--keep]
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from places.behavior_log import (
+    OPEN_SEGMENT_SUFFIX, SEALED_SEGMENT_SUFFIX,
+    build_behavior, forget_segment, get_behavior_log_settings, read_segment,
+    segment_owner_alive, store_segment,
+)
+
+
+class Command(BaseCommand):
+    help = 'Ingest spooled UserBehavior segment files into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            type=str,
+            default=None,
+            help='Segment dizini (default: settings.BEHAVIOR_LOG["SPOOL_DIR"])'
+        )
+        parser.add_argument(
+            '--include-open',
+            action='store_true',
+            help='Çökmüş process\'lerden kalan açık (.jsonl.open) segmentleri de yükle '
+                 '(yazan process hâlâ çalışıyorsa atlanır)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Yüklenen segmentleri silme'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='bulk_create batch boyutu (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or get_behavior_log_settings()['SPOOL_DIR']
+        if not directory:
+            raise CommandError('Spool dizini belirtilmedi (--dir veya BEHAVIOR_LOG["SPOOL_DIR"])')
+
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise CommandError(f'Dizin bulunamadı: {directory}')
+
+        segments = sorted(directory.glob(f'*{SEALED_SEGMENT_SUFFIX}'))
+        if options['include_open']:
+            for segment in sorted(directory.glob(f'*{OPEN_SEGMENT_SUFFIX}')):
+                # Çalışan process hâlâ bu dosyaya ekliyor olabilir
+                if segment_owner_alive(segment):
+                    self.stdout.write(self.style.WARNING(f'  {segment.name}: yazan process çalışıyor, atlandı'))
+                    continue
+                segments.append(segment)
+
+        if not segments:
+            self.stdout.write('Yüklenecek segment yok.')
+            return
+
+        total_events = 0
+        for segment in segments:
+            loaded, skipped, stored = self.load_segment(segment, options['batch_size'])
+            total_events += loaded if stored else 0
+
+            if not options['keep']:
+                segment.unlink()
+                forget_segment(segment)
+
+            if stored:
+                message = f'  {segment.name}: {loaded} olay'
+                if skipped:
+                    message += f' ({skipped} bozuk satır atlandı)'
+            else:
+                message = f'  {segment.name}: daha önce yüklenmiş, atlandı'
+            self.stdout.write(message)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {len(segments)} segmentten {total_events} olay yüklendi')
+        )
+
+    def load_segment(self, path, batch_size):
+        """
+        Tek bir segmenti transaction içinde yükler
+
+        Returns:
+            tuple: (olay sayısı, bozuk satır sayısı, yazıldı mı - daha önce yüklendiyse False)
+        """
+        events, skipped = read_segment(path)
+        behaviors = [build_behavior(event) for event in events]
+        stored = store_segment(path, behaviors, batch_size)
+        return len(behaviors), skipped, stored
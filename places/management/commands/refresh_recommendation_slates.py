@@ -0,0 +1,50 @@
+"""
+Aktif kullanıcıların öneri slate'lerini yeniler (cron ile TTL süpürmesi için)
+Usage: python manage.py refresh_recommendation_slates [--active-days 7] [--stale-only] [--limit 1000]
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import User
+from places.recommendation_slates import compute_slate, get_slate_settings
+
+
+class Command(BaseCommand):
+    help = 'Recompute precomputed recommendation slates for recently active users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--active-days', type=int, default=7, help='Son kaç günde aktif kullanıcılar (default: 7)')
+        parser.add_argument('--stale-only', action='store_true', help='Sadece TTL\'i dolmuş veya slate\'i olmayanlar')
+        parser.add_argument('--limit', type=int, default=None, help='En fazla yenilenecek kullanıcı sayısı')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(days=options['active_days'])
+        users = User.objects.filter(
+            Q(last_login__gte=since) |
+            Q(place_preferences__updated_at__gte=since) |
+            Q(visits__visited_at__gte=since)
+        ).distinct().order_by('id')
+
+        if options['stale_only']:
+            ttl = timedelta(seconds=get_slate_settings()['TTL'])
+            users = users.filter(
+                Q(recommendation_slate__isnull=True) | Q(recommendation_slate__computed_at__lt=now - ttl)
+            )
+        if options['limit']:
+            users = users[:options['limit']]
+
+        started = time.perf_counter()
+        refreshed = 0
+        for user in users.iterator():
+            compute_slate(user)
+            refreshed += 1
+            if refreshed % 100 == 0:
+                self.stdout.write(f'  {refreshed} slate yenilendi')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'✓ {refreshed} slate {elapsed:.1f} sn\'de yenilendi'))
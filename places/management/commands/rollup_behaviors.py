@@ -0,0 +1,50 @@
+"""
+UserBehavior rollup'larını ve trend mekan tablosunu günceller, retention politikasını uygular
+Usage: python manage.py rollup_behaviors [--no-retention]
+       python manage.py rollup_behaviors --backfill-user-place
+"""
+from django.core.management.base import BaseCommand
+
+from places.behavior_storage import apply_retention, backfill_user_place_rollups, build_rollups
+from places.trending import save_trending_rollup
+
+
+class Command(BaseCommand):
+    help = 'Build hourly/daily UserBehavior rollups and apply the retention policy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-retention',
+            action='store_true',
+            help='Sadece rollup üret, arşivleme/silme yapma'
+        )
+        parser.add_argument(
+            '--backfill-user-place',
+            action='store_true',
+            help='Kullanıcı-mekan rollup\'larını ham + arşiv tablolarından baştan üret'
+        )
+
+    def handle(self, *args, **options):
+        watermark = build_rollups()
+        if watermark is None:
+            self.stdout.write('Henüz davranış kaydı yok.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rollup\'lar güncellendi (watermark: {watermark.isoformat()})'))
+
+        if options['backfill_user_place']:
+            written = backfill_user_place_rollups()
+            self.stdout.write(f'  {written} kullanıcı-mekan rollup satırı yazıldı (arşiv dahil)')
+
+        trending = save_trending_rollup()
+        self.stdout.write(f'  {trending} trend mekan satırı yazıldı')
+
+        if options['no_retention']:
+            return
+
+        result = apply_retention()
+        self.stdout.write(f'  {result["archived"]} ham olay arşive taşındı')
+        self.stdout.write(f'  {result["deleted_hourly_rollups"]} eski saatlik rollup silindi')
+        for table in result['dropped_partitions']:
+            self.stdout.write(f'  Arşiv tablosu silindi: {table}')
+        self.stdout.write(self.style.SUCCESS('✓ Retention uygulandı'))
@@ -0,0 +1,67 @@
+"""
+Yük testi için büyük ölçekli sentetik veri üretir (bulk_create, paralel worker)
+Usage: python manage.py seed_synthetic_data --scale large --workers 4 --seed 42
+       python manage.py seed_synthetic_data --places 5000 --users 2000 --visits 50000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from places.synthetic_data import SCALES, generate
+
+
+class Command(BaseCommand):
+    help = 'Generate a production-like synthetic dataset (Zipf popularity, clustered locations and tastes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Veri ölçeği (default: small)')
+        for key in SCALES['small']:
+            parser.add_argument(f'--{key}', type=int, default=None, help=f'{key} sayısını ölçekten bağımsız belirle')
+        parser.add_argument('--seed', type=int, default=42, help='Deterministik üretim için seed (default: 42)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Transaction başına satır (default: 5000)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Olay tabloları için paralel process sayısı (SQLite\'ta her zaman 1)'
+        )
+        parser.add_argument('--zipf', type=float, default=1.1, help='Popülerlik Zipf üssü (default: 1.1)')
+        parser.add_argument('--prefix', default='synth', help='Üretilen kullanıcı adı öneki (default: synth)')
+
+    def handle(self, *args, **options):
+        counts = dict(SCALES[options['scale']])
+        for key in counts:
+            if options[key] is not None:
+                counts[key] = options[key]
+        if min(counts.values()) < 0 or options['chunk_size'] < 10:
+            raise CommandError('Sayılar negatif olamaz, --chunk-size en az 10 olmalı')
+
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite tek yazıcıya izin verir, worker sayısı 1\'e düşürüldü'))
+
+        self.stdout.write(f'Üretiliyor: {counts} (seed={options["seed"]})')
+        started = time.perf_counter()
+        last_report = {}
+
+        def progress(table, rows):
+            # Her tablo için en fazla saniyede bir satır yaz
+            now = time.perf_counter()
+            if now - last_report.get(table, 0) >= 1:
+                last_report[table] = now
+                self.stdout.write(f'  {table}: {rows}')
+
+        written = generate(
+            counts,
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            zipf_exponent=options['zipf'],
+            prefix=options['prefix'],
+            progress=progress,
+        )
+
+        elapsed = time.perf_counter() - started
+        for table, rows in written.items():
+            self.stdout.write(f'  ✓ {table}: {rows}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Sentetik veri {elapsed:.1f} sn\'de üretildi'))
@@ -0,0 +1,43 @@
+"""
+SQL profiling snapshot'larından en kötü endpoint'leri listeler
+Usage: python manage.py sql_profile_report [--dir /tmp/sqlprof] [--order-by queries_max] [--limit 10]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from config.sql_profiling import REPORT_ORDERINGS, build_report, get_profiling_settings, read_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Print the slowest / most query-heavy endpoints recorded by SQLProfilingMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help='Snapshot dizini (default: SQL_PROFILING.SNAPSHOT_DIR)')
+        parser.add_argument('--order-by', choices=REPORT_ORDERINGS, default='p95_ms', help='Sıralama metriği (default: p95_ms)')
+        parser.add_argument('--limit', type=int, default=20, help='Listelenecek endpoint sayısı (default: 20)')
+        parser.add_argument('--sql', action='store_true', help='Tekrar eden sorguların örnek SQL\'ini de yazdır')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or get_profiling_settings()['SNAPSHOT_DIR']
+        if not directory:
+            raise CommandError('Snapshot dizini yok: --dir verin veya SQL_PROFILING_SNAPSHOT_DIR ayarlayın')
+
+        rows = build_report(read_snapshots(directory), order_by=options['order_by'], limit=options['limit'])
+        if not rows:
+            self.stdout.write(self.style.WARNING(f'{directory} içinde profil verisi bulunamadı'))
+            return
+
+        self.stdout.write(
+            f'{"route":<45} {"req":>6} {"p50 ms":>8} {"p95 ms":>8} {"db ms":>8} '
+            f'{"queries":>8} {"max":>5} {"repeat":>7}'
+        )
+        for row in rows:
+            line = (
+                f'{row["route"]:<45} {row["requests"]:>6} {row["p50_ms"]:>8} {row["p95_ms"]:>8} '
+                f'{row["db_ms_mean"]:>8} {row["queries_mean"]:>8} {row["queries_max"]:>5} {row["repeated_mean"]:>7}'
+            )
+            self.stdout.write(self.style.WARNING(line) if row['repeated_mean'] >= 10 else line)
+
+            for repeat in row['top_repeats']:
+                self.stdout.write(f'    {repeat["fingerprint"]} x{repeat["per_request"]}/istek')
+                if options['sql']:
+                    self.stdout.write(f'      {repeat["sql"]}')
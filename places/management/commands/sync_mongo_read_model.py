@@ -0,0 +1,59 @@
+"""
+Keşfet/yakın/arama için MongoDB read model dokümanlarını SQL'den yazar
+Usage: python manage.py sync_mongo_read_model [--batch-size 500]
+       python manage.py sync_mongo_read_model --since 2024-06-01T03:00
+       python manage.py sync_mongo_read_model --place-ids 12 15 --indexes-only
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from pymongo.errors import PyMongoError
+
+from places.mongo_read_model import changed_place_ids, ensure_indexes, sync_read_model
+
+
+class Command(BaseCommand):
+    help = 'Write denormalised place documents and indexes for the MongoDB discover/nearby/search read model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default=None,
+                            help='Sadece bu zamandan sonra değişen mekanlar (ISO zaman)')
+        parser.add_argument('--place-ids', nargs='+', type=int, default=None, help='Sadece bu mekanlar')
+        parser.add_argument('--batch-size', type=int, default=None, help='bulk_write başına doküman')
+        parser.add_argument('--no-prune', action='store_true', help='Tam senkronda SQL\'de olmayanları silme')
+        parser.add_argument('--indexes-only', action='store_true', help='Sadece indeksleri oluştur')
+
+    def handle(self, *args, **options):
+        place_ids = options['place_ids']
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f'Geçersiz --since: {options["since"]}')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            place_ids = sorted(changed_place_ids(since) | set(place_ids or []))
+            self.stdout.write(f'{len(place_ids)} mekan değişmiş')
+
+        started = time.perf_counter()
+        try:
+            ensure_indexes()
+            if options['indexes_only']:
+                self.stdout.write(self.style.SUCCESS('✓ İndeksler hazır'))
+                return
+            result = sync_read_model(
+                place_ids=place_ids,
+                batch_size=options['batch_size'],
+                prune=not options['no_prune'],
+                progress=lambda written: self.stdout.write(f'  {written} doküman yazıldı'),
+            )
+        except PyMongoError as e:
+            raise CommandError(f'MongoDB hatası: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {result["written"]} doküman yazıldı, {result["deleted"]} silindi '
+            f'({time.perf_counter() - started:.1f} sn)'
+        ))
@@ -0,0 +1,90 @@
+"""
+Yerel OTLP/HTTP collector yerine geçen basit sunucu (TRACING['SINK'] = 'otlp' denemeleri için)
+Usage: python manage.py trace_collector [--port 4318] [--output traces_collected.jsonl]
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+def iter_otlp_spans(payload):
+    """OTLP JSON gövdesindeki span'leri (service_name, span) olarak döner"""
+    for resource_spans in payload.get('resourceSpans', []):
+        service_name = ''
+        for attribute in resource_spans.get('resource', {}).get('attributes', []):
+            if attribute['key'] == 'service.name':
+                service_name = attribute['value'].get('stringValue', '')
+        for scope_spans in resource_spans.get('scopeSpans', []):
+            for otlp_span in scope_spans.get('spans', []):
+                yield service_name, otlp_span
+
+
+def span_attributes(otlp_span):
+    values = {}
+    for attribute in otlp_span.get('attributes', []):
+        value = attribute['value']
+        values[attribute['key']] = next(iter(value.values())) if value else None
+    return values
+
+
+class Command(BaseCommand):
+    help = 'Run a minimal OTLP/HTTP JSON trace collector that prints and optionally stores received spans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Dinlenecek adres (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=4318, help='Dinlenecek port (default: 4318)')
+        parser.add_argument('--output', default=None, help='Gelen span\'lerin yazılacağı JSONL dosyası')
+
+    def handle(self, *args, **options):
+        command = self
+        output = options['output']
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != '/v1/traces':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                spans = list(iter_otlp_spans(payload))
+                for service_name, otlp_span in spans:
+                    attributes = span_attributes(otlp_span)
+                    duration_ms = (int(otlp_span['endTimeUnixNano']) - int(otlp_span['startTimeUnixNano'])) / 1e6
+                    indent = '  ' if otlp_span.get('parentSpanId') else ''
+                    command.stdout.write(
+                        f'{indent}{otlp_span["name"]:<40} {duration_ms:>9.2f} ms '
+                        f'{attributes.get("db.query_count", 0):>4} q  [{service_name} {otlp_span["traceId"][:8]}]'
+                    )
+                if output and spans:
+                    with open(output, 'a', encoding='utf-8') as f:
+                        for service_name, otlp_span in spans:
+                            f.write(json.dumps(dict(otlp_span, service=service_name), ensure_ascii=False) + '\n')
+
+                body = b'{"partialSuccess":{}}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f'OTLP collector dinleniyor: http://{options["host"]}:{options["port"]}/v1/traces (Ctrl+C ile çık)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0006_userbehavior_socialmatching_placegraph'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userbehavior',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('places', '0007_userbehavior_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregationWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserBehaviorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=20)),
+                ('granularity', models.CharField(choices=[('hour', 'Saatlik'), ('day', 'Günlük')], max_length=4)),
+                ('bucket_start', models.DateTimeField(help_text='Saat/gün başlangıcı')),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='behavior_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='places_user_granula_d4c4e1_idx')],
+                'unique_together': {('user', 'action_type', 'granularity', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaceBehaviorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=20)),
+                ('granularity', models.CharField(choices=[('hour', 'Saatlik'), ('day', 'Günlük')], max_length=4)),
+                ('bucket_start', models.DateTimeField(help_text='Saat/gün başlangıcı')),
+                ('count', models.IntegerField(default=0)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='behavior_rollups', to='places.place')),
+            ],
+            options={
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='places_plac_granula_d6b14e_idx')],
+                'unique_together': {('place', 'action_type', 'granularity', 'bucket_start')},
+            },
+        ),
+    ]
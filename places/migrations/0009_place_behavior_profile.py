@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0008_behavior_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregationwatermark',
+            name='position',
+            field=models.BigIntegerField(blank=True, help_text="Son işlenen kayıt ID'si", null=True),
+        ),
+        migrations.AlterField(
+            model_name='aggregationwatermark',
+            name='value',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PlaceBehaviorProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour_of_week_counts', models.JSONField(default=list, help_text='168 elemanlı saat-hafta histogramı')),
+                ('event_count', models.IntegerField(default=0)),
+                ('dwell_minutes_total', models.FloatField(default=0.0)),
+                ('dwell_samples', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('place', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='behavior_profile', to='places.place')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('places', '0009_place_behavior_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationSlate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entries', models.JSONField(default=list, help_text="[{'id': 12, 'score': 0.91, 'reason': '...', 'location': '...'}]")),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_slate', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
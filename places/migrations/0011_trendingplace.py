@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0010_recommendationslate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(help_text="Pencere: '1h', '24h', '7d'", max_length=8)),
+                ('city', models.CharField(blank=True, help_text='Küçük harf şehir; boş = tüm şehirler', max_length=100)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_entries', to='places.place')),
+            ],
+            options={
+                'ordering': ['window', 'city', 'rank'],
+                'indexes': [models.Index(fields=['window', 'city', 'rank'], name='places_tren_window_a02f89_idx')],
+                'unique_together': {('window', 'city', 'place')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0011_trendingplace'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamSketchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Günlük'), ('week', 'Haftalık')], max_length=4)),
+                ('period_key', models.CharField(help_text="'2024-06-01' veya '2024-W22'", max_length=10)),
+                ('payload', models.BinaryField(help_text='Count-Min, Space-Saving ve HyperLogLog dizileri (npz)')),
+                ('events', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+                'unique_together': {('period', 'period_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+# categories/tags/vibe_tags: jsonb_ops GIN -> @>, ?, ?| (has_element / has_any_element)
+# name/address/description: pg_trgm GIN -> icontains (Django: UPPER(col::text) LIKE UPPER(%s))
+POSTGRES_INDEXES = [
+    ('places_place_categories_gin', 'USING gin ("categories")'),
+    ('places_place_tags_gin', 'USING gin ("tags")'),
+    ('places_place_vibe_tags_gin', 'USING gin ("vibe_tags")'),
+    ('places_place_name_trgm', 'USING gin ((UPPER("name"::text)) gin_trgm_ops)'),
+    ('places_place_address_trgm', 'USING gin ((UPPER("address"::text)) gin_trgm_ops)'),
+    ('places_place_description_trgm', 'USING gin ((UPPER("description"::text)) gin_trgm_ops)'),
+]
+
+
+def create_postgres_indexes(apps, schema_editor):
+    """Sadece PostgreSQL'de; SQLite'ta json_each/LIKE zaten tam tarama yapar"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "places_place" {definition}')
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY transaction içinde çalışmaz; tablo yazmaya açık kalır
+    atomic = False
+
+    dependencies = [
+        ('places', '0012_streamsketchcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('places', '0013_postgres_json_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPlaceBehaviorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=20)),
+                ('bucket_start', models.DateTimeField(help_text='Gün başlangıcı')),
+                ('count', models.IntegerField(default=0)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_behavior_rollups', to='places.place')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='place_behavior_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['place', 'action_type'], name='places_user_place_i_197da2_idx'), models.Index(fields=['bucket_start'], name='places_user_bucket__2c7ed3_idx')],
+                'unique_together': {('user', 'place', 'action_type', 'bucket_start')},
+            },
+        ),
+    ]
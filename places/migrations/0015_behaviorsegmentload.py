@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0014_userplacebehaviorrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BehaviorSegmentLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Uzantısız segment adı: 'behavior-<pid>-<ms>-<sıra>'", max_length=200, unique=True)),
+                ('events', models.IntegerField(default=0)),
+                ('loaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-loaded_at'],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from accounts.models import User
 
@@ -156,7 +157,8 @@ class UserBehavior(models.Model):
     filters_used = models.JSONField(default=list, blank=True, help_text="Kullanılan filtreler: ['category:kafe', 'price:$$']")
     session_id = models.CharField(max_length=100, blank=True, help_text="Oturum ID")
     
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # auto_now_add yerine default: tamponlanan olaylar DB'ye geç yazılsa da gerçek zamanı korunur
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
@@ -170,6 +172,19 @@ class UserBehavior(models.Model):
         return f"{self.user.username} - {self.place.name} - {self.action_type}"
 
 
+class BehaviorSegmentLoad(models.Model):
+    """DB'ye yazılmış behavior segmentleri - olaylarla aynı transaction'da kaydedilir, segment iki kez yüklenmez"""
+    name = models.CharField(max_length=200, unique=True, help_text="Uzantısız segment adı: 'behavior-<pid>-<ms>-<sıra>'")
+    events = models.IntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-loaded_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.events} olay)"
+
+
 class SocialMatching(models.Model):
     """Sosyal eşleştirme - Arkadaşların beğendiği mekanlar"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='social_matches')
@@ -224,3 +239,164 @@ class PlaceGraph(models.Model):
     def __str__(self):
         return f"{self.from_place.name} -> {self.to_place.name} ({self.relationship_type})"
 
+
+
+class PlaceBehaviorRollup(models.Model):
+    """Mekan bazlı davranış özetleri - (place, action_type) için saatlik/günlük sayaçlar"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Saatlik'),
+        ('day', 'Günlük'),
+    ]
+    
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='behavior_rollups')
+    action_type = models.CharField(max_length=20)
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(help_text="Saat/gün başlangıcı")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['place', 'action_type', 'granularity', 'bucket_start']
+        ordering = ['-bucket_start']
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.place_id} - {self.action_type} @ {self.bucket_start} ({self.count})"
+
+
+class UserBehaviorRollup(models.Model):
+    """Kullanıcı bazlı davranış özetleri - (user, action_type) için saatlik/günlük sayaçlar"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='behavior_rollups')
+    action_type = models.CharField(max_length=20)
+    granularity = models.CharField(max_length=4, choices=PlaceBehaviorRollup.GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(help_text="Saat/gün başlangıcı")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'action_type', 'granularity', 'bucket_start']
+        ordering = ['-bucket_start']
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.action_type} @ {self.bucket_start} ({self.count})"
+
+
+class UserPlaceBehaviorRollup(models.Model):
+    """Kullanıcı-mekan davranış özetleri - (user, place, action_type) için günlük sayaçlar (ör. arkadaş ziyaretleri)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='place_behavior_rollups')
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='user_behavior_rollups')
+    action_type = models.CharField(max_length=20)
+    bucket_start = models.DateTimeField(help_text="Gün başlangıcı")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'place', 'action_type', 'bucket_start']
+        ordering = ['-bucket_start']
+        indexes = [
+            models.Index(fields=['place', 'action_type']),
+            models.Index(fields=['bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id}/{self.place_id} - {self.action_type} @ {self.bucket_start} ({self.count})"
+
+
+class AggregationWatermark(models.Model):
+    """Artımlı batch işleri için son işlenen zaman damgası / kayıt ID'si"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    position = models.BigIntegerField(null=True, blank=True, help_text="Son işlenen kayıt ID'si")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value or self.position}"
+    
+    @classmethod
+    def get_value(cls, name):
+        """Watermark değerini döner, yoksa None"""
+        return cls.objects.filter(name=name).values_list('value', flat=True).first()
+    
+    @classmethod
+    def set_value(cls, name, value):
+        cls.objects.update_or_create(name=name, defaults={'value': value})
+    
+    @classmethod
+    def get_position(cls, name):
+        """Son işlenen kayıt ID'sini döner, yoksa None"""
+        return cls.objects.filter(name=name).values_list('position', flat=True).first()
+    
+    @classmethod
+    def set_position(cls, name, position):
+        cls.objects.update_or_create(name=name, defaults={'position': position})
+
+
+class PlaceBehaviorProfile(models.Model):
+    """Mekan davranış profili - behavior_stats hesaplaması için birikimli sayaçlar"""
+    place = models.OneToOneField(Place, on_delete=models.CASCADE, related_name='behavior_profile')
+    
+    # Pazartesi 00:00'dan başlayan 168 saatlik (7x24) olay histogramı
+    hour_of_week_counts = models.JSONField(default=list, help_text="168 elemanlı saat-hafta histogramı")
+    event_count = models.IntegerField(default=0)
+    
+    # Kalış süresi tahmini: kullanıcının bir sonraki olayına kadar geçen süre
+    dwell_minutes_total = models.FloatField(default=0.0)
+    dwell_samples = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.place.name} - {self.event_count} olay"
+
+
+class RecommendationSlate(models.Model):
+    """Kullanıcı için önceden hesaplanmış öneri listesi (sıralı mekan ID'leri, skor ve sebep)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation_slate')
+    entries = models.JSONField(default=list, help_text="[{'id': 12, 'score': 0.91, 'reason': '...', 'location': '...'}]")
+    computed_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.user_id} - {len(self.entries)} öneri ({self.computed_at})"
+
+
+class TrendingPlace(models.Model):
+    """Trend mekan rollup'ı - pencere/şehir başına en yüksek skorlu mekanlar (process belleği soğukken okunur)"""
+    window = models.CharField(max_length=8, help_text="Pencere: '1h', '24h', '7d'")
+    city = models.CharField(max_length=100, blank=True, help_text="Küçük harf şehir; boş = tüm şehirler")
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='trending_entries')
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['window', 'city', 'place']
+        ordering = ['window', 'city', 'rank']
+        indexes = [
+            models.Index(fields=['window', 'city', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.window}/{self.city or '*'} #{self.rank} - {self.place_id} ({self.score:.2f})"
+
+
+class StreamSketchCheckpoint(models.Model):
+    """Akış istatistikleri checkpoint'i - dönem başına worker'ların birleştirilmiş sketch'leri (places/stream_stats.py)"""
+    PERIOD_CHOICES = [
+        ('day', 'Günlük'),
+        ('week', 'Haftalık'),
+    ]
+    
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_key = models.CharField(max_length=10, help_text="'2024-06-01' veya '2024-W22'")
+    payload = models.BinaryField(help_text="Count-Min, Space-Saving ve HyperLogLog dizileri (npz)")
+    events = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['period', 'period_key']
+        ordering = ['-updated_at']
+    
+    def __str__(self):
+        return f"{self.period} {self.period_key} ({self.events} olay)"
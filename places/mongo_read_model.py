@@ -0,0 +1,284 @@
+"""
+MongoDB Read Model - Keşfet/yakın/arama trafiğini ilişkisel DB'den alır
+
+Her mekan için tek bir denormalize doküman tutulur:
+    _id          Place.id
+    data         PlaceSerializer çıktısı (puan ortalaması, ziyaret sayısı,
+                 puan dağılımı ve son yorumlar gömülü) - API aynen bunu döner
+    name, description, address, city, price_level, categories, tags, created_at
+                 filtre/sıralama alanları
+    location     GeoJSON Point [lon, lat] (koordinatı olmayan mekanlarda yok)
+    rating       {'average', 'count'}
+
+İndeksler: categories ve tags (multikey), location (2dsphere),
+name/description/address (text), price_level + created_at, city + created_at.
+
+Dokümanlar python manage.py sync_mongo_read_model ile yazılır (tam ya da
+--since ile artımlı); ziyaret ve puan değişiklikleri bir sonraki senkrona
+kadar gecikmeli görünür. Endpoint'ler MONGO_READ_MODEL['ENDPOINTS'] ile tek
+tek açılır; Mongo hatasında FALLBACK_TO_SQL ile SQL yoluna düşülür.
+
+Yanıtlar SQL yoluyla birebir aynıdır (places/tests.py parity testleri):
+- city/search icontains -> büyük/küçük harf duyarsız, kaçışlı $regex
+  (SEARCH_MODE='text' ise $text; kelime bazlı, sonuçlar farklı olabilir)
+- nearby: $geoWithin/$centerSphere (Haversine ile aynı 6371 km yarıçap),
+  mesafeler ve sıralama SQL yolundaki calculate_distance ile hesaplanır
+"""
+import re
+
+from django.db.models import Q
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, ReplaceOne
+from pymongo.errors import PyMongoError
+
+from config.app_settings import merged_settings
+from config.mongodb import get_mongodb_database
+from visits.models import Visit
+from .models import Place
+from .serializers import PlaceSerializer, build_place_stats
+
+
+DEFAULT_SETTINGS = {
+    'ENDPOINTS': {'discover': False, 'nearby': False, 'search': False},
+    'COLLECTION': 'place_read_model',
+    'READ_PREFERENCE': 'secondaryPreferred',
+    'SEARCH_MODE': 'contains',
+    'FALLBACK_TO_SQL': True,
+    'BATCH_SIZE': 500,
+}
+
+EARTH_RADIUS_KM = 6371
+SORT_NEWEST = [('created_at', DESCENDING), ('_id', DESCENDING)]
+
+
+def get_read_model_settings():
+    return merged_settings('MONGO_READ_MODEL', DEFAULT_SETTINGS, nested=('ENDPOINTS',))
+
+
+def read_model_enabled(endpoint):
+    return bool(get_read_model_settings()['ENDPOINTS'].get(endpoint))
+
+
+def get_read_collection():
+    config = get_read_model_settings()
+    return get_mongodb_database(read_preference=config['READ_PREFERENCE'])[config['COLLECTION']]
+
+
+def get_write_collection():
+    return get_mongodb_database(read_preference='primary')[get_read_model_settings()['COLLECTION']]
+
+
+# --- Doküman yazma ---
+
+def build_document(place, data, stats):
+    document = {
+        '_id': place.id,
+        'data': data,
+        'name': place.name,
+        'description': place.description,
+        'address': place.address,
+        'city': place.city,
+        'price_level': place.price_level,
+        'categories': place.categories or [],
+        'tags': place.tags or [],
+        'created_at': place.created_at,
+        'rating': {'average': stats['average_rating'], 'count': stats['total_visits']},
+    }
+    if place.latitude is not None and place.longitude is not None:
+        document['location'] = {'type': 'Point', 'coordinates': [float(place.longitude), float(place.latitude)]}
+    return document
+
+
+def ensure_indexes(collection=None):
+    collection = collection if collection is not None else get_write_collection()
+    collection.create_index([('categories', ASCENDING)], name='categories')
+    collection.create_index([('tags', ASCENDING)], name='tags')
+    collection.create_index([('location', GEOSPHERE)], name='location_2dsphere')
+    collection.create_index(
+        [('name', TEXT), ('description', TEXT), ('address', TEXT)],
+        name='search_text', default_language='turkish', weights={'name': 5, 'address': 2, 'description': 1},
+    )
+    collection.create_index([('price_level', ASCENDING), ('created_at', DESCENDING)], name='price_created')
+    collection.create_index([('city', ASCENDING), ('created_at', DESCENDING)], name='city_created')
+    collection.create_index([('created_at', DESCENDING), ('_id', DESCENDING)], name='created')
+
+
+def changed_place_ids(since):
+    """since'ten sonra değişen mekanlar veya ziyaretleri değişen mekanlar"""
+    place_ids = set(Place.objects.filter(updated_at__gte=since).values_list('id', flat=True))
+    place_ids.update(
+        Visit.objects.filter(Q(updated_at__gte=since) | Q(visited_at__gte=since)).values_list('place_id', flat=True)
+    )
+    return place_ids
+
+
+def sync_read_model(place_ids=None, batch_size=None, prune=True, progress=None):
+    """
+    Mekan dokümanlarını SQL'den yeniden yazar (ReplaceOne upsert, toplu)
+
+    Args:
+        place_ids: Sadece bu mekanlar (None = tüm katalog)
+        prune: Tam senkronda SQL'de olmayan dokümanları sil
+    Returns:
+        dict: {'written', 'deleted'}
+    """
+    batch_size = batch_size or get_read_model_settings()['BATCH_SIZE']
+    collection = get_write_collection()
+    report = progress or (lambda written: None)
+
+    queryset = Place.objects.order_by('id')
+    if place_ids is not None:
+        queryset = queryset.filter(id__in=list(place_ids))
+    ids = list(queryset.values_list('id', flat=True))
+
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        places = list(Place.objects.filter(id__in=ids[start:start + batch_size]).order_by('id'))
+        stats = build_place_stats([place.id for place in places])
+        data = PlaceSerializer(places, many=True, context={'place_stats': stats}).data
+        operations = [
+            ReplaceOne({'_id': place.id}, build_document(place, dict(item), stats[place.id]), upsert=True)
+            for place, item in zip(places, data)
+        ]
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+        report(written)
+
+    deleted = 0
+    if place_ids is None and prune:
+        deleted = collection.delete_many({'_id': {'$nin': ids}}).deleted_count
+    elif place_ids is not None:
+        missing = set(place_ids) - set(ids)
+        if missing:
+            deleted = collection.delete_many({'_id': {'$in': list(missing)}}).deleted_count
+    return {'written': written, 'deleted': deleted}
+
+
+# --- Sorgular ---
+
+def _contains(value):
+    return {'$regex': re.escape(value), '$options': 'i'}
+
+
+def _search_filter(search):
+    if get_read_model_settings()['SEARCH_MODE'] == 'text':
+        return {'$text': {'$search': search}}
+    return {'$or': [{'name': _contains(search)}, {'description': _contains(search)}, {'address': _contains(search)}]}
+
+
+def _with_all(query, field, values):
+    values = [value for value in values if value]
+    if values:
+        query[field] = {'$all': list(dict.fromkeys(values))}
+
+
+def discover_query(exclude_ids=(), category=None, price_level=None, atmosphere=None, suitable_for=None,
+                   city=None, mode=None, search=None):
+    """discover_places filtrelerinin Mongo karşılığı"""
+    query = {}
+    if exclude_ids:
+        query['_id'] = {'$nin': list(exclude_ids)}
+    if price_level:
+        query['price_level'] = price_level
+    if city:
+        query['city'] = _contains(city)
+    if search:
+        query.update(_search_filter(search))
+    # suitable_for ve mode da SQL yolunda categories içinde aranır
+    _with_all(query, 'categories', [category, suitable_for, mode])
+    _with_all(query, 'tags', [atmosphere])
+    return query
+
+
+def find_discover(query, limit=20):
+    """
+    Returns:
+        tuple: (serialize edilmiş mekanlar, toplam eşleşen)
+    """
+    collection = get_read_collection()
+    documents = collection.find(query, {'data': 1}).sort(SORT_NEWEST).limit(limit)
+    places = [document['data'] for document in documents]
+    return places, collection.count_documents(query)
+
+
+def find_nearby(lat, lon, radius_km, limit, distance):
+    """
+    Args:
+        distance: (lat1, lon1, lat2, lon2) -> km; SQL yoluyla aynı fonksiyon verilir
+    Returns:
+        list: [(serialize edilmiş mekan, mesafe km)]
+    """
+    collection = get_read_collection()
+    query = {'location': {'$geoWithin': {'$centerSphere': [[lon, lat], radius_km / EARTH_RADIUS_KM]}}}
+    candidates = []
+    for document in collection.find(query, {'location': 1}).sort(SORT_NEWEST):
+        place_lon, place_lat = document['location']['coordinates']
+        place_distance = distance(lat, lon, place_lat, place_lon)
+        if place_distance <= radius_km:
+            candidates.append((document['_id'], round(place_distance, 2)))
+    # Stabil sıralama: eşit mesafede SQL yolundaki gibi yeni mekan önce
+    candidates.sort(key=lambda item: item[1])
+    candidates = candidates[:max(0, limit)]
+
+    documents = {
+        document['_id']: document['data']
+        for document in collection.find({'_id': {'$in': [place_id for place_id, _ in candidates]}}, {'data': 1})
+    }
+    return [(documents[place_id], place_distance) for place_id, place_distance in candidates if place_id in documents]
+
+
+def search_query(city=None, category=None, mode=None, search=None):
+    """PlaceListAPIView filtrelerinin Mongo karşılığı"""
+    query = {}
+    if city:
+        query['city'] = _contains(city)
+    _with_all(query, 'categories', [category, mode])
+    if search:
+        query.update(_search_filter(search))
+    return query
+
+
+class ReadModelResults:
+    """
+    Django Paginator'ın beklediği count() + dilimleme arayüzü; sadece istenen
+    sayfa Mongo'dan okunur
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = get_read_collection().count_documents(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('ReadModelResults sadece dilimlenebilir')
+        start = index.start or 0
+        cursor = get_read_collection().find(self.query, {'data': 1}).sort(SORT_NEWEST).skip(start)
+        if index.stop is not None:
+            cursor = cursor.limit(max(0, index.stop - start))
+        return [document['data'] for document in cursor]
+
+
+def serve_from_read_model(endpoint, handler):
+    """
+    Endpoint read model'e yönlendirilmişse handler()'ı çalıştırır
+
+    Returns:
+        handler sonucu veya None (kapalıysa ya da Mongo hatasında SQL'e düşülecekse)
+    """
+    if not read_model_enabled(endpoint):
+        return None
+    try:
+        return handler()
+    except PyMongoError as e:
+        if not get_read_model_settings()['FALLBACK_TO_SQL']:
+            raise
+        print(f"Mongo read model error ({endpoint}): {e}")
+        return None
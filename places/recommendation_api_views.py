@@ -8,11 +8,14 @@ from rest_framework import status
 from django.db.models import Q, Avg, Count
 from .recommendations import get_recommendations
 from .models import Place, PlacePreference
-from .serializers import PlaceSerializer
+from .recommendation_slates import get_slate_entries, get_slate_settings
+from .serializers import PlaceSerializer, build_place_stats
+from config.tracing import current_span, traced
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@traced('recommendations.api')
 def get_recommendations_api(request):
     """
     Kullanıcı için öneriler döner (Swipe için)
@@ -49,13 +52,20 @@ def get_recommendations_api(request):
     # Limit
     try:
         limit = int(request.query_params.get('limit', 20))
-        limit = min(limit, 50)  # Max 50
+        limit = max(1, min(limit, 50))  # 1-50 arası
     except (ValueError, TypeError):
         limit = 20
     
-    # Önerileri al (get_recommendations fonksiyonu zaten en çok beğenilen mekanları önceliklendiriyor)
+    # Önerileri al: filtre yoksa önceden hesaplanmış slate'ten, varsa canlı hesapla
     try:
-        query_dict, results = get_recommendations(user, query_params if query_params else None, limit)
+        slate_meta = None
+        results = []
+        if not query_params and get_slate_settings()['ENABLED']:
+            results, slate_meta = get_slate_entries(user, limit)
+            query_dict = {'category': [], 'atmosphere': [], 'context': None, 'price': None}
+        if not results:
+            query_dict, results = get_recommendations(user, query_params if query_params else None, limit)
+            slate_meta = None
         
         # PlaceSerializer ile serialize et
         place_ids = [r.get('id') for r in results if r.get('id')]
@@ -64,22 +74,31 @@ def get_recommendations_api(request):
             # Sıralamayı korumak için dict kullan
             place_dict = {p.id: p for p in places}
             
-            serializer = PlaceSerializer([place_dict[r['id']] for r in results if r['id'] in place_dict], many=True)
+            serializer = PlaceSerializer(
+                [place_dict[r['id']] for r in results if r['id'] in place_dict],
+                many=True,
+                context={'place_stats': build_place_stats(list(place_dict))}
+            )
             final_results = serializer.data
             
             # Score bilgisini ekle (her sonuç için)
-            for i, result in enumerate(results):
-                if i < len(final_results) and final_results[i]['id'] == result.get('id'):
-                    final_results[i]['score'] = result.get('score', 0)
-                    final_results[i]['location'] = result.get('location', '')
+            by_id = {r['id']: r for r in results}
+            for final_result in final_results:
+                result = by_id[final_result['id']]
+                final_result['score'] = result.get('score', 0)
+                final_result['reason'] = result.get('reason', '')
+                final_result['location'] = result.get('location', '')
         else:
             final_results = []
+        current_span().set(source='slate' if slate_meta else 'live', results=len(final_results))
         
         return Response({
             'success': True,
             'query': query_dict,
             'places': final_results,  # Swipe için 'places' key'i kullan
-            'count': len(final_results)
+            'count': len(final_results),
+            'source': 'slate' if slate_meta else 'live',
+            'slate': slate_meta
         }, status=status.HTTP_200_OK)
     
     except Exception as e:
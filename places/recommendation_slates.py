@@ -0,0 +1,174 @@
+"""
+Öneri Slate'leri - Kullanıcı başına önceden hesaplanmış öneri listesi
+
+Swipe sayfası her açıldığında önerileri sıfırdan hesaplamak yerine
+RecommendationSlate'te tutulan sıralı listeden okunur:
+
+- Slate yoksa ilk istekte senkron hesaplanır ve kaydedilir
+- Swipe/değerlendirme sonrası ve TTL dolunca arka plandaki refresher
+  thread'i slate'i yeniden hesaplar (istek yolu beklemez)
+- Okurken slate hesaplandıktan sonra swipe yapılan mekanlar atlanır;
+  kalan öneri LOW_WATERMARK altına düşerse yenileme istenir
+
+Ayarlar (settings.RECOMMENDATION_SLATES):
+    ENABLED: False ise API her istekte canlı hesaplar
+    SIZE: Slate başına tutulan öneri sayısı
+    TTL: Saniye; bu süreden eski slate sunulur ama yenilenmesi istenir
+    LOW_WATERMARK: Kalan öneri bu sayının altına inince yenileme istenir
+    BACKGROUND: False ise yenileme senkron yapılır (testler/komutlar için)
+"""
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from accounts.models import User
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from config.tracing import span
+from .models import PlacePreference, RecommendationSlate
+from .recommendations import get_recommendations
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'SIZE': 100,
+    'TTL': 900,
+    'LOW_WATERMARK': 20,
+    'BACKGROUND': True,
+}
+
+
+def get_slate_settings():
+    return merged_settings('RECOMMENDATION_SLATES', DEFAULT_SETTINGS)
+
+
+def compute_slate(user, size=None):
+    """Kullanıcının slate'ini yeniden hesaplar ve kaydeder"""
+    size = size or get_slate_settings()['SIZE']
+    with span('slates.compute', size=size) as stage:
+        _, results = get_recommendations(user, None, size)
+        entries = [
+            {
+                'id': result['id'],
+                'score': result['score'],
+                'reason': result['reason'],
+                'location': result['location'],
+            }
+            for result in results
+        ]
+        slate, _ = RecommendationSlate.objects.update_or_create(
+            user=user,
+            defaults={'entries': entries, 'computed_at': timezone.now()}
+        )
+        stage.set(entries=len(entries))
+    return slate
+
+
+class SlateRefresher:
+    """
+    Yenilenecek kullanıcıları toplayıp arka plan thread'inde hesaplar
+    Aynı kullanıcı için bekleyen istekler tekilleştirilir
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = BackgroundThread(self._run, 'slate-refresher', on_stop=self._wakeup.set)
+        self.refreshed_count = 0
+
+    def request(self, user_id):
+        with self._lock:
+            self._pending.add(user_id)
+        self._worker.ensure()
+        self._wakeup.set()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self):
+        """Bekleyen tüm yenilemeleri çalıştırır, yenilenen slate sayısını döner"""
+        with self._lock:
+            user_ids, self._pending = self._pending, set()
+        refreshed = 0
+        for user in User.objects.filter(id__in=user_ids):
+            compute_slate(user)
+            refreshed += 1
+        self.refreshed_count += refreshed
+        return refreshed
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._worker.stopped:
+                return
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Slate refresh error: {e}")
+            finally:
+                close_old_connections()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_slate_refresher():
+    """Process genelinde tek SlateRefresher objesi"""
+    global _refresher
+
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = SlateRefresher()
+    return _refresher
+
+
+def request_slate_refresh(user):
+    """Swipe/değerlendirme sonrası çağrılır; BACKGROUND kapalıysa hemen hesaplar"""
+    config = get_slate_settings()
+    if not config['ENABLED']:
+        return
+    if not config['BACKGROUND']:
+        compute_slate(user)
+        return
+    get_slate_refresher().request(user.id)
+
+
+def get_slate_entries(user, limit):
+    """
+    Slate'ten sıradaki `limit` öneriyi döner
+
+    Returns:
+        tuple: (entries, meta) - meta: {'computed_at', 'remaining', 'refreshing'}
+    """
+    config = get_slate_settings()
+    slate = RecommendationSlate.objects.filter(user=user).first()
+    if slate is None:
+        slate = compute_slate(user, config['SIZE'])
+
+    # Slate hesaplandıktan sonra swipe yapılan mekanları atla
+    swiped_since = set(PlacePreference.objects.filter(
+        user=user,
+        updated_at__gte=slate.computed_at,
+    ).values_list('place_id', flat=True))
+    remaining = [entry for entry in slate.entries if entry['id'] not in swiped_since]
+
+    stale = timezone.now() - slate.computed_at > timedelta(seconds=config['TTL'])
+    # Slate dolu hesaplandıysa daha fazla aday vardır; eksik hesaplandıysa katalog tükenmiştir (TTL bekler)
+    running_low = len(remaining) < config['LOW_WATERMARK'] and len(slate.entries) >= config['SIZE']
+    refreshing = stale or running_low
+    if refreshing:
+        request_slate_refresh(user)
+
+    return remaining[:max(0, limit)], {
+        'computed_at': slate.computed_at,
+        'remaining': len(remaining),
+        'refreshing': refreshing,
+    }
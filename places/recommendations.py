@@ -1,10 +1,16 @@
 """
-Recommendation Engine V1 - Rule-based recommendation system
+Recommendation Engine - Rule-based recommendation system
+
+İki aşamalı: places.candidates üreticileri aday kümesini çıkarır,
+rank_candidates sadece bu kümeyi calculate_match_score ile skorlar.
 """
 from collections import defaultdict
 from django.db.models import Q
 from places.models import Place, PlacePreference
+from places.candidates import CandidateRequest, candidate_reason, generate_candidates, get_candidate_index
+from places.cf_model import cf_scores, get_cf_settings
 from accounts.models import UserTasteProfile
+from config.tracing import current_span, traced
 
 
 def calculate_match_score(place, query_params, taste_profile=None):
@@ -216,11 +222,122 @@ def calculate_price_match(place, query_price, taste_profile=None):
     return 0.5
 
 
+@traced('recommendations.normalize')
+def _normalize_scores(scored_places):
+    """En yüksek skoru %95'e normalize eder (0.95'ten büyükse), değilse sadece yuvarlar"""
+    current_span().set(candidates=len(scored_places))
+    if not scored_places:
+        return
+    max_score = max(item['score'] for item in scored_places)
+    factor = 0.95 / max_score if max_score > 0.95 else 1.0
+    for item in scored_places:
+        item['score'] = round(item['score'] * factor, 3)
+
+
+def candidate_bonus(evidence):
+    """Aday üreticilerinden gelen kanıt bonusu (graph gücü ve arkadaş beğenileri)"""
+    graph_bonus = (evidence.get('graph_strength') or 0.0) * 0.1
+    friend_bonus = min(0.1, (evidence.get('friend_likes') or 0) * 0.05)
+    return graph_bonus + friend_bonus
+
+
+@traced('recommendations.scoring')
+def rank_candidates(places, candidates, stats, query, taste_profile=None, collaborative=None):
+    """
+    İkinci aşama: adayları tüm özelliklerle skorlar
+
+    Args:
+        places: Place objeleri (sadece adaylar)
+        candidates: generate_candidates çıktısı - {place_id: kanıt}
+        stats: {place_id: (avg_rating, visit_count)}
+        query: dict - category, atmosphere, context, price
+        collaborative: {place_id: CF modelinin tahmini tercihi} (places.cf_model)
+
+    Returns:
+        list: [{'place', 'score', 'reason'}] (normalize edilmemiş)
+    """
+    category = query.get('category') or []
+    atmosphere = query.get('atmosphere') or []
+    filtered = bool(category or atmosphere or query.get('context') or query.get('price'))
+    cf_weight = get_cf_settings()['WEIGHT']
+
+    scored_places = []
+    for place in places:
+        avg_rating, visit_count = stats.get(place.id, (0.0, 0))
+        evidence = candidates.get(place.id, {})
+
+        if filtered:
+            # JSONField filtreleri: istenen kategori/atmosferden en az biri olmalı
+            if category and not any(c in (place.categories or []) for c in category):
+                continue
+            if atmosphere and not any(a in (place.tags or []) for a in atmosphere):
+                continue
+            score = calculate_match_score(place, query, taste_profile)
+            # Rating bonus ekle (%20)
+            if avg_rating:
+                score += (avg_rating / 5.0) * 0.2
+            if score <= 0:
+                continue
+        else:
+            # Rating bazlı skor + popülerlik bonusu
+            score = (avg_rating or 0.0) / 5.0 + min(0.3, visit_count / 100.0)
+            # Zevk profili uyumu (query yokken profil ağırlıkları kullanılır)
+            if taste_profile:
+                score += calculate_match_score(place, query, taste_profile) * 0.15
+
+        score += candidate_bonus(evidence)
+        # Eğitilmiş CF modelinin tahmini (0-1 aralığına kırpılır)
+        if collaborative and place.id in collaborative:
+            score += cf_weight * min(1.0, max(0.0, collaborative[place.id]))
+        scored_places.append({'place': place, 'score': min(1.0, score), 'reason': candidate_reason(evidence)})
+    current_span().set(candidates=len(places), scored=len(scored_places))
+    return scored_places
+
+
+@traced('recommendations.fetch')
+def _fetch_candidate_places(candidates):
+    """Aday ID'lerinin skorlamada kullanılan alanlarını tek sorguda yükler"""
+    places = list(Place.objects.filter(id__in=list(candidates)).only(
+        'id', 'name', 'city', 'address', 'categories', 'tags', 'price_level',
+        'photos', 'short_description', 'use_cases'
+    ))
+    current_span().set(candidates=len(candidates), places=len(places))
+    return places
+
+
+@traced('recommendations.serialize')
+def _format_results(results, stats):
+    """Skorlanmış mekanları API cevabı formatına çevirir"""
+    formatted_results = []
+    for item in results:
+        place = item['place']
+        avg_rating, visit_count = stats.get(place.id, (0.0, 0))
+        formatted_results.append({
+            'id': place.id,
+            'name': place.name,
+            'location': place.city or place.address or 'İstanbul',
+            'score': round(item['score'], 2),
+            'reason': item['reason'],
+            'price_level': place.price_level or '₺₺',
+            'average_rating': round(float(avg_rating), 2) if avg_rating else 0.0,
+            'photos': place.photos or [],
+            'short_description': place.short_description or '',
+            'categories': place.categories or [],
+            'tags': place.tags or [],
+            'total_visits': visit_count or 0
+        })
+    current_span().set(results=len(formatted_results))
+    return formatted_results
+
+
+@traced('recommendations.get_recommendations')
 def get_recommendations(user, query_params=None, limit=10):
     """
-    Kullanıcı için öneriler üretir
-    En çok beğenilen mekanları önceliklendirir
-    
+    Kullanıcı için öneriler üretir (iki aşamalı)
+
+    1. Aday üreticileri (places.candidates) birkaç yüz mekan ID'si döner
+    2. rank_candidates sadece bu adayları skorlar
+
     Args:
         user: User objesi
         query_params: dict - category, atmosphere, context, price
@@ -229,29 +346,6 @@ def get_recommendations(user, query_params=None, limit=10):
     Returns:
         tuple: (query_dict, results_list)
     """
-    from django.db.models import Avg, Count, Q
-    
-    if query_params is None:
-        query_params = {}
-    
-    # Kullanıcının daha önce swipe yaptığı mekanları al
-    swiped_place_ids = list(PlacePreference.objects.filter(
-        user=user
-    ).values_list('place_id', flat=True))
-    
-    # Swipe yapılmamış mekanları getir
-    if swiped_place_ids:
-        places = Place.objects.exclude(id__in=swiped_place_ids)
-    else:
-        places = Place.objects.all()
-    
-    # Taste profile'ı al
-    try:
-        taste_profile = UserTasteProfile.objects.get(user=user)
-    except UserTasteProfile.DoesNotExist:
-        taste_profile = None
-    
-    # Query parametrelerini hazırla
     if query_params is None:
         query_params = {}
     
@@ -265,125 +359,6 @@ def get_recommendations(user, query_params=None, limit=10):
     if isinstance(atmosphere, str):
         atmosphere = [a.strip() for a in atmosphere.split(',')]
     
-    # Eğer query parametresi yoksa, en çok beğenilen mekanları önceliklendir
-    if not query_params or (not category and not atmosphere and not query_params.get('context') and not query_params.get('price')):
-        # En çok beğenilen mekanları al (rating ve visit sayısına göre)
-        places = places.annotate(
-            visit_count=Count('visits'),
-            avg_rating=Avg('visits__rating')
-        ).filter(
-            visit_count__gt=0  # En az bir yorum olanlar
-        ).order_by(
-            '-avg_rating',  # Önce rating'e göre
-            '-visit_count'  # Sonra visit sayısına göre
-        )
-        
-        # Places'i listeye çevir
-        places_list = list(places[:limit * 2])  # Biraz daha al ki filtrelerden sonra yeterli olsun
-        
-        # Her mekan için skor hesapla (rating bazlı) - ESKİ YÖNTEM
-        scored_places = []
-        for place in places_list:
-            # Rating bazlı skor (0-1 arası)
-            rating_score = (place.avg_rating or 0) / 5.0 if place.avg_rating else 0.0
-            
-            # Visit sayısına göre bonus (popülerlik)
-            visit_bonus = min(0.3, (place.visit_count or 0) / 100.0) if place.visit_count else 0.0
-            
-            # Toplam skor
-            score = min(1.0, rating_score + visit_bonus)
-            
-            scored_places.append({
-                'place': place,
-                'score': score
-            })
-        
-        # Skorları normalize et (en yüksek skor %95'e normalize edilir)
-        if scored_places:
-            scores = [item['score'] for item in scored_places]
-            max_score = max(scores) if scores else 1.0
-            
-            # En yüksek skoru 0.95'e normalize et (eğer 0.95'ten büyükse)
-            if max_score > 0.95:
-                normalization_factor = 0.95 / max_score
-                for item in scored_places:
-                    item['score'] = round(item['score'] * normalization_factor, 3)
-            else:
-                # Zaten düşükse, sadece yuvarla
-                for item in scored_places:
-                    item['score'] = round(item['score'], 3)
-    else:
-        # Filtre varsa, önce filtrele sonra skorla
-        places_list = list(places)
-        
-        # JSONField filtrelerini Python'da yap
-        if category:
-            places_list = [p for p in places_list if category and any(c in (p.categories or []) for c in category)]
-        
-        if atmosphere:
-            places_list = [p for p in places_list if atmosphere and any(a in (p.tags or []) for a in atmosphere)]
-        
-        # Her mekan için skor hesapla - ESKİ YÖNTEM
-        scored_places = []
-        for place in places_list:
-            score = calculate_match_score(place, {
-                'category': category,
-                'atmosphere': atmosphere,
-                'context': query_params.get('context'),
-                'price': query_params.get('price')
-            }, taste_profile)
-            
-            # Rating bonus ekle
-            if place.average_rating:
-                rating_bonus = (place.average_rating / 5.0) * 0.2  # %20 ekle
-                score = min(1.0, score + rating_bonus)
-            
-            if score > 0:
-                scored_places.append({
-                    'place': place,
-                    'score': score
-                })
-        
-        # Skorları normalize et (en yüksek skor %95'e normalize edilir)
-        if scored_places:
-            scores = [item['score'] for item in scored_places]
-            max_score = max(scores) if scores else 1.0
-            
-            # En yüksek skoru 0.95'e normalize et (eğer 0.95'ten büyükse)
-            if max_score > 0.95:
-                normalization_factor = 0.95 / max_score
-                for item in scored_places:
-                    item['score'] = round(item['score'] * normalization_factor, 3)
-            else:
-                # Zaten düşükse, sadece yuvarla
-                for item in scored_places:
-                    item['score'] = round(item['score'], 3)
-    
-    # Skora göre sırala
-    scored_places.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Limit'e göre al
-    results = scored_places[:limit]
-    
-    # Sonuçları formatla
-    formatted_results = []
-    for item in results:
-        place = item['place']
-        formatted_results.append({
-            'id': place.id,
-            'name': place.name,
-            'location': place.city or place.address or 'İstanbul',
-            'score': round(item['score'], 2),
-            'price_level': place.price_level or '₺₺',
-            'average_rating': float(place.average_rating) if place.average_rating else 0.0,
-            'photos': place.photos or [],
-            'short_description': place.short_description or '',
-            'categories': place.categories or [],
-            'tags': place.tags or [],
-            'total_visits': getattr(place, 'visit_count', place.total_visits) or 0
-        })
-    
-    # Query dict oluştur
     query_dict = {
         'category': category,
         'atmosphere': atmosphere,
@@ -391,4 +366,37 @@ def get_recommendations(user, query_params=None, limit=10):
         'price': query_params.get('price')
     }
     
+    # Kullanıcının daha önce swipe yaptığı mekanlar
+    swiped_place_ids = list(PlacePreference.objects.filter(
+        user=user
+    ).values_list('place_id', flat=True))
+    
+    # Taste profile'ı al
+    try:
+        taste_profile = UserTasteProfile.objects.get(user=user)
+    except UserTasteProfile.DoesNotExist:
+        taste_profile = None
+    
+    # 1. Aşama: aday üretimi
+    index = get_candidate_index()
+    request = CandidateRequest(user, swiped_place_ids, taste_profile, category, atmosphere)
+    candidates, _ = generate_candidates(request, index)
+    
+    places = _fetch_candidate_places(candidates)
+    
+    collaborative = cf_scores(user.id, [place.id for place in places])
+    
+    # 2. Aşama: sadece adayları skorla
+    scored_places = rank_candidates(places, candidates, index.stats, query_dict, taste_profile, collaborative)
+    
+    _normalize_scores(scored_places)
+    # Skora göre sırala (eşitlikte popülerlik sırası)
+    scored_places.sort(key=lambda x: (-x['score'], index.rank.get(x['place'].id, 0)))
+    
+    results = scored_places[:limit]
+    
+    # Sonuçları formatla
+    formatted_results = _format_results(results, index.stats)
+    current_span().set(candidates=len(candidates), results=len(formatted_results))
+    
     return query_dict, formatted_results
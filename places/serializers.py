@@ -1,8 +1,47 @@
 from rest_framework import serializers
+from django.db.models import Avg, Count, F, Window
+from django.db.models.functions import RowNumber
 from .models import Place
 from visits.models import Visit
 
 
+def build_place_stats(place_ids):
+    """
+    PlaceSerializer için mekan istatistiklerini toplu hesaplar (sabit 2 sorgu)
+    Serializer context'ine 'place_stats' olarak verilirse mekan başına sorgu atılmaz
+    
+    Returns:
+        dict: {place_id: {'average_rating', 'total_visits', 'recent_comments'}}
+    """
+    place_ids = set(place_ids)
+    stats = {
+        place_id: {'average_rating': 0, 'total_visits': 0, 'recent_comments': []}
+        for place_id in place_ids
+    }
+    if not place_ids:
+        return stats
+    
+    aggregates = Visit.objects.filter(place_id__in=place_ids).values('place_id').annotate(
+        avg_rating=Avg('rating'),
+        visit_count=Count('id')
+    ).order_by()
+    for row in aggregates:
+        stats[row['place_id']]['total_visits'] = row['visit_count']
+        if row['avg_rating'] is not None:
+            stats[row['place_id']]['average_rating'] = round(row['avg_rating'], 2)
+    
+    # Her mekan için son 3 yorum (window function ile tek sorguda)
+    recent_visits = Visit.objects.filter(
+        place_id__in=place_ids, comment__isnull=False
+    ).exclude(comment='').select_related('user').annotate(
+        row_number=Window(RowNumber(), partition_by=[F('place_id')], order_by=F('visited_at').desc())
+    ).filter(row_number__lte=3).order_by('place_id', 'row_number')
+    for visit in recent_visits:
+        stats[visit.place_id]['recent_comments'].append(visit)
+    
+    return stats
+
+
 class VisitSerializer(serializers.ModelSerializer):
     """Ziyaret serializer"""
     user = serializers.StringRelatedField()
@@ -39,10 +78,23 @@ class PlaceSerializer(serializers.ModelSerializer):
             'latitude', 'longitude'
         ]
     
+    def _get_stats(self, obj):
+        """Context'te önceden hesaplanmış istatistik varsa onu döner"""
+        place_stats = self.context.get('place_stats')
+        if place_stats is not None:
+            return place_stats.get(obj.id)
+        return None
+    
     def get_average_rating(self, obj):
+        stats = self._get_stats(obj)
+        if stats is not None:
+            return stats['average_rating']
         return obj.average_rating
     
     def get_total_visits(self, obj):
+        stats = self._get_stats(obj)
+        if stats is not None:
+            return stats['total_visits']
         return obj.total_visits
     
     def get_first_photo(self, obj):
@@ -53,10 +105,13 @@ class PlaceSerializer(serializers.ModelSerializer):
     
     def get_rating_breakdown(self, obj):
         """Puan dağılımı: atmosfer, kahve, fiyat/performans, personel"""
-        from visits.models import Visit
-        visits = Visit.objects.filter(place=obj)
+        stats = self._get_stats(obj)
+        if stats is not None:
+            has_visits = stats['total_visits'] > 0
+        else:
+            has_visits = Visit.objects.filter(place=obj).exists()
         
-        if not visits.exists():
+        if not has_visits:
             return {
                 'atmosphere': 0,
                 'coffee': 0,
@@ -66,7 +121,7 @@ class PlaceSerializer(serializers.ModelSerializer):
         
         # Basit hesaplama - gerçekte Visit modelinde bu alanlar olabilir
         # Şimdilik average_rating'i kullan
-        avg = obj.average_rating
+        avg = stats['average_rating'] if stats is not None else obj.average_rating
         return {
             'atmosphere': round(avg + 0.2, 1) if avg > 0 else 0,
             'coffee': round(avg - 0.1, 1) if avg > 0 else 0,
@@ -76,8 +131,11 @@ class PlaceSerializer(serializers.ModelSerializer):
     
     def get_recent_comments(self, obj):
         """Son yorumlar (kısa, özet)"""
-        from visits.models import Visit
-        visits = Visit.objects.filter(place=obj, comment__isnull=False).exclude(comment='')[:3]
+        stats = self._get_stats(obj)
+        if stats is not None:
+            visits = stats['recent_comments']
+        else:
+            visits = Visit.objects.filter(place=obj, comment__isnull=False).exclude(comment='')[:3]
         
         comments = []
         for visit in visits:
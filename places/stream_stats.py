@@ -0,0 +1,524 @@
+"""
+Akış İstatistikleri - Sınırlı bellekli heavy-hitter sketch'leri
+
+"Bugün en çok beğenilen mekanlar" veya "bu haftanın en sık atmosfer
+etiketleri" için UserBehavior/Visit taranmaz; yazma yolları (record_behavior,
+değerlendirme) olayları dönem başına (gün ve ISO hafta) sketch'lere ekler:
+
+- Count-Min Sketch: (action, mekan) çiftinin yaklaşık sayısı (hep fazla tahmin)
+- Space-Saving: aksiyon başına en çok etkileşim alan TOP_K mekan ve
+  en sık etiketler (sayaç + hata payı)
+- HyperLogLog: tekil kullanıcı sayısı; genel ve en çok etkileşim alan
+  HLL_PLACES mekan için (düşen mekanın HLL'i de atılır)
+
+Bellek trafikten bağımsızdır: CMS_WIDTH x CMS_DEPTH sayaç, akış başına
+TOP_K anahtar ve HLL_PLACES x 2^HLL_PRECISION bayt.
+
+Her process kendi delta'sını tutar; arka plandaki thread CHECKPOINT_INTERVAL'da
+bir delta'yı DB'deki dönem satırıyla birleştirir (satır kilidi altında) ve
+sıfırlar. Sorgular DB checkpoint'i + bu process'in henüz yazılmamış delta'sını
+birleştirir; diğer worker'lar en fazla bir aralık geriden gelir.
+
+Ayarlar (settings.STREAM_STATS):
+    ENABLED: False ise yazma yolları hiçbir şey yapmaz
+    CMS_WIDTH / CMS_DEPTH: Count-Min boyutları (hata ~ e/WIDTH * toplam, olasılık e^-DEPTH)
+    TOP_K: Space-Saving akışı başına sayaç sayısı
+    HLL_PRECISION: HyperLogLog register biti (hata ~ 1.04 / sqrt(2^p))
+    HLL_PLACES: Tekil kullanıcı sayılan en fazla mekan
+    CHECKPOINT_INTERVAL: Saniye
+    RETENTION_DAYS: Bundan eski checkpoint'ler silinir
+"""
+import atexit
+import hashlib
+import heapq
+import io
+import json
+import os
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from .models import Place, StreamSketchCheckpoint
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'CMS_WIDTH': 2048,
+    'CMS_DEPTH': 4,
+    'TOP_K': 200,
+    'HLL_PRECISION': 9,
+    'HLL_PLACES': 500,
+    'CHECKPOINT_INTERVAL': 60,
+    'RETENTION_DAYS': 35,
+}
+
+PERIODS = ('day', 'week')
+MASK64 = (1 << 64) - 1
+
+
+def get_stream_settings():
+    return merged_settings('STREAM_STATS', DEFAULT_SETTINGS)
+
+
+def period_keys(moment=None):
+    """Yerel saate göre {'day': '2024-06-01', 'week': '2024-W22'}"""
+    moment = timezone.localtime(moment or timezone.now())
+    year, week, _ = moment.isocalendar()
+    return {'day': moment.strftime('%Y-%m-%d'), 'week': f'{year}-W{week:02d}'}
+
+
+def _hash128(key):
+    # Python hash() process başına rastgele; sketch'ler process'ler arası birleştiği için sabit hash
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+
+# --- Sketch'ler ---
+
+class CountMinSketch:
+    def __init__(self, width, depth, table=None):
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, key):
+        h1, h2 = _hash128(key)
+        depth, width = self.table.shape
+        # Kirsch-Mitzenmacher: d bağımsız hash yerine h1 + i * h2
+        return [(h1 + row * (h2 | 1)) % width for row in range(depth)]
+
+    def add(self, key, count=1):
+        self.table[np.arange(self.table.shape[0]), self._columns(key)] += count
+
+    def estimate(self, key):
+        return int(self.table[np.arange(self.table.shape[0]), self._columns(key)].min())
+
+    def merge(self, other):
+        if other.table.shape != self.table.shape:
+            raise ValueError('Count-Min boyutları farklı')
+        self.table += other.table
+
+
+class SpaceSaving:
+    """
+    En fazla `capacity` anahtar; gerçek sayı [count - error, count] aralığındadır
+
+    En küçük sayaç tembel bir min-heap'ten bulunur: sayaçlar sadece artar,
+    heap'teki eski değer ancak tepeye çıkınca düzeltilir (dolu sketch'e
+    yeni anahtar eklemek O(k) tarama yerine amortize O(log k))
+    """
+
+    def __init__(self, capacity, items=None):
+        self.capacity = capacity
+        self.items = items or {}  # anahtar -> [count, error]
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(count, key) for key, (count, _) in self.items.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_minimum(self):
+        # Her anahtarın heap'te tek kaydı vardır ve kayıtlı değer <= gerçek sayaçtır
+        while True:
+            recorded, key = heapq.heappop(self._heap)
+            count = self.items[key][0]
+            if count == recorded:
+                return count, key
+            heapq.heappush(self._heap, (count, key))
+
+    def add(self, key, count=1):
+        entry = self.items.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.items) < self.capacity:
+            self.items[key] = [count, 0]
+            heapq.heappush(self._heap, (count, key))
+        else:
+            # En küçük sayaç yeni anahtara devredilir
+            floor, evicted = self._pop_minimum()
+            del self.items[evicted]
+            self.items[key] = [floor + count, floor]
+            heapq.heappush(self._heap, (floor + count, key))
+
+    def minimum(self):
+        if len(self.items) < self.capacity or not self.items:
+            return 0
+        floor, key = self._pop_minimum()
+        heapq.heappush(self._heap, (floor, key))
+        return floor
+
+    def merge(self, other):
+        """Birleştirilebilir özet: diğer tarafta olmayan anahtar o tarafın minimumunu alır"""
+        own_min, other_min = self.minimum(), other.minimum()
+        merged = {}
+        for key in set(self.items) | set(other.items):
+            count_a, error_a = self.items.get(key, (own_min, own_min))
+            count_b, error_b = other.items.get(key, (other_min, other_min))
+            merged[key] = [count_a + count_b, error_a + error_b]
+        keep = sorted(merged, key=lambda k: -merged[k][0])[:self.capacity]
+        self.items = {key: merged[key] for key in keep}
+        self._rebuild_heap()
+
+    def top(self, limit):
+        ranked = sorted(self.items.items(), key=lambda item: -item[1][0])[:limit]
+        return [(key, count, error) for key, (count, error) in ranked]
+
+
+class HyperLogLog:
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, key):
+        h1, _ = _hash128(key)
+        index = h1 >> (64 - self.precision)
+        rest = (h1 << self.precision) & MASK64
+        rank = 64 - self.precision + 1 if rest == 0 else 64 - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Küçük kardinalitede linear counting
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if len(other.registers) != len(self.registers):
+            raise ValueError('HyperLogLog hassasiyetleri farklı')
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+
+class StreamStats:
+    """Bir dönemin tüm sketch'leri"""
+
+    def __init__(self, config):
+        self.config = config
+        self.events = 0
+        self.cms = CountMinSketch(config['CMS_WIDTH'], config['CMS_DEPTH'])
+        self.top_places = {}  # action -> SpaceSaving
+        self.top_tags = SpaceSaving(config['TOP_K'])
+        self.interactions = SpaceSaving(config['HLL_PLACES'])
+        self.users = HyperLogLog(config['HLL_PRECISION'])
+        self.place_users = {}  # place_id -> HyperLogLog
+
+    def add(self, user_id, place_id, action, tags=()):
+        self.events += 1
+        place_key = str(place_id)
+        self.cms.add(f'{action}:{place_key}')
+        self.top_places.setdefault(action, SpaceSaving(self.config['TOP_K'])).add(place_key)
+        for tag in tags or ():
+            if isinstance(tag, str) and tag:
+                self.top_tags.add(tag)
+        self.interactions.add(place_key)
+        self.users.add(str(user_id))
+        if place_key in self.interactions.items:
+            hll = self.place_users.get(place_id)
+            if hll is None:
+                hll = self.place_users[place_id] = HyperLogLog(self.config['HLL_PRECISION'])
+            hll.add(str(user_id))
+        self._trim_place_users()
+
+    def _trim_place_users(self):
+        if len(self.place_users) > len(self.interactions.items):
+            for place_id in [p for p in self.place_users if str(p) not in self.interactions.items]:
+                del self.place_users[place_id]
+
+    def merge(self, other):
+        self.events += other.events
+        self.cms.merge(other.cms)
+        for action, sketch in other.top_places.items():
+            self.top_places.setdefault(action, SpaceSaving(sketch.capacity)).merge(sketch)
+        self.top_tags.merge(other.top_tags)
+        self.interactions.merge(other.interactions)
+        self.users.merge(other.users)
+        for place_id, hll in other.place_users.items():
+            if place_id in self.place_users:
+                self.place_users[place_id].merge(hll)
+            else:
+                self.place_users[place_id] = HyperLogLog(hll.precision, hll.registers.copy())
+        self._trim_place_users()
+
+    def distinct_users(self, place_id):
+        hll = self.place_users.get(place_id)
+        return hll.count() if hll is not None else None
+
+    def memory_bytes(self):
+        counters = sum(len(s.items) for s in self.top_places.values())
+        counters += len(self.top_tags.items) + len(self.interactions.items)
+        hll = len(self.users.registers) * (1 + len(self.place_users))
+        return int(self.cms.table.nbytes + hll + counters * 64)
+
+    def to_bytes(self):
+        streams = {f'places:{action}': sketch for action, sketch in self.top_places.items()}
+        streams['tags'] = self.top_tags
+        streams['interactions'] = self.interactions
+        arrays = {
+            'meta': np.array(json.dumps({'events': self.events, 'streams': list(streams)})),
+            'cms': self.cms.table,
+            'users': self.users.registers,
+            'hll_place_ids': np.array(sorted(self.place_users), dtype=np.int64),
+        }
+        arrays['hll_registers'] = (
+            np.stack([self.place_users[p].registers for p in sorted(self.place_users)])
+            if self.place_users else np.zeros((0, len(self.users.registers)), dtype=np.uint8)
+        )
+        for i, sketch in enumerate(streams.values()):
+            ranked = sketch.top(sketch.capacity)
+            arrays[f's{i}_keys'] = np.array([key for key, _, _ in ranked], dtype=str)
+            arrays[f's{i}_counts'] = np.array([[c, e] for _, c, e in ranked], dtype=np.int64).reshape(-1, 2)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, config, payload):
+        stats = cls(config)
+        with np.load(io.BytesIO(bytes(payload)), allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            stats.events = meta['events']
+            stats.cms = CountMinSketch(0, 0, data['cms'].copy())
+            stats.users = HyperLogLog(config['HLL_PRECISION'], data['users'].copy())
+            for place_id, registers in zip(data['hll_place_ids'].tolist(), data['hll_registers']):
+                stats.place_users[place_id] = HyperLogLog(config['HLL_PRECISION'], registers.copy())
+            for i, name in enumerate(meta['streams']):
+                items = {
+                    key: [int(count), int(error)]
+                    for key, (count, error) in zip(data[f's{i}_keys'].tolist(), data[f's{i}_counts'])
+                }
+                capacity = config['HLL_PLACES'] if name == 'interactions' else config['TOP_K']
+                sketch = SpaceSaving(capacity, items)
+                if name == 'tags':
+                    stats.top_tags = sketch
+                elif name == 'interactions':
+                    stats.interactions = sketch
+                else:
+                    stats.top_places[name.split(':', 1)[1]] = sketch
+        return stats
+
+
+# --- Process içi kayıt ve checkpoint ---
+
+class StreamStatsRecorder:
+    """Dönem başına process delta'ları + periyodik DB checkpoint thread'i"""
+
+    def __init__(self, config):
+        self.config = config
+        self._deltas = {}  # (period, period_key) -> StreamStats
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, 'stream-stats-checkpoint', on_fork=self._drop_parent_deltas)
+        self.checkpointed_count = 0
+
+    def record(self, user_id, place_id, action, tags=(), moment=None):
+        self._worker.ensure()
+        keys = period_keys(moment)
+        with self._lock:
+            for period in PERIODS:
+                stats = self._deltas.get((period, keys[period]))
+                if stats is None:
+                    stats = self._deltas[(period, keys[period])] = StreamStats(self.config)
+                stats.add(user_id, place_id, action, tags)
+
+    def local_delta(self, period, period_key):
+        with self._lock:
+            delta = self._deltas.get((period, period_key))
+            if delta is None:
+                return None
+            copy = StreamStats(self.config)
+            copy.merge(delta)
+            return copy
+
+    def checkpoint(self):
+        """
+        Delta'ları DB satırlarıyla birleştirir, yazılan olay sayısını döner (dönem başına ayrı sayılır)
+        Durdurulmuş veya kapatılmış recorder yazmaz: çıkış kancası test/benchmark
+        veritabanı kapandıktan sonra gerçek veritabanına dokunmamalı
+        """
+        if self._worker.stopped or not get_stream_settings()['ENABLED']:
+            return 0
+        with self._checkpoint_lock:
+            with self._lock:
+                deltas, self._deltas = self._deltas, {}
+            written = 0
+            for (period, period_key), delta in deltas.items():
+                try:
+                    with transaction.atomic():
+                        row = StreamSketchCheckpoint.objects.select_for_update().filter(
+                            period=period, period_key=period_key
+                        ).first()
+                        merged = delta
+                        if row is not None:
+                            try:
+                                merged = StreamStats.from_bytes(self.config, row.payload)
+                                merged.merge(delta)
+                            except (ValueError, KeyError, OSError):
+                                # Sketch boyutları değiştiyse eski checkpoint bırakılır
+                                merged = delta
+                        StreamSketchCheckpoint.objects.update_or_create(
+                            period=period, period_key=period_key,
+                            defaults={'payload': merged.to_bytes(), 'events': merged.events}
+                        )
+                    written += delta.events
+                except Exception as e:
+                    print(f"Stream stats checkpoint error: {e}")
+                    # Yazılamayan delta bir sonraki checkpoint'e kalır
+                    with self._lock:
+                        current = self._deltas.setdefault((period, period_key), StreamStats(self.config))
+                        current.merge(delta)
+            self.checkpointed_count += written
+            return written
+
+    def stop(self, timeout=5):
+        """Kalan delta'yı checkpoint'ler ve thread'i durdurur, yazılan olay sayısını döner"""
+        written = self.checkpoint()
+        self._worker.stop(timeout)
+        return written
+
+    def _drop_parent_deltas(self):
+        # Parent'ın delta'sı child'da tekrar yazılmasın
+        self._deltas = {}
+
+    def _run(self):
+        while not self._worker.wait(self.config['CHECKPOINT_INTERVAL']):
+            close_old_connections()
+            try:
+                self.checkpoint()
+                cutoff = timezone.now() - timedelta(days=self.config['RETENTION_DAYS'])
+                StreamSketchCheckpoint.objects.filter(updated_at__lt=cutoff).delete()
+            except Exception as e:
+                print(f"Stream stats checkpoint error: {e}")
+            finally:
+                close_old_connections()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_stream_recorder():
+    """Process genelinde tek StreamStatsRecorder objesi"""
+    global _recorder
+
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = StreamStatsRecorder(get_stream_settings())
+                atexit.register(_recorder.stop)
+    return _recorder
+
+
+def record_stream_event(user_id, place, action, tags=None):
+    """
+    Yazma yollarından çağrılır (record_behavior, değerlendirme)
+    tags verilmezse mekanın etiketleri kullanılır
+    """
+    if not get_stream_settings()['ENABLED']:
+        return
+    if tags is None:
+        tags = place.tags or []
+    get_stream_recorder().record(user_id, place.id, action, tags)
+
+
+def get_stream_stats(period, period_key=None):
+    """DB checkpoint'i + bu process'in yazılmamış delta'sı"""
+    config = get_stream_settings()
+    period_key = period_key or period_keys()[period]
+    stats = StreamStats(config)
+    row = StreamSketchCheckpoint.objects.filter(period=period, period_key=period_key).first()
+    if row is not None:
+        try:
+            stats = StreamStats.from_bytes(config, row.payload)
+        except (ValueError, KeyError, OSError):
+            pass
+    if _recorder is not None:
+        delta = _recorder.local_delta(period, period_key)
+        if delta is not None:
+            try:
+                stats.merge(delta)
+            except ValueError:
+                stats = delta
+    return stats, period_key
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def stream_stats_api(request):
+    """
+    GET: Dönemin en çok etkileşim alan mekanları, etiketleri ve tekil kullanıcılar
+    Query: ?period=day|week&key=2024-06-01&action=swipe_like&limit=20&place_id=12
+    POST: Bu process'in delta'sını hemen checkpoint'le
+    """
+    if not get_stream_settings()['ENABLED']:
+        return Response(
+            {'success': False, 'error': 'Akış istatistikleri kapalı (STREAM_STATS.ENABLED)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if request.method == 'POST':
+        written = get_stream_recorder().checkpoint()
+        return Response({'success': True, 'pid': os.getpid(), 'checkpointed_events': written})
+
+    period = request.query_params.get('period', 'day')
+    if period not in PERIODS:
+        return Response(
+            {'success': False, 'error': 'period day veya week olmalı'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    action = request.query_params.get('action', 'swipe_like')
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        place_id = int(request.query_params['place_id']) if request.query_params.get('place_id') else None
+    except ValueError:
+        return Response(
+            {'success': False, 'error': 'limit ve place_id sayısal olmalı'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    stats, period_key = get_stream_stats(period, request.query_params.get('key'))
+    sketch = stats.top_places.get(action, SpaceSaving(0))
+    ranked = [(int(key), count, error) for key, count, error in sketch.top(limit)]
+    names = dict(Place.objects.filter(id__in=[p for p, _, _ in ranked]).values_list('id', 'name'))
+
+    data = {
+        'success': True,
+        'period': period,
+        'key': period_key,
+        'action': action,
+        'events': stats.events,
+        'distinct_users': stats.users.count(),
+        'actions': sorted(stats.top_places),
+        'top_places': [
+            {
+                'place_id': p,
+                'name': names.get(p, ''),
+                'count': count,
+                'error': error,
+                'distinct_users': stats.distinct_users(p),
+            }
+            for p, count, error in ranked
+        ],
+        'top_tags': [
+            {'tag': tag, 'count': count, 'error': error}
+            for tag, count, error in stats.top_tags.top(limit)
+        ],
+        'memory_bytes': stats.memory_bytes(),
+    }
+    if place_id is not None:
+        data['place'] = {
+            'place_id': place_id,
+            'counts': {a: stats.cms.estimate(f'{a}:{place_id}') for a in sorted(stats.top_places)},
+            'distinct_users': stats.distinct_users(place_id),
+        }
+    return Response(data)
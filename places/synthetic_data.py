@@ -0,0 +1,444 @@
+"""
+Sentetik Veri Üretici - Yük testi için üretim benzeri veri seti
+
+- Mekan popülerliği Zipf dağılımlı (az sayıda mekan ziyaretlerin çoğunu alır)
+- Koordinatlar semt merkezleri etrafında kümelenir
+- Kullanıcılar ve mekanlar zevk kümelerine ayrılır; ziyaret, swipe ve
+  arkadaşlıklar aynı kümeye doğru eğilimlidir (zevk profilleri de kümeye göre)
+- Satırlar parça parça bulk_create ile, her parça kendi transaction'ında yazılır
+- Ziyaret içerikleri seed_user_data'daki build_random_visit ile üretilir
+  (puan zevk kümesine göre ayarlanır)
+- Her parça (tablo, parça no) ile seed'lenir: worker sayısından bağımsız olarak
+  aynı seed ve parça boyutu aynı veriyi üretir
+
+Mekan ve kullanıcılar sırayla yazılır (sonraki tablolar ID'lerine ihtiyaç duyar);
+ziyaret, swipe, davranış ve arkadaşlık tabloları paralel worker process'lerle
+yazılabilir. SQLite tek yazıcıya izin verdiği için orada worker kullanılmaz.
+
+API benchmark'ı (places/benchmark.py) da veriyi bu modülle üretir.
+"""
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.management.commands.seed_user_data import VISIT_SENTIMENTS, build_random_visit
+from accounts.models import User, Profile, UserTasteProfile
+from places.management.commands.seed_data import PLACE_ENRICHMENTS
+from places.models import Place, PlacePreference, UserBehavior
+from social.models import Friendship
+from visits.models import Visit
+
+
+SCALES = {
+    'small': {'places': 1000, 'users': 500, 'visits': 10000, 'swipes': 10000, 'behaviors': 20000, 'friendships': 2000},
+    'medium': {'places': 10000, 'users': 5000, 'visits': 100000, 'swipes': 100000, 'behaviors': 200000, 'friendships': 20000},
+    'large': {'places': 100000, 'users': 50000, 'visits': 1000000, 'swipes': 1000000, 'behaviors': 2000000, 'friendships': 200000},
+}
+
+# Zevk kümeleri: kategori ağırlıkları ve atmosfer etiketleri
+TASTE_CLUSTERS = [
+    {'name': 'Çalışma', 'categories': {'kafe': 0.6, 'kahve': 0.4}, 'tags': ['sessiz', 'rahat', 'çalışma dostu', 'kitap dostu']},
+    {'name': 'Brunch', 'categories': {'brunch': 0.5, 'kafe': 0.3, 'pastane': 0.2}, 'tags': ['estetik', 'sıcak', 'instagramable', 'modern']},
+    {'name': 'Gece', 'categories': {'bar': 0.6, 'meyhane': 0.4}, 'tags': ['canlı', 'müzikli', 'kalabalık', 'samimi']},
+    {'name': 'Yemek', 'categories': {'restoran': 0.7, 'meyhane': 0.3}, 'tags': ['samimi', 'manzaralı', 'mahalle', 'lokal']},
+    {'name': 'Tatlı', 'categories': {'pastane': 0.6, 'kafe': 0.4}, 'tags': ['sıcak', 'estetik', 'butik', 'huzurlu']},
+]
+
+# (şehir, semt, enlem, boylam, ağırlık)
+HOTSPOTS = [
+    ('İstanbul', 'Kadıköy', 40.990, 29.029, 8),
+    ('İstanbul', 'Moda', 40.982, 29.026, 5),
+    ('İstanbul', 'Beşiktaş', 41.043, 29.007, 7),
+    ('İstanbul', 'Cihangir', 41.031, 28.983, 5),
+    ('İstanbul', 'Karaköy', 41.024, 28.977, 5),
+    ('İstanbul', 'Nişantaşı', 41.052, 28.994, 4),
+    ('İstanbul', 'Bebek', 41.077, 29.043, 3),
+    ('Ankara', 'Kızılay', 39.920, 32.854, 4),
+    ('Ankara', 'Çankaya', 39.900, 32.860, 3),
+    ('İzmir', 'Alsancak', 38.437, 27.143, 4),
+    ('İzmir', 'Karşıyaka', 38.459, 27.110, 2),
+    ('Bursa', 'Nilüfer', 40.214, 28.984, 2),
+]
+# Semt merkezinden sapma (derece, ~1 km)
+HOTSPOT_SPREAD = 0.01
+
+# Aynı kümedeki mekanın seçilme olasılığı çarpanı
+CLUSTER_AFFINITY = 6.0
+# Tekrar eden (kullanıcı, mekan) çiftlerini telafi için fazladan çekiliş oranı
+OVERSAMPLE = 1.5
+# Arkadaşlıkların aynı kümeden olma oranı
+FRIEND_HOMOPHILY = 0.7
+BEHAVIOR_ACTIONS = np.array(['view', 'click', 'like', 'save', 'visit', 'share'])
+BEHAVIOR_ACTION_WEIGHTS = np.array([0.5, 0.25, 0.1, 0.07, 0.05, 0.03])
+# Geçmişe dönük zaman damgaları için pencere (gün)
+HISTORY_DAYS = 365
+
+TABLE_IDS = {'places': 1, 'users': 2, 'visits': 3, 'swipes': 4, 'behaviors': 5, 'friendships': 6}
+
+
+class SyntheticContext:
+    """
+    Mekan/kullanıcı düzeyindeki tüm özellikler (tek seferde, seed'den üretilir)
+    Worker'lar bu diziler üzerinden sadece kendi parçalarının satırlarını üretir
+    """
+
+    def __init__(self, counts, seed=42, zipf_exponent=1.1, prefix='synth'):
+        self.counts = counts
+        self.seed = seed
+        self.prefix = prefix
+        self.now = timezone.now()
+        rng = np.random.default_rng([seed, 0])
+
+        n_places, n_users = counts['places'], counts['users']
+        n_clusters = len(TASTE_CLUSTERS)
+
+        # Zipf popülerliği: rastgele sıralanmış 1/rank^s ağırlıkları
+        ranks = rng.permutation(n_places) + 1
+        self.popularity = 1.0 / np.power(ranks, zipf_exponent)
+        self.place_cluster = rng.integers(0, n_clusters, size=n_places)
+
+        hotspot_weights = np.array([h[4] for h in HOTSPOTS], dtype=float)
+        self.place_hotspot = rng.choice(len(HOTSPOTS), size=n_places, p=hotspot_weights / hotspot_weights.sum())
+
+        # Kullanıcı aktivitesi de çarpık: az sayıda kullanıcı çok ziyaret eder
+        self.user_cluster = rng.integers(0, n_clusters, size=n_users)
+        activity = rng.lognormal(mean=0.0, sigma=1.0, size=n_users)
+        self.user_activity = activity / activity.sum()
+        self.cluster_members = [np.flatnonzero(self.user_cluster == c) for c in range(n_clusters)]
+
+        self.place_ids = None
+        self.user_ids = None
+
+        # Küme başına mekan seçim dağılımı (popülerlik x küme yakınlığı), kümülatif
+        self.cluster_place_cdf = [
+            np.cumsum(self.popularity * np.where(self.place_cluster == cluster, CLUSTER_AFFINITY, 1.0))
+            for cluster in range(n_clusters)
+        ]
+
+    def chunk_rng(self, table, chunk_index):
+        return np.random.default_rng([self.seed, TABLE_IDS[table], chunk_index])
+
+    def username(self, index):
+        return f'{self.prefix}_{self.seed}_{index}'
+
+
+@contextmanager
+def historical_timestamps(model, *field_names):
+    """
+    auto_now/auto_now_add alanlarını geçici kapatır: bulk_create verilen
+    geçmiş tarihleri ezmesin (sadece seed sırasında)
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _past(ctx, rng, size):
+    """Son HISTORY_DAYS gün içinde rastgele zamanlar"""
+    minutes = rng.integers(0, HISTORY_DAYS * 24 * 60, size=size)
+    return [ctx.now - timedelta(minutes=int(m)) for m in minutes]
+
+
+def _write(model, objs, ignore_conflicts=False):
+    with transaction.atomic():
+        model.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=ignore_conflicts)
+    return len(objs)
+
+
+# --- Parça üreticileri: (ctx, chunk_index, start, stop) -> yazılan satır sayısı ---
+
+def build_places(ctx, chunk_index, start, stop):
+    rng = ctx.chunk_rng('places', chunk_index)
+    places = []
+    for i in range(start, stop):
+        cluster = TASTE_CLUSTERS[ctx.place_cluster[i]]
+        city, district, lat, lon, _ = HOTSPOTS[ctx.place_hotspot[i]]
+        names, weights = zip(*cluster['categories'].items())
+        primary = names[rng.choice(len(names), p=np.array(weights) / sum(weights))]
+        tags = list(rng.choice(cluster['tags'], size=rng.integers(2, 4), replace=False))
+        places.append(Place(
+            name=f'{district} {primary.title()} {i}',
+            description=f"{cluster['name']} mekanı",
+            address=f'{district} Mah. No:{i}',
+            city=city,
+            categories=[primary] + ([n for n in names if n != primary][:1] if rng.random() < 0.3 else []),
+            tags=tags,
+            price_level=str(rng.choice(['₺', '₺₺', '₺₺₺'], p=[0.3, 0.5, 0.2])),
+            atmosphere_profile=PLACE_ENRICHMENTS['atmosphere_profile'],
+            behavior_stats=PLACE_ENRICHMENTS['behavior_stats'],
+            price_range=PLACE_ENRICHMENTS['price_range'],
+            menu_highlights=PLACE_ENRICHMENTS['menu_highlights'],
+            popular_orders=PLACE_ENRICHMENTS['popular_orders'],
+            vibe_tags=PLACE_ENRICHMENTS['vibe_tags'],
+            use_cases=PLACE_ENRICHMENTS['use_cases'],
+            working_suitability=int(rng.integers(60, 100) if cluster['name'] == 'Çalışma' else rng.integers(0, 60)),
+            latitude=Decimal(f'{lat + rng.normal(0, HOTSPOT_SPREAD):.6f}'),
+            longitude=Decimal(f'{lon + rng.normal(0, HOTSPOT_SPREAD):.6f}'),
+        ))
+    return _write(Place, places)
+
+
+def build_users(ctx, chunk_index, start, stop):
+    users = [
+        User(username=ctx.username(i), email=f'{ctx.username(i)}@example.com', password=ctx.password_hash)
+        for i in range(start, stop)
+    ]
+    return _write(User, users)
+
+
+def build_profiles(ctx, chunk_index, start, stop):
+    """Profile ve UserTasteProfile (bulk_create post_save sinyalini tetiklemez)"""
+    rng = ctx.chunk_rng('users', chunk_index + 1_000_000)
+    profiles, tastes = [], []
+    for i in range(start, stop):
+        user_id = ctx.user_ids[i]
+        cluster = TASTE_CLUSTERS[ctx.user_cluster[i]]
+        city = HOTSPOTS[rng.integers(len(HOTSPOTS))][0]
+        profiles.append(Profile(user_id=user_id, display_name=f'Kullanıcı {i}', city=city,
+                                favorite_categories=list(cluster['categories'])))
+        # Küme ağırlıkları etrafında gürültülü zevk profili
+        tastes.append(UserTasteProfile(
+            user_id=user_id,
+            category_weights={c: round(float(np.clip(w + rng.normal(0, 0.1), 0, 1)), 2) for c, w in cluster['categories'].items()},
+            atmosphere_weights={t: round(float(rng.uniform(0.2, 0.6)), 2) for t in cluster['tags'][:3]},
+            style_label=cluster['name'],
+        ))
+    with transaction.atomic():
+        Profile.objects.bulk_create(profiles, batch_size=1000, ignore_conflicts=True)
+        UserTasteProfile.objects.bulk_create(tastes, batch_size=1000, ignore_conflicts=True)
+    return len(profiles)
+
+
+def _user_place_pairs(ctx, rng, user_start, user_stop, total):
+    """
+    Kullanıcı aralığı için (kullanıcı indeksi, mekan indeksi) çiftleri
+    Kullanıcı aktivitesine göre dağıtılır. Tekrarları telafi etmek için fazladan
+    çekilir, tekrarlar atılır ve her kullanıcı hedef sayısına kırpılır (popüler
+    mekanlarda yoğunlaşan çok aktif kullanıcılar hedefin altında kalabilir)
+    """
+    per_user = np.minimum(rng.poisson(ctx.user_activity[user_start:user_stop] * total), len(ctx.place_ids))
+    users = np.repeat(np.arange(user_start, user_stop), np.ceil(per_user * OVERSAMPLE).astype(np.int64))
+    places = _sample_places_by_cluster(ctx, rng, ctx.user_cluster[users])
+
+    # (kullanıcı, mekan) tekrarlarını at, çekiliş sırasını koru (kullanıcılar gruplu kalır)
+    _, first = np.unique(users * len(ctx.place_ids) + places, return_index=True)
+    first.sort()
+    users, places = users[first], places[first]
+
+    # Kullanıcı içindeki sıra < hedef olanları tut
+    group_start = np.searchsorted(users, users)
+    rank = np.arange(len(users)) - group_start
+    keep = rank < per_user[users - user_start]
+    return users[keep], places[keep]
+
+
+def build_visits(ctx, chunk_index, start, stop):
+    rng = ctx.chunk_rng('visits', chunk_index)
+    users, places = _user_place_pairs(ctx, rng, start, stop, ctx.counts['visits'])
+    same_cluster = ctx.user_cluster[users] == ctx.place_cluster[places]
+    # Zevkine uyan mekanlara daha yüksek puan
+    ratings = np.clip(np.round(rng.normal(np.where(same_cluster, 4.3, 3.4), 0.7)), 1, 5).astype(int)
+    # build_random_visit random.Random arayüzü bekler; parça rng'sinden seed'lenir
+    visit_rng = random.Random(int(rng.integers(2 ** 63)))
+    today = timezone.localdate(ctx.now)
+
+    visits = []
+    for n, (i, j) in enumerate(zip(users.tolist(), places.tolist())):
+        visit = build_random_visit(User(id=ctx.user_ids[i]), Place(id=ctx.place_ids[j]), today, rng=visit_rng)
+        visit.rating = int(ratings[n])
+        visit.sentiment = VISIT_SENTIMENTS[0 if ratings[n] >= 5 else 1 if ratings[n] >= 4 else 2]
+        visits.append(visit)
+    with historical_timestamps(Visit, 'visited_at'):
+        return _write(Visit, visits, ignore_conflicts=True)
+
+
+def build_swipes(ctx, chunk_index, start, stop):
+    rng = ctx.chunk_rng('swipes', chunk_index)
+    users, places = _user_place_pairs(ctx, rng, start, stop, ctx.counts['swipes'])
+    same_cluster = ctx.user_cluster[users] == ctx.place_cluster[places]
+    like_p = np.where(same_cluster, 0.8, 0.35)
+    roll = rng.random(len(users))
+    actions = np.where(roll < like_p * 0.8, 'like', np.where(roll < like_p, 'save', 'dislike'))
+    timestamps = _past(ctx, rng, len(users))
+
+    swipes = [
+        PlacePreference(user_id=ctx.user_ids[i], place_id=ctx.place_ids[j], action=str(actions[n]), timestamp=timestamps[n])
+        for n, (i, j) in enumerate(zip(users.tolist(), places.tolist()))
+    ]
+    with historical_timestamps(PlacePreference, 'timestamp'):
+        return _write(PlacePreference, swipes, ignore_conflicts=True)
+
+
+def build_behaviors(ctx, chunk_index, start, stop):
+    rng = ctx.chunk_rng('behaviors', chunk_index)
+    share = ctx.user_activity[start:stop]
+    count = int(round(ctx.counts['behaviors'] * share.sum()))
+    users = start + rng.choice(stop - start, size=count, p=share / share.sum())
+    places = _sample_places_by_cluster(ctx, rng, ctx.user_cluster[users])
+    actions = rng.choice(BEHAVIOR_ACTIONS, size=count, p=BEHAVIOR_ACTION_WEIGHTS)
+    timestamps = _past(ctx, rng, count)
+
+    behaviors = [
+        UserBehavior(user_id=ctx.user_ids[i], place_id=ctx.place_ids[j], action_type=str(actions[n]), timestamp=timestamps[n])
+        for n, (i, j) in enumerate(zip(users.tolist(), places.tolist()))
+    ]
+    return _write(UserBehavior, behaviors)
+
+
+def _sample_places_by_cluster(ctx, rng, clusters):
+    """Her satır için kendi kümesinin dağılımından mekan seçer (kümülatif dağılım + searchsorted)"""
+    places = np.empty(len(clusters), dtype=np.int64)
+    for cluster in np.unique(clusters):
+        mask = clusters == cluster
+        cdf = ctx.cluster_place_cdf[cluster]
+        places[mask] = np.minimum(np.searchsorted(cdf, rng.random(int(mask.sum())) * cdf[-1]), len(cdf) - 1)
+    return places
+
+
+def build_friendships(ctx, chunk_index, start, stop):
+    rng = ctx.chunk_rng('friendships', chunk_index)
+    n_users = len(ctx.user_ids)
+    share = ctx.user_activity[start:stop]
+    count = int(round(ctx.counts['friendships'] * share.sum()))
+    requesters = start + rng.choice(stop - start, size=count, p=share / share.sum())
+
+    # Homofili: çoğunlukla aynı kümeden arkadaş, kalanı rastgele
+    receivers = rng.integers(0, n_users, size=count)
+    same = rng.random(count) < FRIEND_HOMOPHILY
+    requester_clusters = ctx.user_cluster[requesters]
+    for cluster, members in enumerate(ctx.cluster_members):
+        mask = same & (requester_clusters == cluster)
+        if len(members) and mask.any():
+            receivers[mask] = members[rng.integers(0, len(members), size=int(mask.sum()))]
+
+    # Her çift tek yönde tutulur (a < b) ve tekrarlar atılır
+    low, high = np.minimum(requesters, receivers), np.maximum(requesters, receivers)
+    keep = low != high
+    pairs = np.unique(np.stack([low[keep], high[keep]], axis=1), axis=0)
+    statuses = rng.choice(['accepted', 'pending', 'rejected'], size=len(pairs), p=[0.8, 0.15, 0.05])
+
+    friendships = [
+        Friendship(requester_id=ctx.user_ids[a], receiver_id=ctx.user_ids[b], status=str(statuses[n]))
+        for n, (a, b) in enumerate(pairs.tolist())
+    ]
+    return _write(Friendship, friendships, ignore_conflicts=True)
+
+
+BUILDERS = {
+    'visits': build_visits,
+    'swipes': build_swipes,
+    'behaviors': build_behaviors,
+    'friendships': build_friendships,
+}
+
+
+# --- Worker process'leri ---
+
+_worker_ctx = None
+
+
+def _init_worker(ctx):
+    global _worker_ctx
+    _worker_ctx = ctx
+    # Ana process'ten miras kalan bağlantı paylaşılmasın
+    connections.close_all()
+
+
+def _run_chunk(table, chunk_index, start, stop):
+    return BUILDERS[table](_worker_ctx, chunk_index, start, stop)
+
+
+def _chunks(total, chunk_size):
+    return [(index, start, min(start + chunk_size, total)) for index, start in enumerate(range(0, total, chunk_size))]
+
+
+def _new_ids(model, after_id, expected):
+    ids = list(model.objects.filter(id__gt=after_id).order_by('id').values_list('id', flat=True))
+    if len(ids) != expected:
+        raise RuntimeError(f'{model.__name__}: {expected} satır beklenirken {len(ids)} bulundu')
+    return ids
+
+
+def generate(counts, seed=42, chunk_size=5000, workers=1, zipf_exponent=1.1, prefix='synth', progress=None):
+    """
+    Sentetik veri setini üretir
+
+    Args:
+        counts: {'places', 'users', 'visits', 'swipes', 'behaviors', 'friendships'}
+        workers: olay tabloları için paralel process sayısı (SQLite'ta 1'e düşer)
+        progress: callable(tablo, yazılan satır) - ilerleme bildirimi
+
+    Returns:
+        dict: tablo başına yazılan satır sayısı
+    """
+    if connection.vendor == 'sqlite':
+        workers = 1
+
+    ctx = SyntheticContext(counts, seed=seed, zipf_exponent=zipf_exponent, prefix=prefix)
+    # Hash tek sefer hesaplanır; kullanıcı başına PBKDF2 saatler sürer
+    ctx.password_hash = make_password('testpass123')
+    report = progress or (lambda table, rows: None)
+    written = {}
+
+    # 1. Mekan ve kullanıcılar sırayla (ID sırası = indeks sırası)
+    for table, model, builder in (('places', Place, build_places), ('users', User, build_users)):
+        after_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        for chunk_index, start, stop in _chunks(counts[table], chunk_size):
+            builder(ctx, chunk_index, start, stop)
+            report(table, stop)
+        ids = _new_ids(model, after_id, counts[table])
+        if table == 'places':
+            ctx.place_ids = ids
+        else:
+            ctx.user_ids = ids
+        written[table] = len(ids)
+
+    for chunk_index, start, stop in _chunks(counts['users'], chunk_size):
+        build_profiles(ctx, chunk_index, start, stop)
+
+    if not ctx.place_ids or not ctx.user_ids:
+        return written
+
+    # 2. Olay tabloları: kullanıcı aralıklarına bölünür
+    jobs = [
+        (table, chunk_index, start, stop)
+        for table in BUILDERS if counts.get(table)
+        for chunk_index, start, stop in _chunks(counts['users'], max(1, chunk_size // 10))
+    ]
+    for table in BUILDERS:
+        written[table] = 0
+
+    if workers > 1:
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(ctx,),
+        )
+        with executor:
+            futures = [(job[0], executor.submit(_run_chunk, *job)) for job in jobs]
+            for table, future in futures:
+                written[table] += future.result()
+                report(table, written[table])
+    else:
+        for table, chunk_index, start, stop in jobs:
+            written[table] += BUILDERS[table](ctx, chunk_index, start, stop)
+            report(table, written[table])
+
+    return written
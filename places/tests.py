@@ -1,3 +1,1391 @@
-from django.test import TestCase
+import csv
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import SkipTest, mock
 
-# Create your tests here.
+import numpy as np
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from accounts.models import User
+from config import sql_profiling
+from config.mongodb import close_mongodb_client, get_mongodb_client
+from config.tracing import get_tracer
+from visits.models import Visit
+from . import (
+    candidates, catalogue_import, catalogue_snapshot, cf_model, evaluation, recommendation_slates, trending,
+)
+from .advanced_features import build_place_graph
+from .behavior_log import BehaviorEventBuffer, serialize_event, store_segment
+from .behavior_stats import compute_behavior_stats
+from .behavior_storage import (
+    apply_retention, archive_raw_events, build_rollups, count_user_actions, count_user_place_actions,
+    list_partition_tables,
+)
+from .bulk_export import run_export, verify_export
+from .models import (
+    BehaviorSegmentLoad, Place, PlaceGraph, PlacePreference, RecommendationSlate, StreamSketchCheckpoint,
+    UserBehavior, UserBehaviorRollup,
+)
+from .mongo_read_model import sync_read_model
+from .recommendations import get_recommendations
+from .stream_stats import CountMinSketch, HyperLogLog, SpaceSaving, StreamStats, StreamStatsRecorder, get_stream_settings
+
+
+MONGODB_TEST_URI = os.environ.get('MONGODB_TEST_URI', 'mongodb://localhost:27017')
+MONGODB_TEST_DATABASE = 'btkdb_test_read_model'
+
+
+def mongo_test_settings(**overrides):
+    # MONGODB_TEST_CLIENT_CLASS=mongomock.MongoClient ile mongod olmadan da çalıştırılabilir
+    config = {
+        'uri': MONGODB_TEST_URI,
+        'database': MONGODB_TEST_DATABASE,
+        'client_class': os.environ.get('MONGODB_TEST_CLIENT_CLASS') or None,
+        'server_selection_timeout_ms': 500,
+        'connect_timeout_ms': 500,
+        'read_preference': 'primary',
+    }
+    config.update(overrides)
+    return config
+
+
+def read_model_settings(*endpoints):
+    return {
+        'ENDPOINTS': {endpoint: True for endpoint in endpoints},
+        'READ_PREFERENCE': 'primary',
+        'FALLBACK_TO_SQL': False,
+    }
+
+
+class MongoReadModelParityTests(TestCase):
+    """Read model yanıtları SQL yoluyla birebir aynı olmalı (yerel mongod gerekir)"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mongo_settings = override_settings(MONGODB_SETTINGS=mongo_test_settings())
+        cls.mongo_settings.enable()
+        try:
+            close_mongodb_client()
+            get_mongodb_client().admin.command('ping')
+        except Exception as e:
+            close_mongodb_client()
+            cls.mongo_settings.disable()
+            raise SkipTest(f'Yerel mongod yok ({MONGODB_TEST_URI}): {e}')
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        get_mongodb_client().drop_database(MONGODB_TEST_DATABASE)
+        close_mongodb_client()
+        cls.mongo_settings.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='kasif', email='kasif@example.com', password='testpass123')
+        reviewers = [
+            User.objects.create_user(username=f'yorumcu{j}', email=f'yorumcu{j}@example.com', password='testpass123')
+            for j in range(4)
+        ]
+        specs = [
+            ('Moda Kahve', 'Moda Cad. 1', 'İstanbul', ['kafe', 'kahve'], ['sessiz', 'samimi'], '₺', (40.9870, 29.0260)),
+            ('Kadıköy Meyhane', 'Kadıköy Çarşı', 'İstanbul', ['meyhane'], ['samimi'], '₺₺', (40.9900, 29.0290)),
+            ('Cihangir Brunch', 'Cihangir Sok. 4', 'İstanbul', ['brunch', 'kafe'], ['estetik'], '₺₺₺', (41.0310, 28.9830)),
+            ('Alsancak Bar', 'Kıbrıs Şehitleri', 'İzmir', ['bar'], ['samimi'], '₺₺', (38.4370, 27.1430)),
+            ('Koordinatsız Kafe', 'Moda', 'İstanbul', ['kafe'], ['sessiz'], '₺₺', None),
+            ('Moda Pastane', 'Moda Cad. 9', 'İstanbul', ['pastane', 'kafe'], ['sıcak'], '₺', (40.9875, 29.0265)),
+        ]
+        now = timezone.now()
+        cls.places = []
+        for i, (name, address, city, categories, tags, price, location) in enumerate(specs):
+            place = Place.objects.create(
+                name=name, address=address, city=city, categories=categories, tags=tags, price_level=price,
+                description=f'{name} açıklaması', latitude=location[0] if location else None,
+                longitude=location[1] if location else None,
+            )
+            # BSON milisaniye hassasiyetinde; sıralama eşitliği olmasın
+            Place.objects.filter(id=place.id).update(created_at=now - timedelta(minutes=i))
+            cls.places.append(place)
+        for i, place in enumerate(cls.places[:4]):
+            for j in range(i + 1):
+                Visit.objects.create(user=reviewers[j], place=place, rating=3 + (j % 3), comment=f'{place.name} yorum {j}')
+        PlacePreference.objects.create(user=cls.user, place=cls.places[1], action='like')
+
+    def setUp(self):
+        sync_read_model()
+        self.client.force_login(self.user)
+
+    def assertParity(self, endpoint, url):
+        sql_response = self.client.get(url)
+        with override_settings(MONGO_READ_MODEL=read_model_settings(endpoint)):
+            mongo_response = self.client.get(url)
+        self.assertEqual(sql_response.status_code, 200)
+        self.assertEqual(mongo_response.status_code, 200)
+        self.assertEqual(sql_response.json(), mongo_response.json(), url)
+        return mongo_response.json()
+
+    def test_discover_parity(self):
+        urls = [
+            '/api/places/discover/',
+            '/api/places/discover/?show_all=true',
+            '/api/places/discover/?category=kafe',
+            '/api/places/discover/?category=kafe&atmosphere=sessiz',
+            '/api/places/discover/?price_level=₺&show_all=true',
+            '/api/places/discover/?city=İzmir',
+            '/api/places/discover/?search=moda',
+            '/api/places/discover/?mode=brunch&suitable_for=kafe',
+        ]
+        for url in urls:
+            self.assertParity('discover', url)
+        data = self.assertParity('discover', '/api/places/discover/?show_all=true')
+        self.assertEqual(data['total_available'], len(self.places))
+
+    def test_discover_excludes_swiped_places(self):
+        data = self.assertParity('discover', '/api/places/discover/')
+        self.assertNotIn(self.places[1].id, [place['id'] for place in data['places']])
+
+    def test_nearby_parity(self):
+        for url in [
+            '/api/places/nearby/?lat=40.9872&lon=29.0262&radius=1',
+            '/api/places/nearby/?lat=40.9872&lon=29.0262&radius=10&limit=2',
+            '/api/places/nearby/?lat=41.0&lon=29.0&radius=600',
+        ]:
+            self.assertParity('nearby', url)
+        data = self.assertParity('nearby', '/api/places/nearby/?lat=40.9872&lon=29.0262&radius=1')
+        distances = [place['distance_km'] for place in data['places']]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(data['count'], 3)
+
+    def test_search_parity(self):
+        for url in [
+            '/api/places/',
+            '/api/places/?search=moda',
+            '/api/places/?search=açıklaması',
+            '/api/places/?city=İstanbul',
+        ]:
+            self.assertParity('search', url)
+        data = self.assertParity('search', '/api/places/?search=moda')
+        self.assertEqual(data['count'], 3)
+
+    def test_embedded_rating_aggregates(self):
+        data = self.assertParity('search', f'/api/places/?search={self.places[3].name}')
+        place = data['results'][0]
+        self.assertEqual(place['total_visits'], 4)
+        self.assertEqual(len(place['recent_comments']), 3)
+
+    def test_incremental_sync_picks_up_new_visit(self):
+        Visit.objects.create(user=self.user, place=self.places[4], rating=5, comment='Çok iyi')
+        sync_read_model(place_ids=[self.places[4].id])
+        data = self.assertParity('discover', '/api/places/discover/?search=Koordinatsız')
+        self.assertEqual(data['places'][0]['total_visits'], 1)
+
+
+class MongoReadModelFallbackTests(TestCase):
+    """Mongo erişilemezse endpoint SQL yoluna düşmeli"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='kasif', email='kasif@example.com', password='testpass123')
+        Place.objects.create(name='Moda Kahve', address='Moda', city='İstanbul', categories=['kafe'], tags=['sessiz'])
+        self.client.force_login(self.user)
+        close_mongodb_client()
+
+    def tearDown(self):
+        close_mongodb_client()
+
+    @override_settings(
+        MONGODB_SETTINGS=mongo_test_settings(uri='mongodb://127.0.0.1:1', client_class=None, server_selection_timeout_ms=50),
+        MONGO_READ_MODEL={'ENDPOINTS': {'discover': True, 'search': True}, 'FALLBACK_TO_SQL': True},
+    )
+    def test_falls_back_to_sql(self):
+        response = self.client.get('/api/places/discover/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        response = self.client.get('/api/places/?search=moda')
+        self.assertEqual(response.json()['count'], 1)
+
+
+class JSONLookupParityTests(TestCase):
+    """
+    has_element / has_any_element her veritabanında Python filtresiyle aynı sonucu vermeli
+    PostgreSQL'de: DB_ENGINE=postgresql python manage.py test places
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='kasif', email='kasif@example.com', password='testpass123')
+        specs = [
+            (['kafe', 'kahve'], ['sessiz', 'samimi'], ['Chill']),
+            (['meyhane'], ['samimi', 'canlı müzik'], []),
+            (['brunch', 'kafe'], ['estetik'], ['Local']),
+            (['bar'], [], ['Chill', 'Local']),
+            ([], ['sıcak'], []),
+            (['pastane', 'kafe'], ['sıcak', 'sessiz'], ['Third-wave coffee']),
+        ]
+        cls.places = [
+            Place.objects.create(
+                name=f'Mekan {i}', address='Moda', city='İstanbul',
+                categories=categories, tags=tags, vibe_tags=vibe_tags
+            )
+            for i, (categories, tags, vibe_tags) in enumerate(specs)
+        ]
+
+    def expected(self, predicate):
+        return {place.id for place in self.places if predicate(place)}
+
+    def matched(self, **filters):
+        return set(Place.objects.filter(**filters).values_list('id', flat=True))
+
+    def test_has_element(self):
+        for value in ['kafe', 'bar', 'yok']:
+            self.assertEqual(
+                self.matched(categories__has_element=value),
+                self.expected(lambda place: value in place.categories)
+            )
+        for value in ['sıcak', 'canlı müzik', 'Sessiz']:
+            self.assertEqual(
+                self.matched(tags__has_element=value),
+                self.expected(lambda place: value in place.tags)
+            )
+        self.assertEqual(
+            self.matched(vibe_tags__has_element='Chill'),
+            self.expected(lambda place: 'Chill' in place.vibe_tags)
+        )
+
+    def test_has_any_element(self):
+        for values in [['sessiz', 'estetik'], ['sıcak'], ['yok', 'samimi'], []]:
+            self.assertEqual(
+                self.matched(tags__has_any_element=values),
+                self.expected(lambda place: bool(set(values) & set(place.tags)))
+            )
+        self.assertEqual(
+            self.matched(categories__has_any_element=['bar', 'pastane'], tags__has_element='sessiz'),
+            self.expected(lambda place: bool({'bar', 'pastane'} & set(place.categories)) and 'sessiz' in place.tags)
+        )
+
+    def test_discover_filters(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/places/discover/?category=kafe&atmosphere=sessiz')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        expected = self.expected(lambda place: 'kafe' in place.categories and 'sessiz' in place.tags)
+        self.assertEqual({place['id'] for place in data['places']}, expected)
+        self.assertEqual(data['total_available'], len(expected))
+
+    def test_place_list_category_filter(self):
+        response = self.client.get('/api/places/?category=kafe')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {place['id'] for place in response.json()['results']},
+            self.expected(lambda place: 'kafe' in place.categories)
+        )
+
+    def test_place_graph_uses_has_any_element(self):
+        place = self.places[0]
+        build_place_graph(place)
+        related = set(
+            PlaceGraph.objects.filter(from_place=place, relationship_type='same_category')
+            .values_list('to_place_id', flat=True)
+        )
+        self.assertEqual(
+            related,
+            self.expected(lambda other: other.id != place.id and bool(set(place.categories) & set(other.categories)))
+        )
+
+
+class PostgresIndexTests(TestCase):
+    """0013 migration'ı PostgreSQL'de GIN ve pg_trgm indekslerini oluşturmalı"""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('PostgreSQL gerekir (DB_ENGINE=postgresql)')
+
+    def test_indexes_exist(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'places_place'")
+            indexes = {row[0] for row in cursor.fetchall()}
+        for name in [
+            'places_place_categories_gin', 'places_place_tags_gin', 'places_place_vibe_tags_gin',
+            'places_place_name_trgm', 'places_place_address_trgm',
+        ]:
+            self.assertIn(name, indexes)
+
+
+class CandidateIndexRefreshTests(SimpleTestCase):
+    """TTL dolunca indeks arka planda kurulur, bu sırada eski indeks sunulur"""
+
+    def setUp(self):
+        self.saved = (candidates._index, candidates._index_built_at)
+        self.release = threading.Event()
+        self.builds = []
+
+    def tearDown(self):
+        self.release.set()
+        candidates._rebuild_worker.join(timeout=5)
+        candidates._index, candidates._index_built_at = self.saved
+
+    def slow_build(self):
+        self.release.wait(timeout=5)
+        self.builds.append(object())
+        return self.builds[-1]
+
+    @override_settings(RECOMMENDATION_CANDIDATES={'INDEX_TTL': 60})
+    def test_serves_stale_index_while_rebuilding(self):
+        stale = object()
+        candidates._index = stale
+        candidates._index_built_at = time.monotonic() - 120
+        with mock.patch.object(candidates, 'build_candidate_index', self.slow_build):
+            self.assertIs(candidates.get_candidate_index(), stale)
+            self.assertTrue(candidates._rebuild_worker.is_alive())
+            # Kurulum sürerken ikinci bir kurulum başlatılmaz
+            self.assertIs(candidates.get_candidate_index(), stale)
+
+            self.release.set()
+            candidates._rebuild_worker.join(timeout=5)
+        self.assertEqual(len(self.builds), 1)
+        self.assertIs(candidates.get_candidate_index(), self.builds[0])
+
+    @override_settings(RECOMMENDATION_CANDIDATES={'INDEX_TTL': 60})
+    def test_fresh_index_is_not_rebuilt(self):
+        current = object()
+        candidates._index = current
+        candidates._index_built_at = time.monotonic()
+        with mock.patch.object(candidates, 'build_candidate_index', self.slow_build):
+            self.assertIs(candidates.get_candidate_index(), current)
+        self.assertFalse(candidates._rebuild_worker.is_alive())
+        self.assertEqual(self.builds, [])
+
+
+class TrendingLimitTests(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            Place.objects.create(name=f'Trend {i}', address='Adres', city='İstanbul')
+
+    def test_limit_is_clamped(self):
+        for limit in ['-3', '0', '500', 'abc']:
+            response = self.client.get('/api/places/trending/', {'limit': limit})
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertLessEqual(response.json()['count'], 50)
+
+
+class TrendingEngineTests(TestCase):
+    """Sönümlü sıralama, rebase sonrası skorlar ve geçmiş aralıklarının tek sayılması"""
+
+    NOW = 1_700_000_000.0
+
+    def setUp(self):
+        self.engine = trending.TrendingEngine({'1h': 3600, '24h': 86400}, {'view': 1.0, 'visit': 5.0})
+        self.istanbul, self.ankara = trending.city_key('İstanbul'), trending.city_key('Ankara')
+        self.engine.load([
+            (1, 'visit', self.NOW - 10 * 3600, 1),
+            (2, 'view', self.NOW, 2),
+            (3, 'unknown', self.NOW, 100),
+            (4, 'view', self.NOW - 600, 1),
+        ], {1: self.istanbul, 2: self.istanbul, 3: self.istanbul, 4: self.ankara}, self.NOW)
+
+    def assert_ranking(self, ranked, expected):
+        self.assertEqual([place_id for place_id, _ in ranked], [place_id for place_id, _ in expected])
+        for (_, score), (_, value) in zip(ranked, expected):
+            self.assertAlmostEqual(score / value, 1.0, places=9)
+
+    def test_ranking_after_decay(self):
+        # 1h penceresinde 10 saatlik ziyaret neredeyse sönmüş; 24h'de hâlâ en üstte
+        self.assert_ranking(self.engine.top('1h', limit=10, now=self.NOW), [
+            (2, 2.0), (4, math.exp(-600 / 3600)), (1, 5 * math.exp(-10)),
+        ])
+        self.assert_ranking(self.engine.top('24h', limit=2, now=self.NOW), [
+            (1, 5 * math.exp(-10 / 24)), (2, 2.0),
+        ])
+        self.assert_ranking(self.engine.top('24h', 'İstanbul', limit=10, now=self.NOW + 86400), [
+            (1, 5 * math.exp(-10 / 24 - 1)), (2, 2 * math.exp(-1)),
+        ])
+        self.assertEqual([place_id for place_id, _ in self.engine.top('24h', 'Ankara', now=self.NOW)], [4])
+
+        self.engine.ingest(4, 'visit', datetime.fromtimestamp(self.NOW, tz=dt_timezone.utc))
+        self.engine.ingest(1, 'unknown', datetime.fromtimestamp(self.NOW, tz=dt_timezone.utc))
+        self.assertEqual(self.engine.ingested_count, 1)
+        self.assertEqual(self.engine.top('1h', limit=1, now=self.NOW)[0][0], 4)
+
+    def test_rebase_preserves_scores(self):
+        later = self.NOW + 40 * 3600
+        before = self.engine.top('24h', limit=10, now=later)
+
+        # 1h penceresinde 30 zaman sabitini aşan olay referansı ileri alır
+        self.engine.ingest(5, 'view', datetime.fromtimestamp(later, tz=dt_timezone.utc))
+        self.assertEqual(self.engine._reference, later)
+        self.assert_ranking(self.engine.top('24h', limit=10, now=later), [(5, 1.0)] + before)
+        self.assert_ranking(
+            [entry for entry in self.engine.top('24h', limit=10, now=later + 3600) if entry[0] != 5],
+            [(place_id, score * math.exp(-1 / 24)) for place_id, score in before],
+        )
+        # Sönmüş 1h sayaçları düşürülür
+        self.assert_ranking(self.engine.top('1h', limit=10, now=later), [(5, 1.0)])
+        self.assertEqual(self.engine.top('1h', 'İstanbul', now=later), [])
+
+    @override_settings(TRENDING={'HISTORY_DAYS': 7, 'HOURLY_DAYS': 2, 'WEIGHTS': {'visit': 5.0}})
+    def test_history_ranges_do_not_overlap(self):
+        user = User.objects.create_user(username='trend', password='pass12345')
+        place = Place.objects.create(name='Trend Kafe', address='Adres', city='İstanbul')
+        now = timezone.now()
+        for age in (timedelta(days=10), timedelta(days=5), timedelta(days=2, hours=12),
+                    timedelta(days=1), timedelta(hours=5), timedelta(hours=1), timedelta(minutes=5)):
+            UserBehavior.objects.create(user=user, place=place, action_type='visit', timestamp=now - age)
+        UserBehavior.objects.create(user=user, place=place, action_type='view', timestamp=now)
+
+        def total(rows):
+            self.assertTrue(all(place_id == place.id and action == 'visit' for place_id, action, _, _ in rows))
+            return sum(count for _, _, _, count in rows)
+
+        # Rollup yokken her şey ham olaylardan; HISTORY_DAYS dışı sayılmaz
+        self.assertEqual(total(trending.load_trending_rows(now)), 6)
+
+        build_rollups(until=now - timedelta(hours=3))
+        rows = trending.load_trending_rows(now)
+        self.assertEqual(total(rows), 6)
+        self.assertTrue(any(count == 1 and epoch < (now - timedelta(hours=3)).timestamp() for _, _, epoch, count in rows))
+        self.assertTrue(all(epoch >= (now - timedelta(days=7)).timestamp() for _, _, epoch, _ in rows))
+
+        engine = trending.build_trending_engine(now=now)
+        self.assertEqual(engine.top('7d', 'İstanbul', now=now.timestamp())[0][0], place.id)
+
+
+class CatalogueSnapshotTests(TestCase):
+    """Snapshot varken nearby sonuçları DB yoluyla aynı kalmalı; CURRENT değişince yeni sürüm açılmalı"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(CATALOGUE_SNAPSHOT={
+            'DIR': self.tmpdir.name, 'RELOAD_INTERVAL': 0, 'KEEP': 1,
+        })
+        self.settings_override.enable()
+        catalogue_snapshot._loader.reset()
+        self.client.force_login(User.objects.create_user(username='gezgin', email='gezgin@example.com', password='testpass123'))
+        coordinates = [(41.0, 29.0), (41.01, 29.01), (41.03, 29.0), (41.2, 29.2), (None, None)]
+        self.places = [
+            Place.objects.create(
+                name=f'Yakın {i}', address='Kadıköy', city='İstanbul', latitude=lat, longitude=lon,
+                hours={'monday': '09:00-18:00'} if i == 0 else {},
+            )
+            for i, (lat, lon) in enumerate(coordinates)
+        ]
+
+    def tearDown(self):
+        catalogue_snapshot._loader.reset()
+        self.settings_override.disable()
+        self.tmpdir.cleanup()
+
+    def nearby_ids(self):
+        response = self.client.get('/api/places/nearby/', {'lat': '41.0', 'lon': '29.0', 'radius': '3.4'})
+        self.assertEqual(response.status_code, 200)
+        return [place['id'] for place in response.json()['places']]
+
+    def test_nearby_matches_database_path(self):
+        expected = self.nearby_ids()
+        catalogue_snapshot.build_catalogue_snapshot()
+        self.assertIsNotNone(catalogue_snapshot.get_catalogue_snapshot())
+        self.assertEqual(self.nearby_ids(), expected)
+        self.assertEqual(expected, [place.id for place in self.places[:3]])
+
+    def test_nearby_sees_places_added_after_snapshot(self):
+        catalogue_snapshot.build_catalogue_snapshot()
+        added = Place.objects.create(name='Yeni', address='Moda', city='İstanbul', latitude=41.0, longitude=29.001)
+        self.assertIn(added.id, self.nearby_ids())
+
+    def test_loader_follows_current(self):
+        first = catalogue_snapshot.build_catalogue_snapshot()
+        self.assertEqual(catalogue_snapshot.get_catalogue_snapshot().version, first['version'])
+        second = catalogue_snapshot.build_catalogue_snapshot()
+        self.assertEqual(catalogue_snapshot.get_catalogue_snapshot().version, second['version'])
+        os.remove(os.path.join(self.tmpdir.name, 'CURRENT'))
+        self.assertIsNone(catalogue_snapshot.get_catalogue_snapshot())
+
+    def test_open_mask(self):
+        catalogue_snapshot.build_catalogue_snapshot()
+        ids = [self.places[0].id, self.places[1].id, 10 ** 9]
+        # Pazartesi 09-18 açık; saati bilinmeyen ve snapshot'ta olmayan mekanlar elenmez
+        self.assertEqual(catalogue_snapshot.open_mask(ids, 0, 10), dict.fromkeys(ids, True))
+        self.assertEqual(catalogue_snapshot.open_mask(ids, 0, 20), {ids[0]: False, ids[1]: True, ids[2]: True})
+        self.assertEqual(catalogue_snapshot.open_mask(ids, 1, 10)[ids[0]], False)
+
+    def test_place_open_mask_uses_fresh_hours(self):
+        place = self.places[0]
+        # Snapshot yokken saatler doğrudan place.hours'tan okunur
+        self.assertEqual(catalogue_snapshot.place_open_mask([place], 0, 20), {place.id: False})
+
+        catalogue_snapshot.build_catalogue_snapshot()
+        self.assertEqual(catalogue_snapshot.place_open_mask([place], 0, 20), {place.id: False})
+
+        # Snapshot'tan sonra saatleri değişen mekan eski saatlerle elenmemeli
+        place.hours = {'monday': '18:00-23:00'}
+        place.save()
+        self.assertEqual(catalogue_snapshot.place_open_mask([place], 0, 20), {place.id: True})
+        self.assertEqual(catalogue_snapshot.place_open_mask([place], 0, 10), {place.id: False})
+
+
+class CatalogueImportTests(TestCase):
+    """Satır normalleştirme, tekilleştirme, kısmi güncelleme ve checkpoint'ten devam"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_csv(self, lines):
+        path = os.path.join(self.tmpdir.name, 'places.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_normalize_row(self):
+        fields = catalogue_import.normalize_row({
+            'Title': '  Moda   Kahve ', 'Şehir': 'İstanbul', 'Fiyat': '$$', 'unknown': 'x',
+            'Category': 'Cafe; coffee shop | Bakery', 'lat': '40,987654', 'lng': '29.03',
+        })
+        self.assertEqual(fields, {
+            'name': 'Moda Kahve', 'city': 'İstanbul', 'price_level': '₺₺', 'categories': ['kafe', 'pastane'],
+            'latitude': Decimal('40.987654'), 'longitude': Decimal('29.030000'),
+        })
+        self.assertEqual(catalogue_import.normalize_row({'name': 'A', 'city': 'B', 'price': 'PAHALI'})['price_level'], '₺₺₺')
+        self.assertEqual(
+            catalogue_import.normalize_row({'name': 'A', 'city': 'B', 'categories': '["Restaurant", "lokanta"]'})['categories'],
+            ['restoran'],
+        )
+
+        results = catalogue_import.normalize_chunk([
+            (1, {'name': 'A'}),
+            (2, {'name': 'A', 'city': 'B', 'price': 'çok'}),
+            (3, {'name': 'A', 'city': 'B', 'lat': '41.0'}),
+            (4, {'name': 'A', 'city': 'B', 'lat': '0', 'lon': '0'}),
+            (5, {'name': 'A', 'city': 'B', 'lat': '91', 'lon': '29'}),
+            (6, '{bozuk'),
+            (7, '{"name": "A", "city": "B"}'),
+        ])
+        errors = {row: error for row, fields, error, _ in results if error}
+        self.assertEqual(set(errors), {1, 2, 3, 4, 5, 6})
+        self.assertEqual(errors[1], 'city zorunlu')
+        self.assertIn('geçersiz fiyat seviyesi', errors[2])
+        self.assertEqual(errors[3], 'latitude ve longitude birlikte verilmeli')
+        self.assertEqual(errors[4], 'koordinat 0,0')
+        self.assertIn('aralık dışında', errors[5])
+        self.assertIn('geçersiz JSON', errors[6])
+        self.assertEqual(results[5][3], '{bozuk')
+        self.assertEqual(results[6][1], {'name': 'A', 'city': 'B'})
+
+    def test_matcher_dedupes_against_database_and_within_chunk(self):
+        existing = Place.objects.create(name='Moda Kahve', address='Bahariye Cad. No 5', city='İstanbul')
+        matcher = catalogue_import.PlaceMatcher.from_database()
+        self.assertEqual(matcher.match('MODA KAHVE', 'bahariye caddesi no: 5'), existing.id)
+        self.assertIsNone(matcher.match('Moda Kahve', 'Başka Sok. 1'))
+
+        written = catalogue_import.upsert_chunk([
+            {'name': 'moda kahve', 'address': 'Bahariye Caddesi No 5', 'city': 'İstanbul', 'tags': ['sessiz']},
+            {'name': 'Yeni Yer', 'city': 'İstanbul', 'latitude': Decimal('41.000000'), 'longitude': Decimal('29.000000')},
+            # ~33 m ötede aynı ad: aynı parçadaki yeni mekana birleşir
+            {'name': 'yeni yer', 'city': 'İstanbul', 'latitude': Decimal('41.000300'), 'longitude': Decimal('29.000000'),
+             'price_level': '₺'},
+            # Yarıçap dışında: ayrı mekan
+            {'name': 'Yeni Yer', 'city': 'İstanbul', 'latitude': Decimal('41.010000'), 'longitude': Decimal('29.000000')},
+        ], matcher)
+        self.assertEqual(written, {'created': 2, 'updated': 1, 'merged': 1})
+        self.assertEqual(Place.objects.count(), 3)
+        self.assertEqual(Place.objects.get(id=existing.id).tags, ['sessiz'])
+        merged = Place.objects.get(name='yeni yer')
+        self.assertEqual(merged.price_level, '₺')
+
+        # Yazılan mekanlar matcher'a eklenir; sonraki parça aynı kaydı bulur
+        written = catalogue_import.upsert_chunk([
+            {'name': 'Yeni Yer', 'city': 'İstanbul', 'latitude': Decimal('41.000100'), 'longitude': Decimal('29.000100')},
+        ], matcher)
+        self.assertEqual(written, {'created': 0, 'updated': 1, 'merged': 0})
+        self.assertEqual(Place.objects.count(), 3)
+
+    def test_partial_update_keeps_other_fields(self):
+        place = Place.objects.create(
+            name='Moda Kahve', address='Bahariye Cad. 5', city='İstanbul', description='Eski açıklama',
+            tags=['samimi'], price_level='₺₺₺', hours={'monday': '09:00-18:00'},
+        )
+        matcher = catalogue_import.PlaceMatcher.from_database()
+        written = catalogue_import.upsert_chunk(
+            [{'name': 'Moda Kahve', 'address': 'Bahariye Caddesi 5', 'city': 'İstanbul', 'price_level': '₺'}], matcher
+        )
+        self.assertEqual(written['updated'], 1)
+        place.refresh_from_db()
+        self.assertEqual(place.price_level, '₺')
+        self.assertEqual(place.description, 'Eski açıklama')
+        self.assertEqual(place.tags, ['samimi'])
+        self.assertEqual(place.hours, {'monday': '09:00-18:00'})
+        self.assertEqual(place.address, 'Bahariye Caddesi 5')
+
+    def test_resume_from_mid_file_checkpoint(self):
+        path = self.write_csv([
+            'name,address,city,price,lat,lon',
+            'Kahve 1,Moda Cad. 1,İstanbul,$$,41.0,29.0',
+            'Kahve 2,Moda Cad. 2,İstanbul,2,41.01,29.01',
+            'Kahve 3,Moda Cad. 3,İstanbul,çok,,',
+            'Kahve 4,Moda Cad. 4,İstanbul,1,,',
+            'kahve 1,Moda Caddesi 1,İstanbul,₺₺₺,,',
+            'Kahve 5,,İstanbul,,41.02,29.02',
+        ])
+
+        class Interrupted(Exception):
+            pass
+
+        def crash(totals):
+            raise Interrupted
+
+        # İlk parça yazılıp checkpoint kaydedildikten sonra süreç kesilir
+        with self.assertRaises(Interrupted):
+            catalogue_import.import_places(path, chunk_size=2, progress=crash)
+        self.assertEqual(Place.objects.count(), 2)
+
+        out = StringIO()
+        call_command('import_places', path, '--resume', '--chunk-size', '2', stdout=out)
+        self.assertIn('2. satırdan devam edildi', out.getvalue())
+
+        names = list(Place.objects.values_list('name', flat=True))
+        self.assertEqual(len(names), 4)
+        self.assertEqual(Counter(name.lower() for name in names).most_common(1)[0][1], 1)
+        self.assertEqual(Place.objects.get(address='Moda Caddesi 1').price_level, '₺₺₺')
+
+        with open(f'{path}.errors.csv', encoding='utf-8', newline='') as f:
+            report = list(csv.reader(f))
+        self.assertEqual(report[0], ['row', 'error', 'raw'])
+        self.assertEqual([row[0] for row in report[1:]], ['3'])
+        self.assertIn('Kahve 3', report[1][2])
+
+        # Bitmiş checkpoint'ten tekrar devam etmek kopya üretmez
+        totals = catalogue_import.import_places(path, chunk_size=2, resume=True)
+        self.assertEqual(totals['resumed_from'], 6)
+        self.assertEqual(Place.objects.count(), 4)
+
+
+@override_settings(TRACING={'ENABLED': True, 'SINK': 'ring', 'SAMPLE_RATE': 1.0})
+class RecommendationTracingTests(TestCase):
+    """Öneri aşamaları ayrı span'ler olarak aday/sonuç sayılarıyla kaydedilir"""
+
+    def test_stage_spans_carry_counts(self):
+        user = User.objects.create_user(username='izlenen', email='izlenen@example.com', password='testpass123')
+        for i in range(4):
+            place = Place.objects.create(name=f'İz {i}', address='Moda', city='İstanbul', categories=['kafe'])
+            Visit.objects.create(user=user, place=place, rating=4)
+        candidates.refresh_candidate_index()
+
+        _, results = get_recommendations(user, limit=2)
+        spans = {record['name']: record for record in get_tracer().sink.records()}
+
+        for stage in ('fetch', 'scoring', 'normalize', 'serialize'):
+            self.assertEqual(spans[f'recommendations.{stage}']['parent_id'], spans['recommendations.get_recommendations']['span_id'])
+        self.assertEqual(spans['recommendations.fetch']['attributes']['places'], 4)
+        self.assertEqual(spans['recommendations.scoring']['attributes']['scored'], 4)
+        self.assertEqual(spans['recommendations.serialize']['attributes']['results'], len(results))
+        self.assertEqual(spans['recommendations.get_recommendations']['attributes']['results'], 2)
+
+
+@override_settings(RECOMMENDATION_SLATES={'ENABLED': True, 'SIZE': 4, 'TTL': 900, 'LOW_WATERMARK': 3, 'BACKGROUND': False})
+class RecommendationSlateTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='kaydirici', email='kaydirici@example.com', password='testpass123')
+        self.places = [
+            Place.objects.create(name=f'Slate {i}', address='Moda', city='İstanbul', categories=['kafe'])
+            for i in range(8)
+        ]
+        # Soğuk başlangıç adayları ziyaret almış popüler mekanlardan gelir
+        reviewer = User.objects.create_user(username='yorumcu', email='yorumcu@example.com', password='testpass123')
+        for i, place in enumerate(self.places):
+            Visit.objects.create(user=reviewer, place=place, rating=5 - i % 5)
+        candidates.refresh_candidate_index()
+
+    def test_first_read_computes_slate(self):
+        entries, meta = recommendation_slates.get_slate_entries(self.user, 2)
+        slate = RecommendationSlate.objects.get(user=self.user)
+        self.assertEqual(len(slate.entries), 4)
+        self.assertEqual([entry['id'] for entry in entries], [entry['id'] for entry in slate.entries[:2]])
+        self.assertEqual(meta['remaining'], 4)
+        self.assertFalse(meta['refreshing'])
+
+    def test_swiped_entries_are_skipped(self):
+        recommendation_slates.compute_slate(self.user)
+        slate = RecommendationSlate.objects.get(user=self.user)
+        swiped = slate.entries[0]['id']
+        PlacePreference.objects.create(user=self.user, place_id=swiped, action='dislike')
+
+        with mock.patch.object(recommendation_slates, 'request_slate_refresh') as refresh:
+            entries, meta = recommendation_slates.get_slate_entries(self.user, 10)
+        self.assertNotIn(swiped, [entry['id'] for entry in entries])
+        self.assertEqual(meta['remaining'], 3)
+        # 4 öneriden 3'ü kaldı: LOW_WATERMARK (3) altına inmedi
+        refresh.assert_not_called()
+
+        PlacePreference.objects.create(user=self.user, place_id=slate.entries[1]['id'], action='like')
+        with mock.patch.object(recommendation_slates, 'request_slate_refresh') as refresh:
+            _, meta = recommendation_slates.get_slate_entries(self.user, 10)
+        self.assertTrue(meta['refreshing'])
+        refresh.assert_called_once_with(self.user)
+
+    def test_stale_slate_is_served_and_refreshed(self):
+        recommendation_slates.compute_slate(self.user)
+        old = timezone.now() - timedelta(hours=1)
+        RecommendationSlate.objects.filter(user=self.user).update(computed_at=old)
+
+        entries, meta = recommendation_slates.get_slate_entries(self.user, 10)
+        self.assertEqual(meta['computed_at'], old)
+        self.assertTrue(meta['refreshing'])
+        self.assertEqual(len(entries), 4)
+        # BACKGROUND kapalı: yenileme senkron yapıldı
+        self.assertGreater(RecommendationSlate.objects.get(user=self.user).computed_at, old)
+
+    def test_short_slate_does_not_refresh_when_catalogue_is_exhausted(self):
+        for place in self.places[:6]:
+            PlacePreference.objects.create(user=self.user, place=place, action='dislike')
+        recommendation_slates.compute_slate(self.user)
+        with mock.patch.object(recommendation_slates, 'request_slate_refresh') as refresh:
+            _, meta = recommendation_slates.get_slate_entries(self.user, 10)
+        self.assertLess(meta['remaining'], 3)
+        self.assertFalse(meta['refreshing'])
+        refresh.assert_not_called()
+
+    def test_api_limit_is_clamped(self):
+        # Negatif limit remaining[:-1] ile neredeyse tüm slate'i döndürüyordu
+        self.client.force_login(self.user)
+        for limit, expected in [('-1', 1), ('0', 1), ('2', 2)]:
+            response = self.client.get('/api/places/recommendations/', {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['count'], expected, limit)
+
+    def test_html_review_requests_refresh(self):
+        self.client.force_login(self.user)
+        with mock.patch('places.views.request_slate_refresh') as refresh, mock.patch('places.views.record_stream_event'):
+            response = self.client.post(f'/places/{self.places[0].id}/review/', {'rating': 5, 'comment': 'Güzel', 'mood_tags': '[]'})
+        self.assertEqual(response.status_code, 302)
+        refresh.assert_called_once_with(self.user)
+
+
+class LoadBehaviorSegmentsTests(TestCase):
+    """Segment yükleme tekrar çalıştırıldığında olaylar çoğalmamalı"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.user = User.objects.create_user(username='segment', email='segment@example.com', password='testpass123')
+        self.place = Place.objects.create(name='Segment Mekan', address='Moda', city='İstanbul')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_segment(self, name, count=3):
+        path = Path(self.tmpdir.name) / name
+        event = {
+            'user_id': self.user.id, 'place_id': self.place.id, 'action_type': 'view',
+            'context': {}, 'filters_used': [], 'session_id': '', 'timestamp': timezone.now(),
+        }
+        path.write_text(''.join(serialize_event(event) + '\n' for _ in range(count)), encoding='utf-8')
+        return path
+
+    def load(self, *args):
+        call_command('load_behavior_segments', '--dir', self.tmpdir.name, *args, stdout=StringIO())
+
+    def test_reload_does_not_duplicate(self):
+        path = self.write_segment('behavior-1-1000-1.jsonl')
+        self.load('--keep')
+        self.load('--keep')
+        self.assertEqual(UserBehavior.objects.count(), 3)
+
+        # Yüklenip silinemeden kalan segment (çökme) temizlenir
+        self.load()
+        self.assertEqual(UserBehavior.objects.count(), 3)
+        self.assertFalse(path.exists())
+        self.assertFalse(BehaviorSegmentLoad.objects.exists())
+
+    def test_segment_written_by_flusher_is_skipped(self):
+        # Flusher olayları yazdı, segmenti silemeden process çöktü
+        path = self.write_segment('behavior-1-1000-2.jsonl')
+        store_segment(path, [UserBehavior(user=self.user, place=self.place, action_type='view') for _ in range(3)])
+        self.load()
+        self.assertEqual(UserBehavior.objects.count(), 3)
+        self.assertFalse(path.exists())
+
+    def test_buffer_overflow_keeps_spooled_events(self):
+        buffer = BehaviorEventBuffer(buffer_size=3, flush_size=100, flush_interval=60, spool_dir=self.tmpdir.name)
+        with mock.patch.object(buffer._worker, 'ensure'):
+            for _ in range(10):
+                buffer.record({
+                    'user_id': self.user.id, 'place_id': self.place.id, 'action_type': 'view',
+                    'context': {}, 'filters_used': [], 'session_id': '', 'timestamp': timezone.now(),
+                })
+
+        self.assertEqual(buffer.dropped_count, 7)
+        self.assertEqual(buffer.flush(), 10)
+        self.assertEqual(UserBehavior.objects.count(), 10)
+        self.assertEqual(list(Path(self.tmpdir.name).iterdir()), [])
+
+    def test_open_segment_of_live_process_is_refused(self):
+        live = self.write_segment(f'behavior-{os.getpid()}-1000-1.jsonl.open')
+        dead = self.write_segment('behavior-99999999-1000-1.jsonl.open', count=2)
+        self.load('--include-open')
+        self.assertTrue(live.exists())
+        self.assertFalse(dead.exists())
+        self.assertEqual(UserBehavior.objects.count(), 2)
+
+
+class StreamSketchTests(SimpleTestCase):
+    """Sketch birleştirme kuralları: iki yarının birleşimi tek akışla aynı sınırları vermeli"""
+
+    def stream(self, seed, size=5000):
+        rng = np.random.default_rng(seed)
+        return [str(key) for key in rng.zipf(1.3, size) % 1000]
+
+    def test_count_min_never_underestimates_and_merges_by_sum(self):
+        events = self.stream(1)
+        left, right, whole = (CountMinSketch(256, 4) for _ in range(3))
+        for i, key in enumerate(events):
+            (left if i % 2 else right).add(key)
+            whole.add(key)
+        left.merge(right)
+        np.testing.assert_array_equal(left.table, whole.table)
+        for key, count in Counter(events).items():
+            self.assertGreaterEqual(left.estimate(key), count)
+        with self.assertRaises(ValueError):
+            left.merge(CountMinSketch(128, 4))
+
+    def test_hyperloglog_merge_is_union(self):
+        left, right, whole = (HyperLogLog(10) for _ in range(3))
+        for user_id in range(6000):
+            (left if user_id < 4000 else right).add(str(user_id))
+            whole.add(str(user_id))
+        for user_id in range(2000, 4000):
+            right.add(str(user_id))
+        left.merge(right)
+        np.testing.assert_array_equal(left.registers, whole.registers)
+        # 1.04 / sqrt(1024) ~ %3.3 standart hata
+        self.assertLess(abs(left.count() - 6000) / 6000, 0.1)
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(9))
+
+    def assert_bounds(self, sketch, counts):
+        for key, (count, error) in sketch.items.items():
+            self.assertLessEqual(count - error, counts[key], key)
+            self.assertGreaterEqual(count, counts[key], key)
+
+    def test_space_saving_bounds_and_eviction(self):
+        events = self.stream(2)
+        sketch = SpaceSaving(50)
+        for key in events:
+            sketch.add(key)
+        self.assertEqual(len(sketch.items), 50)
+        self.assert_bounds(sketch, Counter(events))
+        # Gerçek en sık 5 anahtar (Zipf) sketch'te kalır
+        top = {key for key, _, _ in sketch.top(5)}
+        self.assertEqual(top, {key for key, _ in Counter(events).most_common(5)})
+
+        floor = sketch.minimum()
+        self.assertEqual(floor, min(count for count, _ in sketch.items.values()))
+        sketch.add('yeni-anahtar')
+        self.assertEqual(sketch.items['yeni-anahtar'], [floor + 1, floor])
+
+    def test_space_saving_merge(self):
+        left_events, right_events = self.stream(3), self.stream(4)
+        left, right = SpaceSaving(50), SpaceSaving(50)
+        for key in left_events:
+            left.add(key)
+        for key in right_events:
+            right.add(key)
+
+        left.merge(right)
+        self.assertEqual(len(left.items), 50)
+        self.assert_bounds(left, Counter(left_events + right_events))
+        # Birleşimden sonra heap yeniden kurulur; yeni ekleme doğru minimumu devralır
+        floor = left.minimum()
+        left.add('yeni-anahtar')
+        self.assertEqual(left.items['yeni-anahtar'], [floor + 1, floor])
+
+    def test_space_saving_merge_rule(self):
+        left, right = SpaceSaving(3), SpaceSaving(3)
+        for key in 'aaaaabbbcc':
+            left.add(key)
+        for key in 'adddde':
+            right.add(key)
+        # Bir tarafta olmayan anahtar o tarafın minimumunu (sol 2, sağ 1) sayaç ve hata olarak alır
+        left.merge(right)
+        self.assertEqual(left.items, {'a': [6, 0], 'd': [6, 2], 'b': [4, 1]})
+
+    def test_space_saving_merge_with_empty(self):
+        sketch = SpaceSaving(10)
+        for key in 'aabbbc':
+            sketch.add(key)
+        sketch.merge(SpaceSaving(10))
+        self.assertEqual(sketch.items, {'a': [2, 0], 'b': [3, 0], 'c': [1, 0]})
+
+
+class StreamStatsAPITests(TestCase):
+
+    def test_limit_is_clamped(self):
+        admin = User.objects.create_superuser(username='yonetici', email='yonetici@example.com', password='testpass123')
+        self.client.force_login(admin)
+        delta = StreamStats(get_stream_settings())
+        for place_id in range(1, 6):
+            delta.add(admin.id, place_id, 'swipe_like')
+        with mock.patch('places.stream_stats._recorder') as recorder:
+            recorder.local_delta.return_value = delta
+            response = self.client.get('/api/debug/stream-stats/', {'limit': '-3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['top_places']), 1)
+
+    def test_stop_flushes_and_disables_checkpoints(self):
+        user = User.objects.create_user(username='akis', email='akis@example.com', password='testpass123')
+        recorder = StreamStatsRecorder(get_stream_settings())
+        with mock.patch.object(recorder._worker, 'ensure'):
+            recorder.record(user.id, 1, 'swipe_like')
+            self.assertEqual(recorder.stop(), 2)  # gün + hafta
+            self.assertEqual(StreamSketchCheckpoint.objects.count(), 2)
+
+            # Durdurulan recorder (örn. çıkış kancası) artık yazmaz
+            recorder.record(user.id, 2, 'swipe_like')
+            self.assertEqual(recorder.checkpoint(), 0)
+            self.assertEqual(recorder.stop(), 0)
+        self.assertEqual(sum(StreamSketchCheckpoint.objects.values_list('events', flat=True)), 2)
+
+
+class BehaviorStatsWatermarkTests(TestCase):
+    """Geç commit edilen (düşük ID'li) olaylar bir sonraki artımlı çalıştırmada sayılır"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='istatistik', password='pass12345')
+        self.place = Place.objects.create(name='İstatistik Kafe', address='Adres', city='İstanbul')
+
+    def event(self, event_id, hours_ago, now):
+        UserBehavior.objects.create(
+            id=event_id, user=self.user, place=self.place, action_type='view', timestamp=now - timedelta(hours=hours_ago)
+        )
+
+    def test_late_commit_with_lower_id_is_counted(self):
+        now = timezone.now()
+        self.event(10, hours_ago=5, now=now)
+        self.event(11, hours_ago=1, now=now)  # LATE_EVENT_HOURS içinde: bu çalıştırmaya girmez
+        self.assertEqual(compute_behavior_stats()['events'], 1)
+
+        # Çalıştırma sırasında açık transaction'daki olay daha küçük ID ile sonradan commit edilir
+        self.event(5, hours_ago=1.5, now=now)
+        with mock.patch('places.behavior_stats.timezone.now', return_value=now + timedelta(hours=3)):
+            self.assertEqual(compute_behavior_stats()['events'], 2)
+        self.assertEqual(self.place.behavior_profile.event_count, 3)
+
+
+class BehaviorRetentionTests(TransactionTestCase):
+    """Arşive taşınan olaylar rollup'larda ve sorgu yardımcılarında sayılmaya devam eder"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='retention', password='pass12345')
+        self.place = Place.objects.create(name='Rollup Kafe', address='Adres', city='İstanbul')
+        now = timezone.now()
+        for days, action_type in ((0, 'view'), (2, 'visit'), (45, 'visit'), (45, 'review'), (100, 'view'), (100, 'visit')):
+            UserBehavior.objects.create(
+                user=self.user, place=self.place, action_type=action_type, timestamp=now - timedelta(days=days)
+            )
+        self.addCleanup(self.drop_partitions)
+
+    def drop_partitions(self):
+        with connection.schema_editor() as schema_editor:
+            for table in list_partition_tables():
+                schema_editor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+
+    def totals(self):
+        rollups = Counter()
+        for action_type, count in UserBehaviorRollup.objects.filter(
+            user=self.user, granularity='day'
+        ).values_list('action_type', 'count'):
+            rollups[action_type] += count
+        return (
+            dict(rollups),
+            count_user_actions(self.user.id),
+            count_user_place_actions([self.user.id], self.place.id, ['visit', 'review', 'view']),
+        )
+
+    def test_totals_survive_archiving(self):
+        build_rollups()
+        before = self.totals()
+        self.assertEqual(before[0], {'view': 1, 'visit': 3, 'review': 1})
+        self.assertEqual(before[1], {'view': 2, 'visit': 3, 'review': 1})
+        self.assertEqual(before[2], before[1])
+
+        result = apply_retention()
+        self.assertEqual(result['archived'], 4)
+        self.assertEqual(UserBehavior.objects.count(), 2)
+        self.assertEqual(self.totals(), before)
+        self.assertEqual(count_user_actions(self.user.id, ['visit', 'swipe_like']), {'visit': 3, 'swipe_like': 0})
+
+
+class BulkExportArchiveTests(TransactionTestCase):
+    """user_behaviors export'u retention'ın taşıdığı aylık arşiv tablolarını da içerir"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='pass12345')
+        self.place = Place.objects.create(name='Arşiv Kafe', address='Adres', city='İstanbul')
+        now = timezone.now()
+        for days in (3, 70, 100):
+            UserBehavior.objects.create(
+                user=self.user, place=self.place, action_type='view', timestamp=now - timedelta(days=days)
+            )
+        archive_raw_events(now - timedelta(days=30))
+        self.addCleanup(self.drop_partitions)
+
+    def drop_partitions(self):
+        with connection.schema_editor() as schema_editor:
+            for table in list_partition_tables():
+                schema_editor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+
+    def test_archived_rows_are_exported(self):
+        self.assertEqual(UserBehavior.objects.count(), 1)
+        archives = list_partition_tables()
+        self.assertTrue(archives)
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = run_export(tables=['user_behaviors'], directory=directory, file_format='csv', workers=1)
+            entry = manifest['tables']['user_behaviors']
+            self.assertEqual(entry['rows'], 3)
+            self.assertEqual([source['table'] for source in entry['sources']], ['places_userbehavior', *archives])
+            self.assertIsNone(entry['sources'][0]['month'])
+            self.assertEqual(sum(source['rows'] for source in entry['sources'][1:]), 2)
+            self.assertEqual(
+                {item['source'] for item in entry['files']},
+                {source['table'] for source in entry['sources'] if source['rows']},
+            )
+            self.assertEqual(verify_export(manifest['directory']), [])
+
+
+class SQLProfilingTests(TestCase):
+    """SQL parmak izi, tekrar eden sorgu tespiti ve endpoint raporu"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        sql_profiling.get_profile_store().reset()
+
+    def tearDown(self):
+        sql_profiling.get_profile_store().reset()
+        self.tmpdir.cleanup()
+
+    def test_fingerprint_ignores_literals(self):
+        sql = "SELECT \"t1\".\"id\" FROM \"t1\" WHERE \"id\" = 5 AND \"name\" = 'Kafe''s' AND \"x\" IN (1, 2, 3)"
+        self.assertEqual(
+            sql_profiling.normalize_sql(sql),
+            "SELECT \"t1\".\"id\" FROM \"t1\" WHERE \"id\" = ? AND \"name\" = ? AND \"x\" IN (...)",
+        )
+        self.assertEqual(
+            sql_profiling.fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND score > 0.5'),
+            sql_profiling.fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s, %s) AND score > 12'),
+        )
+        self.assertNotEqual(
+            sql_profiling.fingerprint('SELECT * FROM t WHERE id = 1'),
+            sql_profiling.fingerprint('SELECT * FROM u WHERE id = 1'),
+        )
+
+    def test_recorder_flags_repeated_shapes(self):
+        places = [Place.objects.create(name=f'Profil {i}', address='Adres', city='İstanbul') for i in range(3)]
+        recorder = sql_profiling.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for place in places:
+                Place.objects.get(id=place.id)
+            Place.objects.count()
+
+        self.assertEqual(recorder.count, 4)
+        repeated = recorder.repeated(2)
+        self.assertEqual(list(repeated.values()), [3])
+        key = next(iter(repeated))
+        self.assertTrue(recorder.samples[key].startswith('SELECT "places_place"."id"'))
+        self.assertLessEqual(len(recorder.samples[key]), sql_profiling.SAMPLE_SQL_LENGTH)
+        self.assertEqual(recorder.repeated(4), {})
+
+    def test_build_report_and_merged_snapshots(self):
+        sql_profiling.write_snapshot(self.tmpdir.name, {
+            'pid': 1, 'routes': {'a': [[10, 2, 3, 0], [30, 5, 5, 2]]},
+            'repeats': {'a': {'fp1': 3}}, 'totals': {'a': 2}, 'samples': {'fp1': 'SELECT 1'},
+        })
+        sql_profiling.write_snapshot(self.tmpdir.name, {
+            'pid': 2, 'routes': {'a': [[20, 4, 4, 1]], 'b': [[100, 50, 20, 18]]},
+            'repeats': {'a': {'fp1': 3}, 'b': {'fp2': 19}}, 'totals': {'a': 1, 'b': 1}, 'samples': {'fp2': 'SELECT 2'},
+        })
+        data = sql_profiling.read_snapshots(self.tmpdir.name)
+        self.assertEqual(len(data['routes']['a']), 3)
+        self.assertEqual(data['totals'], {'a': 3, 'b': 1})
+
+        report = sql_profiling.build_report(data, order_by='p95_ms')
+        self.assertEqual([row['route'] for row in report], ['b', 'a'])
+        route_a = report[1]
+        self.assertEqual((route_a['requests'], route_a['p50_ms'], route_a['p95_ms']), (3, 20, 30))
+        self.assertEqual((route_a['queries_mean'], route_a['queries_max'], route_a['repeated_mean']), (4.0, 5, 1.0))
+        self.assertEqual(route_a['top_repeats'], [{'fingerprint': 'fp1', 'per_request': 2.0, 'sql': 'SELECT 1'}])
+        self.assertEqual([row['route'] for row in sql_profiling.build_report(data, order_by='requests', limit=1)], ['a'])
+
+        out = StringIO()
+        call_command('sql_profile_report', '--dir', self.tmpdir.name, '--sql', stdout=out)
+        self.assertIn('fp2 x19.0/istek', out.getvalue())
+        self.assertIn('SELECT 2', out.getvalue())
+
+    def test_middleware_records_requests(self):
+        config = {'ENABLED': True, 'SNAPSHOT_DIR': self.tmpdir.name, 'SNAPSHOT_INTERVAL': 0}
+        with override_settings(SQL_PROFILING=config, TRENDING={'ENABLED': False}):
+            response = self.client.get('/api/places/trending/')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('db;dur=', response['Server-Timing'])
+            route = response.resolver_match.view_name
+
+            admin = User.objects.create_user(username='profiler', password='pass12345', is_staff=True)
+            self.client.force_login(admin)
+            report = self.client.get('/api/debug/sql-profile/', {'order_by': 'queries_max'}).json()
+            self.assertIn(route, [row['route'] for row in report['routes']])
+            self.assertEqual(self.client.get('/api/debug/sql-profile/', {'order_by': 'x'}).status_code, 400)
+            self.assertIn(route, sql_profiling.read_snapshots(self.tmpdir.name)['routes'])
+            self.assertEqual(self.client.delete('/api/debug/sql-profile/').status_code, 200)
+            # Sıfırlamadan sonra sadece DELETE isteğinin kendisi kalır
+            self.assertNotIn(route, sql_profiling.get_profile_store().snapshot()['routes'])
+
+        # Kapalıyken middleware yüklenmez (yeni handler), rapor 404 döner
+        client = self.client_class()
+        client.force_login(admin)
+        self.assertNotIn('Server-Timing', client.get('/api/places/trending/'))
+        self.assertEqual(client.get('/api/debug/sql-profile/').status_code, 404)
+
+
+class EvaluationTests(TestCase):
+    """Offline değerlendirme metrikleri, zamana göre bölme ve gizlenen satırların geri alınması"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.cutoff = self.now - timedelta(days=10)
+        self.places = [
+            Place.objects.create(name=f'Değer {i}', address='Adres', city='İstanbul', categories=['kafe'])
+            for i in range(6)
+        ]
+        self.user, self.newcomer, self.critic = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='pass12345')
+            for name in ('deniz', 'yeni', 'elestirmen')
+        ]
+        p = self.places
+        # deniz: eğitimde 1 like + 1 dislike; testte like, save, dislike ve 5 puanlı ziyaret
+        self.swipe(self.user, p[0], 'like', days=20)
+        self.swipe(self.user, p[1], 'dislike', days=20)
+        self.swipe(self.user, p[2], 'like', days=5)
+        self.swipe(self.user, p[3], 'save', days=5)
+        self.swipe(self.user, p[4], 'dislike', days=5)
+        self.visit(self.user, p[5], 5, days=3)
+        # yeni: eğitim verisi yok
+        self.swipe(self.newcomer, p[2], 'like', days=4)
+        # elestirmen: test dönemindeki ziyaret pozitif değil
+        self.visit(self.critic, p[1], 2, days=15)
+        self.visit(self.critic, p[4], 3, days=2)
+
+    def swipe(self, user, place, action, days):
+        preference = PlacePreference.objects.create(user=user, place=place, action=action)
+        PlacePreference.objects.filter(id=preference.id).update(timestamp=self.now - timedelta(days=days))
+
+    def visit(self, user, place, rating, days):
+        visit = Visit.objects.create(user=user, place=place, rating=rating)
+        Visit.objects.filter(id=visit.id).update(visited_at=self.now - timedelta(days=days))
+
+    def ids(self, *indexes):
+        return {self.places[i].id for i in indexes}
+
+    def test_metrics(self):
+        recommended, relevant = [1, 2, 3, 4, 5], {2, 5, 9}
+        self.assertAlmostEqual(evaluation.precision_at_k(recommended, relevant, 3), 1 / 3)
+        self.assertAlmostEqual(evaluation.recall_at_k(recommended, relevant, 3), 1 / 3)
+        self.assertAlmostEqual(evaluation.recall_at_k(recommended, relevant, 5), 2 / 3)
+        ideal = 1 + 1 / math.log2(3) + 1 / math.log2(4)
+        self.assertAlmostEqual(evaluation.ndcg_at_k(recommended, relevant, 3), (1 / math.log2(3)) / ideal)
+        self.assertAlmostEqual(
+            evaluation.ndcg_at_k(recommended, relevant, 5), (1 / math.log2(3) + 1 / math.log2(6)) / ideal
+        )
+        self.assertEqual(evaluation.ndcg_at_k([2, 5], {2, 5}, 10), 1.0)
+        # Kısa liste k'ya bölünür; boş alaka ve k=0 sıfırdır
+        self.assertEqual(evaluation.precision_at_k([2], relevant, 4), 0.25)
+        self.assertEqual(evaluation.precision_at_k(recommended, relevant, 0), 0.0)
+        self.assertEqual(evaluation.recall_at_k(recommended, set(), 3), 0.0)
+        self.assertEqual(evaluation.ndcg_at_k(recommended, set(), 3), 0.0)
+
+    def test_cutoff_split(self):
+        self.assertEqual(evaluation.held_out_positives(self.cutoff), {
+            self.user.id: self.ids(2, 3, 5), self.newcomer.id: self.ids(2),
+        })
+        self.assertEqual(evaluation.select_test_users(self.cutoff), {self.user.id: self.ids(2, 3, 5)})
+        self.assertEqual(list(evaluation.select_test_users(self.cutoff, min_train=0)), [self.user.id, self.newcomer.id])
+        self.assertEqual(list(evaluation.select_test_users(self.cutoff, min_train=0, max_users=1)), [self.user.id])
+        self.assertEqual(evaluation.select_test_users(self.cutoff, min_train=3), {})
+
+        # 10 etkileşimin %50'lik noktası: 6. en eski zaman damgası
+        timestamps = sorted(
+            list(PlacePreference.objects.values_list('timestamp', flat=True))
+            + list(Visit.objects.values_list('visited_at', flat=True))
+        )
+        self.assertEqual(evaluation.default_cutoff(0.5), timestamps[5])
+        self.assertEqual(evaluation.default_cutoff(1.0), timestamps[-1])
+
+    def test_evaluate_users_rolls_back_hidden_rows(self):
+        seen = {}
+
+        def probe(user, k):
+            seen['preferences'] = set(PlacePreference.objects.filter(user=user).values_list('place_id', flat=True))
+            seen['visits'] = Visit.objects.filter(user=user).count()
+            return [self.places[2].id, self.places[0].id, self.places[3].id]
+
+        def broken(user, k):
+            PlacePreference.objects.filter(user=user).delete()
+            raise RuntimeError('motor hatası')
+
+        before = (PlacePreference.objects.count(), Visit.objects.count())
+        with mock.patch.dict(evaluation.ENGINES, {'probe': probe, 'broken': broken}):
+            results = evaluation.evaluate_users([self.user.id], ['broken', 'probe'], self.cutoff, k=2, memory=False)
+
+        # Motor sadece cutoff öncesini görür; hatalı motorun silmesi savepoint ile geri alınır
+        self.assertEqual(seen, {'preferences': self.ids(0, 1), 'visits': 0})
+        self.assertEqual(results[self.user.id]['broken'], {'error': 'motor hatası'})
+        self.assertEqual(results[self.user.id]['probe']['recommended'], [self.places[2].id, self.places[0].id])
+        self.assertEqual((PlacePreference.objects.count(), Visit.objects.count()), before)
+
+        summary = evaluation.summarize(
+            results, {self.user.id: self.ids(2, 3, 5)}, ['probe', 'broken'], 2, len(self.places)
+        )
+        self.assertEqual(summary['probe']['precision@2'], 0.5)
+        self.assertEqual(summary['probe']['recall@2'], round(1 / 3, 4))
+        self.assertEqual(summary['probe']['coverage'], round(2 / 6, 4))
+        self.assertEqual((summary['broken']['users'], summary['broken']['errors']), (0, 1))
+
+    def test_contextual_engine_honours_k(self):
+        seeds, targets = self.places[:4], [
+            Place.objects.create(name=f'Komşu {i}', address='Adres', city='İstanbul') for i in range(12)
+        ]
+        explorer = User.objects.create_user(username='kasif', email='kasif@example.com', password='pass12345')
+        for i, seed in enumerate(seeds):
+            PlacePreference.objects.create(user=explorer, place=seed, action='like')
+            for j, target in enumerate(targets[i * 3:i * 3 + 3]):
+                PlaceGraph.objects.create(
+                    from_place=seed, to_place=target, relationship_type='similar', strength=0.9 - 0.01 * (i * 3 + j)
+                )
+
+        self.assertEqual(len(evaluation.contextual_engine(explorer, 12)), 12)
+        self.assertEqual(evaluation.contextual_engine(explorer, 3), [target.id for target in targets[:3]])
+
+        result = evaluation.run_evaluation(['contextual', 'popular'], cutoff=self.cutoff, k=3, memory=False)
+        self.assertEqual(result['users'], 1)
+        self.assertEqual(result['engines']['contextual']['errors'], 0)
+        self.assertEqual(PlacePreference.objects.filter(user=self.user).count(), 5)
+
+
+class CFModelTests(SimpleTestCase):
+    """ALS çözücüleri yoğun (dense) çözümle, CSR birleştirme ve skor araması"""
+
+    FACTORS = 6
+    REGULARIZATION = 0.05
+    ALPHA = 20.0
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        swipes = [
+            (100 + user, 500 + place, str(rng.choice(['like', 'save', 'dislike'])))
+            for user in range(25)
+            for place in rng.choice(15, size=int(rng.integers(1, 7)), replace=False)
+        ]
+        self.matrix = cf_model.build_interaction_matrix(swipes, [(100, 500, 5), (101, 514, 1)])
+        self.fixed = (rng.standard_normal((self.matrix.shape[1], self.FACTORS)) * 0.5).astype(np.float32)
+
+    def normal_equations(self, matrix, fixed, row):
+        """Tek satırın yoğun normal denklemleri: (Y^T C Y + λI, Y^T C p)"""
+        start, stop = matrix.indptr[row], matrix.indptr[row + 1]
+        weights = np.zeros(matrix.shape[1])
+        observed = np.zeros(matrix.shape[1], dtype=bool)
+        weights[matrix.indices[start:stop]] = matrix.weights[start:stop]
+        observed[matrix.indices[start:stop]] = True
+        confidence = 1.0 + self.ALPHA * np.abs(weights) * observed
+        y = fixed.astype(np.float64)
+        lhs = y.T @ (confidence[:, None] * y) + self.REGULARIZATION * np.eye(y.shape[1])
+        return lhs, y.T @ (confidence * (weights > 0))
+
+    def dense_solve(self, matrix, fixed):
+        return np.array([
+            np.linalg.solve(*self.normal_equations(matrix, fixed, row)) for row in range(matrix.shape[0])
+        ])
+
+    def objective(self, matrix, fixed, solution):
+        """Satır başına ½ xᵀAx − bᵀx toplamı (normal denklemlerin minimize ettiği değer)"""
+        total = 0.0
+        for row in range(matrix.shape[0]):
+            lhs, rhs = self.normal_equations(matrix, fixed, row)
+            x = solution[row].astype(np.float64)
+            total += 0.5 * x @ lhs @ x - rhs @ x
+        return total
+
+    def test_exact_solver_matches_dense_solve(self):
+        expected = self.dense_solve(self.matrix, self.fixed)
+        result = cf_model._als_half_step(self.matrix, self.fixed, self.REGULARIZATION, self.ALPHA)
+        np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+        # Popüler satır dalı (satır nnz > SOLVE_CHUNK_NNZ) ve küçük parçalar aynı sonucu vermeli
+        with mock.patch.object(cf_model, 'SOLVE_CHUNK_NNZ', 3):
+            chunked = cf_model._als_half_step(self.matrix, self.fixed, self.REGULARIZATION, self.ALPHA)
+        np.testing.assert_allclose(chunked, expected, rtol=1e-4, atol=1e-4)
+
+    def test_cg_lands_within_a_tenth_of_a_percent(self):
+        user_factors, place_factors = cf_model.train_als(
+            self.matrix, factors=self.FACTORS, iterations=20,
+            regularization=self.REGULARIZATION, alpha=self.ALPHA, solver='exact'
+        )
+        exact = cf_model._als_half_step(self.matrix, place_factors, self.REGULARIZATION, self.ALPHA)
+        # Eğitimdeki gibi önceki çözümden başlayan CG_STEPS adım
+        approx = cf_model._als_half_step_cg(
+            self.matrix, place_factors, user_factors, self.REGULARIZATION, self.ALPHA
+        )
+        best = self.objective(self.matrix, place_factors, exact)
+        reached = self.objective(self.matrix, place_factors, approx)
+        self.assertLess((reached - best) / abs(best), 1e-3)
+
+        # Yeterli adımla sıfırdan başlayan CG de tam çözüme yakınsar
+        converged = cf_model._als_half_step_cg(
+            self.matrix, self.fixed, np.zeros_like(exact), self.REGULARIZATION, self.ALPHA,
+            steps=4 * self.FACTORS
+        )
+        expected = self.dense_solve(self.matrix, self.fixed)
+        self.assertLess(np.abs(converged - expected).max() / np.abs(expected).max(), 1e-3)
+
+    def test_csr_sums_duplicate_pairs(self):
+        matrix = cf_model.build_interaction_matrix(
+            [(2, 20, 'like'), (1, 30, 'dislike'), (2, 20, 'save'), (1, 10, 'like'), (2, 10, 'unknown')],
+            [(2, 20, 5), (1, 30, None)],
+        )
+        self.assertEqual(matrix.user_ids.tolist(), [1, 2])
+        self.assertEqual(matrix.place_ids.tolist(), [10, 20, 30])
+        self.assertEqual(matrix.indptr.tolist(), [0, 2, 3])
+        self.assertEqual(matrix.indices.tolist(), [0, 2, 1])
+        # (1, 30): dislike + puansız ziyaret; (2, 20): like + save + 5 puanlı ziyaret
+        np.testing.assert_allclose(matrix.weights, [1.0, -1.0 + 0.3, 1.0 + 0.8 + 0.3 + 2 * 0.35], rtol=1e-6)
+
+        transposed = matrix.transpose()
+        self.assertEqual(transposed.indptr.tolist(), [0, 1, 2, 3])
+        self.assertEqual(transposed.indices.tolist(), [0, 1, 0])
+        self.assertEqual(transposed.nnz, 3)
+
+    def test_score_ignores_unknown_ids(self):
+        user_factors = np.arange(6, dtype=np.float32).reshape(3, 2)
+        place_factors = np.array([[1, 0], [0, 1]], dtype=np.float32)
+        matrix = cf_model.build_interaction_matrix([(5, 50, 'like'), (7, 70, 'like'), (9, 70, 'save')], [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            version = cf_model.save_model(directory, matrix, user_factors, place_factors, {})
+            model = cf_model.CFModel(os.path.join(directory, version), version)
+
+            self.assertEqual(model.score(7, [50, 70]), {50: 2.0, 70: 3.0})
+            # Aradaki, en küçükten küçük ve en büyükten büyük bilinmeyen ID'ler atlanır
+            self.assertEqual(model.score(7, [1, 60, 70, 999]), {70: 3.0})
+            self.assertEqual(model.score(6, [50, 70]), {})
+            self.assertEqual(model.score(1, [50]), {})
+            self.assertEqual(model.score(99, [50]), {})
+            self.assertEqual(model.score(7, []), {})
@@ -0,0 +1,344 @@
+"""
+Trend Mekanlar - Kayan zaman pencerelerinde üstel sönümlü sayaçlar
+
+Her pencere (1h/24h/7d) için mekan başına ağırlıklı bir sayaç tutulur:
+
+    skor(t) = Σ ağırlık(olay) * exp(-(t - olay_zamanı) / pencere)
+
+Sayaçlar ortak bir referans zamanına göre saklanır (olay eklerken
+exp((olay_zamanı - referans) / pencere) ile çarpılır). Böylece tüm sayaçlar
+aynı oranda sönümlendiği için sıralama zamandan bağımsızdır; olay eklemek
+O(pencere sayısı), "şehirde şu an trend" sorgusu heapq.nlargest ile
+O(n log k)'dır. Üs büyüyünce referans zamanı ileri alınır (rebase).
+
+Veri akışı:
+- record_behavior her olayı ingest() ile process içi motora da ekler
+  (yeniden kurulum sırasında gelen yerel olaylar bir sonraki kuruluma kadar
+  sadece DB'den gelir)
+- Motor REBUILD_INTERVAL'da bir arka plan thread'inde DB'den yeniden kurulur:
+  eski günler günlük, son HOURLY_DAYS saatlik PlaceBehaviorRollup'tan,
+  rollup watermark'ından sonrası ham UserBehavior'dan (diğer worker'ların
+  olayları da böylece görülür)
+- Motor henüz kurulmamışsa TrendingPlace rollup tablosu okunur
+  (rollup_behaviors komutu yazar); o da boşsa genel popüler mekanlar döner
+
+Ayarlar (settings.TRENDING):
+    ENABLED: False ise sadece rollup tablosu/popüler liste kullanılır
+    WINDOWS: {ad: saniye} - sönüm zaman sabiti
+    DEFAULT_WINDOW: Pencere verilmezse kullanılan
+    WEIGHTS: UserBehavior.action_type -> ağırlık (olmayanlar sayılmaz)
+    HISTORY_DAYS: Yeniden kurarken okunan geçmiş
+    HOURLY_DAYS: Bu kadar günden yeni geçmiş saatlik rollup'tan okunur
+    REBUILD_INTERVAL: Saniye; motor bu sıklıkla DB'den yeniden kurulur
+    ROLLUP_SIZE: Rollup tablosunda pencere/şehir başına tutulan mekan
+    MIN_SCORE: Bu skorun altındaki mekanlar trend sayılmaz
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import timedelta
+from operator import itemgetter
+
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from config.app_settings import merged_settings
+from config.background import BackgroundThread
+from config.tracing import span
+from .behavior_storage import ROLLUP_WATERMARK
+from .candidates import get_candidate_index
+from .models import AggregationWatermark, Place, PlaceBehaviorRollup, TrendingPlace, UserBehavior
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'WINDOWS': {'1h': 3600, '24h': 86400, '7d': 604800},
+    'DEFAULT_WINDOW': '24h',
+    'WEIGHTS': {
+        'view': 1.0,
+        'detail_view': 1.5,
+        'swipe_like': 3.0,
+        'swipe_save': 4.0,
+        'visit': 5.0,
+        'review': 5.0,
+    },
+    'HISTORY_DAYS': 7,
+    'HOURLY_DAYS': 2,
+    'REBUILD_INTERVAL': 300,
+    'ROLLUP_SIZE': 50,
+    'MIN_SCORE': 0.01,
+}
+
+# Referans zamanından bu kadar zaman sabiti uzaklaşınca sayaçlar yeniden ölçeklenir
+REBASE_EXPONENT = 30
+ALL_CITIES = ''
+
+
+def get_trending_settings():
+    return merged_settings('TRENDING', DEFAULT_SETTINGS)
+
+
+def city_key(city):
+    return (city or '').strip().lower()
+
+
+class TrendingEngine:
+    """
+    Pencere -> şehir -> {place_id: referans zamanına göre sayaç}
+    Şehir anahtarı ALL_CITIES ('') tüm mekanları içerir
+    """
+
+    def __init__(self, windows, weights):
+        self.windows = dict(windows)
+        self.weights = dict(weights)
+        self._lock = threading.Lock()
+        self._counters = {window: {} for window in self.windows}
+        self._place_city = {}
+        self._reference = time.time()
+        self.built_at = None
+        self.ingested_count = 0
+
+    def _add(self, counters, place_city, reference, place_id, weight, epoch):
+        city = place_city.get(place_id)
+        keys = (ALL_CITIES, city) if city else (ALL_CITIES,)
+        for window, tau in self.windows.items():
+            value = weight * math.exp((epoch - reference) / tau)
+            for key in keys:
+                bucket = counters[window].setdefault(key, {})
+                bucket[place_id] = bucket.get(place_id, 0.0) + value
+
+    def _rebase(self, now):
+        # Çok küçülen sayaçlar düşürülür, sözlükler sınırsız büyümesin
+        for window, tau in self.windows.items():
+            factor = math.exp(-(now - self._reference) / tau)
+            for key, bucket in list(self._counters[window].items()):
+                scaled = {place_id: value * factor for place_id, value in bucket.items() if value * factor > 1e-6}
+                if scaled:
+                    self._counters[window][key] = scaled
+                else:
+                    del self._counters[window][key]
+        self._reference = now
+
+    def ingest(self, place_id, action_type, timestamp):
+        """Tek olayı sayaçlara ekler (record_behavior'dan çağrılır)"""
+        weight = self.weights.get(action_type)
+        if not weight:
+            return
+        epoch = timestamp.timestamp()
+        with self._lock:
+            if (epoch - self._reference) / min(self.windows.values()) > REBASE_EXPONENT:
+                self._rebase(epoch)
+            self._add(self._counters, self._place_city, self._reference, place_id, weight, epoch)
+            self.ingested_count += 1
+
+    def load(self, rows, place_city, now):
+        """
+        Sayaçları baştan kurar ve tek seferde değiştirir
+
+        Args:
+            rows: (place_id, action_type, epoch, count) - rollup kovaları veya ham olaylar
+            place_city: {place_id: şehir anahtarı}
+        """
+        counters = {window: {} for window in self.windows}
+        for place_id, action_type, epoch, count in rows:
+            weight = self.weights.get(action_type)
+            if weight:
+                self._add(counters, place_city, now, place_id, weight * count, epoch)
+        with self._lock:
+            self._counters = counters
+            self._place_city = place_city
+            self._reference = now
+            self.built_at = now
+
+    def cities(self):
+        with self._lock:
+            return {city for city in self._place_city.values() if city}
+
+    def top(self, window, city=None, limit=10, now=None):
+        """
+        Returns:
+            list: [(place_id, skor)] - skor `now` anına sönümlenmiş değer
+        """
+        now = now or time.time()
+        tau = self.windows[window]
+        with self._lock:
+            bucket = self._counters[window].get(city_key(city), {})
+            best = heapq.nlargest(limit, bucket.items(), key=itemgetter(1))
+            factor = math.exp(-(now - self._reference) / tau)
+        return [(place_id, value * factor) for place_id, value in best]
+
+
+def _bucket_rows(queryset, half_width):
+    for place_id, action_type, bucket_start, count in queryset:
+        yield place_id, action_type, bucket_start.timestamp() + half_width, count
+
+
+def load_trending_rows(now=None):
+    """
+    HISTORY_DAYS geçmişi kova satırları olarak okur
+    (günlük rollup | saatlik rollup | watermark sonrası ham olaylar, aralıklar çakışmaz)
+    """
+    config = get_trending_settings()
+    now = now or timezone.now()
+    since = now - timedelta(days=config['HISTORY_DAYS'])
+    hourly_since = timezone.localtime(now - timedelta(days=config['HOURLY_DAYS'])).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    watermark = AggregationWatermark.get_value(ROLLUP_WATERMARK)
+    actions = list(config['WEIGHTS'])
+
+    rows = []
+    if watermark is not None:
+        watermark = max(watermark, since)
+        daily = PlaceBehaviorRollup.objects.filter(
+            granularity='day', action_type__in=actions,
+            bucket_start__gte=since, bucket_start__lt=min(hourly_since, watermark),
+        ).values_list('place_id', 'action_type', 'bucket_start', 'count')
+        hourly = PlaceBehaviorRollup.objects.filter(
+            granularity='hour', action_type__in=actions,
+            bucket_start__gte=max(hourly_since, since), bucket_start__lt=watermark,
+        ).values_list('place_id', 'action_type', 'bucket_start', 'count')
+        rows.extend(_bucket_rows(daily.iterator(chunk_size=5000), 43200))
+        rows.extend(_bucket_rows(hourly.iterator(chunk_size=5000), 1800))
+        raw_since = watermark
+    else:
+        raw_since = since
+
+    raw = UserBehavior.objects.filter(
+        timestamp__gte=raw_since, action_type__in=actions
+    ).annotate(bucket=TruncHour('timestamp')).values_list(
+        'place_id', 'action_type', 'bucket'
+    ).annotate(total=Count('id')).order_by()
+    rows.extend(_bucket_rows(raw.iterator(chunk_size=5000), 1800))
+    return rows
+
+
+def build_trending_engine(engine=None, now=None):
+    """Motoru DB'den kurar (engine verilmezse yenisini oluşturur)"""
+    config = get_trending_settings()
+    now = now or timezone.now()
+    engine = engine or TrendingEngine(config['WINDOWS'], config['WEIGHTS'])
+    with span('trending.build') as stage:
+        rows = load_trending_rows(now)
+        place_city = {
+            place_id: city_key(city)
+            for place_id, city in Place.objects.values_list('id', 'city').iterator(chunk_size=5000)
+        }
+        engine.load(rows, place_city, now.timestamp())
+        stage.set(rows=len(rows), places=len(place_city))
+    return engine
+
+
+def save_trending_rollup(engine=None, now=None):
+    """
+    Pencere/şehir başına ilk ROLLUP_SIZE mekanı TrendingPlace'e yazar
+
+    Returns:
+        int: yazılan satır sayısı
+    """
+    config = get_trending_settings()
+    now = now or timezone.now()
+    engine = engine or build_trending_engine(now=now)
+    cities = {ALL_CITIES} | engine.cities()
+
+    entries = []
+    for window in engine.windows:
+        for city in cities:
+            ranked = engine.top(window, city, config['ROLLUP_SIZE'], now.timestamp())
+            entries.extend(
+                TrendingPlace(window=window, city=city, place_id=place_id, rank=rank, score=score, computed_at=now)
+                for rank, (place_id, score) in enumerate(ranked, start=1)
+                if score >= config['MIN_SCORE']
+            )
+    with transaction.atomic():
+        TrendingPlace.objects.all().delete()
+        TrendingPlace.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+class TrendingRebuilder:
+    """Motoru arka plan thread'inde yeniden kurar; aynı anda tek kurulum çalışır"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._worker = BackgroundThread(self._run, 'trending-rebuild')
+
+    def request(self):
+        self._worker.ensure()
+
+    def _run(self):
+        close_old_connections()
+        try:
+            build_trending_engine(self.engine)
+        except Exception as e:
+            print(f"Trending rebuild error: {e}")
+        finally:
+            close_old_connections()
+
+
+_engine = None
+_rebuilder = None
+_engine_lock = threading.Lock()
+
+
+def get_trending_engine():
+    """Process genelinde tek TrendingEngine objesi (ilk çağrıda boş, arka planda kurulur)"""
+    global _engine, _rebuilder
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                config = get_trending_settings()
+                _rebuilder = TrendingRebuilder(TrendingEngine(config['WINDOWS'], config['WEIGHTS']))
+                _engine = _rebuilder.engine
+    return _engine
+
+
+def ingest_behavior(event):
+    """record_behavior kancası - olay dict'ini motora ekler"""
+    if not get_trending_settings()['ENABLED']:
+        return
+    get_trending_engine().ingest(event['place_id'], event['action_type'], event['timestamp'])
+
+
+def get_trending(city=None, window=None, limit=10):
+    """
+    Şehirde (veya genel) şu an trend mekanlar
+
+    Returns:
+        tuple: (list [(place_id, skor)], kaynak 'memory' | 'rollup' | 'popular')
+    """
+    config = get_trending_settings()
+    window = window or config['DEFAULT_WINDOW']
+    if window not in config['WINDOWS']:
+        raise ValueError(f'Geçersiz pencere: {window}')
+
+    if config['ENABLED']:
+        engine = get_trending_engine()
+        now = time.time()
+        if engine.built_at is None or now - engine.built_at > config['REBUILD_INTERVAL']:
+            _rebuilder.request()
+        if engine.built_at is not None:
+            ranked = [
+                (place_id, score) for place_id, score in engine.top(window, city, limit, now)
+                if score >= config['MIN_SCORE']
+            ]
+            if ranked:
+                return ranked, 'memory'
+
+    rows = list(TrendingPlace.objects.filter(
+        window=window, city=city_key(city)
+    ).order_by('rank').values_list('place_id', 'score')[:limit])
+    if rows:
+        return rows, 'rollup'
+
+    # Hiç davranış verisi yoksa: önbellekli aday indeksindeki genel popülerlik
+    index = get_candidate_index()
+    if city:
+        popular = index.by_city.get(city_key(city), [])
+    else:
+        popular = index.popular
+    return [(place_id, 0.0) for place_id in popular[:limit]], 'popular'
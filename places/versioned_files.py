@@ -0,0 +1,90 @@
+"""
+Sürümlü Dosyalar - CURRENT ile yayınlanan, process içinde tembel açılan çıktılar
+
+cf_model ve catalogue_snapshot aynı düzeni kullanır:
+    <DIR>/<sürüm><sonek>   yeni sürüm önce tamamen yazılır
+    <DIR>/CURRENT          sonra atomik olarak (tmp + os.replace) yeni sürümü gösterir
+
+Okuyan process CURRENT'ı en fazla RELOAD_INTERVAL saniyede bir kontrol eder.
+Açık sürümler eski dosyayı (silinse bile) kullanmaya devam eder; yeni sürüm
+açılamazsa eldeki sürümle devam edilir.
+"""
+import os
+import threading
+import time
+
+from django.utils import timezone
+
+
+CURRENT_FILE = 'CURRENT'
+
+
+def new_version():
+    return timezone.now().strftime('v%Y%m%d%H%M%S%f')
+
+
+def publish_version(directory, version):
+    """CURRENT'ı atomik olarak verilen sürüme çevirir"""
+    tmp_path = os.path.join(directory, f'{CURRENT_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(directory, CURRENT_FILE))
+
+
+def read_current_version(directory):
+    """CURRENT'ın gösterdiği sürüm (yoksa None)"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+class VersionedFileLoader:
+    """
+    CURRENT'ın gösterdiği sürümü açıp process içinde tutar
+
+    Args:
+        opener: (path, version) -> açılmış obje; OSError/ValueError ile başarısız olabilir
+        get_settings: DIR ve RELOAD_INTERVAL içeren ayar sözlüğünü döner
+        suffix: Sürüm adına eklenen dosya soneki ('' ise sürüm bir dizindir)
+    """
+
+    def __init__(self, opener, get_settings, suffix=''):
+        self.opener = opener
+        self.get_settings = get_settings
+        self.suffix = suffix
+        self._current = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Açık sürümü döner (CURRENT yoksa None); gerekirse yeni sürüme geçer"""
+        config = self.get_settings()
+        now = time.monotonic()
+        if self._is_fresh(now, config['RELOAD_INTERVAL']):
+            return self._current
+
+        with self._lock:
+            if self._is_fresh(now, config['RELOAD_INTERVAL']):
+                return self._current
+            self._checked_at = now
+            directory = str(config['DIR'])
+            version = read_current_version(directory)
+            if version is None:
+                self._current = None
+            elif self._current is None or self._current.version != version:
+                try:
+                    self._current = self.opener(os.path.join(directory, version + self.suffix), version)
+                except (OSError, ValueError):
+                    pass
+            return self._current
+
+    def reset(self):
+        """Bir sonraki get() CURRENT'ı yeniden okusun"""
+        with self._lock:
+            self._current = None
+            self._checked_at = None
+
+    def _is_fresh(self, now, interval):
+        return self._checked_at is not None and now - self._checked_at < interval
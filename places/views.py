@@ -3,32 +3,39 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Avg
 from .models import Place
+from .recommendation_slates import request_slate_refresh
+from .stream_stats import record_stream_event
 from visits.models import Visit
 from visits.forms import VisitForm
 
 
 def home(request):
     """Ana sayfa - Modern tanıtım sayfası"""
-    from django.db.models import Avg, Count
-    
-    # Popüler mekanları al (en çok beğenilenler)
-    popular_places = Place.objects.annotate(
-        visit_count=Count('visits'),
-        avg_rating=Avg('visits__rating')
-    ).filter(
-        visit_count__gt=0
-    ).order_by(
-        '-avg_rating',
-        '-visit_count'
-    )[:6]  # İlk 6 mekan
+    from .candidates import get_candidate_index
+    from .trending import get_trending
     
-    # Ortalama puanları hesapla
+    # Trend mekanlar: giriş yapmış kullanıcının şehri, yoksa/boşsa tüm şehirler
+    city = None
+    if request.user.is_authenticated:
+        profile = getattr(request.user, 'profile', None)
+        city = profile.city if profile else None
+    ranked, source = get_trending(city, limit=6) if city else ([], None)
+    if not ranked:
+        ranked, source = get_trending(None, limit=6)
+    
+    place_dict = Place.objects.in_bulk([place_id for place_id, _ in ranked])
+    popular_places = [place_dict[place_id] for place_id, _ in ranked if place_id in place_dict]
+    
+    # Puan/ziyaret sayısı önbellekli aday indeksinden (her istekte aggregate yok)
+    stats = get_candidate_index().stats
     for place in popular_places:
-        place.avg_rating_display = round(place.avg_rating or 0, 1)
-        place.visit_count_display = place.visit_count or 0
+        avg_rating, visit_count = stats.get(place.id, (0.0, 0))
+        place.avg_rating_display = round(avg_rating or 0, 1)
+        place.visit_count_display = visit_count or 0
     
     context = {
         'popular_places': popular_places,
+        'trending_source': source,
         'user': request.user
     }
     
@@ -45,7 +52,6 @@ def discover(request):
     mode = request.GET.get('mode', '')
     search = request.GET.get('search', '')
     
-    # SQLite uyumlu filtreler
     if city:
         places = places.filter(city__icontains=city)
     
@@ -56,15 +62,15 @@ def discover(request):
             Q(address__icontains=search)
         )
     
-    # Queryset'i listeye çevir (evaluate et)
-    places_list = list(places)
-    
-    # JSONField filtrelerini Python'da yap (SQLite uyumluluğu için)
+    # JSONField filtreleri SQL'de (places/json_lookups.py)
     if category:
-        places_list = [p for p in places_list if category in (p.categories or [])]
+        places = places.filter(categories__has_element=category)
     
     if mode:
-        places_list = [p for p in places_list if mode in (p.categories or [])]
+        places = places.filter(categories__has_element=mode)
+    
+    # Queryset'i listeye çevir (evaluate et)
+    places_list = list(places)
     
     # Ortalama puanları hesapla
     for place in places_list:
@@ -131,6 +137,12 @@ def add_review(request, place_id):
             visit.place = place
             visit.save()
             
+            # Akış istatistikleri (değerlendirmenin atmosfer etiketleri, yoksa mekanınkiler)
+            record_stream_event(request.user.id, place, 'review', tags=visit.atmosphere or None)
+            
+            # Öneri slate'ini arka planda yenile
+            request_slate_refresh(request.user)
+            
             # UserScore'u güncelle
             from social.models import UserScore
             score, created = UserScore.objects.get_or_create(user=request.user)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import api_views, group_planning_api
+from . import api_views, group_planning_api, plan_events, plan_calendar
 
 app_name = 'social_api'
 
@@ -18,5 +18,12 @@ urlpatterns = [
     path('plans/<int:plan_id>/finalize/', group_planning_api.finalize_plan_api, name='finalize_plan'),
     path('plans/<int:plan_id>/poll/answers/', group_planning_api.save_poll_answers_api, name='save_poll_answers'),
     path('plans/<int:plan_id>/export-ical/', group_planning_api.export_plan_ical, name='export_plan_ical'),
+    path('plans/<int:plan_id>/recommendations/', group_planning_api.group_recommendations_api, name='group_recommendations'),
+    path('plans/<int:plan_id>/events/', plan_events.plan_events_stream, name='plan_events'),
+    path('calendar/feed-url/', group_planning_api.plan_calendar_feed_url_api, name='plan_calendar_feed_url'),
+    path('calendar/feed-url/reset/', group_planning_api.reset_plan_calendar_feed_url_api, name='reset_plan_calendar_feed_url'),
+    path('calendar/<str:token>.ics', plan_calendar.plan_calendar_feed, name='plan_calendar_feed'),
     path('friends/for-invite/', group_planning_api.get_friends_for_invite_api, name='friends_for_invite'),
+    path('friends/groups/', group_planning_api.friend_groups_api, name='friend_groups'),
+    path('friends/groups/<int:group_id>/', group_planning_api.friend_group_detail_api, name='friend_group_detail'),
 ]
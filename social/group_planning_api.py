@@ -6,17 +6,24 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q, Count, Prefetch
 from django.utils import timezone
 from django.http import HttpResponse
-from datetime import timedelta
 from accounts.models import User
 from places.models import Place
-from .models import GroupPlan, PlanParticipant, PlanVote, PlanPlaceOption, Friendship
+from places.serializers import PlaceSerializer, build_place_stats
+from .models import GroupPlan, PlanParticipant, PlanVote, PlanPlaceOption, FriendGroup
 from .serializers import (
     GroupPlanSerializer, GroupPlanListSerializer,
     PlanParticipantSerializer, PlanVoteSerializer, PlanPlaceOptionSerializer
 )
+from .plan_read_model import get_plan_with_relations, is_plan_member, serialize_plan_detail, get_vote_tallies
+from .plan_events import publish_plan_event
+from .group_recommender import recommend_for_group, STRATEGIES
+from .plan_finalization import finalize_plan, FINALIZABLE_STATUSES
+from .plan_invites import friends_of, resolve_invitees, invite_to_plan
+from .plan_calendar import iter_calendar, feed_url, rotate_feed_key
 
 
 @api_view(['GET', 'POST'])
@@ -98,10 +105,9 @@ def group_plans_api(request):
             has_accepted=True
         )
         
-        serializer = GroupPlanSerializer(plan)
         return Response({
             'success': True,
-            'plan': serializer.data
+            'plan': serialize_plan_detail(get_plan_with_relations(plan.id))
         }, status=status.HTTP_201_CREATED)
 
 
@@ -114,7 +120,8 @@ def group_plan_detail_api(request, plan_id):
     DELETE: Planı sil
     """
     try:
-        plan = GroupPlan.objects.get(id=plan_id)
+        # Katılımcılar, oylar ve seçenekler sabit sayıda sorgu ile yüklenir
+        plan = get_plan_with_relations(plan_id)
     except GroupPlan.DoesNotExist:
         return Response(
             {'success': False, 'error': 'Plan bulunamadı'},
@@ -122,20 +129,18 @@ def group_plan_detail_api(request, plan_id):
         )
     
     # Sadece oluşturucu veya katılımcı görebilir
-    is_creator = plan.creator == request.user
-    is_participant = PlanParticipant.objects.filter(plan=plan, user=request.user).exists()
+    is_creator = plan.creator_id == request.user.id
     
-    if not (is_creator or is_participant):
+    if not is_plan_member(plan, request.user):
         return Response(
             {'success': False, 'error': 'Bu plana erişim yetkiniz yok'},
             status=status.HTTP_403_FORBIDDEN
         )
     
     if request.method == 'GET':
-        serializer = GroupPlanSerializer(plan)
         return Response({
             'success': True,
-            'plan': serializer.data
+            'plan': serialize_plan_detail(plan)
         })
     
     elif request.method == 'PUT':
@@ -146,40 +151,63 @@ def group_plan_detail_api(request, plan_id):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        title = request.data.get('title', plan.title)
-        description = request.data.get('description', plan.description)
-        planned_date = request.data.get('planned_date', None)
-        deadline = request.data.get('deadline', None)
-        status_value = request.data.get('status', plan.status)
+        status_value = request.data.get('status', None)
         poll_questions = request.data.get('poll_questions', None)
         
-        plan.title = title
-        plan.description = description
-        plan.status = status_value
-        
-        if planned_date:
-            try:
-                plan.planned_date = timezone.datetime.fromisoformat(planned_date.replace('Z', '+00:00'))
-            except:
-                pass
-        
-        if deadline:
-            try:
-                plan.deadline = timezone.datetime.fromisoformat(deadline.replace('Z', '+00:00'))
-            except:
-                pass
-        
-        # Sorular güncellendiyse temizle ve kaydet
-        if isinstance(poll_questions, list):
-            clean_questions = [q.strip() for q in poll_questions if isinstance(q, str) and q.strip()]
-            plan.poll_questions = clean_questions[:3]
+        # Kesinleştirme kazananı seçen finalize endpoint'inden geçer; kesinleşen plan geri açılmaz
+        if status_value is not None and status_value != plan.status:
+            if status_value == 'finalized':
+                return Response(
+                    {'success': False, 'error': 'Planı kesinleştirmek için finalize kullanın'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if status_value not in dict(GroupPlan.STATUS_CHOICES):
+                return Response(
+                    {'success': False, 'error': 'Geçersiz plan durumu'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        plan.save()
+        with transaction.atomic():
+            # Kesinleştirme ve oylama ile aynı satır kilidi; sadece gönderilen alanlar yazılır
+            locked = GroupPlan.objects.select_for_update().get(id=plan.id)
+            update_fields = []
+            
+            for field in ('title', 'description'):
+                if field in request.data:
+                    setattr(locked, field, request.data[field])
+                    update_fields.append(field)
+            
+            if status_value is not None and status_value != locked.status:
+                if locked.status == 'finalized':
+                    return Response(
+                        {'success': False, 'error': 'Plan zaten kesinleştirilmiş'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                locked.status = status_value
+                update_fields.append('status')
+            
+            for field in ('planned_date', 'deadline'):
+                value = request.data.get(field, None)
+                if value:
+                    try:
+                        setattr(locked, field, timezone.datetime.fromisoformat(value.replace('Z', '+00:00')))
+                        update_fields.append(field)
+                    except:
+                        pass
+            
+            # Sorular güncellendiyse temizle ve kaydet
+            if isinstance(poll_questions, list):
+                clean_questions = [q.strip() for q in poll_questions if isinstance(q, str) and q.strip()]
+                locked.poll_questions = clean_questions[:3]
+                update_fields.append('poll_questions')
+            
+            if update_fields:
+                locked.save(update_fields=update_fields + ['updated_at'])
         
-        serializer = GroupPlanSerializer(plan)
+        plan = get_plan_with_relations(plan.id)
         return Response({
             'success': True,
-            'plan': serializer.data
+            'plan': serialize_plan_detail(plan)
         })
     
     elif request.method == 'DELETE':
@@ -202,7 +230,8 @@ def group_plan_detail_api(request, plan_id):
 def invite_participants_api(request, plan_id):
     """
     Plana katılımcı davet et
-    Body: { "user_ids": [1, 2, 3] }
+    Body: { "user_ids": [1, 2, 3] } | { "group_id": 5 } | { "all_friends": true }
+    (birlikte de gönderilebilir)
     """
     try:
         plan = GroupPlan.objects.get(id=plan_id)
@@ -213,56 +242,49 @@ def invite_participants_api(request, plan_id):
         )
     
     # Sadece oluşturucu davet edebilir
-    if plan.creator != request.user:
+    if plan.creator_id != request.user.id:
         return Response(
             {'success': False, 'error': 'Sadece plan oluşturucusu davet edebilir'},
             status=status.HTTP_403_FORBIDDEN
         )
     
     user_ids = request.data.get('user_ids', [])
-    if not user_ids or not isinstance(user_ids, list):
+    group_id = request.data.get('group_id')
+    # Form verisinde 'false'/'0' string gelir; bool() bunları True sayar
+    all_friends = str(request.data.get('all_friends', False)).lower() in ('1', 'true', 'yes')
+    
+    if not isinstance(user_ids, list) or not all(isinstance(user_id, int) for user_id in user_ids):
         return Response(
-            {'success': False, 'error': 'user_ids listesi gerekli'},
+            {'success': False, 'error': 'user_ids tam sayı listesi olmalı'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Sadece arkadaşları davet edebilir
-    friendships = Friendship.objects.filter(
-        Q(requester=request.user, status='accepted') |
-        Q(receiver=request.user, status='accepted')
-    )
-    
-    friend_ids = []
-    for friendship in friendships:
-        if friendship.requester == request.user:
-            friend_ids.append(friendship.receiver.id)
-        else:
-            friend_ids.append(friendship.requester.id)
+    if not user_ids and group_id is None and not all_friends:
+        return Response(
+            {'success': False, 'error': 'user_ids, group_id veya all_friends gerekli'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    invited_users = []
-    for user_id in user_ids:
-        if user_id not in friend_ids:
-            continue  # Arkadaş değilse atla
-        
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            continue
-        
-        # Zaten katılımcı mı?
-        participant, created = PlanParticipant.objects.get_or_create(
-            plan=plan,
-            user=user,
-            defaults={'is_invited': True}
+    # Sadece arkadaşlar davet edilebilir (tek sorguda doğrulanır)
+    try:
+        invitees, rejected_ids = resolve_invitees(
+            request.user, user_ids=user_ids, group_id=group_id, all_friends=all_friends
+        )
+    except (FriendGroup.DoesNotExist, ValueError, TypeError):
+        return Response(
+            {'success': False, 'error': 'Arkadaş grubu bulunamadı'},
+            status=status.HTTP_404_NOT_FOUND
         )
-        
-        if created:
-            invited_users.append(user.username)
+    
+    result = invite_to_plan(plan, invitees)
     
     return Response({
         'success': True,
-        'message': f'{len(invited_users)} kişi davet edildi',
-        'invited_users': invited_users
+        'message': f'{len(result["created"])} kişi davet edildi',
+        'invited_users': [row['username'] for row in result['created']],
+        'created': result['created'],
+        'existing': result['existing'],
+        'rejected_ids': rejected_ids
     })
 
 
@@ -299,6 +321,12 @@ def respond_to_invitation_api(request, plan_id):
     participant.responded_at = timezone.now()
     participant.save()
     
+    publish_plan_event(plan.id, 'participant', {
+        'user_id': request.user.id,
+        'username': request.user.username,
+        'action': action
+    })
+    
     return Response({
         'success': True,
         'message': f'Davet {action} edildi'
@@ -366,6 +394,13 @@ def suggest_place_api(request, plan_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    publish_plan_event(plan.id, 'place_suggested', {
+        'option_id': option.id,
+        'place_id': place.id,
+        'place_name': place.name,
+        'suggested_by': request.user.username
+    })
+    
     serializer = PlanPlaceOptionSerializer(option)
     return Response({
         'success': True,
@@ -380,34 +415,6 @@ def vote_place_api(request, plan_id):
     Mekana oy ver
     Body: { "place_id": 1, "vote_type": "yes" | "maybe" | "no", "note": "..." }
     """
-    try:
-        plan = GroupPlan.objects.get(id=plan_id)
-    except GroupPlan.DoesNotExist:
-        return Response(
-            {'success': False, 'error': 'Plan bulunamadı'},
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    # Oylama aktif mi?
-    if not plan.is_voting_active:
-        return Response(
-            {'success': False, 'error': 'Oylama aktif değil'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    # Katılımcı mı?
-    is_participant = PlanParticipant.objects.filter(
-        plan=plan,
-        user=request.user,
-        has_accepted=True
-    ).exists()
-    
-    if not is_participant:
-        return Response(
-            {'success': False, 'error': 'Bu plana katılımcı değilsiniz'},
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     place_id = request.data.get('place_id')
     vote_type = request.data.get('vote_type', 'yes')
     note = request.data.get('note', '')
@@ -432,16 +439,55 @@ def vote_place_api(request, plan_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Oy oluştur veya güncelle
-    vote, created = PlanVote.objects.update_or_create(
-        plan=plan,
-        user=request.user,
-        place=place,
-        defaults={
-            'vote_type': vote_type,
-            'note': note
-        }
-    )
+    # Plan satırı kilitlenir: kesinleştirme ile yarışan oy yazılamaz
+    with transaction.atomic():
+        try:
+            plan = GroupPlan.objects.select_for_update().get(id=plan_id)
+        except GroupPlan.DoesNotExist:
+            return Response(
+                {'success': False, 'error': 'Plan bulunamadı'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Oylama aktif mi? (durum ve deadline kilit altında kontrol edilir)
+        if not plan.is_voting_active:
+            return Response(
+                {'success': False, 'error': 'Oylama aktif değil'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Katılımcı mı?
+        is_participant = PlanParticipant.objects.filter(
+            plan=plan,
+            user=request.user,
+            has_accepted=True
+        ).exists()
+        
+        if not is_participant:
+            return Response(
+                {'success': False, 'error': 'Bu plana katılımcı değilsiniz'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Oy oluştur veya güncelle
+        vote, created = PlanVote.objects.update_or_create(
+            plan=plan,
+            user=request.user,
+            place=place,
+            defaults={
+                'vote_type': vote_type,
+                'note': note
+            }
+        )
+    
+    publish_plan_event(plan.id, 'vote', {
+        'place_id': place.id,
+        'user_id': request.user.id,
+        'username': request.user.username,
+        'vote_type': vote_type,
+        'created': created,
+        'tally': get_vote_tallies(plan.id).get(place.id, {'yes': 0, 'maybe': 0, 'no': 0})
+    })
     
     serializer = PlanVoteSerializer(vote)
     return Response({
@@ -496,7 +542,7 @@ def save_poll_answers_api(request, plan_id):
 @permission_classes([IsAuthenticated])
 def finalize_plan_api(request, plan_id):
     """
-    Planı kesinleştir - En çok oy alan mekanı seç
+    Planı kesinleştir - Ağırlıklı oyda kazanan mekanı seç
     """
     try:
         plan = GroupPlan.objects.get(id=plan_id)
@@ -513,61 +559,226 @@ def finalize_plan_api(request, plan_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # En çok oy alan mekanı bul
-    winner_place = plan.get_winner_place()
+    # Ağırlıklı oylarla kazananı kilit altında seç
+    plan, winner = finalize_plan(plan.id)
     
-    if not winner_place:
+    if not winner:
+        if plan.status == 'finalized':
+            error = 'Plan zaten kesinleştirilmiş'
+        elif plan.status not in FINALIZABLE_STATUSES:
+            error = 'Bu plan kesinleştirilemez'
+        else:
+            error = 'Henüz oy verilmemiş'
         return Response(
-            {'success': False, 'error': 'Henüz oy verilmemiş'},
+            {'success': False, 'error': error},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    plan.selected_place = winner_place
-    plan.status = 'finalized'
-    plan.save()
-    
-    serializer = GroupPlanSerializer(plan)
+    plan = get_plan_with_relations(plan.id)
     return Response({
         'success': True,
-        'plan': serializer.data,
+        'plan': serialize_plan_detail(plan),
         'winner_place': {
-            'id': winner_place.id,
-            'name': winner_place.name
+            'id': plan.selected_place.id,
+            'name': plan.selected_place.name
         }
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_friends_for_invite_api(request):
+def group_recommendations_api(request, plan_id):
     """
-    Davet için arkadaş listesini getir
+    Plan katılımcılarının ortak zevkine göre mekan önerileri
+    Query params: strategy (average | least_misery | approval), limit (default: 10, 1-50 arası)
     """
-    friendships = Friendship.objects.filter(
-        Q(requester=request.user, status='accepted') |
-        Q(receiver=request.user, status='accepted')
+    try:
+        plan = GroupPlan.objects.get(id=plan_id)
+    except GroupPlan.DoesNotExist:
+        return Response(
+            {'success': False, 'error': 'Plan bulunamadı'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    is_creator = plan.creator_id == request.user.id
+    is_participant = PlanParticipant.objects.filter(plan=plan, user=request.user).exists()
+    
+    if not (is_creator or is_participant):
+        return Response(
+            {'success': False, 'error': 'Bu plana erişim yetkiniz yok'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    strategy = request.query_params.get('strategy', 'average')
+    if strategy not in STRATEGIES:
+        return Response(
+            {'success': False, 'error': f'strategy {", ".join(STRATEGIES)} olmalı'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+    except (ValueError, TypeError):
+        return Response(
+            {'success': False, 'error': 'limit tam sayı olmalı'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    recommendations = recommend_for_group(plan, strategy=strategy, limit=limit)
+    
+    # Mekanları tek sorguda al, istatistikleri toplu hesapla
+    place_ids = [r['place_id'] for r in recommendations]
+    places = Place.objects.in_bulk(place_ids)
+    serializer = PlaceSerializer(
+        [places[place_id] for place_id in place_ids if place_id in places],
+        many=True,
+        context={'place_stats': build_place_stats(place_ids)}
     )
     
-    friends = []
-    for friendship in friendships:
-        if friendship.requester == request.user:
-            friend = friendship.receiver
-        else:
-            friend = friendship.requester
-        
-        friends.append({
+    results = []
+    for rec, place_data in zip(recommendations, serializer.data):
+        place_data['group_score'] = rec['score']
+        place_data['support'] = rec['support']
+        results.append(place_data)
+    
+    return Response({
+        'success': True,
+        'strategy': strategy,
+        'places': results,
+        'count': len(results)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_friends_for_invite_api(request):
+    """
+    Davet için arkadaş listesini ve kayıtlı arkadaş gruplarını getir
+    """
+    friends = [
+        {
             'id': friend.id,
             'username': friend.username,
             'display_name': friend.profile.get_display_name if hasattr(friend, 'profile') else friend.username
-        })
+        }
+        for friend in friends_of(request.user).select_related('profile').order_by('username')
+    ]
     
     return Response({
         'success': True,
         'friends': friends,
+        'groups': [serialize_friend_group(group) for group in _friend_groups(request.user)],
         'count': len(friends)
     })
 
 
+def _friend_groups(user):
+    return FriendGroup.objects.filter(owner=user).prefetch_related(
+        Prefetch('members', queryset=User.objects.only('id', 'username'))
+    )
+
+
+def serialize_friend_group(group):
+    members = sorted(group.members.all(), key=lambda member: member.username)
+    return {
+        'id': group.id,
+        'name': group.name,
+        'members': [{'id': member.id, 'username': member.username} for member in members],
+        'member_count': len(members)
+    }
+
+
+def _save_friend_group(request, group):
+    """Grup adı ve üyelerini doğrular/kaydeder; hata varsa Response döner"""
+    name = (request.data.get('name', group.name) or '').strip()
+    member_ids = request.data.get('member_ids')
+    
+    if not name:
+        return Response(
+            {'success': False, 'error': 'name gerekli'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if FriendGroup.objects.filter(owner=request.user, name=name).exclude(id=group.id).exists():
+        return Response(
+            {'success': False, 'error': 'Bu isimde bir grubunuz zaten var'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    members = None
+    if member_ids is not None:
+        if not isinstance(member_ids, list) or not all(isinstance(member_id, int) for member_id in member_ids):
+            return Response(
+                {'success': False, 'error': 'member_ids tam sayı listesi olmalı'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Gruba sadece arkadaşlar eklenebilir
+        members, _ = resolve_invitees(request.user, user_ids=member_ids)
+    
+    group.name = name
+    with transaction.atomic():
+        group.save()
+        if members is not None:
+            group.members.set([row['id'] for row in members])
+    return None
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def friend_groups_api(request):
+    """
+    GET: Kayıtlı arkadaş gruplarını listele
+    POST: Yeni grup oluştur
+    Body: { "name": "Ofis Ekibi", "member_ids": [1, 2, 3] }
+    """
+    if request.method == 'GET':
+        groups = [serialize_friend_group(group) for group in _friend_groups(request.user)]
+        return Response({
+            'success': True,
+            'groups': groups,
+            'count': len(groups)
+        })
+    
+    group = FriendGroup(owner=request.user, name='')
+    error = _save_friend_group(request, group)
+    if error:
+        return error
+    
+    return Response({
+        'success': True,
+        'group': serialize_friend_group(_friend_groups(request.user).get(id=group.id))
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def friend_group_detail_api(request, group_id):
+    """
+    PUT: Grup adını/üyelerini güncelle
+    DELETE: Grubu sil
+    """
+    try:
+        group = FriendGroup.objects.get(id=group_id, owner=request.user)
+    except FriendGroup.DoesNotExist:
+        return Response(
+            {'success': False, 'error': 'Arkadaş grubu bulunamadı'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if request.method == 'DELETE':
+        group.delete()
+        return Response({'success': True, 'message': 'Grup silindi'})
+    
+    error = _save_friend_group(request, group)
+    if error:
+        return error
+    
+    return Response({
+        'success': True,
+        'group': serialize_friend_group(_friend_groups(request.user).get(id=group.id))
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_plan_ical(request, plan_id):
@@ -575,7 +786,7 @@ def export_plan_ical(request, plan_id):
     Planı iCal formatında export et
     """
     try:
-        plan = GroupPlan.objects.get(id=plan_id)
+        plan = GroupPlan.objects.select_related('selected_place').get(id=plan_id)
     except GroupPlan.DoesNotExist:
         return Response(
             {'success': False, 'error': 'Plan bulunamadı'},
@@ -583,7 +794,7 @@ def export_plan_ical(request, plan_id):
         )
     
     # Erişim kontrolü
-    is_creator = plan.creator == request.user
+    is_creator = plan.creator_id == request.user.id
     is_participant = PlanParticipant.objects.filter(plan=plan, user=request.user).exists()
     
     if not (is_creator or is_participant):
@@ -592,61 +803,35 @@ def export_plan_ical(request, plan_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # iCal dosyası oluştur
-    ical_content = generate_ical(plan)
+    # iCal dosyası oluştur (UID plan oluşturulurken atanır, GET yazma yapmaz)
+    ical_content = ''.join(iter_calendar([plan]))
     
     response = HttpResponse(ical_content, content_type='text/calendar; charset=utf-8')
     response['Content-Disposition'] = f'attachment; filename="plan_{plan.id}.ics"'
     return response
 
 
-def generate_ical(plan):
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def plan_calendar_feed_url_api(request):
     """
-    iCal formatında içerik oluştur
+    Takvim uygulamalarına eklenecek kişisel plan akışı adresi
     """
-    from datetime import datetime
-    import uuid
-    
-    # Plan UID oluştur
-    if not plan.ical_uid:
-        plan.ical_uid = str(uuid.uuid4())
-        plan.save()
-    
-    # Tarih formatı: YYYYMMDDTHHMMSS
-    def format_datetime(dt):
-        if not dt:
-            return None
-        return dt.strftime('%Y%m%dT%H%M%S')
-    
-    created = format_datetime(plan.created_at)
-    start = format_datetime(plan.planned_date) if plan.planned_date else created
-    end = format_datetime(plan.planned_date + timedelta(hours=2)) if plan.planned_date else None
-    
-    # iCal içeriği
-    ical = [
-        'BEGIN:VCALENDAR',
-        'VERSION:2.0',
-        'PRODID:-//MekanKeşif//Grup Planlama//TR',
-        'CALSCALE:GREGORIAN',
-        'METHOD:PUBLISH',
-        'BEGIN:VEVENT',
-        f'UID:{plan.ical_uid}',
-        f'DTSTAMP:{created}',
-    ]
-    
-    if start:
-        ical.append(f'DTSTART:{start}')
-    if end:
-        ical.append(f'DTEND:{end}')
-    
-    ical.extend([
-        f'SUMMARY:{plan.title}',
-        f'DESCRIPTION:{plan.description or ""}',
-        f'LOCATION:{plan.selected_place.address if plan.selected_place else ""}',
-        'STATUS:CONFIRMED',
-        'SEQUENCE:0',
-        'END:VEVENT',
-        'END:VCALENDAR'
-    ])
-    
-    return '\r\n'.join(ical)
+    return Response({
+        'success': True,
+        'feed_url': feed_url(request, request.user)
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reset_plan_calendar_feed_url_api(request):
+    """
+    Takvim akışı adresini yeniler
+    Önceki adresle abone olan takvimler artık plan göremez
+    """
+    rotate_feed_key(request.user)
+    return Response({
+        'success': True,
+        'feed_url': feed_url(request, request.user)
+    })
@@ -0,0 +1,215 @@
+"""
+Grup Öneri Motoru - GroupPlan katılımcılarının ortak zevkine göre mekan önerir
+
+Tüm katılımcıların zevk profili, swipe geçmişi ve plandaki oyları tek seferde
+yüklenir; katalog (mekan x kategori/etiket) matrisiyle çarpılarak
+katılımcı x mekan skor matrisi çıkarılır ve grup stratejisi ile birleştirilir:
+
+- average: katılımcı skorlarının ortalaması
+- least_misery: en mutsuz katılımcının skoru (min)
+- approval: onay oranı (onay=1, belki=0.5, red=0)
+
+Herhangi bir katılımcının beğenmediği (dislike) mekanlar listeye girmez.
+"""
+import threading
+
+import numpy as np
+from django.db.models import Count, Max
+
+from accounts.models import UserTasteProfile
+from places.models import Place, PlacePreference
+from .models import PlanParticipant, PlanVote
+
+
+STRATEGIES = ('average', 'least_misery', 'approval')
+
+# Swipe geçmişinin zevk skorunu ezdiği değerler
+SWIPE_SCORES = {'like': 1.0, 'save': 0.9}
+# Plandaki oyların onay karşılıkları
+VOTE_APPROVAL = {'yes': 1.0, 'maybe': 0.5, 'no': 0.0}
+# Zevk skorundan onay çıkarımı: üstü onay, arası belki, altı red
+APPROVE_THRESHOLD = 0.6
+MAYBE_THRESHOLD = 0.3
+# Zevk profili olmayan katılımcı için nötr skor
+NEUTRAL_SCORE = 0.5
+
+
+class Catalogue:
+    """Mekan kataloğunun vektörel gösterimi (kategori ve etiket multi-hot matrisleri)"""
+
+    def __init__(self, rows):
+        self.place_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.names = [row[1] for row in rows]
+        self.index = {place_id: i for i, place_id in enumerate(self.place_ids.tolist())}
+
+        self.category_vocab, self.categories = self._multi_hot([row[2] or [] for row in rows])
+        self.tag_vocab, self.tags = self._multi_hot([row[3] or [] for row in rows])
+
+    @staticmethod
+    def _multi_hot(values):
+        vocab = {}
+        cols, row_idx = [], []
+        for i, items in enumerate(values):
+            for item in set(items):
+                cols.append(vocab.setdefault(item, len(vocab)))
+                row_idx.append(i)
+        matrix = np.zeros((len(values), len(vocab)), dtype=np.float32)
+        matrix[row_idx, cols] = 1.0
+        return vocab, matrix
+
+
+_catalogue = None
+_catalogue_version = None
+_catalogue_lock = threading.Lock()
+
+
+def get_catalogue():
+    """
+    Process içinde önbelleklenen katalog
+    Mekan sayısı veya son güncelleme zamanı değişince yeniden kurulur
+    """
+    global _catalogue, _catalogue_version
+
+    version = tuple(Place.objects.aggregate(count=Count('id'), updated=Max('updated_at')).values())
+    with _catalogue_lock:
+        if _catalogue is None or _catalogue_version != version:
+            rows = list(Place.objects.order_by('id').values_list('id', 'name', 'categories', 'tags'))
+            _catalogue = Catalogue(rows)
+            _catalogue_version = version
+        return _catalogue
+
+
+def _weight_matrix(profiles, member_ids, vocab, field):
+    """Katılımcı x sözlük ağırlık matrisi (UserTasteProfile ağırlıklarından)"""
+    matrix = np.zeros((len(member_ids), len(vocab)), dtype=np.float32)
+    for i, user_id in enumerate(member_ids):
+        profile = profiles.get(user_id)
+        if profile is None:
+            continue
+        for key, weight in (getattr(profile, field) or {}).items():
+            col = vocab.get(key)
+            if col is not None:
+                matrix[i, col] = weight
+    return matrix
+
+
+def load_group_signals(plan, member_ids):
+    """Katılımcıların zevk profilleri, swipe geçmişleri ve plan oyları (3 sorgu)"""
+    profiles = {p.user_id: p for p in UserTasteProfile.objects.filter(user_id__in=member_ids)}
+    swipes = list(PlacePreference.objects.filter(user_id__in=member_ids).values_list('user_id', 'place_id', 'action'))
+    votes = list(PlanVote.objects.filter(plan=plan).values_list('user_id', 'place_id', 'vote_type'))
+    return profiles, swipes, votes
+
+
+def score_members(catalogue, member_ids, profiles, swipes):
+    """
+    Katılımcı x mekan skor matrisi (0-1) ve dislike maskesi
+
+    Returns:
+        tuple: (scores, disliked) - disliked: herhangi bir katılımcının beğenmediği mekanlar
+    """
+    category_weights = _weight_matrix(profiles, member_ids, catalogue.category_vocab, 'category_weights')
+    atmosphere_weights = _weight_matrix(profiles, member_ids, catalogue.tag_vocab, 'atmosphere_weights')
+
+    scores = category_weights @ catalogue.categories.T + atmosphere_weights @ catalogue.tags.T
+
+    # Her katılımcının en uygun mekanı 1.0 olacak şekilde normalize et
+    row_max = scores.max(axis=1, keepdims=True) if scores.size else scores
+    has_profile = (row_max > 0).ravel()
+    scores = np.divide(scores, row_max, out=np.zeros_like(scores), where=row_max > 0)
+    scores[~has_profile] = NEUTRAL_SCORE
+
+    disliked = np.zeros(len(catalogue.place_ids), dtype=bool)
+    member_index = {user_id: i for i, user_id in enumerate(member_ids)}
+    for user_id, place_id, action in swipes:
+        col = catalogue.index.get(place_id)
+        if col is None:
+            continue
+        if action == 'dislike':
+            disliked[col] = True
+        else:
+            row = member_index[user_id]
+            scores[row, col] = max(scores[row, col], SWIPE_SCORES.get(action, 0.0))
+
+    return scores, disliked
+
+
+def approval_matrix(scores, catalogue, member_ids, votes):
+    """Zevk skorundan onay (1 / 0.5 / 0); plandaki açık oylar çıkarımın yerine geçer"""
+    approvals = np.where(scores >= APPROVE_THRESHOLD, 1.0,
+                         np.where(scores >= MAYBE_THRESHOLD, 0.5, 0.0)).astype(np.float32)
+
+    member_index = {user_id: i for i, user_id in enumerate(member_ids)}
+    for user_id, place_id, vote_type in votes:
+        row = member_index.get(user_id)
+        col = catalogue.index.get(place_id)
+        if row is not None and col is not None:
+            approvals[row, col] = VOTE_APPROVAL.get(vote_type, 0.0)
+    return approvals
+
+
+def recommend_for_group(plan, strategy='average', limit=10, exclude_suggested=True):
+    """
+    Plan katılımcıları için ortak mekan önerileri
+
+    Args:
+        plan: GroupPlan objesi
+        strategy: 'average' | 'least_misery' | 'approval'
+        limit: döndürülecek mekan sayısı
+        exclude_suggested: planda zaten önerilmiş mekanları çıkar
+
+    Returns:
+        list: [{'place_id', 'name', 'score', 'support'}] skora göre sıralı
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f'Geçersiz strateji: {strategy}')
+
+    member_ids = list(PlanParticipant.objects.filter(
+        plan=plan, has_accepted=True
+    ).values_list('user_id', flat=True))
+    if plan.creator_id not in member_ids:
+        member_ids.append(plan.creator_id)
+
+    catalogue = get_catalogue()
+    if not len(catalogue.place_ids):
+        return []
+
+    profiles, swipes, votes = load_group_signals(plan, member_ids)
+    scores, disliked = score_members(catalogue, member_ids, profiles, swipes)
+    approvals = approval_matrix(scores, catalogue, member_ids, votes)
+
+    if strategy == 'average':
+        group_scores = scores.mean(axis=0)
+    elif strategy == 'least_misery':
+        group_scores = scores.min(axis=0)
+    else:
+        group_scores = approvals.mean(axis=0)
+
+    # Kaç katılımcı onaylıyor (açıklama için)
+    support = (approvals >= 1.0).sum(axis=0)
+
+    candidates = ~disliked
+    if exclude_suggested:
+        for place_id in plan.place_options.values_list('place_id', flat=True):
+            col = catalogue.index.get(place_id)
+            if col is not None:
+                candidates[col] = False
+
+    candidate_idx = np.flatnonzero(candidates)
+    if not len(candidate_idx):
+        return []
+
+    # Tam sıralama yerine argpartition ile ilk `limit` mekan
+    top_k = max(1, min(limit, len(candidate_idx)))
+    top = candidate_idx[np.argpartition(-group_scores[candidate_idx], top_k - 1)[:top_k]]
+    top = top[np.lexsort((catalogue.place_ids[top], -group_scores[top]))]
+
+    return [
+        {
+            'place_id': int(catalogue.place_ids[i]),
+            'name': catalogue.names[i],
+            'score': round(float(group_scores[i]), 3),
+            'support': int(support[i]),
+        }
+        for i in top
+    ]
@@ -0,0 +1,37 @@
+"""
+Oylama süresi dolmuş grup planlarını toplu kesinleştirir (cron ile çalıştırılır)
+Usage: python manage.py finalize_expired_plans [--batch-size 500] [--cancel-empty]
+"""
+from django.core.management.base import BaseCommand
+
+from social.plan_finalization import finalize_expired_plans
+
+
+class Command(BaseCommand):
+    help = 'Finalize voting plans whose deadline has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tek transaction\'da işlenen plan sayısı (default: 500)'
+        )
+        parser.add_argument(
+            '--cancel-empty',
+            action='store_true',
+            help='Geçerli oyu olmayan süresi dolmuş planları iptal et'
+        )
+
+    def handle(self, *args, **options):
+        result = finalize_expired_plans(
+            batch_size=options['batch_size'],
+            cancel_empty=options['cancel_empty']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {result["finalized"]} plan kesinleştirildi, '
+                f'{result["cancelled"]} plan iptal edildi, '
+                f'{result["skipped"]} plan oysuz bırakıldı'
+            )
+        )
@@ -0,0 +1,35 @@
+import uuid
+
+from django.db import migrations, models
+
+import social.models
+
+
+def backfill_ical_uids(apps, schema_editor):
+    """UID'i olmayan mevcut planlara toplu UID ata"""
+    GroupPlan = apps.get_model("social", "GroupPlan")
+    plans = list(GroupPlan.objects.filter(ical_uid="").only("id"))
+    for plan in plans:
+        plan.ical_uid = str(uuid.uuid4())
+    GroupPlan.objects.bulk_update(plans, ["ical_uid"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0004_friendgroup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="groupplan",
+            name="ical_uid",
+            field=models.CharField(
+                blank=True,
+                default=social.models.generate_ical_uid,
+                help_text="iCal UID",
+                max_length=200,
+            ),
+        ),
+        migrations.RunPython(backfill_ical_uids, migrations.RunPython.noop),
+    ]
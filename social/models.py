@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
@@ -36,6 +38,24 @@ class Friendship(models.Model):
         return f"{self.requester.username} -> {self.receiver.username} ({self.status})"
 
 
+class FriendGroup(models.Model):
+    """Kayıtlı arkadaş grubu - Planlara tek seferde davet için"""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friend_groups')
+    name = models.CharField(max_length=100, help_text="Grup adı: 'Ofis Ekibi'")
+    members = models.ManyToManyField(User, related_name='member_of_friend_groups', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='unique_friend_group_name')
+        ]
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} - {self.owner.username}"
+
+
 class UserScore(models.Model):
     """Liderlik Tablosu için Kullanıcı Puanı"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='score')
@@ -60,6 +80,11 @@ class UserScore(models.Model):
         return points
 
 
+def generate_ical_uid():
+    """Plan oluşturulurken atanan kalıcı iCal UID'i (bulk_create'te de çalışır)"""
+    return str(uuid.uuid4())
+
+
 class GroupPlan(models.Model):
     """Grup Planlama - Arkadaşlarla birlikte mekan seçimi"""
     STATUS_CHOICES = [
@@ -85,7 +110,7 @@ class GroupPlan(models.Model):
     
     # Takvim entegrasyonu
     calendar_event_id = models.CharField(max_length=200, blank=True, help_text="Google Calendar event ID")
-    ical_uid = models.CharField(max_length=200, blank=True, help_text="iCal UID")
+    ical_uid = models.CharField(max_length=200, blank=True, default=generate_ical_uid, help_text="iCal UID")
     
     # Grup içi hızlı anket soruları (en fazla 3 soru önerilir)
     poll_questions = models.JSONField(
@@ -127,15 +152,12 @@ class GroupPlan(models.Model):
         return self.votes.count()
     
     def get_winner_place(self):
-        """En çok oy alan mekanı döndürür"""
-        from django.db.models import Count
-        votes = self.votes.values('place').annotate(
-            vote_count=Count('id')
-        ).order_by('-vote_count')
+        """Ağırlıklı oylamada (evet=1, belki=0.5, hayır=0) kazanan mekanı döndürür"""
+        from .plan_finalization import pick_winners
+        winner = pick_winners([self.id]).get(self.id)
         
-        if votes:
-            winner_place_id = votes[0]['place']
-            return Place.objects.get(id=winner_place_id)
+        if winner:
+            return Place.objects.filter(id=winner['place_id']).first()
         return None
 
 
@@ -227,3 +249,13 @@ class PlanPlaceOption(models.Model):
     def vote_count(self):
         """Bu mekana verilen oy sayısı"""
         return self.place.plan_votes.filter(plan=self.plan, vote_type='yes').count()
+
+
+class CalendarFeedKey(models.Model):
+    """Takvim akışı adresindeki kullanıcıya özel sır - yenilenince eski adresler geçersiz olur"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed_key')
+    key = models.CharField(max_length=64)
+    rotated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} takvim anahtarı"
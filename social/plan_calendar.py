@@ -0,0 +1,235 @@
+"""
+Grup Planı Takvim Akışı (iCalendar, RFC 5545)
+- Kullanıcıya özel imzalı adres ile abone olunabilen takvim akışı:
+  kesinleşmiş ve yaklaşan tüm planlar tek VCALENDAR içinde akıtılır
+  (StreamingHttpResponse + generator, planlar parça parça okunur)
+- Adres kullanıcının CalendarFeedKey sırrını içerir; sır yenilenince
+  (rotate_feed_key) eski adresler 404 döner
+- ETag/Last-Modified plan sayısı ve en son updated_at'ten hesaplanır;
+  birkaç dakikada bir yoklayan takvim istemcileri değişiklik yoksa 304 alır
+- Satırlar 75 oktette katlanır, metin alanları kaçışlanır
+"""
+import hashlib
+import secrets
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotFound, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+
+from .models import CalendarFeedKey, GroupPlan, PlanParticipant
+
+
+FEED_SIGNING_SALT = 'social.plan_calendar_feed'
+PRODID = '-//MekanKeşif//Grup Planlama//TR'
+# Planlanan tarihte etkinlik süresi bilinmediği için varsayılan süre
+DEFAULT_EVENT_DURATION = timedelta(hours=2)
+# Kesinleşmiş geçmiş planlar bu kadar geriye kadar akışta kalır
+PAST_WINDOW = timedelta(days=90)
+# Akış sırasında tek seferde okunan plan sayısı
+FEED_CHUNK_SIZE = 200
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    """TEXT değerlerinde \\ ; , ve satır sonlarını kaçışlar"""
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def fold_line(line):
+    """
+    Satırı 75 oktetlik parçalara katlar (devam satırları boşlukla başlar)
+    UTF-8 karakterleri ortadan bölünmez
+    """
+    if len(line.encode('utf-8')) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+
+    parts = []
+    current, size = [], 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            current, size = [], 0
+            # Devam satırının baştaki boşluğu da 75 oktete dahil
+            limit = MAX_LINE_OCTETS - 1
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_utc(dt):
+    """YYYYMMDDTHHMMSSZ (UTC)"""
+    return dt.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def plan_event_lines(plan, stamp):
+    """Tek plan için VEVENT satırları (selected_place önceden yüklenmiş olmalı)"""
+    start = plan.planned_date or plan.created_at
+    place = plan.selected_place
+
+    yield 'BEGIN:VEVENT'
+    yield f'UID:{plan.ical_uid or f"plan-{plan.id}"}'
+    yield f'DTSTAMP:{format_utc(stamp)}'
+    yield f'DTSTART:{format_utc(start)}'
+    yield f'DTEND:{format_utc(start + DEFAULT_EVENT_DURATION)}'
+    yield f'LAST-MODIFIED:{format_utc(plan.updated_at)}'
+    yield f'SUMMARY:{escape_text(plan.title)}'
+    if plan.description:
+        yield f'DESCRIPTION:{escape_text(plan.description)}'
+    if place is not None:
+        location = ', '.join(part for part in (place.name, place.address) if part)
+        yield f'LOCATION:{escape_text(location)}'
+    yield f"STATUS:{'CONFIRMED' if plan.status == 'finalized' else 'TENTATIVE'}"
+    # Güncellenen etkinliğin istemcide yenilenmesi için artan sıra numarası
+    yield f'SEQUENCE:{int(plan.updated_at.timestamp())}'
+    yield 'END:VEVENT'
+
+
+def iter_calendar(plans, name=None):
+    """
+    Planlardan tek VCALENDAR üretir (katlanmış, CRLF ile biten satırlar)
+
+    Args:
+        plans: GroupPlan iterable (iterator() ile verilebilir)
+        name: takvim adı (X-WR-CALNAME)
+    """
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+    ]
+    if name:
+        header.append(f'X-WR-CALNAME:{escape_text(name)}')
+    for line in header:
+        yield fold_line(line)
+
+    stamp = timezone.now()
+    for plan in plans:
+        yield ''.join(fold_line(line) for line in plan_event_lines(plan, stamp))
+
+    yield fold_line('END:VCALENDAR')
+
+
+def calendar_plans(user_id, now=None):
+    """
+    Kullanıcının takvimindeki planlar: kesinleşmiş (son 90 gün ve sonrası)
+    ve planlanan tarihi gelmemiş taslak/oylamadaki planlar
+    """
+    now = now or timezone.now()
+    member_plan_ids = PlanParticipant.objects.filter(
+        user_id=user_id, has_declined=False
+    ).values('plan_id')
+
+    return GroupPlan.objects.filter(
+        Q(creator_id=user_id) | Q(id__in=member_plan_ids)
+    ).filter(
+        Q(status='finalized') & (Q(planned_date__isnull=True) | Q(planned_date__gte=now - PAST_WINDOW)) |
+        Q(status__in=['draft', 'voting'], planned_date__gte=now)
+    )
+
+
+def _new_feed_key():
+    return secrets.token_urlsafe(24)
+
+
+def make_feed_token(user):
+    """Kullanıcının güncel sırrını içeren imzalı akış anahtarı (sır yoksa oluşturulur)"""
+    feed_key, _ = CalendarFeedKey.objects.get_or_create(user=user, defaults={'key': _new_feed_key()})
+    # Zaman damgasız imza: abonelik adresi sır yenilenene kadar aynı kalır
+    return signing.Signer(salt=FEED_SIGNING_SALT).sign_object([user.id, feed_key.key], compress=True)
+
+
+def rotate_feed_key(user):
+    """Sırrı yeniler: daha önce verilen tüm akış adresleri geçersiz olur"""
+    CalendarFeedKey.objects.update_or_create(user=user, defaults={'key': _new_feed_key()})
+
+
+def resolve_feed_token(token):
+    """Anahtar geçerli ve sırrı güncelse user_id, değilse None"""
+    try:
+        user_id, key = signing.Signer(salt=FEED_SIGNING_SALT).unsign_object(token)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    current = CalendarFeedKey.objects.filter(user_id=user_id).values_list('key', flat=True).first()
+    if current is None or not secrets.compare_digest(current, str(key)):
+        return None
+    return user_id
+
+
+def feed_url(request, user):
+    return request.build_absolute_uri(
+        reverse('social_api:plan_calendar_feed', kwargs={'token': make_feed_token(user)})
+    )
+
+
+def _feed_state(request, token):
+    """
+    Anahtarı çözer ve (user_id, plan sayısı, en son updated_at) değerini tek
+    aggregate sorgusuyla hesaplar; ETag ve Last-Modified aynı sonucu kullanır
+    """
+    if not hasattr(request, '_calendar_feed_state'):
+        user_id = resolve_feed_token(token)
+        if user_id is None:
+            state = None
+        else:
+            aggregate = calendar_plans(user_id).aggregate(count=Count('id'), last_modified=Max('updated_at'))
+            state = (user_id, aggregate['count'], aggregate['last_modified'])
+        request._calendar_feed_state = state
+    return request._calendar_feed_state
+
+
+def _feed_etag(request, token):
+    state = _feed_state(request, token)
+    if state is None:
+        return None
+    user_id, count, last_modified = state
+    version = f'{user_id}:{count}:{last_modified.isoformat() if last_modified else ""}'
+    return hashlib.sha1(version.encode()).hexdigest()
+
+
+def _feed_last_modified(request, token):
+    state = _feed_state(request, token)
+    return state[2] if state else None
+
+
+@require_GET
+@condition(etag_func=_feed_etag, last_modified_func=_feed_last_modified)
+def plan_calendar_feed(request, token):
+    """
+    Abone olunabilen plan takvimi
+    GET /api/social/calendar/<token>.ics
+    Oturum gerektirmez; anahtar kullanıcıya özel imzalı değerdir
+    (POST /api/social/calendar/feed-url/reset/ ile geçersiz kılınır)
+    """
+    state = _feed_state(request, token)
+    if state is None:
+        return HttpResponseNotFound('Takvim bulunamadı', content_type='text/plain; charset=utf-8')
+
+    plans = (
+        calendar_plans(state[0])
+        .select_related('selected_place')
+        .order_by('planned_date', 'id')
+        .iterator(chunk_size=FEED_CHUNK_SIZE)
+    )
+    response = StreamingHttpResponse(
+        iter_calendar(plans, name='MekanKeşif Planlarım'),
+        content_type='text/calendar; charset=utf-8'
+    )
+    response['Cache-Control'] = 'private, no-cache'
+    return response
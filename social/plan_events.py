@@ -0,0 +1,180 @@
+"""
+Grup Planı Canlı Olayları
+Process içi pub/sub: oy, davet yanıtı, mekan önerisi ve kesinleştirme olayları
+plan bazında yayınlanır; SSE endpoint'i (plan_events_stream) aboneleri besler.
+
+Yayıncılar senkron view'lardır (thread), aboneler ASGI event loop'unda çalışan
+async generator'lardır; olaylar loop.call_soon_threadsafe ile kuyruklara aktarılır.
+Boşta bekleyen izleyici sadece bir asyncio.Queue maliyetindedir.
+
+Not: Bus process içidir; birden fazla worker varsa her izleyici sadece bağlı
+olduğu worker'da üretilen olayları görür.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .models import GroupPlan, PlanParticipant
+
+
+# Yeniden bağlanan istemciler için (Last-Event-ID) plan başına tutulan olay sayısı
+REPLAY_BUFFER_SIZE = 50
+# Yavaş istemci kuyruğu dolarsa yeni olaylar o istemci için düşer
+SUBSCRIBER_QUEUE_SIZE = 100
+# Proxy'lerin bağlantıyı kapatmaması için yorum satırı aralığı (saniye)
+HEARTBEAT_INTERVAL = 15
+# Akış bu süreden sonra kapanır; istemci Last-Event-ID ile yeniden bağlanır.
+# Kopan ama yazma hatası almayan bağlantılar da en geç bu sürede temizlenir
+STREAM_MAX_AGE = 300
+
+
+class PlanEventBus:
+    """Plan bazlı process içi olay dağıtıcısı"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._history = {}
+        self._sequence = itertools.count(1)
+
+    def publish(self, plan_id, event_type, data):
+        """Olayı planın tüm abonelerine iletir (thread-safe)"""
+        with self._lock:
+            event = {'id': next(self._sequence), 'type': event_type, 'data': data}
+            self._history.setdefault(plan_id, deque(maxlen=REPLAY_BUFFER_SIZE)).append(event)
+            subscribers = list(self._subscribers.get(plan_id, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Loop kapanmış, abonelik generator kapanınca temizlenir
+                pass
+        return event
+
+    def subscribe(self, plan_id, last_event_id=None):
+        """
+        Çalışan event loop için abone kuyruğu oluşturur
+        last_event_id verilirse kaçırılan olaylar kuyruğa önceden eklenir
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscriber = (loop, queue)
+
+        with self._lock:
+            self._subscribers.setdefault(plan_id, set()).add(subscriber)
+            if last_event_id is not None:
+                for event in self._history.get(plan_id, ()):
+                    if event['id'] > last_event_id:
+                        _offer(queue, event)
+        return subscriber
+
+    def unsubscribe(self, plan_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(plan_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[plan_id]
+
+    def subscriber_count(self, plan_id=None):
+        with self._lock:
+            if plan_id is not None:
+                return len(self._subscribers.get(plan_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+plan_event_bus = PlanEventBus()
+
+
+def publish_plan_event(plan_id, event_type, data):
+    """Olayı transaction commit edildikten sonra yayınlar"""
+    transaction.on_commit(lambda: plan_event_bus.publish(plan_id, event_type, data))
+
+
+def format_sse(event):
+    payload = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+async def _event_stream(plan_id, last_event_id):
+    subscriber = plan_event_bus.subscribe(plan_id, last_event_id)
+    _, queue = subscriber
+    try:
+        # İstemci koptuğunda yeniden bağlanma süresi (ms)
+        yield 'retry: 3000\n\n'
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STREAM_MAX_AGE
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(HEARTBEAT_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_sse(event)
+    finally:
+        plan_event_bus.unsubscribe(plan_id, subscriber)
+
+
+def _check_plan_access(request, plan_id):
+    """
+    Returns:
+        tuple: (status_code, error) - erişim varsa (200, None)
+    """
+    if not request.user.is_authenticated:
+        return 403, 'Kimlik doğrulama bilgileri sağlanmadı'
+
+    plan = GroupPlan.objects.filter(id=plan_id).values('creator_id').first()
+    if plan is None:
+        return 404, 'Plan bulunamadı'
+
+    if plan['creator_id'] != request.user.id and not PlanParticipant.objects.filter(
+        plan_id=plan_id, user=request.user
+    ).exists():
+        return 403, 'Bu plana erişim yetkiniz yok'
+
+    return 200, None
+
+
+async def plan_events_stream(request, plan_id):
+    """
+    Plan için canlı olay akışı (Server-Sent Events)
+    GET /api/social/plans/<plan_id>/events/
+
+    Olay türleri: vote, participant, place_suggested, finalized
+    Bağlantı STREAM_MAX_AGE saniye sonra kapanır; EventSource kaldığı yerden
+    (Last-Event-ID) yeniden bağlanır
+    """
+    status_code, error = await sync_to_async(_check_plan_access)(request, plan_id)
+    if error:
+        return JsonResponse({'success': False, 'error': error}, status=status_code)
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        _event_stream(plan_id, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
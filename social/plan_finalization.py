@@ -0,0 +1,136 @@
+"""
+Plan Kesinleştirme Motoru
+- Oylar ağırlıklı sayılır (evet=1, belki=0.5, hayır=0) ve eşitlik kuralları
+  dahil tek sorguda sıralanır
+- Kesinleştirme plan satırı kilitlenerek (select_for_update) yapılır;
+  oy verme de aynı kilidi aldığı için kesinleşen plana oy yazılamaz
+- Süresi dolan planlar finalize_expired_plans komutu ile toplu kesinleştirilir
+"""
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Min, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import GroupPlan, PlanVote
+from .plan_events import publish_plan_event
+
+
+VOTE_WEIGHTS = {'yes': 1.0, 'maybe': 0.5, 'no': 0.0}
+
+FINALIZABLE_STATUSES = ('draft', 'voting')
+
+
+def weighted_tallies(plan_ids):
+    """
+    Planların mekan bazlı ağırlıklı oy sıralaması (tek sorgu)
+    Sıralama: ağırlıklı skor, evet sayısı, ilk oy zamanı (erken olan), mekan ID
+    """
+    score = Sum(Case(
+        *[When(vote_type=vote_type, then=Value(weight)) for vote_type, weight in VOTE_WEIGHTS.items()],
+        default=Value(0.0),
+        output_field=FloatField()
+    ))
+    return (
+        PlanVote.objects
+        .filter(plan_id__in=plan_ids)
+        .values('plan_id', 'place_id')
+        .annotate(
+            score=score,
+            yes_count=Count('id', filter=Q(vote_type='yes')),
+            first_vote=Min('created_at'),
+        )
+        .order_by('plan_id', '-score', '-yes_count', 'first_vote', 'place_id')
+    )
+
+
+def pick_winners(plan_ids):
+    """
+    Returns:
+        dict: {plan_id: {'place_id', 'score', 'yes_count'}} - sadece skoru pozitif olan kazananlar
+    """
+    winners = {}
+    for row in weighted_tallies(plan_ids):
+        if row['plan_id'] not in winners and row['score'] > 0:
+            winners[row['plan_id']] = row
+    return winners
+
+
+def finalize_plan(plan_id):
+    """
+    Planı kilit altında kesinleştirir
+
+    Returns:
+        tuple: (plan, winner) - winner None ise kesinleştirilemedi (oy yok
+        veya plan kesinleştirilebilir durumda değil; plan.status'a bakın)
+    """
+    with transaction.atomic():
+        plan = GroupPlan.objects.select_for_update().get(id=plan_id)
+        if plan.status not in FINALIZABLE_STATUSES:
+            return plan, None
+
+        winner = pick_winners([plan.id]).get(plan.id)
+        if winner is None:
+            return plan, None
+
+        plan.selected_place_id = winner['place_id']
+        plan.status = 'finalized'
+        plan.save(update_fields=['selected_place', 'status', 'updated_at'])
+
+        publish_plan_event(plan.id, 'finalized', {
+            'place_id': winner['place_id'],
+            'score': winner['score'],
+        })
+
+    return plan, winner
+
+
+def finalize_expired_plans(batch_size=500, cancel_empty=False, now=None):
+    """
+    Oylama süresi dolmuş planları partiler halinde kesinleştirir
+    Her parti: kilitli okuma + tek tally sorgusu + toplu güncelleme
+
+    Args:
+        cancel_empty: hiç geçerli oyu olmayan planları iptal et
+
+    Returns:
+        dict: {'finalized': int, 'cancelled': int, 'skipped': int}
+    """
+    now = now or timezone.now()
+    result = {'finalized': 0, 'cancelled': 0, 'skipped': 0}
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            # Başka bir process'in kilitlediği planlar bu turda atlanır
+            plans = list(
+                GroupPlan.objects.select_for_update(skip_locked=True)
+                .filter(status='voting', deadline__lt=now, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not plans:
+                break
+            last_id = plans[-1].id
+
+            winners = pick_winners([plan.id for plan in plans])
+            to_update = []
+            for plan in plans:
+                winner = winners.get(plan.id)
+                if winner is not None:
+                    plan.selected_place_id = winner['place_id']
+                    plan.status = 'finalized'
+                    result['finalized'] += 1
+                    publish_plan_event(plan.id, 'finalized', {
+                        'place_id': winner['place_id'],
+                        'score': winner['score'],
+                    })
+                elif cancel_empty:
+                    plan.status = 'cancelled'
+                    result['cancelled'] += 1
+                else:
+                    result['skipped'] += 1
+                    continue
+                plan.updated_at = now
+                to_update.append(plan)
+
+            GroupPlan.objects.bulk_update(to_update, ['selected_place', 'status', 'updated_at'])
+
+    return result
@@ -0,0 +1,76 @@
+"""
+Toplu Plan Daveti
+Davet edilecekler (ID listesi, kayıtlı arkadaş grubu veya tüm arkadaşlar)
+arkadaşlık kümesine karşı tek sorguda doğrulanır, katılımcılar tek
+bulk_create ile eklenir. Zaten planda olanlar "existing" olarak döner.
+"""
+from django.db.models import Exists, OuterRef, Q
+
+from accounts.models import User
+from .models import Friendship, FriendGroup, PlanParticipant
+
+
+def friends_of(user):
+    """Kullanıcının kabul edilmiş arkadaşları (tek sorgu, satır başına join yok)"""
+    accepted = Friendship.objects.filter(status='accepted')
+    return User.objects.filter(
+        Exists(accepted.filter(requester=user, receiver=OuterRef('pk'))) |
+        Exists(accepted.filter(receiver=user, requester=OuterRef('pk')))
+    )
+
+
+def resolve_invitees(user, user_ids=None, group_id=None, all_friends=False):
+    """
+    Davet edilecek arkadaşları tek sorguda çözer
+
+    Args:
+        user_ids: davet edilecek kullanıcı ID'leri
+        group_id: kullanıcının kayıtlı arkadaş grubu
+        all_friends: True ise tüm arkadaş listesi
+
+    Returns:
+        tuple: (friends, rejected_ids) - friends: [{'id', 'username'}],
+        rejected_ids: arkadaş olmayan/bulunamayan ID'ler
+
+    Raises:
+        FriendGroup.DoesNotExist: grup yoksa veya kullanıcıya ait değilse
+    """
+    friends = friends_of(user)
+    selection = Q()
+    if not all_friends:
+        selection = Q(pk__in=[])
+        if user_ids:
+            selection |= Q(pk__in=user_ids)
+        if group_id is not None:
+            group = FriendGroup.objects.get(id=group_id, owner=user)
+            selection |= Q(pk__in=group.members.values('pk'))
+
+    rows = list(friends.filter(selection).order_by('id').values('id', 'username'))
+    found = {row['id'] for row in rows}
+    rejected_ids = [user_id for user_id in (user_ids or []) if user_id not in found]
+    return rows, rejected_ids
+
+
+def invite_to_plan(plan, invitees):
+    """
+    Katılımcıları toplu ekler; aynı anda eklenen kayıtlar ignore_conflicts ile atlanır
+
+    Args:
+        invitees: resolve_invitees'ten dönen [{'id', 'username'}]
+
+    Returns:
+        dict: {'created': [...], 'existing': [...]} - [{'id', 'username'}]
+    """
+    invitee_ids = [row['id'] for row in invitees]
+    existing_ids = set(
+        PlanParticipant.objects.filter(plan=plan, user_id__in=invitee_ids).values_list('user_id', flat=True)
+    )
+
+    created = [row for row in invitees if row['id'] not in existing_ids]
+    existing = [row for row in invitees if row['id'] in existing_ids]
+
+    PlanParticipant.objects.bulk_create(
+        [PlanParticipant(plan=plan, user_id=row['id'], is_invited=True) for row in created],
+        ignore_conflicts=True
+    )
+    return {'created': created, 'existing': existing}
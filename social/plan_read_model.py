@@ -0,0 +1,64 @@
+"""
+Grup Planı Okuma Modeli
+Plan detayını sabit sayıda sorgu ile yükler ve serialize eder:
+plan + katılımcılar + oylar + seçenekler (prefetch), mekan istatistikleri ve
+seçenek bazlı oy dağılımı (gruplanmış aggregate)
+"""
+from django.db.models import Count, Prefetch
+from places.serializers import build_place_stats
+from .models import GroupPlan, PlanParticipant, PlanVote, PlanPlaceOption
+
+
+def get_plan_with_relations(plan_id):
+    """
+    Planı ilişkileriyle birlikte yükler (1 + 3 sorgu)
+    Bulunamazsa GroupPlan.DoesNotExist fırlatır
+    """
+    return GroupPlan.objects.select_related('creator', 'selected_place').prefetch_related(
+        Prefetch('participants', queryset=PlanParticipant.objects.select_related('user')),
+        Prefetch('votes', queryset=PlanVote.objects.select_related('user', 'place')),
+        Prefetch('place_options', queryset=PlanPlaceOption.objects.select_related('place', 'suggested_by')),
+    ).get(id=plan_id)
+
+
+def get_vote_tallies(plan_id):
+    """
+    Mekan bazında oy dağılımı (tek gruplanmış sorgu)
+    
+    Returns:
+        dict: {place_id: {'yes': 3, 'maybe': 1, 'no': 0}}
+    """
+    tallies = {}
+    rows = PlanVote.objects.filter(plan_id=plan_id).values('place_id', 'vote_type').annotate(
+        total=Count('id')
+    ).order_by()
+    for row in rows:
+        tally = tallies.setdefault(row['place_id'], {'yes': 0, 'maybe': 0, 'no': 0})
+        tally[row['vote_type']] = row['total']
+    return tallies
+
+
+def is_plan_member(plan, user):
+    """Prefetch edilmiş katılımcılar üzerinden erişim kontrolü (sorgusuz)"""
+    if plan.creator_id == user.id:
+        return True
+    return any(participant.user_id == user.id for participant in plan.participants.all())
+
+
+def build_plan_serializer_context(plan):
+    """GroupPlanSerializer için önceden hesaplanmış context"""
+    place_ids = {vote.place_id for vote in plan.votes.all()}
+    place_ids.update(option.place_id for option in plan.place_options.all())
+    if plan.selected_place_id:
+        place_ids.add(plan.selected_place_id)
+    
+    return {
+        'place_stats': build_place_stats(place_ids),
+        'vote_tallies': get_vote_tallies(plan.id),
+    }
+
+
+def serialize_plan_detail(plan):
+    """Prefetch edilmiş planı GroupPlanSerializer ile serialize eder"""
+    from .serializers import GroupPlanSerializer
+    return GroupPlanSerializer(plan, context=build_plan_serializer_context(plan)).data
@@ -64,12 +64,19 @@ class PlanPlaceOptionSerializer(serializers.ModelSerializer):
     """Plan mekan seçeneği serializer"""
     place_data = PlaceSerializer(source='place', read_only=True)
     suggested_by_username = serializers.CharField(source='suggested_by.username', read_only=True)
-    vote_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.SerializerMethodField()
     
     class Meta:
         model = PlanPlaceOption
         fields = ['id', 'place', 'place_data', 'suggested_by', 'suggested_by_username',
                   'suggestion_note', 'vote_count', 'created_at']
+    
+    def get_vote_count(self, obj):
+        """Evet oyu sayısı - context'te toplu hesaplanmış oy dağılımı varsa onu kullan"""
+        vote_tallies = self.context.get('vote_tallies')
+        if vote_tallies is not None:
+            return vote_tallies.get(obj.place_id, {}).get('yes', 0)
+        return obj.vote_count
 
 
 class GroupPlanSerializer(serializers.ModelSerializer):
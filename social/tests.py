@@ -1,3 +1,534 @@
-from django.test import TestCase
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from accounts.models import User, UserTasteProfile
+from places.models import Place, PlacePreference
+from visits.models import Visit
+from . import group_recommender, plan_events, plan_finalization
+from .group_recommender import STRATEGIES, recommend_for_group
+from .plan_calendar import make_feed_token
+from .plan_finalization import finalize_expired_plans, finalize_plan
+from .plan_events import plan_event_bus
+from .models import Friendship, GroupPlan, PlanParticipant, PlanVote, PlanPlaceOption
+
+
+class GroupPlanDetailQueryCountTests(TestCase):
+    """Plan detay endpoint'i plan büyüklüğünden bağımsız sabit sayıda sorgu atmalı"""
+
+    def create_plan(self, creator, participant_count, option_count):
+        plan = GroupPlan.objects.create(creator=creator, title='Cumartesi Brunch', status='voting')
+        users = [creator] + [
+            User.objects.create_user(
+                username=f'{creator.username}_p{i}',
+                email=f'{creator.username}_p{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(participant_count - 1)
+        ]
+        for user in users:
+            PlanParticipant.objects.create(plan=plan, user=user, has_accepted=True)
+
+        for i in range(option_count):
+            place = Place.objects.create(
+                name=f'{plan.id} Mekan {i}', address='Moda', city='İstanbul',
+                categories=['kafe'], tags=['sessiz']
+            )
+            PlanPlaceOption.objects.create(plan=plan, place=place, suggested_by=creator)
+            for j, user in enumerate(users):
+                Visit.objects.create(user=user, place=place, rating=4, comment=f'Yorum {j}')
+                PlanVote.objects.create(
+                    plan=plan, user=user, place=place,
+                    vote_type=['yes', 'maybe', 'no'][j % 3]
+                )
+        return plan
+
+    def count_detail_queries(self, plan, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/social/plans/{plan.id}/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()['plan']
+
+    def test_query_count_is_constant(self):
+        small_creator = User.objects.create_user(username='small', email='small@example.com', password='testpass123')
+        large_creator = User.objects.create_user(username='large', email='large@example.com', password='testpass123')
+        small_plan = self.create_plan(small_creator, participant_count=2, option_count=1)
+        large_plan = self.create_plan(large_creator, participant_count=10, option_count=5)
+
+        small_count, _ = self.count_detail_queries(small_plan, small_creator)
+        large_count, data = self.count_detail_queries(large_plan, large_creator)
+
+        self.assertEqual(small_count, large_count)
+        # session + kullanıcı + plan + 3 prefetch + mekan istatistikleri (2) + oy dağılımı
+        self.assertLessEqual(large_count, 9)
+
+        self.assertEqual(data['total_participants'], 10)
+        self.assertEqual(data['total_votes'], 50)
+        self.assertEqual(len(data['place_options']), 5)
+        for option in data['place_options']:
+            # 10 katılımcıdan j % 3 == 0 olanlar evet oyu verdi
+            self.assertEqual(option['vote_count'], 4)
+            self.assertEqual(option['place_data']['total_visits'], 10)
+            self.assertEqual(option['place_data']['average_rating'], 4.0)
+            self.assertEqual(len(option['place_data']['recent_comments']), 3)
+
+    def test_non_member_is_forbidden(self):
+        creator = User.objects.create_user(username='owner', email='owner@example.com', password='testpass123')
+        outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='testpass123')
+        plan = self.create_plan(creator, participant_count=2, option_count=1)
+
+        self.client.force_login(outsider)
+        response = self.client.get(f'/api/social/plans/{plan.id}/')
+        self.assertEqual(response.status_code, 403)
+
+
+class GroupPlanUpdateTests(TestCase):
+    """PUT sadece gönderilen alanları yazar, durumu kesinleştirmeye çeviremez"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='updater', email='updater@example.com', password='testpass123')
+        self.place = Place.objects.create(name='Kazanan', address='Moda', city='İstanbul')
+        self.plan = GroupPlan.objects.create(creator=self.creator, title='Pazar Kahvaltısı', status='voting')
+        self.client.force_login(self.creator)
+
+    def put(self, data):
+        return self.client.put(f'/api/social/plans/{self.plan.id}/', data, content_type='application/json')
+
+    def test_status_cannot_be_set_to_finalized(self):
+        response = self.put({'status': 'finalized'})
+        self.assertEqual(response.status_code, 400)
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.status, 'voting')
+        self.assertIsNone(self.plan.selected_place_id)
+
+    def test_update_keeps_concurrent_finalization(self):
+        # İstek okunduktan sonra plan başka bir istekle kesinleşmiş olsun
+        PlanVote.objects.create(plan=self.plan, user=self.creator, place=self.place, vote_type='yes')
+        finalize_plan(self.plan.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.put({'title': 'Pazar Brunch'})
+        self.assertEqual(response.status_code, 200)
+
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"status"', updates[0])
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.title, 'Pazar Brunch')
+        self.assertEqual(self.plan.status, 'finalized')
+        self.assertEqual(self.plan.selected_place_id, self.place.id)
+
+    def test_finalized_plan_cannot_be_reopened(self):
+        GroupPlan.objects.filter(id=self.plan.id).update(status='finalized')
+        response = self.put({'status': 'voting'})
+        self.assertEqual(response.status_code, 400)
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.status, 'finalized')
+
+    def test_unknown_status_is_rejected(self):
+        self.assertEqual(self.put({'status': 'archived'}).status_code, 400)
+        self.assertEqual(self.put({'status': 'cancelled'}).status_code, 200)
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.status, 'cancelled')
+
+
+class GroupRecommendationsLimitTests(TestCase):
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='planner', email='planner@example.com', password='testpass123')
+        self.plan = GroupPlan.objects.create(creator=self.creator, title='Akşam Yemeği', status='voting')
+        for i in range(3):
+            Place.objects.create(name=f'Grup Mekan {i}', address='Kadıköy', city='İstanbul', categories=['restoran'])
+        self.client.force_login(self.creator)
+
+    def get(self, limit):
+        return self.client.get(f'/api/social/plans/{self.plan.id}/recommendations/', {'limit': limit})
+
+    def test_limit_is_clamped(self):
+        for limit in ['-3', '0', '500']:
+            response = self.get(limit)
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertLessEqual(response.json()['count'], 50)
+
+    def test_non_integer_limit_is_rejected(self):
+        self.assertEqual(self.get('abc').status_code, 400)
+
+
+class GroupRecommenderStrategyTests(TestCase):
+    """Strateji sıralamaları, oyların onaya etkisi ve dislike maskesi"""
+
+    def setUp(self):
+        group_recommender._catalogue = None
+        self.creator = User.objects.create_user(username='ayse', email='ayse@example.com', password='testpass123')
+        self.friend = User.objects.create_user(username='mehmet', email='mehmet@example.com', password='testpass123')
+        self.invited = User.objects.create_user(username='zeynep', email='zeynep@example.com', password='testpass123')
+        self.plan = GroupPlan.objects.create(creator=self.creator, title='Cumartesi', status='voting')
+        PlanParticipant.objects.create(plan=self.plan, user=self.friend, has_accepted=True)
+        PlanParticipant.objects.create(plan=self.plan, user=self.invited, has_accepted=False)
+
+        self.kafe, self.restoran, self.bar, self.kafe_bar, self.kahvalti = [
+            Place.objects.create(name=name, address='Kadıköy', city='İstanbul', categories=categories)
+            for name, categories in (
+                ('Kafe', ['kafe']), ('Restoran', ['restoran']), ('Bar', ['bar']),
+                ('Kafe Bar', ['kafe', 'bar']), ('Kahvaltıcı', ['kahvaltı']),
+            )
+        ]
+        UserTasteProfile.objects.create(
+            user=self.creator, category_weights={'kafe': 1.0, 'restoran': 0.2, 'kahvaltı': 0.55}
+        )
+        UserTasteProfile.objects.create(
+            user=self.friend, category_weights={'restoran': 1.0, 'kafe': 0.5, 'kahvaltı': 0.55}
+        )
+
+    def tearDown(self):
+        group_recommender._catalogue = None
+
+    def recommend(self, strategy, **kwargs):
+        return [
+            (entry['place_id'], entry['score'], entry['support'])
+            for entry in recommend_for_group(self.plan, strategy=strategy, **kwargs)
+        ]
+
+    def test_average(self):
+        self.assertEqual(self.recommend('average'), [
+            (self.kafe.id, 0.75, 1), (self.kafe_bar.id, 0.75, 1), (self.restoran.id, 0.6, 1),
+            (self.kahvalti.id, 0.55, 0), (self.bar.id, 0.0, 0),
+        ])
+        self.assertEqual(self.recommend('average', limit=2), self.recommend('average')[:2])
+
+    def test_least_misery(self):
+        # Ortalamada geride kalan ama kimseyi mutsuz etmeyen mekan öne geçer
+        self.assertEqual(self.recommend('least_misery'), [
+            (self.kahvalti.id, 0.55, 0), (self.kafe.id, 0.5, 1), (self.kafe_bar.id, 0.5, 1),
+            (self.restoran.id, 0.2, 1), (self.bar.id, 0.0, 0),
+        ])
+
+    def test_approval_uses_votes(self):
+        PlanVote.objects.create(plan=self.plan, user=self.friend, place=self.kafe, vote_type='no')
+        PlanVote.objects.create(plan=self.plan, user=self.creator, place=self.kahvalti, vote_type='yes')
+        # Katılmayan davetlinin oyu sayılmaz
+        PlanVote.objects.create(plan=self.plan, user=self.invited, place=self.bar, vote_type='yes')
+        self.assertEqual(self.recommend('approval'), [
+            (self.kafe_bar.id, 0.75, 1), (self.kahvalti.id, 0.75, 1), (self.kafe.id, 0.5, 1),
+            (self.restoran.id, 0.5, 1), (self.bar.id, 0.0, 0),
+        ])
+
+    def test_dislike_mask_and_swipes(self):
+        PlacePreference.objects.create(user=self.friend, place=self.kafe_bar, action='dislike')
+        PlacePreference.objects.create(user=self.creator, place=self.bar, action='like')
+        # Kabul etmemiş davetlinin dislike'ı grubu etkilemez
+        PlacePreference.objects.create(user=self.invited, place=self.kafe, action='dislike')
+        PlanPlaceOption.objects.create(plan=self.plan, place=self.restoran, suggested_by=self.creator)
+
+        for strategy in STRATEGIES:
+            ids = [place_id for place_id, _, _ in self.recommend(strategy)]
+            self.assertNotIn(self.kafe_bar.id, ids, strategy)
+            self.assertNotIn(self.restoran.id, ids, strategy)
+            self.assertIn(self.kafe.id, ids, strategy)
+
+        ids = [place_id for place_id, _, _ in self.recommend('average', exclude_suggested=False)]
+        self.assertIn(self.restoran.id, ids)
+        self.assertNotIn(self.kafe_bar.id, ids)
+        self.assertIn((self.bar.id, 0.5, 1), self.recommend('average'))
+
+    def test_member_without_profile_is_neutral(self):
+        UserTasteProfile.objects.filter(user=self.friend).delete()
+        self.assertEqual(self.recommend('least_misery')[0], (self.kafe.id, 0.5, 1))
+        self.assertEqual(self.recommend('average')[0], (self.kafe.id, 0.75, 1))
+        with self.assertRaises(ValueError):
+            recommend_for_group(self.plan, strategy='borda')
+
+
+class InviteAllFriendsParsingTests(TestCase):
+    """all_friends form verisinde 'false'/'0' olarak gelirse arkadaşlar davet edilmemeli"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='host', email='host@example.com', password='testpass123')
+        self.friend = User.objects.create_user(username='guest', email='guest@example.com', password='testpass123')
+        Friendship.objects.create(requester=self.creator, receiver=self.friend, status='accepted')
+        self.plan = GroupPlan.objects.create(creator=self.creator, title='Piknik', status='voting')
+        self.client.force_login(self.creator)
+
+    def invite(self, value, **kwargs):
+        return self.client.post(f'/api/social/plans/{self.plan.id}/invite/', {'all_friends': value}, **kwargs)
+
+    def test_false_values_are_rejected(self):
+        for value in ['false', '0', 'no']:
+            self.assertEqual(self.invite(value).status_code, 400, value)
+        self.assertEqual(self.invite(False, content_type='application/json').status_code, 400)
+        self.assertFalse(PlanParticipant.objects.filter(plan=self.plan, user=self.friend).exists())
+
+    def test_true_values_invite_all_friends(self):
+        for value, kwargs in [('true', {}), (True, {'content_type': 'application/json'})]:
+            response = self.invite(value, **kwargs)
+            self.assertEqual(response.status_code, 200, value)
+        self.assertTrue(PlanParticipant.objects.filter(plan=self.plan, user=self.friend).exists())
+
+
+class CalendarFeedTokenTests(TestCase):
+    """Akış adresi yenilenince eski adres geçersiz olmalı"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='subscriber', email='subscriber@example.com', password='testpass123')
+        GroupPlan.objects.create(creator=self.user, title='Kahvaltı', status='finalized')
+        self.client.force_login(self.user)
+
+    def feed(self, token):
+        return self.client.get(f'/api/social/calendar/{token}.ics')
+
+    def test_token_is_stable_until_reset(self):
+        token = make_feed_token(self.user)
+        self.assertEqual(make_feed_token(self.user), token)
+        response = self.feed(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'SUMMARY:Kahvalt', b''.join(response.streaming_content))
+
+    def test_reset_revokes_previous_token(self):
+        old_token = make_feed_token(self.user)
+        response = self.client.post('/api/social/calendar/feed-url/reset/')
+        self.assertEqual(response.status_code, 200)
+        new_token = make_feed_token(self.user)
+
+        self.assertNotEqual(new_token, old_token)
+        self.assertIn(new_token, response.json()['feed_url'])
+        self.assertEqual(self.feed(old_token).status_code, 404)
+        self.assertEqual(self.feed(new_token).status_code, 200)
+
+    def test_tampered_token_is_rejected(self):
+        self.assertEqual(self.feed(make_feed_token(self.user) + 'x').status_code, 404)
+
+
+class PlanFinalizationTests(TestCase):
+    """Ağırlıklı oy sıralaması, eşitlik kuralları ve tekrar kesinleştirme"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='finalizer', email='finalizer@example.com', password='testpass123')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', email=f'voter{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        self.places = [
+            Place.objects.create(name=f'Aday {i}', address='Moda', city='İstanbul') for i in range(3)
+        ]
+        self.plan = GroupPlan.objects.create(creator=self.creator, title='Cuma Akşamı', status='voting')
+
+    def vote(self, voter, place, vote_type, plan=None):
+        return PlanVote.objects.create(plan=plan or self.plan, user=voter, place=place, vote_type=vote_type)
+
+    def test_tie_on_score_prefers_more_yes_votes(self):
+        # İkisi de 1.0: evet + hayır, belki + belki
+        self.vote(self.voters[0], self.places[0], 'maybe')
+        self.vote(self.voters[1], self.places[0], 'maybe')
+        self.vote(self.voters[0], self.places[1], 'yes')
+        self.vote(self.voters[1], self.places[1], 'no')
+
+        plan, winner = finalize_plan(self.plan.id)
+        self.assertEqual(winner['place_id'], self.places[1].id)
+        self.assertEqual(winner['score'], 1.0)
+        self.assertEqual(plan.selected_place_id, self.places[1].id)
+
+    def test_full_tie_prefers_earliest_first_vote(self):
+        later = self.vote(self.voters[0], self.places[0], 'yes')
+        earlier = self.vote(self.voters[1], self.places[1], 'yes')
+        PlanVote.objects.filter(id=earlier.id).update(created_at=later.created_at - timedelta(minutes=5))
+
+        _, winner = finalize_plan(self.plan.id)
+        self.assertEqual(winner['place_id'], self.places[1].id)
+
+    def test_full_tie_with_same_first_vote_prefers_lower_place_id(self):
+        first = self.vote(self.voters[0], self.places[2], 'yes')
+        second = self.vote(self.voters[1], self.places[1], 'yes')
+        PlanVote.objects.filter(id=second.id).update(created_at=first.created_at)
+
+        _, winner = finalize_plan(self.plan.id)
+        self.assertEqual(winner['place_id'], self.places[1].id)
+
+    def test_zero_score_plan_is_not_finalized(self):
+        self.vote(self.voters[0], self.places[0], 'no')
+        self.vote(self.voters[1], self.places[1], 'no')
+
+        plan, winner = finalize_plan(self.plan.id)
+        self.assertIsNone(winner)
+        self.assertEqual(plan.status, 'voting')
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.status, 'voting')
+        self.assertIsNone(self.plan.selected_place_id)
+
+    def test_double_finalization_keeps_first_result(self):
+        self.vote(self.voters[0], self.places[0], 'yes')
+        with mock.patch.object(plan_finalization, 'publish_plan_event') as publish:
+            _, winner = finalize_plan(self.plan.id)
+            self.assertEqual(winner['place_id'], self.places[0].id)
+
+            # Kesinleştikten sonra gelen oylar sonucu değiştirmez
+            self.vote(self.voters[1], self.places[1], 'yes')
+            self.vote(self.voters[2], self.places[1], 'yes')
+            plan, second = finalize_plan(self.plan.id)
+
+        self.assertIsNone(second)
+        self.assertEqual(plan.status, 'finalized')
+        self.assertEqual(plan.selected_place_id, self.places[0].id)
+        self.assertEqual(publish.call_count, 1)
+
+    def test_double_finalization_via_api(self):
+        PlanParticipant.objects.create(plan=self.plan, user=self.creator, has_accepted=True)
+        self.vote(self.creator, self.places[0], 'yes')
+        self.client.force_login(self.creator)
+
+        self.assertEqual(self.client.post(f'/api/social/plans/{self.plan.id}/finalize/').status_code, 200)
+        response = self.client.post(f'/api/social/plans/{self.plan.id}/finalize/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Plan zaten kesinleştirilmiş')
+
+
+class FinalizeExpiredPlansTests(TestCase):
+    """Süresi dolan planlar partiler halinde kesinleştirilir"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='batcher', email='batcher@example.com', password='testpass123')
+        self.place = Place.objects.create(name='Parti Mekanı', address='Moda', city='İstanbul')
+        self.now = timezone.now()
+        self.voted = [self.create_plan(f'Oylu {i}', votes=['yes']) for i in range(3)]
+        self.zero = [self.create_plan(f'Hayır {i}', votes=['no']) for i in range(2)]
+        self.empty = self.create_plan('Boş', votes=[])
+        self.open = self.create_plan('Açık', votes=['yes'], deadline=self.now + timedelta(days=1))
+
+    def create_plan(self, title, votes, deadline=None):
+        plan = GroupPlan.objects.create(
+            creator=self.creator, title=title, status='voting', deadline=deadline or self.now - timedelta(hours=1)
+        )
+        for vote_type in votes:
+            PlanVote.objects.create(plan=plan, user=self.creator, place=self.place, vote_type=vote_type)
+        return plan
+
+    def statuses(self):
+        return dict(GroupPlan.objects.values_list('title', 'status'))
+
+    def test_batches_cover_all_expired_plans(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = finalize_expired_plans(batch_size=2, now=self.now)
+        self.assertEqual(result, {'finalized': 3, 'cancelled': 0, 'skipped': 3})
+
+        # 6 süresi dolmuş plan, 2'lik partiler: 3 dolu + 1 boş okuma
+        plan_reads = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "social_groupplan"' in query['sql']
+        ]
+        self.assertEqual(len(plan_reads), 4)
+
+        statuses = self.statuses()
+        for plan in self.voted:
+            self.assertEqual(statuses[plan.title], 'finalized')
+        self.assertEqual(statuses['Açık'], 'voting')
+        self.assertEqual(GroupPlan.objects.get(id=self.voted[0].id).selected_place_id, self.place.id)
+
+    def test_cancel_empty_cancels_plans_without_positive_votes(self):
+        result = finalize_expired_plans(batch_size=4, cancel_empty=True, now=self.now)
+        self.assertEqual(result, {'finalized': 3, 'cancelled': 3, 'skipped': 0})
+        statuses = self.statuses()
+        for plan in self.zero + [self.empty]:
+            self.assertEqual(statuses[plan.title], 'cancelled')
+        self.assertEqual(statuses['Açık'], 'voting')
+
+    def test_second_run_finds_nothing(self):
+        finalize_expired_plans(batch_size=2, cancel_empty=True, now=self.now)
+        self.assertEqual(
+            finalize_expired_plans(batch_size=2, cancel_empty=True, now=self.now),
+            {'finalized': 0, 'cancelled': 0, 'skipped': 0}
+        )
+
+
+class FinalizeExpiredPlansLockingTests(TransactionTestCase):
+    """Başka bir transaction'ın kilitlediği plan atlanır (skip_locked), diğerleri işlenir"""
+
+    def setUp(self):
+        if not connection.features.has_select_for_update_skip_locked:
+            self.skipTest('SELECT ... FOR UPDATE SKIP LOCKED desteği gerekir (ör. PostgreSQL)')
+        creator = User.objects.create_user(username='locker', email='locker@example.com', password='testpass123')
+        place = Place.objects.create(name='Kilit Mekanı', address='Moda', city='İstanbul')
+        now = timezone.now()
+        self.plans = []
+        for i in range(4):
+            plan = GroupPlan.objects.create(
+                creator=creator, title=f'Kilit {i}', status='voting', deadline=now - timedelta(hours=1)
+            )
+            PlanVote.objects.create(plan=plan, user=creator, place=place, vote_type='yes')
+            self.plans.append(plan)
+
+    def test_locked_plan_is_skipped(self):
+        locked = self.plans[1]
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    GroupPlan.objects.select_for_update().get(id=locked.id)
+                    acquired.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(acquired.wait(timeout=10))
+            result = finalize_expired_plans(batch_size=2)
+        finally:
+            release.set()
+            holder.join(timeout=10)
+
+        self.assertEqual(result['finalized'], 3)
+        locked.refresh_from_db()
+        self.assertEqual(locked.status, 'voting')
+        self.assertEqual(finalize_expired_plans(batch_size=2)['finalized'], 1)
+
+
+class PlanEventStreamTests(SimpleTestCase):
+    """SSE akışı bittiğinde veya istemci koptuğunda abonelik silinmeli"""
+
+    plan_id = 987654
+
+    def test_stream_closes_after_max_age(self):
+        async def scenario():
+            stream = plan_events._event_stream(self.plan_id, None)
+            self.assertEqual(await stream.__anext__(), 'retry: 3000\n\n')
+            self.assertEqual(plan_event_bus.subscriber_count(self.plan_id), 1)
+            plan_event_bus.publish(self.plan_id, 'vote', {'place_id': 1})
+            return [chunk async for chunk in stream]
+
+        with mock.patch.object(plan_events, 'STREAM_MAX_AGE', 0.05):
+            rest = asyncio.run(scenario())
+        self.assertTrue(rest[0].startswith('id: '))
+        self.assertIn('event: vote', rest[0])
+        self.assertEqual(plan_event_bus.subscriber_count(self.plan_id), 0)
+
+    def test_disconnect_unsubscribes(self):
+        async def scenario():
+            stream = plan_events._event_stream(self.plan_id, None)
+            await stream.__anext__()
+            self.assertEqual(plan_event_bus.subscriber_count(self.plan_id), 1)
+            # Sunucu istemci koptuğunda generator'ı kapatır
+            await stream.aclose()
+
+        asyncio.run(scenario())
+        self.assertEqual(plan_event_bus.subscriber_count(self.plan_id), 0)
+
+    def test_replays_missed_events(self):
+        first = plan_event_bus.publish(self.plan_id, 'vote', {'n': 1})
+        plan_event_bus.publish(self.plan_id, 'vote', {'n': 2})
+
+        async def scenario():
+            stream = plan_events._event_stream(self.plan_id, first['id'])
+            chunks = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        self.assertIn('"n": 2', chunks[1])
+        self.assertEqual(plan_event_bus.subscriber_count(self.plan_id), 0)
@@ -328,6 +328,25 @@ class GroupPlanDetail {
     async init() {
         await this.loadPlan();
         this.setupEventListeners();
+        this.subscribeToEvents();
+    }
+
+    subscribeToEvents() {
+        // Oy, katılım ve öneri olaylarını sunucudan canlı dinle (SSE)
+        if (!window.EventSource) {
+            return;
+        }
+
+        const source = new EventSource(`/api/social/plans/${this.planId}/events/`);
+        const refresh = () => {
+            // Art arda gelen olaylarda planı tek sefer yenile
+            clearTimeout(this.refreshTimer);
+            this.refreshTimer = setTimeout(() => this.loadPlan(), 300);
+        };
+
+        ['vote', 'participant', 'place_suggested', 'finalized'].forEach(eventType => {
+            source.addEventListener(eventType, refresh);
+        });
     }
 
     async loadPlan() {